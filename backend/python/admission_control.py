@@ -0,0 +1,203 @@
+"""
+Admission Control
+Bounded in-flight work and per-client token buckets for the ML APIs, so an
+overloaded service answers 429 / 503 with Retry-After immediately instead of
+letting requests pile up until the caller's timeout.
+"""
+
+import math
+import os
+import threading
+import time
+
+from ml_metrics import metrics
+
+PRIORITY_SINGLE = 'single'
+PRIORITY_BATCH = 'batch'
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now):
+        if now > self.updated_at:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+    def try_acquire(self, cost=1.0, now=None):
+        """
+        Take `cost` tokens if available
+
+        Returns:
+            (acquired, seconds until enough tokens would be available)
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        cost = min(float(cost), self.capacity)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True, 0.0
+        return False, (cost - self.tokens) / self.rate if self.rate > 0 else float('inf')
+
+    def is_full(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class Admission:
+    """Result of AdmissionController.try_admit()"""
+
+    __slots__ = ('admitted', 'status_code', 'reason', 'retry_after', 'slots', 'priority')
+
+    def __init__(self, admitted, status_code=200, reason=None, retry_after=0, slots=0, priority=PRIORITY_SINGLE):
+        self.admitted = admitted
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+        self.slots = slots
+        self.priority = priority
+
+
+class AdmissionController:
+    """
+    Admits or sheds requests before any expensive work starts
+
+    - max_in_flight caps the images being processed at once (single + batch)
+    - reserved_single slots can only be used by single-image requests, so a
+      burst of batch jobs never starves interactive predictions
+    - each client (user_id) has a token bucket; exceeding it returns 429
+    - when capacity is full a request may wait up to queue_timeout for a slot;
+      single-image waiters are always woken before batch waiters
+    """
+
+    def __init__(self, max_in_flight=None, reserved_single=None, rate_per_second=None,
+                 burst=None, queue_timeout=None, max_clients=10000):
+        """
+        Args:
+            max_in_flight: Max images in flight (DISEASE_MAX_IN_FLIGHT, default 8)
+            reserved_single: Slots only single-image requests may use (DISEASE_RESERVED_SINGLE_SLOTS, default 2)
+            rate_per_second: Per-client refill rate in images/s (DISEASE_RATE_PER_SEC, default 2)
+            burst: Per-client bucket size (DISEASE_RATE_BURST, default 10)
+            queue_timeout: Seconds to wait for a free slot before shedding (DISEASE_ADMISSION_QUEUE_TIMEOUT, default 2)
+            max_clients: Idle full buckets are pruned beyond this many clients
+        """
+        env = os.environ.get
+        self.max_in_flight = max_in_flight or int(env('DISEASE_MAX_IN_FLIGHT', '8'))
+        reserved = reserved_single if reserved_single is not None else int(env('DISEASE_RESERVED_SINGLE_SLOTS', '2'))
+        self.reserved_single = max(0, min(reserved, self.max_in_flight - 1))
+        self.rate_per_second = rate_per_second if rate_per_second is not None else float(env('DISEASE_RATE_PER_SEC', '2'))
+        self.burst = burst or float(env('DISEASE_RATE_BURST', '10'))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(env('DISEASE_ADMISSION_QUEUE_TIMEOUT', '2'))
+        self.max_clients = max_clients
+
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._waiting = {PRIORITY_SINGLE: 0, PRIORITY_BATCH: 0}
+        self._buckets = {}
+
+    @property
+    def batch_capacity(self):
+        return self.max_in_flight - self.reserved_single
+
+    def _limit_for(self, priority):
+        return self.max_in_flight if priority == PRIORITY_SINGLE else self.batch_capacity
+
+    def _has_room(self, priority, slots):
+        if priority == PRIORITY_BATCH and self._waiting[PRIORITY_SINGLE] > 0:
+            return False
+        return self._in_flight + slots <= self._limit_for(priority)
+
+    def _bucket(self, client_id, now):
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            if len(self._buckets) >= self.max_clients:
+                self._buckets = {cid: b for cid, b in self._buckets.items() if not b.is_full(now)}
+            bucket = self._buckets[client_id] = TokenBucket(self.rate_per_second, self.burst)
+        return bucket
+
+    def _retry_after_overload(self):
+        """Rough time for the current in-flight work to drain, from recent model latency"""
+        latency = metrics.snapshot()['latency_ms'].get('cascade.model', {})
+        per_image = latency.get('p50', 1000) / 1000.0
+        return max(1, math.ceil(per_image * self._in_flight))
+
+    def try_admit(self, client_id, priority=PRIORITY_SINGLE, cost=1):
+        """
+        Reserve capacity for a request
+
+        Args:
+            client_id: user_id (or another stable client key)
+            priority: PRIORITY_SINGLE or PRIORITY_BATCH
+            cost: Number of images in the request
+
+        Returns:
+            Admission; call release() with it once the work is done
+        """
+        slots = max(1, min(int(cost), self._limit_for(priority)))
+
+        with self._lock:
+            now = time.monotonic()
+            bucket = None
+            if self.rate_per_second > 0:
+                bucket = self._bucket(client_id, now)
+                allowed, wait = bucket.try_acquire(cost, now)
+                if not allowed:
+                    metrics.increment('admission.rejected.rate_limited')
+                    return Admission(False, 429, 'Rate limit exceeded', max(1, math.ceil(wait)), priority=priority)
+
+            if not self._has_room(priority, slots):
+                metrics.increment('admission.queued')
+                metrics.increment(f'admission.queued.{priority}')
+                self._waiting[priority] += 1
+                deadline = now + self.queue_timeout
+                try:
+                    while not self._has_room(priority, slots):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            # Shed requests do not count against the client's rate limit
+                            if bucket is not None:
+                                bucket.tokens = min(bucket.capacity, bucket.tokens + min(cost, bucket.capacity))
+                            metrics.increment('admission.rejected.overloaded')
+                            metrics.increment(f'admission.rejected.overloaded.{priority}')
+                            return Admission(False, 503, 'Service overloaded',
+                                             self._retry_after_overload(), priority=priority)
+                        self._slot_freed.wait(remaining)
+                finally:
+                    self._waiting[priority] -= 1
+                    # A single-image waiter leaving may unblock batch waiters
+                    self._slot_freed.notify_all()
+                    metrics.observe('admission.queue_wait', (time.monotonic() - now) * 1000)
+
+            self._in_flight += slots
+            metrics.increment(f'admission.admitted.{priority}')
+            metrics.set_gauge('admission.in_flight', self._in_flight)
+            return Admission(True, slots=slots, priority=priority)
+
+    def release(self, admission):
+        """Return the slots held by an admitted request"""
+        if not admission.admitted or admission.slots == 0:
+            return
+        with self._lock:
+            self._in_flight -= admission.slots
+            admission.slots = 0
+            metrics.set_gauge('admission.in_flight', self._in_flight)
+            self._slot_freed.notify_all()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'max_in_flight': self.max_in_flight,
+                'reserved_single': self.reserved_single,
+                'in_flight': self._in_flight,
+                'waiting': dict(self._waiting),
+                'tracked_clients': len(self._buckets),
+                'rate_per_second': self.rate_per_second,
+                'burst': self.burst
+            }
@@ -0,0 +1,107 @@
+"""
+Benchmark: FP-growth frequently-bought-together mining
+Usage: python benchmark_bought_together.py [--lines 1000000] [--products 5000] [--check-orders 20000]
+
+Generates synthetic DELIVERED orders (popular products plus planted bundles)
+with about --lines order lines, then reports mining time, peak memory, the
+number of itemsets / rules and lookup latency. Itemsets are checked against
+brute-force enumeration of every pair and triple on a smaller sample.
+"""
+
+import argparse
+import os
+import random
+import resource
+import tempfile
+import time
+from collections import Counter
+from itertools import combinations
+
+from frequently_bought_together import (
+    BoughtTogetherStore, DEFAULT_MIN_SUPPORT, MIN_COUNT_FLOOR, fp_growth, order_transactions
+)
+
+
+def synthetic_orders(n_lines, n_products=5000, n_bundles=300, seed=7):
+    rng = random.Random(seed)
+    products = [f'p{i}' for i in range(n_products)]
+    weights = [1 / (i + 1) ** 0.9 for i in range(n_products)]
+    bundles = [rng.sample(products[:1000], rng.randint(2, 3)) for _ in range(n_bundles)]
+    orders = []
+    lines = 0
+    while lines < n_lines:
+        items = rng.choices(products, weights=weights, k=rng.randint(1, 3))
+        if rng.random() < 0.35:
+            bundle = rng.choice(bundles)
+            items += bundle if rng.random() < 0.7 else bundle[:2]
+        status = 'DELIVERED' if rng.random() < 0.85 else rng.choice(['PENDING', 'CANCELLED'])
+        orders.append({'_id': f'o{len(orders)}', 'user': f'u{rng.randrange(50000)}', 'status': status,
+                       'items': [{'product': p, 'quantity': 1} for p in items]})
+        lines += len(items)
+    return orders, lines
+
+
+def brute_force_itemsets(baskets, min_count, max_length):
+    """Every subset up to max_length counted directly (reference only)"""
+    counts = Counter()
+    for basket, count in baskets.items():
+        for size in range(1, max_length + 1):
+            for subset in combinations(basket, size):
+                counts[frozenset(subset)] += count
+    return {itemset: count for itemset, count in counts.items() if count >= min_count}
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FP-growth bought-together benchmark')
+    parser.add_argument('--lines', type=int, default=1_000_000, help='Approximate order lines')
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--min-support', type=float, default=DEFAULT_MIN_SUPPORT)
+    parser.add_argument('--max-length', type=int, default=3)
+    parser.add_argument('--check-orders', type=int, default=20000, help='Sample size for the brute-force check')
+    args = parser.parse_args()
+
+    orders, lines = synthetic_orders(args.lines, args.products)
+
+    print("\n" + "="*78)
+    print(f"FREQUENTLY BOUGHT TOGETHER ({len(orders)} orders, {lines} lines, {args.products} products)")
+    print("="*78)
+
+    # Correctness: FP-growth against direct subset counting on a sample
+    sample = order_transactions(orders[:args.check_orders])
+    n_sample = sum(sample.values())
+    min_count = max(MIN_COUNT_FLOOR, int(args.min_support * n_sample + 0.999999))
+    identical = fp_growth(sample, min_count, args.max_length) == brute_force_itemsets(sample, min_count, args.max_length)
+    print(f"  itemsets identical to brute force on {n_sample} baskets: {identical}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BoughtTogetherStore(os.path.join(tmp, 'fbt.db'))
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        meta = store.mine(orders, min_support=args.min_support, max_length=args.max_length)
+        mine_s = time.perf_counter() - start
+        rss_after = peak_rss_mb()
+
+        print(f"  mine + persist          {mine_s:8.2f}s   (mining {meta['seconds']:.2f}s)")
+        print(f"  peak RSS                {rss_after:8.0f}MB  (+{rss_after - rss_before:.0f}MB over the loaded orders)")
+        print(f"  transactions            {meta['transactions']:8d}   ({meta['distinct_baskets']} distinct baskets)")
+        print(f"  min count               {meta['min_count']:8d}")
+        print(f"  frequent itemsets       {meta['itemsets']:8d}")
+        print(f"  rules                   {meta['rules']:8d}")
+
+        rng = random.Random(1)
+        queries = [f'p{rng.randrange(1000)}' for _ in range(10000)]
+        store.bought_together(queries[0])  # load the lookup table
+        start = time.perf_counter()
+        hits = sum(1 for product_id in queries if store.bought_together(product_id))
+        lookup_s = (time.perf_counter() - start) / len(queries)
+        print(f"  lookup                  {lookup_s * 1e6:8.1f}us  ({hits}/{len(queries)} products with rules)")
+        store.close()
+    print("="*78)
+
+
+if __name__ == '__main__':
+    main()
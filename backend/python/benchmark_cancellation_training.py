@@ -0,0 +1,115 @@
+"""
+Benchmark: cancellation model training modes against the pre-modes baseline
+(SVC(probability=True), mode svc_calibrated) - exact RBF SVC, Nystroem + SGD, LinearSVC
+Usage: python benchmark_cancellation_training.py [--sizes 5000,20000,100000,300000] [--svc-max 20000]
+                                                 [--data orders.ndjson]
+
+Reports training time (and speedup over svc_calibrated, the estimator
+training used before), inference time per 10k orders and held-out AUC for
+each mode. Without --data a synthetic order set with a non-linear risk
+pattern is generated; with --data the records are streamed through
+CancellationSVMClassifier.build_training_matrix like a real training run.
+"""
+
+import argparse
+import time
+import numpy as np
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+from cancellation_svm_classifier import CancellationSVMClassifier, TRAIN_MODES, iter_json_records
+
+BASELINE_MODE = 'svc_calibrated'
+BASELINE_FIRST = (BASELINE_MODE,) + tuple(m for m in TRAIN_MODES if m != BASELINE_MODE)
+
+
+def synthetic_orders(n, seed=42):
+    """Feature matrix in extract_features order, labels from a non-linear risk rule"""
+    rng = np.random.default_rng(seed)
+    is_cod = rng.random(n) < 0.4
+    order_count = rng.integers(1, 40, n)
+    past_cancellations = rng.binomial(order_count, rng.beta(1.2, 6, n))
+    order_amount = rng.lognormal(7.5, 0.8, n)
+    delivery_days = rng.integers(0, 8, n)
+    account_age_days = rng.integers(0, 1500, n)
+    avg_order_value = order_amount * rng.lognormal(0, 0.3, n)
+    cancellation_rate = past_cancellations / order_count * 100
+
+    logit = (
+        -2.2
+        + 1.1 * is_cod
+        + 0.04 * cancellation_rate
+        + 0.8 * (order_amount > 2 * avg_order_value)
+        + 0.9 * is_cod * (account_age_days < 60)
+        - 0.4 * np.log1p(account_age_days / 100)
+        + 0.15 * delivery_days
+    )
+    y = (rng.random(n) < 1 / (1 + np.exp(-logit))).astype(np.int8)
+    X = np.column_stack([
+        is_cod, past_cancellations, order_amount, delivery_days,
+        order_count, account_age_days, avg_order_value, cancellation_rate
+    ]).astype(np.float64)
+    return X, y
+
+
+def time_mode(classifier, mode, X_train, y_train, X_test, y_test):
+    model = classifier.create_model(mode, X_train)
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    train_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores = model.decision_function(X_test)
+    infer_ms = (time.perf_counter() - start) * 1000 * 10000 / len(X_test)
+
+    return train_s, infer_ms, roc_auc_score(y_test, scores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cancellation model training benchmark')
+    parser.add_argument('--sizes', default='5000,20000,100000,300000')
+    parser.add_argument('--svc-max', type=int, default=20000,
+                        help='Skip the exact SVC modes above this many orders (quadratic or worse)')
+    parser.add_argument('--modes', default=','.join(BASELINE_FIRST))
+    parser.add_argument('--data', help='NDJSON / JSON training export instead of synthetic orders')
+    args = parser.parse_args()
+
+    classifier = CancellationSVMClassifier(model_path='')
+    modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+
+    if args.data:
+        with open(args.data, 'r', encoding='utf-8') as f:
+            X_all, y_all = classifier.build_training_matrix(iter_json_records(f))
+        sizes = [len(X_all)]
+        print(f"📂 Loaded {len(X_all)} orders from {args.data}")
+    else:
+        sizes = [int(s) for s in args.sizes.split(',')]
+        X_all, y_all = synthetic_orders(max(sizes))
+
+    print("\n" + "="*70)
+    print("CANCELLATION MODEL TRAINING BENCHMARK")
+    print("="*70)
+
+    for n in sizes:
+        X = StandardScaler().fit_transform(X_all[:n])
+        X_train, X_test, y_train, y_test = train_test_split(X, y_all[:n], test_size=0.2, random_state=42)
+
+        print(f"\n{n} orders ({len(X_train)} train / {len(X_test)} test, {y_all[:n].mean() * 100:.0f}% cancelled):")
+        baseline_s = None
+        for mode in modes:
+            if mode.startswith('svc') and n > args.svc_max:
+                print(f"  {mode:15s} skipped (> --svc-max {args.svc_max})")
+                continue
+            train_s, infer_ms, auc = time_mode(classifier, mode, X_train, y_train, X_test, y_test)
+            if mode == BASELINE_MODE:
+                baseline_s = train_s
+            speedup = f"{baseline_s / train_s:6.1f}x" if baseline_s else "      -"
+            print(f"  {mode:15s} train {train_s:8.2f}s {speedup}   "
+                  f"inference {infer_ms:8.1f}ms / 10k   AUC {auc:.3f}")
+
+    print("="*70)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: per-customer vs columnar customer segmentation
+Usage: python benchmark_customer_segmentation.py [--customers 100000] [--mean-orders 6]
+
+Generates synthetic customers (ISO timestamps with Z / offsets / naive, int
+and float amounts, customers without orders), runs both paths and checks the
+results are identical.
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from customer_segmentation import segment_customers, segment_customers_iterative, get_segment_summary
+
+
+def synthetic_customers(n, mean_orders, seed=42):
+    rng = random.Random(seed)
+    now = datetime.now()
+    formats = [
+        lambda d: d.isoformat(timespec='milliseconds') + 'Z',
+        lambda d: d.isoformat() + '+05:30',
+        lambda d: d.isoformat()
+    ]
+    # Keep timestamps about half a day away from "now" modulo 24h: both paths
+    # read the clock at slightly different moments, which must not move a
+    # value across a day boundary
+    customers = []
+    for i in range(n):
+        age = rng.randint(0, 900)
+        created = now - timedelta(days=age, hours=12)
+        orders = []
+        for _ in range(int(rng.expovariate(1 / mean_orders)) if rng.random() > 0.1 else 0):
+            placed = now - timedelta(days=rng.randint(0, age), hours=rng.uniform(6, 18))
+            amount = rng.randint(100, 4000) if rng.random() < 0.8 else round(rng.uniform(100, 4000), 2)
+            orders.append({'totalAmount': amount, 'createdAt': rng.choice(formats)(placed)})
+        customers.append({
+            '_id': f'c{i}',
+            'email': f'c{i}@example.com',
+            'firstName': 'Test',
+            'lastName': str(i),
+            'createdAt': rng.choice(formats)(created),
+            'orders': orders
+        })
+    return customers
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Customer segmentation benchmark')
+    parser.add_argument('--customers', type=int, default=100000)
+    parser.add_argument('--mean-orders', type=float, default=6)
+    args = parser.parse_args()
+
+    customers = synthetic_customers(args.customers, args.mean_orders)
+    total_orders = sum(len(c['orders']) for c in customers)
+
+    print("\n" + "="*70)
+    print(f"CUSTOMER SEGMENTATION BENCHMARK ({len(customers)} customers, {total_orders} orders)")
+    print("="*70)
+
+    start = time.perf_counter()
+    baseline = segment_customers_iterative(customers)
+    baseline_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columnar = segment_customers(customers)
+    columnar_s = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(baseline, columnar) if a != b)
+
+    print(f"  per-customer   {baseline_s:8.2f}s")
+    print(f"  columnar       {columnar_s:8.2f}s   ({baseline_s / columnar_s:.1f}x)")
+    print(f"  identical: {mismatches == 0 and len(baseline) == len(columnar)}  ({mismatches} mismatches)")
+    print(f"  summary:   {get_segment_summary(columnar) == get_segment_summary(baseline)}")
+    print("="*70)
+
+
+if __name__ == '__main__':
+    main()
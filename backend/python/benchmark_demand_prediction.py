@@ -0,0 +1,214 @@
+"""
+Benchmark: demand prediction aggregation (per-item loop vs SalesCube)
+Usage: python benchmark_demand_prediction.py [--lines 1000000] [--products 2000] [--months 36]
+    [--product-dates] [--aggregates]
+
+Generates synthetic populated orders (ISO createdAt strings over --months
+months, a few missing dates) and times the old per-item dict aggregation
+against the vectorized product x month cube, built from orders and from the
+columnar orderLines input (which skips the per-line field extraction), and
+end to end through generate_predictions. Checks that all give identical
+sales data and identical predictions, then times the top --limit predictions built from all
+predictions against vectorized urgency scores plus --limit payloads.
+
+Sales are bucketed by the product's createdAt when present, so with
+--product-dates (products populated with createdAt, as Order.populate does)
+there are only as many distinct dates as products; without it every order
+date is parsed, which is the slower case for the cube.
+
+--aggregates also ingests the orders into a temporary sales aggregate store
+(sales_aggregate_store.py) and compares reading the persisted series with
+re-aggregating the orders per request.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from demand_prediction import DemandPredictionService
+
+
+def synthetic_data(n_lines, n_products=2000, n_months=36, product_dates=False, seed=11):
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1)
+    span = n_months * 30 * 86400
+
+    def random_date():
+        return (start + timedelta(seconds=rng.randrange(span))).isoformat() + 'Z'
+
+    products = [
+        {'_id': f'p{i}', 'name': f'Pepper {i}', 'type': rng.choice(['Climber', 'Bush']),
+         'category': 'Pepper', 'price': 100 + i % 50, 'stock': rng.randrange(0, 60)}
+        for i in range(n_products)
+    ]
+    if product_dates:
+        for product in products:
+            product['createdAt'] = random_date()
+    weights = [1 / (i + 1) ** 0.7 for i in range(n_products)]
+    orders = []
+    lines = 0
+    while lines < n_lines:
+        created = random_date()
+        if rng.random() < 0.001:
+            created = None
+        items = [
+            {'product': product, 'quantity': rng.randint(1, 5)}
+            for product in rng.choices(products, weights=weights, k=rng.randint(1, 4))
+        ]
+        orders.append({'_id': f'o{len(orders)}', 'createdAt': created, 'items': items})
+        lines += len(items)
+    return orders, products, lines
+
+
+def legacy_aggregate(orders):
+    """The per-item nested-dict aggregation generate_predictions used before SalesCube"""
+    sales_data = {}
+
+    for order in orders:
+        for item in order.get('items', []):
+            product = item.get('product', {})
+            product_id = str(product.get('_id', ''))
+
+            if not product_id:
+                continue
+
+            if product_id not in sales_data:
+                sales_data[product_id] = {
+                    'byMonth': {},
+                    'total': 0,
+                    'orderCount': 0
+                }
+
+            # Get month key from product creation date or order date
+            date_str = product.get('createdAt') or order.get('createdAt')
+            if date_str:
+                try:
+                    # Handle ISO format datetime strings
+                    if isinstance(date_str, str):
+                        date_str = date_str.replace('Z', '+00:00')
+                        date_obj = datetime.fromisoformat(date_str)
+                    else:
+                        date_obj = date_str
+                except (ValueError, AttributeError):
+                    date_obj = datetime.now()
+            else:
+                date_obj = datetime.now()
+
+            month = DemandPredictionService.get_month_key(date_obj)
+
+            if month not in sales_data[product_id]['byMonth']:
+                sales_data[product_id]['byMonth'][month] = 0
+
+            quantity = item.get('quantity', 0)
+            sales_data[product_id]['byMonth'][month] += quantity
+            sales_data[product_id]['total'] += quantity
+            sales_data[product_id]['orderCount'] += 1
+
+    return sales_data
+
+
+def order_line_columns(orders):
+    """The orderLines request input for the orders: one entry per order line"""
+    lines = {'product': [], 'createdAt': [], 'quantity': []}
+    for order in orders:
+        for item in order['items']:
+            lines['product'].append(item['product']['_id'])
+            lines['createdAt'].append(item['product'].get('createdAt') or order['createdAt'])
+            lines['quantity'].append(item['quantity'])
+    return lines
+
+
+def legacy_predictions(orders, products):
+    """generate_predictions as it was: nested-dict aggregation, then predict_demand per product"""
+    sales_data = legacy_aggregate(orders)
+    predictions = [
+        DemandPredictionService.predict_demand(product, sales_data.get(str(product.get('_id', '')), {}))
+        for product in products
+    ]
+    predictions.sort(key=lambda x: x['urgencyScore'], reverse=True)
+    return predictions
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def benchmark_aggregates(orders, products):
+    """Persisted monthly series (whole history in the window) against per-request aggregation"""
+    from sales_aggregate_store import SalesAggregateStore
+
+    months_back = 1000
+    # Ingestion follows createdAt: each batch holds every order newer than the last
+    dated = sorted((order for order in orders if order['createdAt']), key=lambda order: order['createdAt'])
+    current = DemandPredictionService.generate_predictions(dated, products)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SalesAggregateStore(os.path.join(tmp, 'sales.db'))
+        half = len(dated) // 2
+        _, first_s = timed(store.ingest, dated[:half])
+        delta, delta_s = timed(store.ingest, dated)
+        print(f"  store ingest              {first_s:8.2f}s   (+{delta_s:.2f}s replaying all orders, "
+              f"{delta['alreadySeen']} skipped by the watermark)")
+
+        stored, stored_s = timed(DemandPredictionService.generate_predictions_from_aggregates,
+                                 products, months_back, store)
+        print(f"  predictions (store)       {stored_s:8.2f}s   identical: {stored == current}")
+
+        rng = random.Random(3)
+        sample = rng.sample(products, 20)
+        start = time.perf_counter()
+        for product in sample:
+            DemandPredictionService.get_prediction_for_product_from_aggregates(
+                product['_id'], product, months_back, store)
+        single_s = (time.perf_counter() - start) / len(sample)
+        _, orders_single_s = timed(DemandPredictionService.get_prediction_for_product,
+                                   sample[0]['_id'], sample[0], dated)
+        print(f"  one product (store)       {single_s * 1e3:8.2f}ms  (from orders: {orders_single_s:.2f}s)")
+        store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Demand prediction aggregation benchmark')
+    parser.add_argument('--lines', type=int, default=1_000_000, help='Approximate order lines')
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--months', type=int, default=36)
+    parser.add_argument('--product-dates', action='store_true', help='Products carry createdAt')
+    parser.add_argument('--aggregates', action='store_true', help='Also benchmark the persisted aggregate store')
+    parser.add_argument('--limit', type=int, default=10, help='Top-N size')
+    args = parser.parse_args()
+
+    orders, products, lines = synthetic_data(args.lines, args.products, args.months, args.product_dates)
+
+    print("\n" + "="*78)
+    print(f"DEMAND PREDICTION ({len(orders)} orders, {lines} lines, {len(products)} products)")
+    print("="*78)
+
+    legacy_sales, legacy_agg_s = timed(legacy_aggregate, orders)
+    cube, cube_s = timed(DemandPredictionService.build_sales_cube, orders)
+    print(f"  aggregate (per-item loop) {legacy_agg_s:8.2f}s")
+    print(f"  aggregate (sales cube)    {cube_s:8.2f}s   ({legacy_agg_s / cube_s:.1f}x)")
+    lines_cube, lines_s = timed(DemandPredictionService.build_sales_cube, order_line_columns(orders))
+    print(f"  aggregate (order lines)   {lines_s:8.2f}s   ({legacy_agg_s / lines_s:.1f}x, columnar input)")
+    print(f"  sales data identical      {cube.to_sales_data() == legacy_sales == lines_cube.to_sales_data()}")
+
+    legacy, legacy_s = timed(legacy_predictions, orders, products)
+    current, current_s = timed(DemandPredictionService.generate_predictions, orders, products)
+    print(f"  predictions (old path)    {legacy_s:8.2f}s")
+    print(f"  predictions (cube)        {current_s:8.2f}s   ({legacy_s / current_s:.1f}x)")
+    print(f"  predictions identical     {current == legacy}")
+
+    all_top, all_top_s = timed(lambda: DemandPredictionService.predictions_from_cube(cube, products)[:args.limit])
+    top, top_s = timed(DemandPredictionService.top_predictions_from_cube, cube, products, args.limit)
+    print(f"  top {args.limit:<3d} (all + sort)      {all_top_s:8.3f}s")
+    print(f"  top {args.limit:<3d} (scores + top-k)  {top_s:8.3f}s   ({all_top_s / top_s:.0f}x, identical: {top == all_top})")
+    if args.aggregates:
+        benchmark_aggregates(orders, products)
+    print("="*78)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: pepper /batch-predict (per-row predict loop vs predict_batch)
+Usage: python benchmark_pepper_batch.py [--rows 10000] [--loop-rows 500] [--samples 2000]
+
+Trains the yield and suitability models on generated training data (in a
+temporary models directory, so the shipped models are untouched), builds
+--rows batch inputs (a few invalid or with unknown regions / optional values)
+and times the old one-predict-per-row loop against one vectorized
+predict_batch call. The loop is timed on the first --loop-rows rows and
+extrapolated; every row both paths accept must give the same result (the
+loop never validated its rows, so out-of-range inputs now come back as errors).
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+from generate_pepper_training_data import generate_pepper_training_data
+from pepper_yield_predictor import (
+    PepperYieldPredictor, VALID_CROP_STAGES, VALID_SOIL_TYPES, VALID_WATER_AVAILABILITY
+)
+
+
+def synthetic_inputs(n_rows, seed=13):
+    rng = random.Random(seed)
+    inputs = []
+    for _ in range(n_rows):
+        row = {
+            'soil_type': rng.choice(VALID_SOIL_TYPES),
+            'water_availability': rng.choice(VALID_WATER_AVAILABILITY),
+            'irrigation_frequency': rng.randint(1, 7),
+            'crop_stage': rng.choice(VALID_CROP_STAGES)
+        }
+        roll = rng.random()
+        if roll < 0.2:
+            row['temperature'] = round(rng.uniform(20, 35), 1)
+            row['region'] = rng.choice(['Kerala', 'Karnataka', 'Tamil Nadu'])
+        elif roll < 0.22:
+            row['soil_type'] = 'Peat'
+        elif roll < 0.23:
+            row['irrigation_frequency'] = 9
+        elif roll < 0.24:
+            del row['crop_stage']
+        elif roll < 0.25:
+            row['region'] = 'Atlantis'
+        inputs.append(row)
+    return inputs
+
+
+def loop_predict(predictor, inputs):
+    """/batch-predict as it was: predictor.predict per row, exceptions become error entries"""
+    results = []
+    for i, input_data in enumerate(inputs):
+        try:
+            results.append({'index': i, 'success': True, 'data': predictor.predict(input_data)})
+        except Exception as e:
+            results.append({'index': i, 'success': False, 'error': str(e)})
+    return results
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pepper batch prediction benchmark')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--loop-rows', type=int, default=500, help='Rows timed through the per-row loop')
+    parser.add_argument('--samples', type=int, default=2000, help='Training samples')
+    args = parser.parse_args()
+
+    inputs = synthetic_inputs(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'pepper_training_data.csv')
+        predictor = PepperYieldPredictor()
+        predictor.models_dir = tmp
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pepper_training_data(args.samples).to_csv(data_path, index=False)
+            predictor.train(data_path)
+
+        print("\n" + "="*78)
+        print(f"PEPPER BATCH PREDICT ({args.rows} rows, models trained on {args.samples} samples)")
+        print("="*78)
+
+        loop_inputs = inputs[:args.loop_rows]
+        legacy, loop_s = timed(loop_predict, predictor, loop_inputs)
+        loop_total_s = loop_s * args.rows / len(loop_inputs)
+        batch, batch_s = timed(predictor.predict_batch, inputs)
+
+        failed = [result for result in batch if not result['success']]
+        both_ok = [result for result in legacy if result['success'] and batch[result['index']]['success']]
+        newly_rejected = sum(1 for result in legacy if result['success'] and not batch[result['index']]['success'])
+        matching = sum(1 for result in both_ok if batch[result['index']] == result)
+        print(f"  per-row loop              {loop_total_s:8.2f}s   ({len(loop_inputs)} rows in {loop_s:.2f}s, extrapolated)")
+        print(f"  predict_batch             {batch_s:8.2f}s   ({loop_total_s / batch_s:.0f}x)")
+        print(f"  rows with errors          {len(failed):8d}   (batch not aborted)")
+        print(f"  identical to loop         {matching}/{len(both_ok)} rows both accept "
+              f"({newly_rejected} the loop predicted without validation)")
+        print("="*78)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+"""
+Benchmark: per-user scans vs sparse user x product matrix for KNN recommendations
+Usage: python benchmark_recommendations.py [--users 1000,5000,50000] [--legacy-max 2000] [--targets 20]
+       python benchmark_recommendations.py --item-similarity [--users 2000] [--products 500]
+       python benchmark_recommendations.py --precompute [--users 5000,50000] [--workers 4]
+       python benchmark_recommendations.py --ann [--users 5000,20000,50000] [--tables 32 --hashes 4 --width 12]
+
+Generates synthetic orders and browsing history, then times neighbour search
+and full recommendations. Rankings are checked against the original
+O(users x (orders + browsing)) scan where that is affordable, and against an
+exact per-user distance computation at every size.
+
+--item-similarity instead times the item-item table: full rebuild versus
+feeding the same orders as incremental event batches, and checks both end
+with the same top-N neighbour table.
+
+--precompute times the offline all-users job and checks sampled users against
+the online get_recommended_products ranking.
+
+--ann compares the LSH index (user_ann_index.py) with exact KNN: recall@k
+(returned neighbours within the exact K-th distance), query latency, and the
+cost of inserting users one at a time after a bulk build.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from recommendation_engine import RecommendationEngine
+
+
+def synthetic_interactions(n_users, n_products=2000, orders_per_user=3, views_per_user=4, seed=42):
+    rng = random.Random(seed)
+    products = [
+        {'_id': f'p{i}', 'name': f'Variety {i}', 'isActive': rng.random() > 0.05,
+         'available_stock': rng.randint(0, 50)}
+        for i in range(n_products)
+    ]
+    # A few hundred popular products get most of the traffic
+    weights = [1 / (i + 1) ** 0.8 for i in range(n_products)]
+    orders = []
+    browsing = []
+    for u in range(n_users):
+        user = f'u{u}'
+        for _ in range(rng.randint(1, orders_per_user * 2 - 1)):
+            items = rng.choices(products, weights=weights, k=rng.randint(1, 3))
+            orders.append({
+                'user': user,
+                'status': 'DELIVERED' if rng.random() < 0.8 else rng.choice(['PENDING', 'CANCELLED']),
+                'items': [{'product': p['_id'], 'quantity': 1} for p in items]
+            })
+        for p in sorted(set(p['_id'] for p in rng.choices(products, weights=weights, k=rng.randint(0, views_per_user * 2)))):
+            browsing.append({'user': user, 'product': p, 'viewCount': rng.randint(1, 6)})
+    rng.shuffle(orders)
+    return orders, browsing, products
+
+
+def same_ranking(a, b):
+    """Same distances in order; users identical except within a tie at the cut-off"""
+    if [n['distance'] for n in a] != [n['distance'] for n in b]:
+        return False
+    if not a:
+        return True
+    cutoff = a[-1]['distance']
+    return ({n['userId'] for n in a if n['distance'] < cutoff} ==
+            {n['userId'] for n in b if n['distance'] < cutoff})
+
+
+def exact_neighbors(engine, user_id, k):
+    """Exact distances from the per-user vectors (first-seen order on ties)"""
+    index = engine._get_index()
+    target = engine.build_user_vector(user_id)
+    distances = [
+        {'userId': other, 'distance': engine.calculate_distance(target, index['vectors'].get(other, {}))}
+        for other in index['candidates'] if other != user_id
+    ]
+    distances.sort(key=lambda x: x['distance'])
+    return distances[:k]
+
+
+def benchmark_item_similarity(n_users, n_products, batch_size=50, top_n=20):
+    from item_similarity_store import ItemSimilarityStore
+
+    orders, browsing, _ = synthetic_interactions(n_users, n_products=n_products)
+    for i, order in enumerate(orders):
+        order['_id'] = f'o{i}'
+
+    print("\n" + "="*78)
+    print(f"ITEM SIMILARITY ({n_users} users, {n_products} products, {len(orders)} orders, top {top_n})")
+    print("="*78)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        full = ItemSimilarityStore(os.path.join(tmp, 'full.db'), top_n=top_n)
+        start = time.perf_counter()
+        full.rebuild(orders, browsing)
+        print(f"  rebuild                {time.perf_counter() - start:8.2f}s")
+
+        incremental = ItemSimilarityStore(os.path.join(tmp, 'incremental.db'), top_n=top_n)
+        incremental.record_browsing(browsing)
+        start = time.perf_counter()
+        for i in range(0, len(orders), batch_size):
+            incremental.record_orders(orders[i:i + batch_size])
+        elapsed = time.perf_counter() - start
+        batches = (len(orders) + batch_size - 1) // batch_size
+        print(f"  incremental            {elapsed:8.2f}s   ({elapsed / batches * 1000:.1f}ms per {batch_size}-order batch)")
+
+        print(f"  identical tables: {full.neighbor_table() == incremental.neighbor_table()}")
+        print(f"  {full.stats()['pairs']} product pairs, {full.stats()['neighbors']} neighbour rows")
+        full.close()
+        incremental.close()
+    print("="*78)
+
+
+def benchmark_precompute(n_users, workers, k, samples=200, depth=20):
+    from precompute_recommendations import recommend_all
+
+    orders, browsing, products = synthetic_interactions(n_users)
+    # Every product available, so the online list is the unfiltered ranking
+    products = [dict(p, isActive=True, available_stock=1) for p in products]
+    engine = RecommendationEngine(orders, browsing, products)
+
+    start = time.perf_counter()
+    recommendations, popular = recommend_all(engine, k, depth, workers)
+    elapsed = time.perf_counter() - start
+
+    rng = random.Random(n_users)
+    sample = rng.sample(sorted(recommendations), min(samples, len(recommendations)))
+    start = time.perf_counter()
+    identical = all(
+        [p['_id'] for p in engine.get_recommended_products(user, k, depth)] == recommendations[user]
+        for user in sample
+    )
+    online_s = (time.perf_counter() - start) / len(sample)
+
+    print(f"{n_users:8d} {len(recommendations):8d} {elapsed:9.2f}s {elapsed / len(recommendations) * 1000:9.3f}ms "
+          f"{online_s * 1000:10.2f}ms {str(identical):>9}")
+
+
+def benchmark_ann(n_users, k, n_targets, tables, hashes, width, incremental=0.1):
+    from user_ann_index import UserLSHIndex
+
+    orders, browsing, products = synthetic_interactions(n_users)
+    engine = RecommendationEngine(orders, browsing, products)
+    index = engine._get_index()
+    rng = random.Random(n_users)
+    targets = [f'u{rng.randrange(n_users)}' for _ in range(n_targets)]
+
+    start = time.perf_counter()
+    exact = {user: engine.find_k_nearest_neighbors(user, k) for user in targets}
+    exact_s = (time.perf_counter() - start) / len(targets)
+
+    # Bulk-load most users, then insert the rest one at a time
+    users = [(user_id, index['vectors'].get(user_id, {})) for user_id in index['candidates']]
+    split = int(len(users) * (1 - incremental))
+    ann = UserLSHIndex(tables, hashes, width)
+    start = time.perf_counter()
+    ann.add_many(users[:split])
+    build_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for user_id, vector in users[split:]:
+        ann.add(user_id, vector)
+    insert_s = (time.perf_counter() - start) / max(1, len(users) - split)
+
+    ann.query({}, k)  # stack the pending inserts before timing queries
+    start = time.perf_counter()
+    approximate = {user: ann.query(index['vectors'].get(user, {}), k, user) for user in targets}
+    ann_s = (time.perf_counter() - start) / len(targets)
+
+    recall = sum(
+        sum(n['distance'] <= exact[user][-1]['distance'] for n in approximate[user]) / len(exact[user])
+        for user in targets if exact[user]
+    ) / len(targets)
+    candidates = sum(len(ann.candidates(user)) for user in targets) / len(targets) / len(ann)
+
+    print(f"{n_users:8d} {exact_s * 1000:8.2f}ms {build_s:8.2f}s {insert_s * 1e6:8.0f}us "
+          f"{ann_s * 1000:8.2f}ms {recall:8.3f} {candidates:10.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='KNN recommendation benchmark')
+    parser.add_argument('--users', default='1000,5000,50000', help='Comma-separated user counts')
+    parser.add_argument('--legacy-max', type=int, default=2000, help='Largest size to run the per-user scan on')
+    parser.add_argument('--targets', type=int, default=20, help='Target users per size')
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--item-similarity', action='store_true', help='Benchmark the item-item table instead')
+    parser.add_argument('--products', type=int, default=500, help='Catalog size for --item-similarity')
+    parser.add_argument('--precompute', action='store_true', help='Benchmark the offline all-users job instead')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for --precompute')
+    parser.add_argument('--ann', action='store_true', help='Compare the LSH index with exact KNN instead')
+    parser.add_argument('--tables', type=int, default=32, help='LSH tables for --ann')
+    parser.add_argument('--hashes', type=int, default=4, help='Hashes per LSH table for --ann')
+    parser.add_argument('--width', type=float, default=12, help='LSH bucket width for --ann')
+    args = parser.parse_args()
+
+    if args.ann:
+        print("\n" + "="*78)
+        print(f"ANN (LSH {args.tables} tables x {args.hashes} hashes, width {args.width}) vs EXACT KNN, k={args.k}")
+        print("="*78)
+        print(f"{'users':>8} {'exact/q':>10} {'build':>9} {'insert':>10} {'lsh/q':>10} {'recall':>8} {'candidates':>10}")
+        for n_users in [int(n) for n in args.users.split(',')]:
+            benchmark_ann(n_users, args.k, max(args.targets, 100), args.tables, args.hashes, args.width)
+        print("="*78)
+        print("build: bulk insert of 90% of users; insert: per-user add() for the remaining 10%")
+        print("recall: share of returned neighbours within the exact K-th distance")
+        print("candidates: share of users re-ranked per query")
+        return
+
+    if args.precompute:
+        print("\n" + "="*78)
+        print("OFFLINE PRECOMPUTE BENCHMARK")
+        print("="*78)
+        print(f"{'users':>8} {'stored':>8} {'total':>10} {'per user':>11} {'online/user':>11} {'rankings':>9}")
+        for n_users in [int(n) for n in args.users.split(',')]:
+            benchmark_precompute(n_users, args.workers, args.k)
+        print("="*78)
+        print("online/user: get_recommended_products on the already-built index (sampled users)")
+        return
+
+    if args.item_similarity:
+        for n_users in [int(n) for n in args.users.split(',')]:
+            benchmark_item_similarity(n_users, args.products)
+        return
+
+    print("\n" + "="*78)
+    print("KNN RECOMMENDATION BENCHMARK")
+    print("="*78)
+    print(f"{'users':>8} {'orders':>8} {'index':>9} {'knn/user':>10} {'legacy/user':>12} "
+          f"{'speedup':>8} {'rankings':>9}")
+
+    for n_users in [int(n) for n in args.users.split(',')]:
+        orders, browsing, products = synthetic_interactions(n_users)
+        rng = random.Random(n_users)
+        targets = [f'u{rng.randrange(n_users)}' for _ in range(args.targets)]
+
+        engine = RecommendationEngine(orders, browsing, products)
+        start = time.perf_counter()
+        engine._get_index()
+        index_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = {user: engine.find_k_nearest_neighbors(user, args.k) for user in targets}
+        knn_s = (time.perf_counter() - start) / len(targets)
+
+        identical = all(
+            same_ranking(results[user], exact_neighbors(engine, user, args.k)) for user in targets
+        )
+
+        legacy = '-'
+        speedup = '-'
+        if n_users <= args.legacy_max:
+            legacy_targets = targets[:max(1, min(len(targets), 5))]
+            start = time.perf_counter()
+            legacy_results = {user: engine.find_k_nearest_neighbors_iterative(user, args.k) for user in legacy_targets}
+            legacy_s = (time.perf_counter() - start) / len(legacy_targets)
+            identical = identical and all(same_ranking(results[u], legacy_results[u]) for u in legacy_targets)
+            legacy = f'{legacy_s * 1000:10.1f}ms'
+            speedup = f'{legacy_s / (index_s + knn_s):7.0f}x'
+
+        print(f"{n_users:8d} {len(orders):8d} {index_s:8.2f}s {knn_s * 1000:8.2f}ms {legacy:>12} "
+              f"{speedup:>8} {str(identical):>9}")
+
+    print("="*78)
+    print("index: one-time sparse matrix build per engine; knn/user: neighbour search per target")
+    print("speedup: legacy scan vs index build + one search (what a single CLI request pays)")
+
+
+if __name__ == '__main__':
+    main()
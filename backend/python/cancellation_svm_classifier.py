@@ -7,15 +7,70 @@ import json
 import sys
 import pickle
 import os
-from datetime import datetime, timedelta
+import threading
+from array import array
+from datetime import datetime, timedelta, timezone
 import numpy as np
-from sklearn.svm import SVC
+from sklearn.svm import SVC, LinearSVC
+from sklearn.kernel_approximation import Nystroem
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import make_pipeline
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
 import warnings
 warnings.filterwarnings('ignore')
 
+from ml_stream_io import iter_json_file, iter_json_records, read_request, write_response
+
+MS_PER_DAY = 86_400_000
+
+# Training modes:
+#   svc             exact RBF-kernel SVC (O(n^2)-O(n^3) in samples; fine up to ~20k orders)
+#   svc_calibrated  the same SVC with probability=True, as trained before the modes
+#                   existed: adds sklearn's internal 5-fold Platt calibration (about
+#                   5x the training time) for predict_proba, which scoring never
+#                   calls, so risk scores are identical to svc
+#   nystroem        Nystroem RBF feature map + linear SGD (scales to hundreds of thousands)
+#   linear          LinearSVC on the raw scaled features (fastest, no kernel)
+TRAIN_MODES = ('svc', 'svc_calibrated', 'nystroem', 'linear')
+DEFAULT_TRAIN_MODE = os.environ.get('CANCELLATION_TRAIN_MODE', 'svc')
+NYSTROEM_COMPONENTS = int(os.environ.get('CANCELLATION_NYSTROEM_COMPONENTS', '300'))
+
+
+def parse_iso_datetimes(values):
+    """
+    Vectorized ISO-8601 parsing for batch scoring
+
+    Returns (datetime64[ms] array in UTC for zoned values, bool array marking
+    which values carried a zone). Missing or unparseable values become NaT.
+    """
+    strings = np.array([v if isinstance(v, str) else '' for v in values], dtype=str)
+    try:
+        parsed = strings.astype('datetime64[ms]')
+    except ValueError:
+        # Some value numpy cannot read: fall back to one-by-one parsing
+        parsed = np.full(len(strings), np.datetime64('NaT'), dtype='datetime64[ms]')
+        for i, value in enumerate(strings):
+            if not value:
+                continue
+            try:
+                dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                continue
+            if dt.tzinfo:
+                dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+            parsed[i] = np.datetime64(dt, 'ms')
+
+    # Zone designator: trailing Z, or +hh:mm / -hh:mm after the time separator
+    time_sep = np.char.find(strings, 'T')
+    has_tz = (
+        np.char.endswith(strings, 'Z')
+        | (np.char.find(strings, '+') >= 0)
+        | ((time_sep >= 0) & (np.char.rfind(strings, '-') > time_sep))
+    )
+    return parsed, has_tz
+
 
 class CancellationSVMClassifier:
     """SVM-based Order Cancellation Risk Classifier"""
@@ -24,6 +79,7 @@ class CancellationSVMClassifier:
         self.model_path = model_path
         self.scaler = StandardScaler()
         self.svm_model = None
+        self.train_mode = 'svc'
         self.feature_names = [
             'is_cod',
             'past_cancellations',
@@ -37,15 +93,39 @@ class CancellationSVMClassifier:
         self.is_trained = False
         self.load_model()
     
-    def extract_features(self, order, customer, customer_orders):
-        """Extract 8 features from order and customer data"""
+    def customer_aggregates(self, order, customer, customer_orders):
+        """
+        (past_cancellations, history_count, history_total) for the customer
+
+        Computed from customer_orders when given; when it is None the
+        aggregates come from the customer feature store (one indexed lookup).
+        """
+        if customer_orders is None:
+            from customer_feature_store import get_feature_store
+            customer_id = order.get('customerId') or customer.get('_id')
+            stats = get_feature_store().get(customer_id) if customer_id else {}
+            return (
+                stats.get('past_cancellations', 0),
+                stats.get('order_count', 0),
+                stats.get('total_amount', 0)
+            )
+        return (
+            sum(1 for o in customer_orders if o.get('status') == 'cancelled'),
+            len(customer_orders),
+            sum(o.get('totalAmount', 0) for o in customer_orders)
+        )
+    
+    def extract_features(self, order, customer, customer_orders=None):
+        """Extract 8 features from order and customer data (customer_orders=None: use the feature store)"""
         try:
             # Feature 1: Payment Method (COD = 1, others = 0)
             payment_method = order.get('paymentMethod', '').upper()
             is_cod = 1 if payment_method == 'COD' else 0
             
             # Feature 2: Past Cancellations
-            past_cancellations = sum(1 for o in customer_orders if o.get('status') == 'cancelled')
+            past_cancellations, history_count, history_total = self.customer_aggregates(
+                order, customer, customer_orders
+            )
             
             # Feature 3: Order Amount
             order_amount = float(order.get('totalAmount', 0))
@@ -65,7 +145,7 @@ class CancellationSVMClassifier:
                 delivery_days = 5
             
             # Feature 5: Total Order Count
-            order_count = len(customer_orders) if customer_orders else 1
+            order_count = history_count if history_count else 1
             
             # Feature 6: Account Age (in days)
             customer_created_at = customer.get('createdAt')
@@ -80,9 +160,8 @@ class CancellationSVMClassifier:
                 account_age_days = 0
             
             # Feature 7: Average Order Value
-            if customer_orders and len(customer_orders) > 0:
-                total_value = sum(o.get('totalAmount', 0) for o in customer_orders)
-                avg_order_value = total_value / len(customer_orders)
+            if history_count > 0:
+                avg_order_value = history_total / history_count
             else:
                 avg_order_value = order_amount
             
@@ -120,7 +199,7 @@ class CancellationSVMClassifier:
             zero_features = np.zeros((1, len(self.feature_names)))
             return zero_features, {}
     
-    def predict_risk(self, order, customer, customer_orders):
+    def predict_risk(self, order, customer, customer_orders=None):
         """Predict cancellation risk for an order"""
         if not self.is_trained:
             return {
@@ -185,6 +264,131 @@ class CancellationSVMClassifier:
                 'features': {}
             }
     
+    def build_batch_features(self, orders, customers, history=None):
+        """
+        Feature matrix for many orders at once (same features as extract_features)
+
+        Args:
+            orders: [{"_id", "customerId", "totalAmount", "paymentMethod", "createdAt"}]
+            customers: [{"_id", "createdAt"}]
+            history: every order of those customers [{"customerId", "totalAmount", "status"}],
+                     or None to read the aggregates from the customer feature store
+        """
+        n = len(orders)
+        customer_ids = [str(o.get('customerId', '')) for o in orders]
+
+        if history is None:
+            from customer_feature_store import get_feature_store
+            stats = get_feature_store().get_many(customer_ids)
+            history_count = np.array([stats[c]['order_count'] for c in customer_ids], dtype=np.float64)
+            past_cancellations = np.array([stats[c]['past_cancellations'] for c in customer_ids], dtype=np.float64)
+            history_total = np.array([stats[c]['total_amount'] for c in customer_ids], dtype=np.float64)
+        else:
+            # Per-customer aggregates over the order history in one grouped pass
+            history_ids = [str(h.get('customerId', '')) for h in history]
+            keys, inverse = np.unique(np.array(customer_ids + history_ids, dtype=str), return_inverse=True)
+            order_group = inverse[:n]
+            history_group = inverse[n:]
+            history_amount = np.array([float(h.get('totalAmount', 0) or 0) for h in history], dtype=np.float64)
+            history_cancelled = np.array([h.get('status') == 'cancelled' for h in history], dtype=np.float64)
+            history_count = np.bincount(history_group, minlength=len(keys))[order_group]
+            past_cancellations = np.bincount(history_group, weights=history_cancelled, minlength=len(keys))[order_group]
+            history_total = np.bincount(history_group, weights=history_amount, minlength=len(keys))[order_group]
+
+        order_amount = np.array([float(o.get('totalAmount', 0) or 0) for o in orders], dtype=np.float64)
+        is_cod = np.array([str(o.get('paymentMethod') or '').upper() == 'COD' for o in orders], dtype=np.float64)
+        order_count = np.maximum(history_count, 1)
+        avg_order_value = np.where(
+            history_count > 0, history_total / np.maximum(history_count, 1), order_amount
+        )
+        cancellation_rate = past_cancellations / order_count * 100
+
+        # Naive timestamps compare against local time, zoned ones against UTC
+        now_utc = np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None), 'ms')
+        now_local = np.datetime64(datetime.now(), 'ms')
+
+        created, created_tz = parse_iso_datetimes([o.get('createdAt') for o in orders])
+        now = np.where(created_tz, now_utc, now_local)
+        delivery = created + np.timedelta64(5, 'D')
+        delivery_days = np.where(
+            np.isnat(created), 5,
+            np.maximum(0, (delivery - now).astype(np.int64) // MS_PER_DAY)
+        )
+
+        customer_created = {str(c.get('_id', '')): c.get('createdAt') for c in customers}
+        account_date, account_tz = parse_iso_datetimes([customer_created.get(cid) for cid in customer_ids])
+        now = np.where(account_tz, now_utc, now_local)
+        account_age_days = np.where(
+            np.isnat(account_date), 0, (now - account_date).astype(np.int64) // MS_PER_DAY
+        )
+
+        return np.column_stack([
+            is_cod,
+            past_cancellations,
+            order_amount,
+            delivery_days,
+            order_count,
+            account_age_days,
+            avg_order_value,
+            cancellation_rate
+        ]).astype(np.float64)
+
+    def predict_batch(self, orders, customers, history=None):
+        """
+        Score many orders with one scaler.transform and one decision_function
+
+        Returns predictions (same fields as predict_risk plus order_id) ranked
+        by risk score, highest first.
+        """
+        if not orders:
+            return {'success': True, 'predictions': [], 'total': 0}
+
+        if not self.is_trained:
+            untrained = self.predict_risk({}, {}, [])
+            return {
+                'success': True,
+                'predictions': [{'order_id': o.get('_id'), **untrained} for o in orders],
+                'total': len(orders)
+            }
+
+        try:
+            X = self.build_batch_features(orders, customers, history)
+            decision_scores = self.svm_model.decision_function(self.scaler.transform(X))
+        except Exception as e:
+            print(f"Error in batch prediction: {str(e)}", file=sys.stderr)
+            return {'success': False, 'message': f'Batch prediction error: {str(e)}', 'predictions': []}
+
+        probabilities = 1 / (1 + np.exp(-decision_scores))
+        risk_scores = probabilities * 100
+        confidences = np.clip((np.abs(decision_scores) * 10).astype(int), 0, 100)
+        risk_levels = np.where(risk_scores >= 70, 'HIGH', np.where(risk_scores >= 40, 'MEDIUM', 'LOW'))
+
+        predictions = []
+        for i in np.argsort(-risk_scores, kind='stable'):
+            row = X[i]
+            feature_dict = {
+                'is_cod': int(row[0]),
+                'past_cancellations': int(row[1]),
+                'order_amount': float(row[2]),
+                'delivery_days': int(row[3]),
+                'order_count': int(row[4]),
+                'account_age_days': int(row[5]),
+                'avg_order_value': float(row[6]),
+                'cancellation_rate': float(row[7])
+            }
+            risk_level = str(risk_levels[i])
+            predictions.append({
+                'order_id': orders[i].get('_id'),
+                'risk_level': risk_level,
+                'risk_score': round(float(risk_scores[i]), 1),
+                'probability': round(float(probabilities[i]), 3),
+                'confidence': int(confidences[i]),
+                'recommendations': self._generate_recommendations(feature_dict, risk_level, orders[i], {}),
+                'features': feature_dict
+            })
+
+        return {'success': True, 'predictions': predictions, 'total': len(predictions)}
+    
     def _generate_recommendations(self, features, risk_level, order, customer):
         """Generate actionable recommendations based on risk factors"""
         recommendations = []
@@ -217,24 +421,70 @@ class CancellationSVMClassifier:
         
         return recommendations
     
-    def train(self, training_data):
-        """Train SVM model with historical data"""
+    def build_training_matrix(self, training_data):
+        """
+        Build (X, y) from any iterable of training records
+
+        Records are consumed one at a time and packed into flat typed arrays,
+        so a streamed training set is never held as a list of dicts as well.
+        """
+        values = array('d')
+        labels = array('b')
+        
+        for item in training_data:
+            order = item.get('order', {})
+            customer = item.get('customer', {})
+            customer_orders = item.get('customer_orders', [])
+            
+            features, _ = self.extract_features(order, customer, customer_orders)
+            values.extend(features[0])
+            labels.append(1 if order.get('status') == 'cancelled' else 0)
+        
+        X = np.frombuffer(values, dtype=np.float64).reshape(-1, len(self.feature_names))
+        y = np.frombuffer(labels, dtype=np.int8)
+        return X, y
+    
+    def create_model(self, mode, X_train):
+        """
+        Unfitted estimator for a training mode
+
+        Every mode exposes decision_function(), which is all predict_risk and
+        predict_batch use (risk = sigmoid of the decision score), so only
+        svc_calibrated pays for sklearn's internal 5-fold probability calibration.
+        """
+        if mode == 'svc':
+            return SVC(kernel='rbf', C=1.0, gamma='scale', random_state=42)
+
+        if mode == 'svc_calibrated':
+            return SVC(kernel='rbf', C=1.0, gamma='scale', probability=True, random_state=42)
+
+        if mode == 'nystroem':
+            # Same kernel width SVC's gamma='scale' would pick
+            gamma = 1.0 / (X_train.shape[1] * X_train.var()) if X_train.var() > 0 else 1.0
+            return make_pipeline(
+                Nystroem(kernel='rbf', gamma=gamma,
+                         n_components=min(NYSTROEM_COMPONENTS, len(X_train)), random_state=42),
+                # Logistic loss: sigmoid(decision score) is then a calibrated probability
+                SGDClassifier(loss='log_loss', alpha=1e-4, max_iter=50, tol=1e-4,
+                              average=True, random_state=42)
+            )
+
+        if mode == 'linear':
+            return LinearSVC(C=1.0, dual=False, random_state=42)
+
+        raise ValueError(f"Unknown training mode: {mode} (choose from {', '.join(TRAIN_MODES)})")
+    
+    def train(self, training_data, mode=None):
+        """
+        Train the model with historical data (a list or a stream of records)
+
+        Args:
+            training_data: Iterable of {"order", "customer", "customer_orders"}
+            mode: 'svc' | 'svc_calibrated' | 'nystroem' | 'linear' (default: CANCELLATION_TRAIN_MODE)
+        """
+        mode = mode or DEFAULT_TRAIN_MODE
         try:
-            X = []
-            y = []
-            
-            for item in training_data:
-                order = item.get('order', {})
-                customer = item.get('customer', {})
-                customer_orders = item.get('customer_orders', [])
-                label = 1 if order.get('status') == 'cancelled' else 0
-                
-                features, _ = self.extract_features(order, customer, customer_orders)
-                X.append(features[0])
-                y.append(label)
-            
-            X = np.array(X)
-            y = np.array(y)
+            X, y = self.build_training_matrix(training_data)
             
             # Fit scaler
             X_scaled = self.scaler.fit_transform(X)
@@ -244,15 +494,10 @@ class CancellationSVMClassifier:
                 X_scaled, y, test_size=0.2, random_state=42
             )
             
-            # Train SVM
-            self.svm_model = SVC(
-                kernel='rbf',
-                C=1.0,
-                gamma='scale',
-                probability=True,
-                random_state=42
-            )
+            # Train model
+            self.svm_model = self.create_model(mode, X_train)
             self.svm_model.fit(X_train, y_train)
+            self.train_mode = mode
             
             # Evaluate
             y_pred = self.svm_model.predict(X_test)
@@ -260,6 +505,10 @@ class CancellationSVMClassifier:
             precision = precision_score(y_test, y_pred, zero_division=0)
             recall = recall_score(y_test, y_pred, zero_division=0)
             f1 = f1_score(y_test, y_pred, zero_division=0)
+            if len(np.unique(y_test)) > 1:
+                auc = round(roc_auc_score(y_test, self.svm_model.decision_function(X_test)), 3)
+            else:
+                auc = None
             
             self.is_trained = True
             
@@ -270,10 +519,12 @@ class CancellationSVMClassifier:
                 'success': True,
                 'message': 'Model trained successfully',
                 'metrics': {
+                    'mode': mode,
                     'accuracy': round(accuracy, 3),
                     'precision': round(precision, 3),
                     'recall': round(recall, 3),
                     'f1_score': round(f1, 3),
+                    'auc': auc,
                     'training_samples': len(X_train),
                     'test_samples': len(X_test)
                 }
@@ -294,6 +545,7 @@ class CancellationSVMClassifier:
                     'svm_model': self.svm_model,
                     'scaler': self.scaler,
                     'feature_names': self.feature_names,
+                    'train_mode': self.train_mode,
                     'is_trained': self.is_trained
                 }, f)
             return True
@@ -309,6 +561,7 @@ class CancellationSVMClassifier:
                     data = pickle.load(f)
                     self.svm_model = data.get('svm_model')
                     self.scaler = data.get('scaler')
+                    self.train_mode = data.get('train_mode', 'svc')
                     self.is_trained = data.get('is_trained', False)
             else:
                 self.is_trained = False
@@ -317,28 +570,135 @@ class CancellationSVMClassifier:
             self.is_trained = False
 
 
+# Loaded once per process (the ML worker daemon keeps it warm between calls)
+_classifier = None
+_classifier_lock = threading.Lock()
+_train_lock = threading.Lock()
+
+
+def get_classifier():
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = CancellationSVMClassifier()
+    return _classifier
+
+
+def train_classifier(training_data, mode=None):
+    """
+    Train a fresh classifier and swap it in when training succeeds
+
+    The worker daemon serves predictions concurrently with a train request, so
+    the shared instance is never refitted in place; trains run one at a time.
+    """
+    global _classifier
+    with _train_lock:
+        candidate = CancellationSVMClassifier(get_classifier().model_path)
+        result = candidate.train(training_data, mode=mode)
+        if result.get('success'):
+            with _classifier_lock:
+                _classifier = candidate
+    return result
+
+
+def handle_request(request):
+    """
+    Worker entry point
+
+    Expected input format:
+    {
+      "action": "predict" | "predict_batch" | "record_orders" | "remove_order" |
+                "store_status" | "rebuild_store" | "train",
+      "data": {...},  (same JSON the CLI takes as its second argument)
+      "mode": "svc" | "nystroem" | "linear"  (train only, optional)
+    }
+
+    predict_batch data: {"orders": [...], "customers": [...], "history": [...]}
+    (see build_batch_features). Without customer_orders / history the
+    aggregates come from the customer feature store, which record_orders
+    ({"orders": [order events]}) and remove_order ({"order_id"} or
+    {"order_ids": [...]}) keep up to date once rebuild_store has backfilled it
+    from full exports; store_status reports whether it has. rebuild_store
+    takes {"orders": [...], "customers": [...]} or, for exports too large for
+    one request, {"orders_file", "customers_file"}: paths to NDJSON / JSON
+    array files on this host, streamed rather than loaded.
+    """
+    action = request.get('action')
+    data = request.get('data') or {}
+    classifier = get_classifier()
+
+    if action == 'predict':
+        return classifier.predict_risk(
+            data.get('order', {}),
+            data.get('customer', {}),
+            data.get('customer_orders')
+        )
+    if action == 'predict_batch':
+        return classifier.predict_batch(
+            data.get('orders', []),
+            data.get('customers', []),
+            data.get('history')
+        )
+    if action == 'record_orders':
+        from customer_feature_store import get_feature_store
+        return {'success': True, **get_feature_store().record_orders(data.get('orders', []))}
+    if action == 'remove_order':
+        from customer_feature_store import get_feature_store
+        store = get_feature_store()
+        if 'order_ids' in data:
+            return {'success': True, 'removed': sum(store.delete_order(order_id) for order_id in data['order_ids'])}
+        return {'success': True, 'removed': store.delete_order(data.get('order_id'))}
+    if action == 'store_status':
+        from customer_feature_store import get_feature_store
+        return {'success': True, **get_feature_store().status()}
+    if action == 'rebuild_store':
+        from customer_feature_store import get_feature_store
+        orders = iter_json_file(data['orders_file']) if data.get('orders_file') else data.get('orders', [])
+        customers = iter_json_file(data['customers_file']) if data.get('customers_file') else data.get('customers')
+        return {'success': True, **get_feature_store().rebuild(orders, customers)}
+    if action == 'train':
+        return train_classifier(data, mode=request.get('mode'))
+    raise ValueError(f"Unknown action: {action}")
+
+
 def main():
-    """Main entry point for command-line usage"""
+    """
+    Main entry point for command-line usage
+
+    predict / train read their data from stdin when no argument is given:
+    a JSON object, a JSON array or NDJSON (one record per line). predict
+    writes one JSON result line per input record. predict_batch reads one
+    {"orders", "customers", "history"} object. train uses the mode in
+    CANCELLATION_TRAIN_MODE (svc | svc_calibrated | nystroem | linear).
+    """
     if len(sys.argv) < 2:
-        print("Usage: python cancellation_svm_classifier.py <action> [data]")
-        print("Actions: predict, train, test")
+        print("Usage: python cancellation_svm_classifier.py <action> [data]  (data defaults to stdin)")
+        print("Actions: predict, predict_batch, train, test")
         sys.exit(1)
     
     action = sys.argv[1]
-    classifier = CancellationSVMClassifier()
     
-    if action == 'predict' and len(sys.argv) > 2:
-        data = json.loads(sys.argv[2])
-        result = classifier.predict_risk(
-            data.get('order', {}),
-            data.get('customer', {}),
-            data.get('customer_orders', [])
-        )
+    if action in ('predict', 'predict_batch', 'train') and len(sys.argv) > 2:
+        result = handle_request({'action': action, 'data': json.loads(sys.argv[2])})
         print(json.dumps(result))
     
-    elif action == 'train' and len(sys.argv) > 2:
-        data = json.loads(sys.argv[2])
-        result = classifier.train(data)
+    elif action == 'predict':
+        classifier = get_classifier()
+        for data in iter_json_records(sys.stdin):
+            result = classifier.predict_risk(
+                data.get('order', {}),
+                data.get('customer', {}),
+                data.get('customer_orders')
+            )
+            sys.stdout.write(json.dumps(result) + '\n')
+    
+    elif action == 'predict_batch':
+        result = handle_request({'action': action, 'data': read_request(sys.stdin)})
+        write_response(result)
+    
+    elif action == 'train':
+        result = train_classifier(iter_json_records(sys.stdin))
         print(json.dumps(result))
     
     elif action == 'test':
@@ -357,7 +717,7 @@ def main():
             {'status': 'cancelled', 'totalAmount': 2000}
         ]
         
-        result = classifier.predict_risk(sample_order, sample_customer, sample_orders)
+        result = get_classifier().predict_risk(sample_order, sample_customer, sample_orders)
         print(json.dumps(result, indent=2))
     
     else:
@@ -8,6 +8,7 @@ import numpy as np
 import cv2
 import json
 import os
+from keras_inference import CompiledKerasPredictor
 
 class CNNDiseaseDetector:
     """
@@ -43,6 +44,7 @@ class CNNDiseaseDetector:
                 break
         
         self.model = None
+        self.compiled_model = None
         self.classes = {}
         self.img_size = 224
         
@@ -171,6 +173,11 @@ class CNNDiseaseDetector:
             print(f"   2. Re-train in Colab and save as .keras format")
             return False
         
+        # Fixed-signature compiled inference path (traced + warmed up here)
+        self.compiled_model = CompiledKerasPredictor(
+            self.model, input_shape=(self.img_size, self.img_size, 3)
+        )
+        
         # Load class indices
         class_indices_path = os.path.join(
             os.path.dirname(self.model_path), 
@@ -244,31 +251,9 @@ class CNNDiseaseDetector:
             img_array = self.preprocess_image(image_path)
             
             # Predict
-            predictions = self.model.predict(img_array, verbose=0)
-            
-            # Get predicted class
-            predicted_idx = np.argmax(predictions[0])
-            confidence = float(predictions[0][predicted_idx])
-            
-            # Get class name
-            disease = self.classes.get(predicted_idx, 'Unknown')
+            predictions = self.compiled_model.predict(img_array)
             
-            # Get all probabilities
-            probabilities = {}
-            for idx, prob in enumerate(predictions[0]):
-                class_name = self.classes.get(idx, f'Class_{idx}')
-                probabilities[class_name] = float(prob)
-            
-            # Get disease info
-            info = self.disease_info.get(disease, {})
-            
-            return {
-                'disease': disease,
-                'confidence': confidence,
-                'probabilities': probabilities,
-                'info': info,
-                'model_type': 'CNN'
-            }
+            return self._format_prediction(predictions[0])
             
         except Exception as e:
             return {
@@ -276,6 +261,73 @@ class CNNDiseaseDetector:
                 'message': 'Error during prediction'
             }
     
+    def predict_batch(self, image_paths):
+        """
+        Predict diseases for several images with a single model call
+        
+        Returns:
+            list: one result dict per image, in input order
+        """
+        if self.model is None:
+            return [{
+                'error': 'Model not loaded',
+                'message': 'Please train the CNN model in Google Colab first'
+            } for _ in image_paths]
+        
+        results = [None] * len(image_paths)
+        batch = []
+        batch_positions = []
+        
+        for i, image_path in enumerate(image_paths):
+            try:
+                batch.append(self.preprocess_image(image_path)[0])
+                batch_positions.append(i)
+            except Exception as e:
+                results[i] = {
+                    'error': str(e),
+                    'message': 'Error during prediction'
+                }
+        
+        if batch:
+            try:
+                predictions = self.compiled_model.predict(np.stack(batch))
+                for position, probs in zip(batch_positions, predictions):
+                    results[position] = self._format_prediction(probs)
+            except Exception as e:
+                for position in batch_positions:
+                    results[position] = {
+                        'error': str(e),
+                        'message': 'Error during prediction'
+                    }
+        
+        return results
+    
+    def _format_prediction(self, probs):
+        """Build the result dict from one row of class probabilities"""
+        # Get predicted class
+        predicted_idx = int(np.argmax(probs))
+        confidence = float(probs[predicted_idx])
+        
+        # Get class name
+        disease = self.classes.get(predicted_idx, 'Unknown')
+        
+        # Get all probabilities
+        probabilities = {}
+        for idx, prob in enumerate(probs):
+            class_name = self.classes.get(idx, f'Class_{idx}')
+            probabilities[class_name] = float(prob)
+        
+        # Get disease info
+        info = self.disease_info.get(disease, {})
+        
+        return {
+            'disease': disease,
+            'confidence': confidence,
+            'probabilities': probabilities,
+            'info': info,
+            'model_type': 'CNN'
+        }
+    
     def validate_image(self, image_path):
         """
         Validate if image is suitable for disease detection
@@ -0,0 +1,577 @@
+"""
+Customer Feature Store
+Per-customer order aggregates for the cancellation classifier and customer
+segmentation, kept in SQLite and updated incrementally as order events
+arrive, so scoring or segmenting a customer is an indexed lookup instead of a
+rescan of their whole order history.
+
+- orders:            last seen state of every order (makes events idempotent:
+                     replaying or re-sending an order only applies the change)
+- customer_stats:    order_count, cancelled_count, total_amount, first / last
+                     order per customer
+- customers:         account created date and display fields (customer
+                     accounts only: removed or demoted accounts are deleted)
+- customer_changes:  customers whose aggregates changed since they were last
+                     segmented
+- customer_segments / segment_summary: stored segmentation and its running
+                     per-segment totals (see customer_segmentation.refresh_segments)
+- store_meta:        when the store was last rebuilt from a full export
+
+The store only knows the orders it has been sent, so it starts out not ready:
+callers keep querying the live order history until a rebuild (from full order
+and customer exports) has run. The Node backend does this backfill at startup
+(src/services/customerFeatureStoreSync.js) and afterwards sends every order
+save / update / delete as an event.
+
+Usage:
+    python customer_feature_store.py rebuild orders.ndjson [--customers users.ndjson]
+    python customer_feature_store.py record < events.ndjson      (incremental order events)
+    python customer_feature_store.py remove <order_id>           (order deleted)
+    python customer_feature_store.py customers < users.ndjson    (customer created / updated)
+    python customer_feature_store.py get <customer_id>
+    python customer_feature_store.py stats
+
+Order records may use Node / Mongo field names: {"_id", "user" | "customer" |
+"customerId", "status", "totalAmount", "createdAt"}; customer records
+{"_id", "createdAt", "email", "firstName", "lastName"}.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+from mongo_ids import normalize_id
+
+DEFAULT_DB_PATH = os.environ.get(
+    'CUSTOMER_FEATURE_STORE_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'customer_features.db')
+)
+
+# Same rule as CancellationSVMClassifier.extract_features
+CANCELLED_STATUS = 'cancelled'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id     TEXT PRIMARY KEY,
+    customer_id  TEXT NOT NULL,
+    status       TEXT,
+    total_amount REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders(customer_id);
+CREATE TABLE IF NOT EXISTS customer_stats (
+    customer_id     TEXT PRIMARY KEY,
+    order_count     INTEGER NOT NULL DEFAULT 0,
+    cancelled_count INTEGER NOT NULL DEFAULT 0,
+    total_amount    REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id TEXT PRIMARY KEY,
+    created_at  TEXT,
+    email       TEXT,
+    first_name  TEXT,
+    last_name   TEXT
+);
+CREATE TABLE IF NOT EXISTS customer_changes (
+    customer_id TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS customer_segments (
+    customer_id TEXT PRIMARY KEY,
+    segment     TEXT NOT NULL,
+    confidence  REAL NOT NULL,
+    posteriors  TEXT NOT NULL,
+    review_at   TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_segments_review ON customer_segments(review_at);
+CREATE TABLE IF NOT EXISTS segment_summary (
+    segment       TEXT PRIMARY KEY,
+    count         INTEGER NOT NULL DEFAULT 0,
+    confidence_e4 INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Columns added after the first release of the store (migrated in place)
+_ADDED_COLUMNS = {
+    'orders': {
+        'created_at': 'TEXT',
+        'amount_is_float': 'INTEGER NOT NULL DEFAULT 0'
+    },
+    'customer_stats': {
+        'float_order_count': 'INTEGER NOT NULL DEFAULT 0',
+        'first_order_at': 'TEXT',
+        'last_order_at': 'TEXT'
+    }
+}
+
+_REFRESH_ORDER_RANGE = """
+UPDATE customer_stats SET
+    first_order_at = (SELECT MIN(created_at) FROM orders WHERE orders.customer_id = customer_stats.customer_id),
+    last_order_at = (SELECT MAX(created_at) FROM orders WHERE orders.customer_id = customer_stats.customer_id)
+WHERE customer_id = ?
+"""
+
+_APPLY_DELTA = """
+INSERT INTO customer_stats (customer_id, order_count, cancelled_count, total_amount, float_order_count)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(customer_id) DO UPDATE SET
+    order_count = order_count + excluded.order_count,
+    cancelled_count = cancelled_count + excluded.cancelled_count,
+    total_amount = total_amount + excluded.total_amount,
+    float_order_count = float_order_count + excluded.float_order_count
+"""
+
+EMPTY_STATS = {'order_count': 0, 'past_cancellations': 0, 'total_amount': 0.0}
+
+# Segmentation input: changed customers plus stored segments due for review.
+# Only accounts in the customer list are segmented (admins who placed orders
+# have aggregates but are not customers, like the live path's role filter).
+# Columns: customer_id, created_at, email, first_name, last_name,
+#          order_count, total_amount, float_order_count, last_order_at
+_SEGMENT_INPUT = """
+WITH pending AS (
+    SELECT customer_id FROM customer_changes
+    UNION
+    SELECT customer_id FROM customer_segments WHERE review_at IS NOT NULL AND review_at <= ?
+)
+SELECT p.customer_id, c.created_at, c.email, c.first_name, c.last_name,
+       COALESCE(s.order_count, 0), COALESCE(s.total_amount, 0), COALESCE(s.float_order_count, 0), s.last_order_at
+FROM pending p
+JOIN customers c ON c.customer_id = p.customer_id
+LEFT JOIN customer_stats s ON s.customer_id = p.customer_id
+"""
+
+# Same columns as _SEGMENT_INPUT, then segment, confidence, posteriors
+_STORED_SEGMENTS = """
+SELECT g.customer_id, c.created_at, c.email, c.first_name, c.last_name,
+       COALESCE(s.order_count, 0), COALESCE(s.total_amount, 0), COALESCE(s.float_order_count, 0), s.last_order_at,
+       g.segment, g.confidence, g.posteriors
+FROM customer_segments g
+LEFT JOIN customers c ON c.customer_id = g.customer_id
+LEFT JOIN customer_stats s ON s.customer_id = g.customer_id
+"""
+
+
+def wall_clock_iso(value):
+    """
+    ISO timestamp -> sortable wall-clock text (zone dropped like
+    customer_segmentation's .replace(tzinfo=None)); None stays None
+    """
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        value = value.get('$date')
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00')).replace(tzinfo=None)
+    return parsed.isoformat(timespec='microseconds')
+
+
+def order_event_fields(record):
+    """(order_id, customer_id, status, total_amount, created_at, amount_is_float) from an order record"""
+    order_id = normalize_id(record.get('order_id') or record.get('_id'))
+    customer_id = normalize_id(
+        record.get('customer_id') or record.get('customerId') or record.get('customer') or record.get('user')
+    )
+    if not order_id or not customer_id:
+        raise ValueError('Order event needs an order id and a customer id')
+    amount = record.get('total_amount', record.get('totalAmount', 0))
+    created_at = wall_clock_iso(record.get('created_at', record.get('createdAt')))
+    return order_id, customer_id, record.get('status'), float(amount or 0), created_at, int(type(amount) is float)
+
+
+def _now_iso():
+    return datetime.now().isoformat(timespec='microseconds')
+
+
+def customer_fields(record):
+    """(customer_id, created_at, email, first_name, last_name) from a customer record"""
+    customer_id = normalize_id(record.get('customer_id') or record.get('_id'))
+    if not customer_id:
+        raise ValueError('Customer record needs an id')
+    return (
+        customer_id,
+        wall_clock_iso(record.get('created_at', record.get('createdAt'))),
+        record.get('email'),
+        record.get('firstName'),
+        record.get('lastName')
+    )
+
+
+class CustomerFeatureStore:
+    """SQLite-backed per-customer aggregates; safe to share between threads"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(_SCHEMA)
+            self._migrate()
+
+    def _migrate(self):
+        for table, columns in _ADDED_COLUMNS.items():
+            existing = {row[1] for row in self._conn.execute(f'PRAGMA table_info({table})')}
+            for column, declaration in columns.items():
+                if column not in existing:
+                    self._conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {declaration}')
+        self._conn.commit()
+
+    def _mark_changed(self, customer_id):
+        self._conn.execute('INSERT OR IGNORE INTO customer_changes (customer_id) VALUES (?)', (customer_id,))
+
+    def _apply(self, order_id, customer_id, status, total_amount, created_at, amount_is_float):
+        """Apply one order's change inside the caller's transaction; False if unchanged"""
+        previous = self._conn.execute(
+            'SELECT customer_id, status, total_amount, created_at, amount_is_float FROM orders WHERE order_id = ?',
+            (order_id,)
+        ).fetchone()
+        if created_at is None:
+            # An order without a timestamp counts as placed when it was first seen
+            created_at = previous[3] if previous is not None and previous[3] else _now_iso()
+        if previous == (customer_id, status, total_amount, created_at, amount_is_float):
+            return False
+
+        if previous is not None:
+            old_customer, old_status, old_amount, _, old_is_float = previous
+            self._conn.execute(_APPLY_DELTA, (
+                old_customer, -1, -int(old_status == CANCELLED_STATUS), -old_amount, -old_is_float
+            ))
+        self._conn.execute(_APPLY_DELTA, (
+            customer_id, 1, int(status == CANCELLED_STATUS), total_amount, amount_is_float
+        ))
+        self._conn.execute(
+            'INSERT OR REPLACE INTO orders (order_id, customer_id, status, total_amount, created_at, amount_is_float) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (order_id, customer_id, status, total_amount, created_at, amount_is_float)
+        )
+
+        # First / last order are not invertible deltas: re-read them (indexed by customer)
+        affected = {customer_id} if previous is None else {customer_id, previous[0]}
+        for customer in affected:
+            self._conn.execute(_REFRESH_ORDER_RANGE, (customer,))
+            self._mark_changed(customer)
+        return True
+
+    def record_order(self, record):
+        """Apply an order created / updated event; returns True if anything changed"""
+        return self.record_orders([record])['applied'] == 1
+
+    def record_orders(self, records):
+        """Apply a batch of order events in one transaction"""
+        applied = 0
+        received = 0
+        with self._lock, self._conn:
+            for record in records:
+                received += 1
+                if self._apply(*order_event_fields(record)):
+                    applied += 1
+        return {'received': received, 'applied': applied}
+
+    def delete_order(self, order_id):
+        """Remove an order (e.g. hard-deleted in the main database)"""
+        order_id = normalize_id(order_id)
+        with self._lock, self._conn:
+            previous = self._conn.execute(
+                'SELECT customer_id, status, total_amount, amount_is_float FROM orders WHERE order_id = ?',
+                (order_id,)
+            ).fetchone()
+            if previous is None:
+                return False
+            customer_id, status, amount, is_float = previous
+            self._conn.execute(_APPLY_DELTA, (customer_id, -1, -int(status == CANCELLED_STATUS), -amount, -is_float))
+            self._conn.execute('DELETE FROM orders WHERE order_id = ?', (order_id,))
+            self._conn.execute(_REFRESH_ORDER_RANGE, (customer_id,))
+            self._mark_changed(customer_id)
+            return True
+
+    def record_customers(self, records):
+        """Insert / update customer records (created date, display fields)"""
+        applied = 0
+        received = 0
+        with self._lock, self._conn:
+            for record in records:
+                received += 1
+                fields = customer_fields(record)
+                previous = self._conn.execute(
+                    'SELECT customer_id, created_at, email, first_name, last_name FROM customers WHERE customer_id = ?',
+                    (fields[0],)
+                ).fetchone()
+                if previous == fields:
+                    continue
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO customers (customer_id, created_at, email, first_name, last_name) '
+                    'VALUES (?, ?, ?, ?, ?)', fields
+                )
+                self._mark_changed(fields[0])
+                applied += 1
+        return {'received': received, 'applied': applied}
+
+    def remove_customers(self, customer_ids):
+        """
+        Forget accounts that are no longer customers (deleted, or no longer
+        role 'user'): their stored segment leaves the summary. Order
+        aggregates stay, cancellation scoring still uses them.
+        """
+        ids = list({normalize_id(c) for c in customer_ids} - {None})
+        removed = 0
+        with self._lock, self._conn:
+            for start in range(0, len(ids), 900):
+                chunk = ids[start:start + 900]
+                placeholders = ",".join("?" * len(chunk))
+                deltas = {}
+                for segment, confidence in self._conn.execute(
+                        f'SELECT segment, confidence FROM customer_segments WHERE customer_id IN ({placeholders})', chunk):
+                    count, total = deltas.get(segment, (0, 0))
+                    deltas[segment] = (count + 1, total + round(confidence * 10000))
+                self._conn.executemany(
+                    'UPDATE segment_summary SET count = count - ?, confidence_e4 = confidence_e4 - ? WHERE segment = ?',
+                    [(count, total, segment) for segment, (count, total) in deltas.items()]
+                )
+                self._conn.execute(f'DELETE FROM customer_segments WHERE customer_id IN ({placeholders})', chunk)
+                self._conn.execute(f'DELETE FROM customer_changes WHERE customer_id IN ({placeholders})', chunk)
+                removed += self._conn.execute(f'DELETE FROM customers WHERE customer_id IN ({placeholders})', chunk).rowcount
+        return {'received': len(ids), 'removed': removed}
+
+    def get(self, customer_id):
+        """Aggregates for one customer (zeros for an unknown customer)"""
+        return self.get_many([customer_id]).get(str(customer_id), dict(EMPTY_STATS))
+
+    def get_many(self, customer_ids):
+        """{customer_id: aggregates} for the requested customers"""
+        ids = list({str(c) for c in customer_ids})
+        result = {c: dict(EMPTY_STATS) for c in ids}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(ids), 900):
+                chunk = ids[start:start + 900]
+                rows = self._conn.execute(
+                    'SELECT customer_id, order_count, cancelled_count, total_amount FROM customer_stats '
+                    f'WHERE customer_id IN ({",".join("?" * len(chunk))})', chunk
+                )
+                for customer_id, order_count, cancelled_count, total_amount in rows:
+                    result[customer_id] = {
+                        'order_count': order_count,
+                        'past_cancellations': cancelled_count,
+                        'total_amount': total_amount
+                    }
+        return result
+
+    def rebuild(self, records, customer_records=None):
+        """Recompute every aggregate from a full order export (and optionally the customer list)"""
+        rebuilt_at = _now_iso()
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM orders')
+            self._conn.execute('DELETE FROM customer_stats')
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO orders (order_id, customer_id, status, total_amount, created_at, amount_is_float) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (fields[:4] + (fields[4] or rebuilt_at,) + fields[5:]
+                 for fields in map(order_event_fields, records))
+            )
+            self._conn.execute(
+                'INSERT INTO customer_stats (customer_id, order_count, cancelled_count, total_amount, '
+                'float_order_count, first_order_at, last_order_at) '
+                'SELECT customer_id, COUNT(*), SUM(status = ?), SUM(total_amount), SUM(amount_is_float), '
+                'MIN(created_at), MAX(created_at) FROM orders GROUP BY customer_id',
+                (CANCELLED_STATUS,)
+            )
+            if customer_records is not None:
+                self._conn.execute('DELETE FROM customers')
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO customers (customer_id, created_at, email, first_name, last_name) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (customer_fields(record) for record in customer_records)
+                )
+            # Stored segments are recomputed from scratch on the next refresh
+            self._conn.execute('DELETE FROM customer_segments')
+            self._conn.execute('DELETE FROM segment_summary')
+            self._conn.execute('DELETE FROM customer_changes')
+            self._conn.execute(
+                'INSERT OR IGNORE INTO customer_changes (customer_id) '
+                'SELECT customer_id FROM customer_stats UNION SELECT customer_id FROM customers'
+            )
+            meta = {'rebuilt_at': rebuilt_at}
+            if customer_records is not None:
+                meta['customers_rebuilt_at'] = rebuilt_at
+            self._conn.executemany('INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)',
+                                   ((key, json.dumps(value)) for key, value in meta.items()))
+        return self.stats()
+
+    def refresh_segments(self, classify, now_iso):
+        """
+        Reclassify changed customers and those whose review time has passed
+
+        classify(rows) receives the pending aggregate rows (see _SEGMENT_INPUT)
+        and returns [(customer_id, segment, confidence, posteriors, review_at)].
+        Runs in one write transaction, so events from other processes wait
+        until the changed-customer set has been consumed.
+        """
+        with self._lock, self._conn:
+            self._conn.execute('BEGIN IMMEDIATE')
+            rows = self._conn.execute(_SEGMENT_INPUT, (now_iso,)).fetchall()
+            if not rows:
+                # Changes to accounts that are not customers
+                self._conn.execute('DELETE FROM customer_changes')
+                return 0
+            results = classify(rows)
+
+            previous = {}
+            ids = [r[0] for r in results]
+            for start in range(0, len(ids), 900):
+                chunk = ids[start:start + 900]
+                for customer_id, segment, confidence in self._conn.execute(
+                        'SELECT customer_id, segment, confidence FROM customer_segments '
+                        f'WHERE customer_id IN ({",".join("?" * len(chunk))})', chunk):
+                    previous[customer_id] = (segment, confidence)
+
+            # Running per-segment totals; confidences have 4 decimals, so sum them as integers
+            deltas = {}
+            for customer_id, segment, confidence, _, _ in results:
+                if customer_id in previous:
+                    old_segment, old_confidence = previous[customer_id]
+                    count, total = deltas.get(old_segment, (0, 0))
+                    deltas[old_segment] = (count - 1, total - round(old_confidence * 10000))
+                count, total = deltas.get(segment, (0, 0))
+                deltas[segment] = (count + 1, total + round(confidence * 10000))
+            self._conn.executemany(
+                'INSERT INTO segment_summary (segment, count, confidence_e4) VALUES (?, ?, ?) '
+                'ON CONFLICT(segment) DO UPDATE SET count = count + excluded.count, '
+                'confidence_e4 = confidence_e4 + excluded.confidence_e4',
+                [(segment, count, total) for segment, (count, total) in deltas.items()]
+            )
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO customer_segments (customer_id, segment, confidence, posteriors, review_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(cid, seg, conf, json.dumps(post), review) for cid, seg, conf, post, review in results]
+            )
+            self._conn.execute('DELETE FROM customer_changes')
+            return len(results)
+
+    def segment_summary(self):
+        """{segment: (count, confidence_sum_e4)} maintained by refresh_segments"""
+        with self._lock:
+            return {
+                segment: (count, confidence_e4)
+                for segment, count, confidence_e4 in self._conn.execute(
+                    'SELECT segment, count, confidence_e4 FROM segment_summary')
+            }
+
+    def stored_segments(self, customer_ids=None, limit=None, offset=0):
+        """Stored segments joined with the aggregates needed for fresh metrics"""
+        query = _STORED_SEGMENTS
+        params = []
+        if customer_ids is not None:
+            ids = [str(c) for c in customer_ids]
+            query += f' WHERE g.customer_id IN ({",".join("?" * len(ids))})' if ids else ' WHERE 0'
+            params.extend(ids)
+        query += ' ORDER BY c.created_at DESC, g.customer_id'
+        if limit is not None:
+            query += ' LIMIT ? OFFSET ?'
+            params.extend([int(limit), int(offset)])
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    def _meta(self):
+        return {key: json.loads(value) for key, value in self._conn.execute('SELECT key, value FROM store_meta')}
+
+    def status(self):
+        """
+        Whether the store can replace live history queries: orders are
+        ready after a rebuild, customers after a rebuild with the customer list
+        """
+        with self._lock:
+            meta = self._meta()
+        return {
+            'ready': 'rebuilt_at' in meta,
+            'customers_ready': 'customers_rebuilt_at' in meta,
+            'rebuilt_at': meta.get('rebuilt_at'),
+            'customers_rebuilt_at': meta.get('customers_rebuilt_at')
+        }
+
+    def stats(self):
+        with self._lock:
+            orders = self._conn.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+            customers = self._conn.execute('SELECT COUNT(*) FROM customer_stats WHERE order_count > 0').fetchone()[0]
+            pending = self._conn.execute('SELECT COUNT(*) FROM customer_changes').fetchone()[0]
+        return {
+            'orders': orders, 'customers': customers, 'pending_segments': pending,
+            **self.status(), 'db_path': self.db_path
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Opened once per process (shared by the classifier and the worker daemon)
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_feature_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CustomerFeatureStore()
+    return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-customer order aggregates for cancellation scoring')
+    parser.add_argument('command', choices=['rebuild', 'record', 'remove', 'customers', 'get', 'stats'])
+    parser.add_argument('arg', nargs='?',
+                        help='Export file for rebuild (default stdin), customer id for get or order id for remove')
+    parser.add_argument('--customers', help='Customer export for rebuild (JSON array or NDJSON)')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH)
+    args = parser.parse_args()
+
+    from ml_stream_io import iter_json_records
+
+    store = CustomerFeatureStore(args.db)
+    try:
+        if args.command == 'rebuild':
+            customer_file = open(args.customers, 'r', encoding='utf-8') if args.customers else None
+            customer_records = iter_json_records(customer_file) if customer_file else None
+            try:
+                if args.arg:
+                    with open(args.arg, 'r', encoding='utf-8') as f:
+                        result = store.rebuild(iter_json_records(f), customer_records)
+                else:
+                    result = store.rebuild(iter_json_records(sys.stdin), customer_records)
+            finally:
+                if customer_file:
+                    customer_file.close()
+        elif args.command == 'record':
+            result = store.record_orders(iter_json_records(sys.stdin))
+        elif args.command == 'remove':
+            if not args.arg:
+                parser.error('remove needs an order id')
+            result = {'removed': store.delete_order(args.arg)}
+        elif args.command == 'customers':
+            result = store.record_customers(iter_json_records(sys.stdin))
+        elif args.command == 'get':
+            if not args.arg:
+                parser.error('get needs a customer id')
+            result = store.get(args.arg)
+        else:
+            result = store.stats()
+        print(json.dumps({'success': True, **result}))
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,29 @@
 import json
+import re
 import sys
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple
 import math
+import numpy as np
+
+from ml_stream_io import read_request, write_response
+
+# Zone suffix the per-customer path drops with .replace(tzinfo=None) (wall clock kept)
+_TZ_SUFFIX = re.compile(r'(?:Z|[+-]\d{2}(?::?\d{2}(?::?\d{2}(?:\.\d+)?)?)?)$')
+_US_PER_DAY = 86_400_000_000
+_MISSING = object()  # createdAt key absent: the per-customer path uses datetime.now()
+
+
+def _strip_zone(value: str) -> str:
+    """Drop a trailing zone designator, keeping the wall-clock time"""
+    if value.endswith('Z'):
+        return value[:-1]
+    if value[-6:-5] in ('+', '-') and value[-3:-2] == ':' and 'T' in value:
+        return value[:-6]
+    t = value.find('T')
+    if t >= 0 and ('+' in value or value.rfind('-') > t):
+        return _TZ_SUFFIX.sub('', value)
+    return value
 
 class BayesianCustomerSegmenter:
     """
@@ -158,6 +179,259 @@ class BayesianCustomerSegmenter:
         else:
             return 0.05
     
+    def calculate_metrics_columnar(self, customers_data: List[Dict], now: datetime = None) -> Dict[str, np.ndarray]:
+        """
+        calculate_customer_metrics for many customers at once
+
+        All orders are flattened into arrays and aggregated per customer with
+        bincount / maximum.at. Raises ValueError for input only the
+        per-customer path can interpret (segment_customers then falls back).
+        """
+        now = np.datetime64(now or datetime.now(), 'us')
+        n = len(customers_data)
+
+        order_counts = np.empty(n, dtype=np.int64)
+        amounts = []
+        order_dates = []
+        for i, customer in enumerate(customers_data):
+            orders = customer.get('orders', [])
+            order_counts[i] = len(orders)
+            for order in orders:
+                amounts.append(order.get('totalAmount', 0))
+                order_dates.append(order.get('createdAt', _MISSING))
+
+        group = np.repeat(np.arange(n), order_counts)
+
+        amount_values = np.array(amounts)
+        if len(amounts) == 0 or amount_values.dtype.kind in 'iu':
+            amount_values = amount_values.astype(np.float64)
+            float_orders = np.zeros(len(amounts), dtype=bool)
+        elif amount_values.dtype.kind == 'f':
+            # sum() stays an int for customers whose amounts are all ints
+            float_orders = np.array([type(a) is not int for a in amounts], dtype=bool)
+        else:
+            raise ValueError('Non-numeric order amounts')
+
+        total_spend = np.bincount(group, weights=amount_values, minlength=n)
+        spend_is_float = np.bincount(group, weights=float_orders, minlength=n) > 0
+
+        created = self._parse_wall_clock([c.get('createdAt', _MISSING) for c in customers_data], now)
+
+        # NaT (the int64 minimum) stays for customers without orders
+        last_order = np.full(n, np.iinfo(np.int64).min, dtype=np.int64)
+        np.maximum.at(last_order, group, self._parse_wall_clock(order_dates, now).astype(np.int64))
+
+        return self.metrics_from_aggregates(
+            order_counts, total_spend, spend_is_float, created, last_order.view('datetime64[us]'), now
+        )
+
+    def metrics_from_aggregates(self, order_counts: np.ndarray, total_spend: np.ndarray,
+                                spend_is_float: np.ndarray, created: np.ndarray,
+                                last_order: np.ndarray, now) -> Dict[str, np.ndarray]:
+        """
+        calculate_customer_metrics fields from per-customer running aggregates
+
+        created / last_order are datetime64 wall-clock arrays; NaT created
+        means "now" (no createdAt), NaT last_order means no orders.
+        """
+        now = np.datetime64(now, 'us')
+        created = np.where(np.isnat(created), now, created)
+        age = (now - created).astype(np.int64) // _US_PER_DAY
+        has_orders = order_counts > 0
+        account_age_days = np.where(has_orders, age + 1, age)
+        days_since_last_order = np.where(
+            has_orders & ~np.isnat(last_order),
+            (now - np.where(np.isnat(last_order), now, last_order)).astype(np.int64) // _US_PER_DAY,
+            999999
+        )
+
+        safe_counts = np.maximum(order_counts, 1)
+        return {
+            'order_count': order_counts,
+            'total_spend': total_spend,
+            'spend_is_float': spend_is_float,
+            'order_frequency_per_month': np.where(
+                has_orders & (account_age_days > 0),
+                order_counts * 30 / np.where(account_age_days > 0, account_age_days, 1),
+                0.0
+            ),
+            'frequency_is_float': has_orders & (account_age_days > 0),
+            'avg_order_value': np.where(has_orders, total_spend / safe_counts, 0.0),
+            'days_since_last_order': days_since_last_order,
+            'account_age_days': account_age_days
+        }
+
+    @staticmethod
+    def _parse_wall_clock(values, now):
+        """ISO strings -> datetime64[us] wall clock; absent values mean now"""
+        stripped = []
+        missing = []
+        for i, v in enumerate(values):
+            if type(v) is str and v:
+                stripped.append(v[:-1] if v[-1] == 'Z' else _strip_zone(v))
+            elif v is _MISSING:
+                stripped.append('')
+                missing.append(i)
+            else:
+                raise ValueError('Timestamp is not an ISO string')
+        parsed = np.array(stripped, dtype='datetime64[us]') if stripped else np.array([], dtype='datetime64[us]')
+        parsed[missing] = now
+        if np.isnat(parsed).any():
+            raise ValueError('Unparseable timestamp')
+        return parsed
+
+    def calculate_likelihoods_columnar(self, metrics: Dict[str, np.ndarray]) -> np.ndarray:
+        """calculate_likelihoods as vectorized masks; columns follow self.segments"""
+        order_freq = metrics['order_frequency_per_month']
+        total_spend = metrics['total_spend']
+        days_since_order = metrics['days_since_last_order']
+        account_age = metrics['account_age_days']
+        avg_order_value = metrics['avg_order_value']
+
+        inactive = np.select(
+            [(order_freq < 0.2) & (total_spend < 500),
+             days_since_order > 90,
+             (order_freq < 0.5) & (days_since_order > 60)],
+            [0.95, 0.80, 0.70], 0.05
+        )
+
+        loyal = (
+            np.select([order_freq >= 3, order_freq >= 2], [0.35, 0.20], 0.0)
+            + np.select([total_spend > 5000, total_spend > 2000], [0.40, 0.25], 0.0)
+        ) + np.select([avg_order_value > 1000, avg_order_value > 500], [0.25, 0.10], 0.0)
+        loyal = np.minimum(0.95, loyal)
+
+        regular = (
+            np.select([(order_freq >= 1) & (order_freq < 3), order_freq >= 3], [0.40, 0.20], 0.0)
+            + np.select([(total_spend >= 500) & (total_spend < 2000), total_spend >= 2000], [0.35, 0.20], 0.0)
+        ) + np.select([days_since_order < 60, days_since_order < 90], [0.25, 0.10], 0.0)
+        regular = np.minimum(0.90, regular)
+
+        new = np.select(
+            [(account_age < 30) & (order_freq > 0),
+             (account_age < 30) & (order_freq == 0),
+             (account_age < 60) & (order_freq < 0.5),
+             (total_spend < 1000) & (order_freq < 1)],
+            [0.85, 0.70, 0.50, 0.35], 0.05
+        )
+
+        by_segment = {'New': new, 'Regular': regular, 'Loyal': loyal, 'Inactive': inactive}
+        return np.maximum(0.001, np.column_stack([by_segment[s] for s in self.segments]))
+
+    def classify_columnar(self, customers_data: List[Dict], now: datetime = None) -> List[Dict]:
+        """classify() for many customers at once; same details dicts in the same order"""
+        return self.classify_metrics(self.calculate_metrics_columnar(customers_data, now))
+
+    def classify_aggregates(self, order_counts: np.ndarray, total_spend: np.ndarray,
+                            spend_is_float: np.ndarray, created: np.ndarray,
+                            last_order: np.ndarray, now) -> Tuple[List[Dict], np.ndarray]:
+        """
+        classify() from stored per-customer aggregates instead of order lists
+
+        Also returns review_at: the earliest moment the passage of time alone
+        can move a customer across one of the likelihood thresholds (account
+        age 30 / 60 days, 60 / 90 days since the last order, order frequency
+        0.2 / 0.5 / 1 / 2 / 3 per month). Until then the stored segment stays
+        exact; NaT means only a new event can change it.
+        """
+        now = np.datetime64(now, 'us')
+        metrics = self.metrics_from_aggregates(order_counts, total_spend, spend_is_float, created, last_order, now)
+        return self.classify_metrics(metrics), self._review_at(metrics, created, last_order, now)
+
+    @staticmethod
+    def _review_at(metrics: Dict[str, np.ndarray], created: np.ndarray, last_order: np.ndarray, now) -> np.ndarray:
+        """Earliest future threshold crossing per customer (see classify_aggregates)"""
+        day = np.timedelta64(_US_PER_DAY, 'us')
+        order_counts = metrics['order_count']
+        has_orders = order_counts > 0
+        age_offset = has_orders.astype(np.int64)  # account_age_days is +1 with orders
+        candidates = []
+
+        # days_since_last_order predicates flip at 60/61 and 90/91
+        for days in (60, 61, 90, 91):
+            at = last_order + days * day
+            candidates.append(np.where(has_orders & ~np.isnat(last_order), at, np.datetime64('NaT')))
+
+        # account_age_days predicates: age < 30, age < 60 and every age where
+        # order_count * 30 / age crosses a frequency threshold (both the
+        # floor and the day after, so float rounding cannot skip a flip)
+        age_values = [np.full(len(order_counts), 1), np.full(len(order_counts), 30), np.full(len(order_counts), 60)]
+        for threshold in (0.2, 0.5, 1, 2, 3):
+            boundary = np.floor(order_counts * 30 / threshold).astype(np.int64)
+            age_values.extend([boundary, boundary + 1])
+        for age in age_values:
+            at = created + (age - age_offset) * day
+            candidates.append(np.where(~np.isnat(created), at, np.datetime64('NaT')))
+
+        stacked = np.column_stack(candidates).astype('datetime64[us]')
+        stacked = np.where(stacked > now, stacked, np.datetime64('NaT'))
+        # NaT-aware minimum over the candidates
+        as_int = stacked.view(np.int64).copy()
+        as_int[np.isnat(stacked)] = np.iinfo(np.int64).max
+        earliest = as_int.min(axis=1)
+        return np.where(
+            earliest == np.iinfo(np.int64).max, np.datetime64('NaT'), earliest.view('datetime64[us]')
+        ).astype('datetime64[us]')
+
+    def classify_metrics(self, metrics: Dict[str, np.ndarray]) -> List[Dict]:
+        """Posteriors and per-customer details from columnar metrics"""
+        likelihoods = self.calculate_likelihoods_columnar(metrics)
+
+        posteriors = likelihoods * np.array([self.priors[s] for s in self.segments])
+        total = posteriors[:, 0]
+        for column in range(1, len(self.segments)):
+            total = total + posteriors[:, column]
+        posteriors = posteriors / total[:, None]
+        predicted = np.argmax(posteriors, axis=1).tolist()  # first maximum, like max(dict)
+        posterior_rows = posteriors.tolist()
+
+        details = []
+        for i, customer_metrics in enumerate(self.metrics_dicts(metrics)):
+            row = posterior_rows[i]
+            details.append({
+                'segment': self.segments[predicted[i]],
+                'confidence': round(row[predicted[i]], 4),
+                'posteriors': dict(zip(self.segments, (round(p, 4) for p in row))),
+                'metrics': customer_metrics
+            })
+        return details
+
+    @staticmethod
+    def metrics_dicts(metrics: Dict[str, np.ndarray]) -> List[Dict]:
+        """Per-customer metrics dicts exactly as calculate_customer_metrics returns them"""
+        # Plain Python scalars for the per-customer dicts
+        order_counts = metrics['order_count'].tolist()
+        total_spend = metrics['total_spend'].tolist()
+        spend_is_float = metrics['spend_is_float'].tolist()
+        frequency = metrics['order_frequency_per_month'].tolist()
+        frequency_is_float = metrics['frequency_is_float'].tolist()
+        avg_order_value = metrics['avg_order_value'].tolist()
+        days_since_last_order = metrics['days_since_last_order'].tolist()
+        account_age_days = metrics['account_age_days'].tolist()
+
+        dicts = []
+        for i in range(len(order_counts)):
+            if order_counts[i]:
+                customer_metrics = {
+                    'order_count': order_counts[i],
+                    'total_spend': total_spend[i] if spend_is_float[i] else int(total_spend[i]),
+                    'order_frequency_per_month': frequency[i] if frequency_is_float[i] else 0,
+                    'avg_order_value': avg_order_value[i],
+                    'days_since_last_order': days_since_last_order[i],
+                    'account_age_days': account_age_days[i]
+                }
+            else:
+                customer_metrics = {
+                    'order_count': 0,
+                    'total_spend': 0,
+                    'order_frequency_per_month': 0,
+                    'avg_order_value': 0,
+                    'days_since_last_order': 999999,
+                    'account_age_days': account_age_days[i]
+                }
+            dicts.append(customer_metrics)
+        return dicts
+
     def classify(self, customer_data: Dict) -> Tuple[str, Dict]:
         """Classify customer into a segment using Bayesian inference"""
         metrics = self.calculate_customer_metrics(customer_data)
@@ -183,8 +457,8 @@ class BayesianCustomerSegmenter:
         }
 
 
-def segment_customers(customers_data: List[Dict]) -> List[Dict]:
-    """Segment a list of customers"""
+def segment_customers_iterative(customers_data: List[Dict]) -> List[Dict]:
+    """Segment a list of customers one at a time"""
     segmenter = BayesianCustomerSegmenter()
     results = []
     
@@ -201,6 +475,27 @@ def segment_customers(customers_data: List[Dict]) -> List[Dict]:
     return results
 
 
+def segment_customers(customers_data: List[Dict]) -> List[Dict]:
+    """Segment a list of customers (columnar; same results as segment_customers_iterative)"""
+    segmenter = BayesianCustomerSegmenter()
+    try:
+        all_details = segmenter.classify_columnar(customers_data)
+    except ValueError:
+        # Timestamps / amounts the vectorized parser does not take: per-customer path
+        return segment_customers_iterative(customers_data)
+    
+    return [
+        {
+            '_id': customer.get('_id'),
+            'email': customer.get('email'),
+            'firstName': customer.get('firstName'),
+            'lastName': customer.get('lastName'),
+            **details
+        }
+        for customer, details in zip(customers_data, all_details)
+    ]
+
+
 def get_segment_summary(results: List[Dict]) -> Dict:
     """Get summary statistics of segmentation"""
     summary = {
@@ -231,30 +526,159 @@ def get_segment_summary(results: List[Dict]) -> Dict:
     return summary
 
 
+def _aggregate_columns(rows):
+    """customer_feature_store segment rows -> metrics_from_aggregates arguments"""
+    def dates(values):
+        return np.array([v or 'NaT' for v in values], dtype='datetime64[us]')
+    return (
+        np.array([r[5] for r in rows], dtype=np.int64),
+        np.array([r[6] for r in rows], dtype=np.float64),
+        np.array([r[7] > 0 for r in rows], dtype=bool),
+        dates([r[1] for r in rows]),
+        dates([r[8] for r in rows])
+    )
+
+
+def refresh_segments(store=None, now: datetime = None) -> int:
+    """
+    Reclassify, from stored aggregates, only the customers whose aggregates
+    changed or whose review time has passed; returns how many were reclassified
+    """
+    from customer_feature_store import get_feature_store
+    store = store or get_feature_store()
+    now = now or datetime.now()
+    segmenter = BayesianCustomerSegmenter()
+
+    def classify(rows):
+        details, review_at = segmenter.classify_aggregates(*_aggregate_columns(rows), now)
+        review_iso = np.datetime_as_string(review_at, unit='us').tolist()
+        return [
+            (row[0], d['segment'], d['confidence'], d['posteriors'], None if review == 'NaT' else review)
+            for row, d, review in zip(rows, details, review_iso)
+        ]
+
+    return store.refresh_segments(classify, now.isoformat(timespec='microseconds'))
+
+
+def get_incremental_summary(store=None, now: datetime = None) -> Dict:
+    """get_segment_summary() from the running per-segment totals"""
+    from customer_feature_store import get_feature_store
+    store = store or get_feature_store()
+    refresh_segments(store, now)
+
+    totals = store.segment_summary()
+    total = sum(count for count, _ in totals.values())
+    summary = {}
+    for segment in BayesianCustomerSegmenter().segments:
+        count, confidence_e4 = totals.get(segment, (0, 0))
+        summary[segment] = {
+            'count': count,
+            'avg_confidence': round(confidence_e4 / 10000 / count, 4) if count > 0 else 0,
+            'percentage': round((count / total * 100) if total > 0 else 0, 2)
+        }
+    return summary
+
+
+def get_incremental_segments(store=None, customer_ids=None, limit=None, offset=0, now: datetime = None) -> List[Dict]:
+    """Stored segments (same result dicts as segment_customers) with metrics as of now"""
+    from customer_feature_store import get_feature_store
+    store = store or get_feature_store()
+    now = now or datetime.now()
+    refresh_segments(store, now)
+
+    rows = store.stored_segments(customer_ids, limit, offset)
+    if not rows:
+        return []
+    segmenter = BayesianCustomerSegmenter()
+    metrics = segmenter.metrics_from_aggregates(*_aggregate_columns(rows), now)
+    return [
+        {
+            '_id': row[0],
+            'email': row[2],
+            'firstName': row[3],
+            'lastName': row[4],
+            'segment': row[9],
+            'confidence': row[10],
+            'posteriors': json.loads(row[11]),
+            'metrics': customer_metrics
+        }
+        for row, customer_metrics in zip(rows, segmenter.metrics_dicts(metrics))
+    ]
+
+
+def _handle_store_action(request: Dict) -> Dict:
+    """Incremental segmentation over customer_feature_store aggregates"""
+    from customer_feature_store import get_feature_store
+    store = get_feature_store()
+    action = request['action']
+
+    if action == 'record_orders':
+        return {'success': True, **store.record_orders(request.get('orders', []))}
+    if action == 'record_customers':
+        return {'success': True, **store.record_customers(request.get('customers', []))}
+    if action == 'remove_customers':
+        return {'success': True, **store.remove_customers(request.get('customer_ids', []))}
+    if action == 'refresh':
+        return {'success': True, 'reclassified': refresh_segments(store)}
+    if action == 'summary':
+        summary = get_incremental_summary(store)
+        return {
+            'success': True,
+            'summary': summary,
+            'totalCustomers': sum(s['count'] for s in summary.values())
+        }
+    if action == 'segments':
+        results = get_incremental_segments(
+            store, request.get('customer_ids'), request.get('limit'), request.get('offset', 0)
+        )
+        # Customers not in the store yet (with their orders) are segmented live alongside
+        if request.get('live_customers'):
+            results.extend(segment_customers(request['live_customers']))
+        return {
+            'success': True,
+            'customers': results,
+            'summary': get_segment_summary(results)
+        }
+    raise ValueError(f"Unknown action: {action}")
+
+
+def handle_request(input_data) -> Dict:
+    """
+    Segment a list of customers (with summary) or a single customer
+
+    A dict with an "action" uses the persisted aggregates instead:
+    record_orders / record_customers / remove_customers (events), refresh,
+    summary, segments
+    (optionally with "live_customers" the store does not know yet)
+    """
+    if isinstance(input_data, dict) and 'action' in input_data:
+        return _handle_store_action(input_data)
+
+    if isinstance(input_data, list):
+        results = segment_customers(input_data)
+        summary = get_segment_summary(results)
+        return {
+            'success': True,
+            'customers': results,
+            'summary': summary
+        }
+    
+    segment, details = BayesianCustomerSegmenter().classify(input_data)
+    return {
+        'success': True,
+        'customer': {
+            '_id': input_data.get('_id'),
+            'email': input_data.get('email'),
+            **details
+        }
+    }
+
+
 if __name__ == '__main__':
     try:
-        input_data = json.loads(sys.stdin.read())
-        
-        if isinstance(input_data, list):
-            results = segment_customers(input_data)
-            summary = get_segment_summary(results)
-            output = {
-                'success': True,
-                'customers': results,
-                'summary': summary
-            }
-        else:
-            segment, details = BayesianCustomerSegmenter().classify(input_data)
-            output = {
-                'success': True,
-                'customer': {
-                    '_id': input_data.get('_id'),
-                    'email': input_data.get('email'),
-                    **details
-                }
-            }
-        
-        print(json.dumps(output, indent=2))
+        input_data = read_request(sys.stdin)
+        output = handle_request(input_data)
+        write_response(output)
         
     except Exception as e:
         output = {
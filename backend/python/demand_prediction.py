@@ -1,9 +1,382 @@
 import json
+import os
 import sys
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple, Optional
 from dateutil.relativedelta import relativedelta
 
+import numpy as np
+import pandas as pd
+
+from ml_stream_io import read_request, write_response
+
+# Where predictions read sales from: 'orders' aggregates the orders in the
+# request, 'aggregates' reads the persisted monthly series (sales_aggregate_store.py)
+PREDICTION_SOURCES = ('orders', 'aggregates')
+DEFAULT_SOURCE = os.environ.get('DEMAND_PREDICTION_SOURCE', 'orders')
+AGGREGATE_ACTIONS = ('ingestOrders', 'aggregateStats')
+
+# Holt-Winters forecasting mode (additive trend and 12-month seasonality)
+FORECAST_ENABLED = os.environ.get('DEMAND_FORECAST', '0') == '1'
+FORECAST_ALPHA = float(os.environ.get('DEMAND_FORECAST_ALPHA', '0.3'))
+FORECAST_BETA = float(os.environ.get('DEMAND_FORECAST_BETA', '0.05'))
+FORECAST_GAMMA = float(os.environ.get('DEMAND_FORECAST_GAMMA', '0.2'))
+FORECAST_HORIZON = int(os.environ.get('DEMAND_FORECAST_HORIZON', '3'))
+FORECAST_HISTORY_MONTHS = int(os.environ.get('DEMAND_FORECAST_HISTORY_MONTHS', '36'))
+FORECAST_INTERVAL_Z = 1.96  # 95% prediction interval
+SEASON_LENGTH = 12
+# Next-month forecast this far above the recent average counts as a seasonal spike
+FORECAST_SPIKE_RATIO = 1.15
+
+
+def _month_keys(values, now_key: str) -> List[str]:
+    """YYYY-MM for each createdAt value, parsed the way the per-item loop did"""
+    keys = []
+    parse = datetime.fromisoformat
+    for value in values:
+        if not value:
+            keys.append(now_key)
+            continue
+        if isinstance(value, str):
+            # Handle ISO format datetime strings
+            try:
+                value = parse(value.replace('Z', '+00:00'))
+            except ValueError:
+                keys.append(now_key)
+                continue
+        keys.append(f"{value.year}-{value.month:02d}")
+    return keys
+
+
+def _month_number(month_key: str) -> int:
+    """Months since year 0 for a YYYY-MM key"""
+    year, month = month_key.split('-')
+    return int(year) * 12 + int(month) - 1
+
+
+def _month_key_from_number(number: int) -> str:
+    return f"{number // 12}-{str(number % 12 + 1).zfill(2)}"
+
+
+class SalesCube:
+    """
+    Product x month sales quantities built in one group-by
+
+    Rows follow first-seen product order, columns are the sorted YYYY-MM
+    keys. A cell is a sales month when at least one order line fell in it
+    (even with quantity 0), as in the nested-dict aggregation.
+    """
+
+    # Integer quantities are summed as float64 only while that stays exact
+    EXACT_INT_LIMIT = 2 ** 53
+
+    def __init__(self, product_ids: List[str], months: List[str], quantities: np.ndarray,
+                 lines: np.ndarray, totals: list, month_order: List[List[int]]):
+        self.product_ids = product_ids
+        self.product_index = {product_id: row for row, product_id in enumerate(product_ids)}
+        self.months = months
+        self.quantities = quantities
+        self.lines = lines          # order lines per cell
+        self.present = lines > 0
+        self.totals = totals
+        self.month_order = month_order  # per product: month columns in first-seen order
+        self._recent = None
+
+    @classmethod
+    def from_orders(cls, orders: List[Dict]) -> 'SalesCube':
+        """Build the cube from orders with populated items.product"""
+        product_ids, dates, quantities = [], [], []
+        for order in orders:
+            order_date = order.get('createdAt')
+            for item in order.get('items', []):
+                product = item.get('product', {})
+                product_id = str(product.get('_id', ''))
+                if not product_id:
+                    continue
+                product_ids.append(product_id)
+                # Month from product creation date or order date
+                dates.append(product.get('createdAt') or order_date)
+                quantities.append(item.get('quantity', 0))
+        return cls.from_lines(product_ids, dates, quantities)
+
+    @classmethod
+    def from_lines(cls, product_ids: List[str], dates: List, quantities: List) -> 'SalesCube':
+        """
+        Build the cube from order line columns: product id, sales date (ISO
+        string, datetime or None) and quantity per line
+        """
+        if not len(product_ids) == len(dates) == len(quantities):
+            raise ValueError('Order line columns must have the same length')
+        rows, unique_ids = pd.factorize(np.array(product_ids, dtype=object))
+        rows = rows.astype(np.int64)
+        product_ids = unique_ids.tolist()
+
+        # Parse each distinct date value once; None / NaN lines one at a time
+        now_key = DemandPredictionService.get_month_key(datetime.now())
+        date_codes, unique_dates = pd.factorize(pd.Series(dates, dtype=object).to_numpy())
+        missing = np.flatnonzero(date_codes < 0)
+        keys = _month_keys(unique_dates, now_key)
+        keys += _month_keys([dates[i] for i in missing.tolist()], now_key)
+        date_codes[missing] = np.arange(len(unique_dates), len(keys))
+
+        months = sorted(set(keys))
+        column_of = {month: column for column, month in enumerate(months)}
+        key_columns = np.array([column_of[key] for key in keys], dtype=np.int64)
+        n_products, n_months = len(product_ids), len(months)
+        cells = rows * n_months + key_columns[date_codes]
+
+        kinds = set(map(type, quantities))
+        if kinds <= {int} and sum(map(abs, quantities)) < cls.EXACT_INT_LIMIT or kinds == {float}:
+            # bincount accumulates in line order, so float sums match the sequential loop
+            weights = np.asarray(quantities, dtype=np.float64)
+            sums = np.bincount(cells, weights=weights, minlength=n_products * n_months)
+            totals = np.bincount(rows, weights=weights, minlength=n_products)
+            if kinds != {float}:
+                sums = sums.astype(np.int64)
+                totals = totals.astype(np.int64)
+            totals = totals.tolist()
+        else:
+            # Mixed or unusual quantity types: add them in Python, line by line
+            sums = np.zeros(n_products * n_months, dtype=object)
+            totals = [0] * n_products
+            for cell, row, quantity in zip(cells.tolist(), rows.tolist(), quantities):
+                sums[cell] += quantity
+                totals[row] += quantity
+        lines = np.bincount(cells, minlength=n_products * n_months)
+
+        # Month columns per product in first-seen order (the byMonth key order)
+        first_cells, first_lines = np.unique(cells, return_index=True)
+        month_order = [[] for _ in range(n_products)]
+        for cell in first_cells[np.argsort(first_lines, kind='stable')].tolist():
+            month_order[cell // n_months].append(cell % n_months)
+
+        return cls(product_ids, months, sums.reshape(n_products, n_months),
+                   lines.reshape(n_products, n_months), totals, month_order)
+
+    @classmethod
+    def from_monthly(cls, records: List[Tuple]) -> 'SalesCube':
+        """Cube over stored (product_id, month, quantity, lines) rows, grouped by product in month order"""
+        product_ids = list(dict.fromkeys(record[0] for record in records))
+        months = sorted({record[1] for record in records})
+        row_of = {product_id: row for row, product_id in enumerate(product_ids)}
+        column_of = {month: column for column, month in enumerate(months)}
+        values = [record[2] for record in records]
+        dtype = np.int64 if all(type(value) is int for value in values) else object
+        quantities = np.zeros((len(product_ids), len(months)), dtype=dtype)
+        lines = np.zeros((len(product_ids), len(months)), dtype=np.int64)
+        totals = [0] * len(product_ids)
+        month_order = [[] for _ in product_ids]
+        for product_id, month, quantity, line_count in records:
+            row, column = row_of[product_id], column_of[month]
+            quantities[row, column] = quantity
+            lines[row, column] = line_count
+            totals[row] += quantity
+            month_order[row].append(column)
+        return cls(product_ids, months, quantities, lines, totals, month_order)
+
+    def _get_recent(self):
+        """
+        Per product: number of sales months and the columns of the last three
+        sales months, oldest first (-1 where there are fewer), as arrays and lists
+        """
+        if self._recent is None:
+            n_months = self.present.sum(axis=1)
+            # Rank of each sales month counted from the newest (1 = newest)
+            from_newest = np.cumsum(self.present[:, ::-1], axis=1)[:, ::-1]
+            last = np.full((len(self.product_ids), 3), -1, dtype=np.int64)
+            if self.months:
+                for position, rank in enumerate((3, 2, 1)):
+                    mask = self.present & (from_newest == rank)
+                    last[:, position] = np.where(mask.any(axis=1), mask.argmax(axis=1), -1)
+            self._recent = (n_months, last, n_months.tolist(),
+                            [[c for c in columns if c >= 0] for columns in last.tolist()])
+        return self._recent
+
+    def series(self, product_id: str) -> Tuple[int, float, List[str], List]:
+        """(number of sales months, total, last <= 3 month keys, their quantities) for a product"""
+        row = self.product_index.get(str(product_id))
+        if row is None:
+            return 0, 0, [], []
+        _, _, n_months, last = self._get_recent()
+        columns = last[row]
+        values = self.quantities[row, columns].tolist() if columns else []
+        return n_months[row], self.totals[row], [self.months[c] for c in columns], values
+
+    def recent_summary(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Arrays over the cube rows: number of sales months, number of recent
+        months (<= 3) and their sales, oldest first and left-padded with 0
+        """
+        n_months, last, _, _ = self._get_recent()
+        values = np.zeros(last.shape)
+        if self.months:
+            gathered = np.take_along_axis(self.quantities, np.maximum(last, 0), axis=1).astype(np.float64)
+            values = np.where(last >= 0, gathered, 0.0)
+        return n_months, (last >= 0).sum(axis=1), values
+
+    def dense(self, first_month: str = None, last_month: str = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Quantities over every calendar month from first_month to last_month
+        (default: the cube's range), months without sales as 0
+        """
+        if not self.months and not (first_month and last_month):
+            return [], np.zeros((len(self.product_ids), 0))
+        first = _month_number(first_month or self.months[0])
+        last = _month_number(last_month or self.months[-1])
+        keys = [_month_key_from_number(number) for number in range(first, last + 1)]
+        matrix = np.zeros((len(self.product_ids), len(keys)))
+        positions = np.array([_month_number(month) - first for month in self.months], dtype=np.int64)
+        inside = (positions >= 0) & (positions < len(keys))
+        matrix[:, positions[inside]] = self.quantities[:, inside].astype(np.float64)
+        return keys, matrix
+
+    def to_sales_data(self) -> Dict:
+        """The {product_id: {'byMonth', 'total', 'orderCount'}} dict of the per-item loop"""
+        quantities = self.quantities.tolist()
+        line_counts = self.lines.sum(axis=1).tolist()
+        return {
+            product_id: {
+                'byMonth': {self.months[column]: quantities[row][column] for column in self.month_order[row]},
+                'total': self.totals[row],
+                'orderCount': line_counts[row]
+            }
+            for row, product_id in enumerate(self.product_ids)
+        }
+
+
+class SeasonalForecaster:
+    """
+    Additive Holt-Winters (level, trend, 12-month season) run on every row of
+    a product x month matrix at once: each time step is a handful of array
+    operations over all products.
+
+    Seeded from the first season (level = its mean, trend from the second
+    season when there is one); with less than a season of history the
+    seasonal term is left out. Prediction intervals use the one-step error
+    variance and the standard horizon multipliers of the additive model.
+    """
+
+    def __init__(self, alpha: float = FORECAST_ALPHA, beta: float = FORECAST_BETA, gamma: float = FORECAST_GAMMA,
+                 season_length: int = SEASON_LENGTH, horizon: int = FORECAST_HORIZON, z: float = FORECAST_INTERVAL_Z):
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.season_length = season_length
+        self.horizon = horizon
+        self.z = z
+
+    def forecast(self, history: np.ndarray, skip: int = 0) -> Dict[str, np.ndarray]:
+        """
+        history: (products, months) quantities, oldest first
+        Returns (products, horizon) arrays 'demand', 'lower', 'upper' (floored
+        at 0) for the horizon months after the first `skip` months past the
+        history, and the per-product one-step error 'sigma'
+        """
+        history = np.asarray(history, dtype=np.float64)
+        n, n_months = history.shape
+        m = self.season_length
+        alpha, beta = self.alpha, self.beta
+        seasonal = n_months >= m
+        gamma = self.gamma if seasonal else 0.0
+
+        if n_months == 0:
+            zeros = np.zeros((n, self.horizon))
+            return {'demand': zeros, 'lower': zeros.copy(), 'upper': zeros.copy(), 'sigma': np.zeros(n)}
+        if seasonal:
+            level = history[:, :m].mean(axis=1)
+            trend = (history[:, m:2 * m].mean(axis=1) - level) / m if n_months >= 2 * m else np.zeros(n)
+            season = history[:, :m] - level[:, None]
+            start = m
+        else:
+            level = history[:, 0].copy()
+            trend = np.zeros(n)
+            season = np.zeros((n, m))
+            start = 1
+
+        squared_errors = np.zeros(n)
+        for t in range(start, n_months):
+            observed = history[:, t]
+            slot = t % m
+            previous_season = season[:, slot]
+            squared_errors += (observed - (level + trend + previous_season)) ** 2
+            new_level = alpha * (observed - previous_season) + (1 - alpha) * (level + trend)
+            trend = beta * (new_level - level) + (1 - beta) * trend
+            season[:, slot] = gamma * (observed - new_level) + (1 - gamma) * previous_season
+            level = new_level
+
+        steps = n_months - start
+        if steps > 0:
+            sigma = np.sqrt(squared_errors / steps)
+        else:
+            sigma = history.std(axis=1)
+
+        horizons = np.arange(skip + 1, skip + self.horizon + 1)
+        slots = (n_months - 1 + horizons) % m
+        demand = level[:, None] + horizons[None, :] * trend[:, None] + season[:, slots]
+
+        # Var(h) = sigma^2 * (1 + sum_{j<h} c_j^2), c_j = alpha * (1 + j * beta) + gamma * [j % m == 0]
+        j = np.arange(1, skip + self.horizon)
+        c = alpha * (1 + j * beta) + gamma * (j % m == 0)
+        multipliers = np.sqrt(1 + np.concatenate([[0.0], np.cumsum(c ** 2)]))[skip:]
+        spread = self.z * sigma[:, None] * multipliers[None, :]
+        return {
+            'demand': np.maximum(demand, 0),
+            'lower': np.maximum(demand - spread, 0),
+            'upper': np.maximum(demand + spread, 0),
+            'sigma': sigma
+        }
+
+    @staticmethod
+    def current_month() -> str:
+        """YYYY-MM of today"""
+        return DemandPredictionService.get_month_key(datetime.now())
+
+    @staticmethod
+    def history_range(first_month: str, last_month: str = None) -> Tuple[str, str]:
+        """
+        The last FORECAST_HISTORY_MONTHS months of a first..last month range;
+        last_month defaults to the last complete month, so months without
+        sales up to now count as 0 (the current month is left out: its sales
+        so far would read as a drop)
+        """
+        if last_month is None:
+            last_month = _month_key_from_number(_month_number(SeasonalForecaster.current_month()) - 1)
+        start = max(_month_number(first_month), _month_number(last_month) - FORECAST_HISTORY_MONTHS + 1)
+        return _month_key_from_number(start), last_month
+
+    def forecast_cube(self, cube: SalesCube, first_month: str = None, last_month: str = None,
+                      product_ids: List[str] = None) -> Dict[str, Dict]:
+        """
+        {product_id: {'months', 'demand', 'lower', 'upper'}} for the cube's
+        products (or just product_ids) from the months first..last, by
+        default the last FORECAST_HISTORY_MONTHS months up to the last complete
+        month. Forecast months start after the current month.
+        """
+        if product_ids is not None:
+            product_ids = [p for p in map(str, product_ids) if p in cube.product_index]
+        else:
+            product_ids = cube.product_ids
+        if not product_ids:
+            return {}
+        if first_month is None or last_month is None:
+            first_month, last_month = self.history_range(first_month or cube.months[0], last_month)
+        _, history = cube.dense(first_month, last_month)
+        if product_ids is not cube.product_ids:
+            history = history[[cube.product_index[p] for p in product_ids]]
+        # Months between the history and the first forecast month (the current one)
+        last = _month_number(last_month)
+        skip = max(0, _month_number(self.current_month()) - last)
+        result = self.forecast(history, skip)
+        future = [_month_key_from_number(last + skip + h) for h in range(1, self.horizon + 1)]
+        demand = np.round(result['demand'], 1).tolist()
+        lower = np.round(result['lower'], 1).tolist()
+        upper = np.round(result['upper'], 1).tolist()
+        return {
+            product_id: {'months': future, 'demand': demand[row], 'lower': lower[row], 'upper': upper[row]}
+            for row, product_id in enumerate(product_ids)
+        }
+
+
 class DemandPredictionService:
     """
     Decision Tree Service for Stock Demand Prediction
@@ -26,51 +399,25 @@ class DemandPredictionService:
         return datetime.now().month
 
     @staticmethod
-    def aggregate_sales_by_product_and_month(orders: List[Dict]) -> Dict:
-        """Aggregate sales data by product and month"""
-        sales_data = {}
+    def window_start_month(months_back: int) -> str:
+        """Month key of the first month in a months_back window (as the Node order query starts it)"""
+        return DemandPredictionService.get_month_key(datetime.now() - relativedelta(months=months_back))
 
-        for order in orders:
-            for item in order.get('items', []):
-                product = item.get('product', {})
-                product_id = str(product.get('_id', ''))
-                
-                if not product_id:
-                    continue
-
-                if product_id not in sales_data:
-                    sales_data[product_id] = {
-                        'byMonth': {},
-                        'total': 0,
-                        'orderCount': 0
-                    }
-
-                # Get month key from product creation date or order date
-                date_str = product.get('createdAt') or order.get('createdAt')
-                if date_str:
-                    try:
-                        # Handle ISO format datetime strings
-                        if isinstance(date_str, str):
-                            date_str = date_str.replace('Z', '+00:00')
-                            date_obj = datetime.fromisoformat(date_str)
-                        else:
-                            date_obj = date_str
-                    except (ValueError, AttributeError):
-                        date_obj = datetime.now()
-                else:
-                    date_obj = datetime.now()
-
-                month = DemandPredictionService.get_month_key(date_obj)
-                
-                if month not in sales_data[product_id]['byMonth']:
-                    sales_data[product_id]['byMonth'][month] = 0
-
-                quantity = item.get('quantity', 0)
-                sales_data[product_id]['byMonth'][month] += quantity
-                sales_data[product_id]['total'] += quantity
-                sales_data[product_id]['orderCount'] += 1
+    @staticmethod
+    def build_sales_cube(orders) -> SalesCube:
+        """
+        Product x month quantity matrix for all orders, or for order line
+        columns ({'product': [...], 'createdAt': [...], 'quantity': [...]})
+        """
+        if isinstance(orders, dict):
+            return SalesCube.from_lines(orders.get('product', []), orders.get('createdAt', []),
+                                        orders.get('quantity', []))
+        return SalesCube.from_orders(orders)
 
-        return sales_data
+    @staticmethod
+    def aggregate_sales_by_product_and_month(orders: List[Dict]) -> Dict:
+        """Aggregate sales data by product and month"""
+        return DemandPredictionService.build_sales_cube(orders).to_sales_data()
 
     @staticmethod
     def calculate_trend(months: List[str], monthly_data: Dict) -> str:
@@ -129,6 +476,60 @@ class DemandPredictionService:
 
         return min(score, 100)
 
+    @staticmethod
+    def urgency_scores(cube: SalesCube, products_data: List[Dict], forecasts: Dict = None) -> np.ndarray:
+        """
+        urgencyScore of predict_from_series for every product in one array
+        pass: the decision tree's recommendation is evaluated as masks over
+        all products, without building the prediction payloads
+        """
+        n_months, n_recent, recent = cube.recent_summary()
+        # Row -1 picks the appended "no sales" row
+        n_months = np.append(n_months, 0)
+        n_recent = np.append(n_recent, 0)
+        recent = np.vstack([recent, np.zeros((1, 3))])
+        product_ids = [str(product.get('_id', '')) for product in products_data]
+        rows = np.fromiter((cube.product_index.get(product_id, -1) for product_id in product_ids),
+                           dtype=np.int64, count=len(product_ids))
+        month_count, k, values = n_months[rows], n_recent[rows], recent[rows]
+        current_stock = np.array([product.get('available_stock') or product.get('stock') or 0
+                                  for product in products_data], dtype=np.float64)
+
+        # Same summation order as sum() over the recent months (padding adds 0 first)
+        recent_average = np.where(k > 0, (values[:, 0] + values[:, 1] + values[:, 2]) / np.maximum(k, 1), 0.0)
+        avg_older = (values[:, 0] + values[:, 1]) / np.maximum(k - 1, 1)
+        newest = values[:, 2]
+        rising = (k >= 2) & (newest > avg_older * 1.2)
+        declining = (k >= 2) & ~rising & (newest < avg_older * 0.8)
+
+        # Seasonal node: forecast spike where a forecast exists, else the fixed seasonal months
+        current_month = DemandPredictionService.get_current_month_number()
+        seasonal_by_type = {}
+        seasonal = np.array([
+            seasonal_by_type.setdefault(
+                product.get('type', ''),
+                DemandPredictionService.check_seasonal_pattern(current_month, product.get('type', ''))
+            )
+            for product in products_data
+        ], dtype=bool)
+        if forecasts is not None:
+            expected = np.array([forecasts[p]['demand'][0] if p in forecasts else np.nan for p in product_ids])
+            has_forecast = ~np.isnan(expected)
+            seasonal = np.where(has_forecast, expected > recent_average * FORECAST_SPIKE_RATIO, seasonal)
+
+        turnover = np.divide(recent_average, current_stock, out=np.zeros(len(rows)), where=current_stock > 0)
+        score = np.select(
+            [month_count == 0, recent_average == 0, rising, declining, seasonal | (current_stock <= 5)],
+            [30, 40,
+             np.where(current_stock < recent_average, 80, 30),
+             np.where(turnover < 0.3, 40, 20),
+             80],
+            default=20
+        )
+        score += np.select([current_stock <= 5, current_stock <= 10], [20, 10], default=0)
+        score += np.select([recent_average > 20, recent_average > 10], [10, 5], default=0)
+        return np.minimum(score, 100)
+
     @staticmethod
     def get_stock_health(stock: int) -> str:
         """Get stock health status"""
@@ -175,20 +576,37 @@ class DemandPredictionService:
     @staticmethod
     def predict_demand(product: Dict, sales_data: Dict) -> Dict:
         """Decision Tree: Predict demand and stock adjustment"""
-        current_month = DemandPredictionService.get_current_month_number()
-        months = sorted(sales_data.get('byMonth', {}).keys())
+        by_month = sales_data.get('byMonth', {})
+        months = sorted(by_month.keys())
         recent_months = months[-3:] if months else []
+        return DemandPredictionService.predict_from_series(
+            product, len(months), sales_data.get('total'), recent_months,
+            [by_month.get(m, 0) for m in recent_months]
+        )
+
+    @staticmethod
+    def predict_from_series(product: Dict, month_count: int, total, recent_months: List[str],
+                            recent_sales_values: List, forecast: Dict = None) -> Dict:
+        """
+        Decision tree over a product's sales summary: number of sales months,
+        total quantity and the last (up to) three months with their sales.
+        With a forecast (SeasonalForecaster.forecast_cube entry) the seasonal
+        node compares next month's forecast demand with the recent average
+        instead of the fixed seasonal months.
+        """
+        current_month = DemandPredictionService.get_current_month_number()
+        recent_by_month = dict(zip(recent_months, recent_sales_values))
 
         # Calculate metrics
         average_monthly_sales = 0
-        if sales_data.get('total') and months:
-            average_monthly_sales = sales_data['total'] / len(months)
+        if total and month_count:
+            average_monthly_sales = total / month_count
 
-        recent_sales = sum(sales_data.get('byMonth', {}).get(m, 0) for m in recent_months)
+        recent_sales = sum(recent_sales_values)
         recent_average = recent_sales / len(recent_months) if recent_months else 0
 
         # Determine trend
-        trend = DemandPredictionService.calculate_trend(months, sales_data.get('byMonth', {}))
+        trend = DemandPredictionService.calculate_trend(recent_months, recent_by_month)
 
         # Current stock info
         current_stock = product.get('available_stock') or product.get('stock') or 0
@@ -200,7 +618,7 @@ class DemandPredictionService:
         reason = ''
 
         # Decision Node 1: Check if product has sales history
-        if not months:
+        if not month_count:
             # No sales history
             recommendation = 'MONITOR'
             reason = 'New product with no sales history. Monitor initial demand.'
@@ -243,9 +661,18 @@ class DemandPredictionService:
             else:
                 # STABLE trend
                 # Decision Node 5: Check seasonal patterns
-                is_seasonal = DemandPredictionService.check_seasonal_pattern(current_month, product.get('type', ''))
+                if forecast is not None:
+                    expected_demand = forecast['demand'][0]
+                    is_seasonal = expected_demand > recent_average * FORECAST_SPIKE_RATIO
+                else:
+                    is_seasonal = DemandPredictionService.check_seasonal_pattern(current_month, product.get('type', ''))
 
-                if is_seasonal:
+                if is_seasonal and forecast is not None:
+                    recommendation = 'INCREASE'
+                    adjustment_percentage = 15
+                    reason = (f'Stable trend with forecast demand rising to {round(expected_demand)} units in '
+                              f'{forecast["months"][0]} (recent avg: {round(recent_average)}).')
+                elif is_seasonal:
                     recommendation = 'INCREASE'
                     adjustment_percentage = 15
                     reason = f'Stable trend with seasonal demand spike expected for {product.get("type")} type in month {current_month}.'
@@ -269,7 +696,7 @@ class DemandPredictionService:
         base_stock_for_suggestion = max(current_stock, recent_average)
         suggested_stock = round(base_stock_for_suggestion * (1 + adjustment_percentage / 100))
 
-        return {
+        prediction = {
             'product': {
                 '_id': str(product.get('_id', '')),
                 'name': product.get('name', ''),
@@ -286,7 +713,7 @@ class DemandPredictionService:
                 'recentAverageMonthlySales': round(recent_average * 10) / 10,
                 'trend': trend,
                 'salesHistory': DemandPredictionService.format_sales_history(
-                    recent_months, sales_data.get('byMonth', {})
+                    recent_months, recent_by_month
                 )
             },
             'prediction': {
@@ -300,109 +727,295 @@ class DemandPredictionService:
             },
             'urgencyScore': urgency_score
         }
+        if forecast is not None:
+            prediction['forecast'] = forecast
+        return prediction
 
     @staticmethod
-    def generate_predictions(orders_data: List[Dict], products_data: List[Dict], months_back: int = 6) -> List[Dict]:
+    def generate_predictions(orders_data: List[Dict], products_data: List[Dict], months_back: int = 6,
+                             forecast: bool = FORECAST_ENABLED) -> List[Dict]:
         """
         Analyze historical sales data and generate predictions
         
         Args:
-            orders_data: List of orders with populated items and products
+            orders_data: List of orders with populated items and products (or order
+                line columns, see build_sales_cube)
             products_data: List of active products
             months_back: Number of months of history to analyze
+            forecast: Add Holt-Winters forecasts and use them for the seasonal decision
             
         Returns:
             Array of predictions sorted by urgency score
         """
         try:
             # Aggregate sales data by product and month
-            sales_data = DemandPredictionService.aggregate_sales_by_product_and_month(orders_data)
+            cube = DemandPredictionService.build_sales_cube(orders_data)
+            forecasts = SeasonalForecaster().forecast_cube(cube) if forecast else None
+            return DemandPredictionService.predictions_from_cube(cube, products_data, forecasts)
+
+        except Exception as error:
+            raise Exception(f'Demand prediction failed: {str(error)}')
+
+    @staticmethod
+    def predictions_from_cube(cube: SalesCube, products_data: List[Dict], forecasts: Dict = None) -> List[Dict]:
+        """
+        Predictions for every product from aggregated sales, sorted by urgency
+        score; forecasts ({product_id: forecast}) switch on the forecast-based
+        seasonal decision for the products they cover
+        """
+        predictions = []
+        for product in products_data:
+            product_id = str(product.get('_id', ''))
+            series = cube.series(product_id)
+            product_forecast = None
+            if forecasts is not None:
+                product_forecast = forecasts.get(product_id)
+            prediction = DemandPredictionService.predict_from_series(product, *series, forecast=product_forecast)
+            predictions.append(prediction)
+
+        # Sort by urgency score (descending)
+        predictions.sort(key=lambda x: x['urgencyScore'], reverse=True)
+        return predictions
+
+    @staticmethod
+    def top_predictions_from_cube(cube: SalesCube, products_data: List[Dict], limit: int = 10,
+                                  forecasts: Dict = None) -> List[Dict]:
+        """
+        The first `limit` entries of predictions_from_cube: urgency scores for
+        all products in one vectorized pass, then full predictions for the top
+        `limit` only (ties keep products_data order, as the stable sort does)
+        """
+        if not isinstance(limit, int) or limit < 0 or cube.quantities.dtype == object:
+            return DemandPredictionService.predictions_from_cube(cube, products_data, forecasts)[:limit]
+        try:
+            scores = DemandPredictionService.urgency_scores(cube, products_data, forecasts)
+        except (TypeError, ValueError):
+            # Non-numeric stock values: let the per-product tree handle them
+            return DemandPredictionService.predictions_from_cube(cube, products_data, forecasts)[:limit]
+
+        k = min(limit, len(scores))
+        if k == 0:
+            return []
+        if k < len(scores):
+            kth = np.partition(-scores, k - 1)[k - 1]
+            candidates = np.flatnonzero(-scores <= kth)
+        else:
+            candidates = np.arange(len(scores))
+        top = candidates[np.lexsort((candidates, -scores[candidates]))][:k]
+
+        predictions = []
+        for index in top.tolist():
+            product = products_data[index]
+            product_id = str(product.get('_id', ''))
+            product_forecast = forecasts.get(product_id) if forecasts is not None else None
+            predictions.append(DemandPredictionService.predict_from_series(
+                product, *cube.series(product_id), forecast=product_forecast))
+        return predictions
+
+    @staticmethod
+    def generate_predictions_from_aggregates(products_data: List[Dict], months_back: int = 6,
+                                             store=None, forecast: bool = FORECAST_ENABLED) -> List[Dict]:
+        """
+        generate_predictions over the persisted monthly series instead of raw
+        orders; the store holds the full history, so months_back selects the
+        window here (forecasts use the last FORECAST_HISTORY_MONTHS months)
+        """
+        try:
+            cube, forecasts = DemandPredictionService._load_aggregates(store, months_back, forecast)
+            return DemandPredictionService.predictions_from_cube(cube, products_data, forecasts)
 
-            # Generate predictions for each product
-            predictions = []
-            for product in products_data:
-                product_sales = sales_data.get(str(product.get('_id', '')), {})
-                prediction = DemandPredictionService.predict_demand(product, product_sales)
-                predictions.append(prediction)
+        except Exception as error:
+            raise Exception(f'Demand prediction failed: {str(error)}')
 
-            # Sort by urgency score (descending)
-            predictions.sort(key=lambda x: x['urgencyScore'], reverse=True)
-            return predictions
+    @staticmethod
+    def get_top_predictions_from_aggregates(products_data: List[Dict], limit: int = 10, months_back: int = 6,
+                                            store=None, forecast: bool = FORECAST_ENABLED) -> List[Dict]:
+        """get_top_predictions over the persisted monthly series"""
+        try:
+            cube, forecasts = DemandPredictionService._load_aggregates(store, months_back, forecast)
+            return DemandPredictionService.top_predictions_from_cube(cube, products_data, limit, forecasts)
 
         except Exception as error:
             raise Exception(f'Demand prediction failed: {str(error)}')
 
     @staticmethod
-    def get_top_predictions(orders_data: List[Dict], products_data: List[Dict], limit: int = 10, months_back: int = 6) -> List[Dict]:
+    def _load_aggregates(store, months_back: int, forecast: bool) -> Tuple[SalesCube, Optional[Dict]]:
+        """Cube over the months_back window of the store, and forecasts when requested"""
+        if store is None:
+            from sales_aggregate_store import get_sales_aggregate_store
+            store = get_sales_aggregate_store()
+        since = DemandPredictionService.window_start_month(months_back)
+        cube = SalesCube.from_monthly(store.monthly(since_month=since))
+        forecasts = DemandPredictionService.forecast_from_aggregates(store) if forecast else None
+        return cube, forecasts
+
+    @staticmethod
+    def forecast_from_aggregates(store, product_id: str = None) -> Dict[str, Dict]:
+        """Forecasts from the stored series (one product or all), over the last FORECAST_HISTORY_MONTHS complete months"""
+        first_month, last_month = store.month_range()
+        if last_month is None:
+            return {}
+        first_month, last_month = SeasonalForecaster.history_range(first_month)
+        cube = SalesCube.from_monthly(store.monthly(product_id, first_month))
+        return SeasonalForecaster().forecast_cube(cube, first_month, last_month)
+
+    @staticmethod
+    def get_top_predictions(orders_data: List[Dict], products_data: List[Dict], limit: int = 10, months_back: int = 6,
+                            forecast: bool = FORECAST_ENABLED) -> List[Dict]:
         """Get top products by urgency"""
-        predictions = DemandPredictionService.generate_predictions(orders_data, products_data, months_back)
-        return predictions[:limit]
+        try:
+            cube = DemandPredictionService.build_sales_cube(orders_data)
+            forecasts = SeasonalForecaster().forecast_cube(cube) if forecast else None
+            return DemandPredictionService.top_predictions_from_cube(cube, products_data, limit, forecasts)
+
+        except Exception as error:
+            raise Exception(f'Demand prediction failed: {str(error)}')
 
     @staticmethod
-    def get_prediction_for_product(product_id: str, product_data: Dict, orders_data: List[Dict]) -> Dict:
+    def get_prediction_for_product(product_id: str, product_data: Dict, orders_data: List[Dict],
+                                   forecast: bool = FORECAST_ENABLED) -> Dict:
         """Get predictions for a specific product"""
         try:
-            sales_data = DemandPredictionService.aggregate_sales_by_product_and_month(orders_data)
-            
-            if product_id not in sales_data:
-                product_sales = {}
-            else:
-                product_sales = sales_data[product_id]
+            cube = DemandPredictionService.build_sales_cube(orders_data)
 
             if not product_data:
                 raise Exception('Product not found')
 
-            return DemandPredictionService.predict_demand(product_data, product_sales)
+            product_forecast = None
+            if forecast:
+                forecasts = SeasonalForecaster().forecast_cube(cube, product_ids=[product_id])
+                product_forecast = forecasts.get(str(product_id))
+            return DemandPredictionService.predict_from_series(product_data, *cube.series(product_id),
+                                                               forecast=product_forecast)
 
         except Exception as error:
             raise Exception(f'Failed to get prediction for product: {str(error)}')
 
+    @staticmethod
+    def get_prediction_for_product_from_aggregates(product_id: str, product_data: Dict, months_back: int = 6,
+                                                   store=None, forecast: bool = FORECAST_ENABLED) -> Dict:
+        """Prediction for one product from its persisted monthly series"""
+        try:
+            if not product_data:
+                raise Exception('Product not found')
+            if store is None:
+                from sales_aggregate_store import get_sales_aggregate_store
+                store = get_sales_aggregate_store()
+            since = DemandPredictionService.window_start_month(months_back)
+            cube = SalesCube.from_monthly(store.monthly(product_id, since))
+            product_forecast = None
+            if forecast:
+                product_forecast = DemandPredictionService.forecast_from_aggregates(store, product_id).get(str(product_id))
+            return DemandPredictionService.predict_from_series(product_data, *cube.series(product_id),
+                                                               forecast=product_forecast)
 
-# For direct CLI usage
-if __name__ == '__main__':
-    try:
-        input_data = json.loads(sys.stdin.read())
-
-        # Expected input format:
-        # {
-        #   "action": "generatePredictions" | "getTopPredictions" | "getPredictionForProduct",
-        #   "orders": [...],
-        #   "products": [...],
-        #   "productId": "...", (for getPredictionForProduct)
-        #   "monthsBack": 6 (optional)
-        # }
-
-        action = input_data.get('action', 'generatePredictions')
-        orders = input_data.get('orders', [])
-        products = input_data.get('products', [])
-        months_back = input_data.get('monthsBack', 6)
+        except Exception as error:
+            raise Exception(f'Failed to get prediction for product: {str(error)}')
 
-        output = {
-            'success': True,
-            'data': None
-        }
 
-        if action == 'generatePredictions':
-            output['data'] = DemandPredictionService.generate_predictions(orders, products, months_back)
+def handle_request(input_data: Dict) -> Dict:
+    """
+    CLI / worker entry point
+
+    Expected input format:
+    {
+      "action": "generatePredictions" | "getTopPredictions" | "getPredictionForProduct"
+                | "ingestOrders" | "aggregateStats",
+      "orders": [...],
+      "orderLines": {"product": [...], "createdAt": [...], "quantity": [...]}
+                    (optional, instead of "orders": one entry per order line),
+      "products": [...],
+      "productId": "...", (for getPredictionForProduct)
+      "monthsBack": 6 (optional),
+      "source": "orders" | "aggregates" (optional),
+      "forecast": true (optional; Holt-Winters forecasts drive the seasonal decision)
+    }
 
-        elif action == 'getTopPredictions':
-            limit = input_data.get('limit', 10)
-            output['data'] = DemandPredictionService.get_top_predictions(orders, products, limit, months_back)
+    With "source": "aggregates" predictions read the persisted monthly series;
+    "orders" then only needs the orders created since the store's watermark
+    (aggregateStats), which are ingested first.
+    """
+    action = input_data.get('action', 'generatePredictions')
+    orders = input_data.get('orders', [])
+    order_lines = input_data.get('orderLines')
+    products = input_data.get('products', [])
+    months_back = input_data.get('monthsBack', 6)
+    source = input_data.get('source', DEFAULT_SOURCE)
+    forecast = bool(input_data.get('forecast', FORECAST_ENABLED))
 
-        elif action == 'getPredictionForProduct':
-            product_id = input_data.get('productId')
-            product_data = next((p for p in products if str(p.get('_id')) == product_id), None)
-            if product_data:
-                output['data'] = DemandPredictionService.get_prediction_for_product(product_id, product_data, orders)
-            else:
-                output['success'] = False
-                output['error'] = 'Product not found'
+    output = {
+        'success': True,
+        'data': None
+    }
+
+    if source not in PREDICTION_SOURCES:
+        output['success'] = False
+        output['error'] = f"Unknown source: {source} (expected one of {', '.join(PREDICTION_SOURCES)})"
+        return output
+
+    if order_lines is not None:
+        if source != 'orders' or action in AGGREGATE_ACTIONS:
+            output['success'] = False
+            output['error'] = 'orderLines is only supported with the orders source'
+            return output
+        orders = order_lines
+
+    store = None
+    if source == 'aggregates' or action in AGGREGATE_ACTIONS:
+        from sales_aggregate_store import get_sales_aggregate_store
+        store = get_sales_aggregate_store()
+        if orders and action not in AGGREGATE_ACTIONS:
+            # Orders since the watermark, added before predicting
+            output['ingest'] = store.ingest(orders)
+
+    if action == 'ingestOrders':
+        output['data'] = store.ingest(orders)
+
+    elif action == 'aggregateStats':
+        output['data'] = store.stats()
 
+    elif action == 'generatePredictions':
+        if store is not None:
+            output['data'] = DemandPredictionService.generate_predictions_from_aggregates(
+                products, months_back, store, forecast)
+        else:
+            output['data'] = DemandPredictionService.generate_predictions(orders, products, months_back, forecast)
+
+    elif action == 'getTopPredictions':
+        limit = input_data.get('limit', 10)
+        if store is not None:
+            output['data'] = DemandPredictionService.get_top_predictions_from_aggregates(
+                products, limit, months_back, store, forecast)
+        else:
+            output['data'] = DemandPredictionService.get_top_predictions(
+                orders, products, limit, months_back, forecast)
+
+    elif action == 'getPredictionForProduct':
+        product_id = input_data.get('productId')
+        product_data = next((p for p in products if str(p.get('_id')) == product_id), None)
+        if product_data and store is not None:
+            output['data'] = DemandPredictionService.get_prediction_for_product_from_aggregates(
+                product_id, product_data, months_back, store, forecast)
+        elif product_data:
+            output['data'] = DemandPredictionService.get_prediction_for_product(
+                product_id, product_data, orders, forecast)
         else:
             output['success'] = False
-            output['error'] = f'Unknown action: {action}'
+            output['error'] = 'Product not found'
 
-        print(json.dumps(output, indent=2))
+    else:
+        output['success'] = False
+        output['error'] = f'Unknown action: {action}'
+
+    return output
+
+
+# For direct CLI usage
+if __name__ == '__main__':
+    try:
+        input_data = read_request(sys.stdin, records_key='orders')
+        output = handle_request(input_data)
+        write_response(output)
 
     except Exception as e:
         output = {
@@ -410,4 +1023,4 @@ if __name__ == '__main__':
             'error': str(e)
         }
         print(json.dumps(output, indent=2))
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -8,39 +8,86 @@ print("BLACK PEPPER DISEASE DETECTION API")
 print("="*60)
 print("Step 1/4: Importing libraries...")
 
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, request, jsonify
 from flask_cors import CORS
 import os
 import sys
 from datetime import datetime
+from functools import wraps
 from werkzeug.utils import secure_filename
 import traceback
 
 print("Step 2/4: Importing disease detector...")
 # Import the black pepper disease detector
 from dual_model_detector import DualModelDetector as PlantDiseaseDetector
-print("Step 3/4: Initializing Flask app...")
+from ml_metrics import metrics
+from lazy_model import LazyModel
+from prediction_pipeline import PredictionPipeline
+from admission_control import AdmissionController, PRIORITY_SINGLE, PRIORITY_BATCH
+print("Step 3/4: Initializing Flask blueprint...")
 
-# Initialize Flask app
-app = Flask(__name__)
-CORS(app)
+# Routes live on a blueprint so ml_gateway.py can host them next to the other services
+bp = Blueprint('disease_detection', __name__)
 
 # Configuration
 UPLOAD_FOLDER = 'backend/uploads/disease_images'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp'}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
-
 # Ensure upload directory exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-print("Step 4/4: Initializing disease detector (may take 20-30 seconds)...")
-print("Loading TensorFlow and Black Pepper CNN model...\n")
-# Initialize black pepper disease detector
-detector = PlantDiseaseDetector()
-print("\nAll initialization complete!")
+print("Step 4/4: Detector and pipeline load on first use (TensorFlow model may take 20-30 seconds)...")
+# Black pepper disease detector
+_detector = LazyModel('disease_detector', PlantDiseaseDetector)
+# Decode / validation / inference stages run concurrently across requests
+_pipeline = LazyModel('prediction_pipeline', lambda: PredictionPipeline(get_detector()))
+# Shed load with 429/503 + Retry-After instead of queueing until the caller times out
+admission = AdmissionController()
+
+
+def get_detector():
+    return _detector.get()
+
+
+def get_pipeline():
+    return _pipeline.get()
+
+
+def _client_id():
+    """
+    Rate-limit key: the X-User-Id header (set by the Node backend for every
+    call), else user_id from the form / JSON body, else the caller address
+    """
+    user_id = request.headers.get('X-User-Id') or request.form.get('user_id')
+    if not user_id and request.is_json:
+        user_id = (request.get_json(silent=True) or {}).get('user_id')
+    return str(user_id) if user_id else request.remote_addr or 'anonymous'
+
+
+def admission_guard(priority):
+    """Admit the request before any work starts, or answer 429/503 with Retry-After"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cost = len(request.files.getlist('images')) if priority == PRIORITY_BATCH else 1
+            ticket = admission.try_admit(_client_id(), priority=priority, cost=cost)
+            if not ticket.admitted:
+                print(f"[!] Admission rejected ({ticket.status_code}): {ticket.reason}")
+                response = jsonify({
+                    'success': False,
+                    'error': ticket.reason,
+                    'message': f'{ticket.reason}. Please retry in {ticket.retry_after} seconds.',
+                    'retry_after': ticket.retry_after
+                })
+                response.headers['Retry-After'] = str(ticket.retry_after)
+                return response, ticket.status_code
+            try:
+                return view(*args, **kwargs)
+            finally:
+                admission.release(ticket)
+        return wrapper
+    return decorator
 
 
 def allowed_file(filename):
@@ -316,21 +363,52 @@ def get_disease_prevention(disease_name):
     return prevention.get(disease_name, [])
 
 
-@app.route('/health', methods=['GET'])
+@bp.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
-    available_models = detector.get_available_models()
+    """Health check endpoint (never loads the model: see /ready and /warmup)"""
+    available_models = _detector.get().get_available_models() if _detector.is_loaded else []
     return jsonify({
         'status': 'healthy',
         'service': 'Black Pepper Disease Detection API',
+        'model_state': _detector.state,
         'models_loaded': len(available_models),
         'available_models': [m['type'] for m in available_models],
-        'current_model': detector.current_model_type,
+        'current_model': _detector.get().current_model_type if _detector.is_loaded else None,
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@bp.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: 200 once the detector is loaded, 503 until then"""
+    ready = _detector.is_loaded
+    return jsonify({
+        'ready': ready,
+        'model_state': _detector.state,
+        'error': _detector.last_error
+    }), 200 if ready else 503
+
+
+@bp.route('/warmup', methods=['POST'])
+def warmup():
+    """Start loading the detector in the background (202 while loading)"""
+    state = _detector.warm_up()
+    return jsonify({'model_state': state}), 200 if state == 'loaded' else 202
+
+
+@bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Service metrics: counters, gauges, latencies and cascade exit rates"""
+    return jsonify({
+        **metrics.snapshot(),
+        'cascade': _detector.get().get_cascade_metrics() if _detector.is_loaded else None,
+        'pipeline': _pipeline.get().get_stats() if _pipeline.is_loaded else None,
+        'admission': admission.get_stats(),
         'timestamp': datetime.now().isoformat()
     })
 
 
-@app.route('/train', methods=['POST'])
+@bp.route('/train', methods=['POST'])
 def train_model():
     """
     Train the disease detection model
@@ -338,6 +416,7 @@ def train_model():
     Returns:
         Training results with accuracy metrics
     """
+    detector = get_detector()
     try:
         result = detector.train(synthetic_data=True)
         return jsonify(result)
@@ -349,11 +428,14 @@ def train_model():
         }), 500
 
 
-@app.route('/predict', methods=['POST'])
+@bp.route('/predict', methods=['POST'])
+@admission_guard(PRIORITY_SINGLE)
 def predict_disease():
     """
     Predict disease from uploaded leaf image
     """
+    detector = get_detector()
+    pipeline = get_pipeline()
     try:
         print("\n" + "="*50)
         print("[PREDICT] PREDICT ENDPOINT CALLED")
@@ -415,7 +497,7 @@ def predict_disease():
         filename = secure_filename(file.filename)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         unique_filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
+        filepath = os.path.join(UPLOAD_FOLDER, unique_filename)
         
         print(f"[SAVE] Saving to: {filepath}")
         file.save(filepath)
@@ -436,7 +518,7 @@ def predict_disease():
         
         # Predict disease
         print(f"[PREDICT] Running prediction...")
-        result = detector.predict(filepath, model_type=pepper_type)
+        result = pipeline.predict(filepath, model_type=pepper_type)
         print(f"[OK] Prediction result: {result}")
         
         # Check for validation errors or model rejection (handles validation, confidence, and wrong pepper type)
@@ -527,7 +609,8 @@ def predict_disease():
         }), 500
 
 
-@app.route('/predict-url', methods=['POST'])
+@bp.route('/predict-url', methods=['POST'])
+@admission_guard(PRIORITY_SINGLE)
 def predict_from_url():
     """
     Predict disease from image URL
@@ -538,6 +621,8 @@ def predict_from_url():
     Returns:
         Disease prediction results
     """
+    detector = get_detector()
+    pipeline = get_pipeline()
     try:
         print("\n" + "="*50)
         print("[PREDICT-URL] PREDICT-URL ENDPOINT CALLED")
@@ -577,7 +662,7 @@ def predict_from_url():
         import ssl
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f"{timestamp}_url_image.jpg"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        filepath = os.path.join(UPLOAD_FOLDER, filename)
         
         print(f"[DOWNLOAD] Downloading image from URL...")
         
@@ -636,7 +721,7 @@ def predict_from_url():
         
         # Predict disease
         print(f"[PREDICT] Running prediction...")
-        result = detector.predict(filepath, model_type=pepper_type)
+        result = pipeline.predict(filepath, model_type=pepper_type)
         print(f"[OK] Prediction result: {result}")
         
         # Check for validation errors or model rejection (handles validation, confidence, and wrong pepper type)
@@ -723,7 +808,7 @@ def predict_from_url():
         }), 500
 
 
-@app.route('/diseases', methods=['GET'])
+@bp.route('/diseases', methods=['GET'])
 def get_diseases_info():
     """
     Get information about all detectable diseases
@@ -777,9 +862,10 @@ def get_diseases_info():
         }), 500
 
 
-@app.route('/model-info', methods=['GET'])
+@bp.route('/model-info', methods=['GET'])
 def get_model_info():
     """Get information about the trained model"""
+    detector = get_detector()
     try:
         current_model_type = detector.current_model_type
         info = {
@@ -805,9 +891,10 @@ def get_model_info():
         }), 500
 
 
-@app.route('/models', methods=['GET'])
+@bp.route('/models', methods=['GET'])
 def get_available_models():
     """Get list of available pepper models"""
+    detector = get_detector()
     try:
         models = detector.get_available_models()
         return jsonify({
@@ -824,19 +911,19 @@ def get_available_models():
 
 # ==================== NEW API ROUTES FOR FRONTEND ====================
 
-@app.route('/api/disease-detection/predict', methods=['POST'])
+@bp.route('/api/disease-detection/predict', methods=['POST'])
 def api_predict():
     """Predict endpoint for frontend"""
     return predict_disease()
 
 
-@app.route('/api/disease-detection/predict-url', methods=['POST'])
+@bp.route('/api/disease-detection/predict-url', methods=['POST'])
 def api_predict_url():
     """Predict from URL endpoint for frontend"""
     return predict_from_url()
 
 
-@app.route('/api/disease-detection/diseases', methods=['GET'])
+@bp.route('/api/disease-detection/diseases', methods=['GET'])
 def get_diseases():
     """Get list of detectable diseases"""
     diseases = [
@@ -884,7 +971,7 @@ def get_diseases():
     return jsonify({"success": True, "diseases": diseases})
 
 
-@app.route('/api/disease-detection/history', methods=['GET'])
+@bp.route('/api/disease-detection/history', methods=['GET'])
 def get_history():
     """Get prediction history"""
     limit = request.args.get('limit', 10, type=int)
@@ -897,7 +984,8 @@ def get_history():
 # ==================== END NEW ROUTES ====================
 
 
-@app.route('/batch-predict', methods=['POST'])
+@bp.route('/batch-predict', methods=['POST'])
+@admission_guard(PRIORITY_BATCH)
 def batch_predict():
     """
     Predict diseases for multiple images
@@ -908,6 +996,8 @@ def batch_predict():
     Returns:
         List of predictions for all images
     """
+    detector = get_detector()
+    pipeline = get_pipeline()
     try:
         if detector.model is None:
             return jsonify({
@@ -932,14 +1022,21 @@ def batch_predict():
         results = []
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
+        # Submit every image first so decode/validation overlap with inference
+        pending = []
         for idx, file in enumerate(files):
             if file and allowed_file(file.filename):
                 filename = secure_filename(file.filename)
                 unique_filename = f"{timestamp}_{idx}_{filename}"
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
+                filepath = os.path.join(UPLOAD_FOLDER, unique_filename)
                 file.save(filepath)
-                
-                prediction = detector.predict(filepath)
+                pending.append((file, filename, pipeline.submit(filepath)))
+            else:
+                pending.append((file, None, None))
+        
+        for file, filename, future in pending:
+            if future is not None:
+                prediction = future.result()
                 
                 # Transform prediction
                 if 'disease' in prediction:
@@ -974,7 +1071,26 @@ def batch_predict():
         }), 500
 
 
+def create_app():
+    """Standalone app serving only this blueprint"""
+    app = Flask(__name__)
+    CORS(app)
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
+    app.register_blueprint(bp)
+    return app
+
+
 if __name__ == '__main__':
+    port = int(os.environ.get('DISEASE_API_PORT', 5001))
+    app = create_app()
+    
+    # Load the model before serving so the first request is not slow
+    print("Loading TensorFlow and Black Pepper CNN model...\n")
+    detector = get_detector()
+    get_pipeline()
+    print("\nAll initialization complete!")
+    
     # Check model status on startup
     if detector.model is None:
         print("[!] Warning: Model not loaded!")
@@ -984,9 +1100,9 @@ if __name__ == '__main__':
     # Start Flask server
     print("\nBlack Pepper Disease Detection API Starting...")
     print("=" * 50)
-    print(f"URL: http://localhost:5001")
-    print(f"Health Check: http://localhost:5001/health")
-    print(f"Predict: POST http://localhost:5001/predict")
+    print(f"URL: http://localhost:{port}")
+    print(f"Health Check: http://localhost:{port}/health")
+    print(f"Predict: POST http://localhost:{port}/predict")
     print("=" * 50)
     
-    app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, debug=True)
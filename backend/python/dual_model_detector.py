@@ -9,21 +9,40 @@ import numpy as np
 import cv2
 import json
 import os
+from PIL import Image
+from keras_inference import CompiledKerasPredictor
+from leaf_gate import LeafGate, threshold_from_env
+from ml_metrics import metrics
 
 class DualModelDetector:
     """
     Disease detector that supports both Bell Pepper and Black Pepper models
     """
     
-    def __init__(self):
-        """Initialize the dual-model detector"""
+    def __init__(self, gate_threshold=None):
+        """
+        Initialize the dual-model detector
+        
+        Args:
+            gate_threshold: Minimum leaf-gate probability to reach the full model
+                            (defaults to LEAF_GATE_THRESHOLD env var, then 0.2;
+                            a malformed value falls back to 0.2 with a warning)
+        """
         print("[*] Initializing Black Pepper Disease Detector...")
         self.models = {}
+        self.compiled_models = {}  # model_type -> CompiledKerasPredictor
         self.class_names = {}
         self.current_model_type = 'black_pepper'  # Default
         self.using_pytorch = False  # Flag for PyTorch model
         self.pytorch_detector = None  # PyTorch detector instance
         
+        # Early-exit leaf gate (stage 2 of the prediction cascade)
+        self.leaf_gate = LeafGate()
+        if gate_threshold is None:
+            gate_threshold = threshold_from_env()
+        self.gate_threshold = gate_threshold
+        print(f"[*] Leaf gate: {'loaded' if self.leaf_gate.is_loaded else 'not trained (stage skipped)'}")
+        
         # Model configurations
         self.model_configs = {
             'bell_pepper': {
@@ -84,6 +103,10 @@ class DualModelDetector:
         model = keras.models.load_model(config['model_path'])
         self.models[model_type] = model
         
+        # Trace the fixed-signature inference function and warm it up now,
+        # so the first request does not pay for tracing
+        self.compiled_models[model_type] = CompiledKerasPredictor(model, input_shape=(224, 224, 3))
+        
         # Load class names
         if not os.path.exists(config['class_file']):
             raise FileNotFoundError(f"Class file not found: {config['class_file']}")
@@ -184,11 +207,15 @@ class DualModelDetector:
                 })
         return available
     
-    def preprocess_image(self, image_path):
-        """Preprocess image for CNN prediction"""
-        img = cv2.imread(image_path)
+    def decode_image(self, image_path):
+        """Read an image from disk as a BGR array (None if unreadable)"""
+        return cv2.imread(image_path)
+    
+    def preprocess_image(self, image):
+        """Preprocess image (path or decoded BGR array) for CNN prediction"""
+        img = self.decode_image(image) if isinstance(image, str) else image
         if img is None:
-            raise ValueError(f"Failed to load image: {image_path}")
+            raise ValueError(f"Failed to load image: {image}" if isinstance(image, str) else "Failed to load image")
         
         # Resize to model input size (224x224 for both models)
         img_resized = cv2.resize(img, (224, 224))
@@ -210,8 +237,21 @@ class DualModelDetector:
         Rejects: screenshots, documents, people, objects, non-plant images
         Returns: (is_valid, reason, confidence)
         """
+        color_stats = {}
+        result = self._check_plant_image(image_path, color_stats)
+        self._last_green_pct = color_stats.get('green_pct', 0)
+        self._last_yellow_pct = color_stats.get('yellow_pct', 0)
+        self._last_plant_pct = color_stats.get('plant_pct', 0)
+        return result
+    
+    def _check_plant_image(self, image, color_stats):
+        """
+        Validation checks on an image path or decoded BGR array
+        Fills color_stats (green/yellow/plant %) for the healthy-override rules
+        Returns: (is_valid, reason, confidence)
+        """
         try:
-            img = cv2.imread(image_path)
+            img = self.decode_image(image) if isinstance(image, str) else image
             if img is None:
                 return False, "Could not read image file", 0
             
@@ -237,17 +277,17 @@ class DualModelDetector:
             green_upper = np.array([90, 255, 255])
             green_mask = cv2.inRange(hsv, green_lower, green_upper)
             green_pct = (np.sum(green_mask > 0) / total_pixels) * 100
-            self._last_green_pct = green_pct
+            color_stats['green_pct'] = green_pct
             
             # Yellow/Light Brown (diseased/stressed leaves)
             yellow_lower = np.array([10, 20, 20])
             yellow_upper = np.array([35, 255, 255])
             yellow_mask = cv2.inRange(hsv, yellow_lower, yellow_upper)
             yellow_pct = (np.sum(yellow_mask > 0) / total_pixels) * 100
-            self._last_yellow_pct = yellow_pct
+            color_stats['yellow_pct'] = yellow_pct
             
             plant_pct = green_pct + yellow_pct
-            self._last_plant_pct = plant_pct
+            color_stats['plant_pct'] = plant_pct
             
             # Minimum plant content threshold - much more lenient to allow diseased leaves
             if plant_pct < 5:
@@ -353,129 +393,191 @@ class DualModelDetector:
             if model_type is not None:
                 self.set_model_type(model_type)
             
-            # Use PyTorch detector if available (black pepper only)
-            if self.current_model_type == 'black_pepper' and self.using_pytorch:
-                print("[*] Using trained PyTorch model for prediction...")
-                
-                # Validate image first
-                is_valid, reason, validation_confidence = self.is_valid_plant_image(image_path)
-                if not is_valid:
-                    return {
-                        'success': False,
-                        'error': 'Invalid Image',
-                        'message': reason,
-                        'validation_confidence': validation_confidence
-                    }
-                
-                # Use PyTorch detector
-                result = self.pytorch_detector.predict(image_path)
-                return result
-            
-            # Otherwise use Keras model (default)
-            # Validate image
-            is_valid, reason, validation_confidence = self.is_valid_plant_image(image_path)
-            if not is_valid:
-                return {
-                    'success': False,
-                    'error': 'Invalid Image',
-                    'message': reason,
-                    'validation_confidence': validation_confidence
-                }
+            # Decode once and share the array between all stages
+            image = self.decode_image(image_path)
             
-            # Preprocess image
-            img_preprocessed = self.preprocess_image(image_path)
+            rejection, color_stats = self.run_validation_stage(image)
+            if rejection is not None:
+                return rejection
             
-            # Get current model
-            model = self.models[self.current_model_type]
-            if model is None:
+            return self.run_model_stage(image, color_stats)
+            
+        except Exception as e:
+            return {
+                'success': False,
+                'error': 'Prediction failed',
+                'message': str(e)
+            }
+    
+    def run_validation_stage(self, image):
+        """
+        Stages 1-2 of the early-exit cascade on a decoded BGR image
+        
+        Returns:
+            (rejection dict or None, color_stats)
+        """
+        # Stage 1: heuristic validator (screenshots, people, documents, ...)
+        metrics.increment('cascade.requests')
+        color_stats = {}
+        with metrics.timer('cascade.validator'):
+            is_valid, reason, validation_confidence = self._check_plant_image(image, color_stats)
+        if not is_valid:
+            metrics.increment('cascade.exit.validator')
+            return {
+                'success': False,
+                'error': 'Invalid Image',
+                'message': reason,
+                'validation_confidence': validation_confidence
+            }, color_stats
+        
+        # Stage 2: tiny leaf gate on a thumbnail (skipped until the gate is trained)
+        if self.leaf_gate.is_loaded:
+            with metrics.timer('cascade.gate'):
+                leaf_probability = self.leaf_gate.predict_proba(image)
+            if leaf_probability < self.gate_threshold:
+                metrics.increment('cascade.exit.gate')
                 return {
                     'success': False,
-                    'error': 'Model not loaded',
-                    'message': f'{self.model_configs[self.current_model_type]["display_name"]} model is not available'
-                }
-            
-            # Predict
-            predictions = model.predict(img_preprocessed, verbose=0)
-            predicted_class_idx = np.argmax(predictions[0])
-            confidence = float(predictions[0][predicted_class_idx] * 100)
-            
-            # Get class name and format it for database
-            raw_class_name = self.class_names[self.current_model_type][predicted_class_idx]
-            predicted_class = self._format_class_name(raw_class_name)
-            
-            # Get all probabilities with formatted class names
-            probabilities = {
-                self._format_class_name(self.class_names[self.current_model_type][i]): float(predictions[0][i] * 100)
-                for i in range(len(predictions[0]))
+                    'error': 'Invalid Image',
+                    'message': "WARNING: Not a pepper plant leaf! Please upload a clear photo showing the actual pepper plant leaf.",
+                    'validation_confidence': round(leaf_probability * 100, 2),
+                    'rejected_by': 'leaf_gate'
+                }, color_stats
+        
+        return None, color_stats
+    
+    def run_model_stage(self, image, color_stats):
+        """
+        Stage 3 of the cascade: full model on a validated, decoded BGR image
+        
+        Returns:
+            dict with prediction results
+        """
+        metrics.increment('cascade.full_model')
+        
+        # Use PyTorch detector if available (black pepper only)
+        if self.current_model_type == 'black_pepper' and self.using_pytorch:
+            print("[*] Using trained PyTorch model for prediction...")
+            with metrics.timer('cascade.model'):
+                return self.pytorch_detector.predict_image(
+                    Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+                )
+        
+        # Otherwise use Keras model (default)
+        # Preprocess image
+        img_preprocessed = self.preprocess_image(image)
+        
+        # Get current model
+        model = self.models[self.current_model_type]
+        if model is None:
+            return {
+                'success': False,
+                'error': 'Model not loaded',
+                'message': f'{self.model_configs[self.current_model_type]["display_name"]} model is not available'
             }
-            
-            # SMART HEALTHY DETECTION LOGIC (Improve Accuracy)
-            # Find the healthy class key
-            healthy_key = next((k for k in probabilities.keys() if 'Healthy' in k), None)
-            if healthy_key:
-                # Get the highest disease probability
-                disease_probs = [(k, v) for k, v in probabilities.items() if k != healthy_key]
-                max_disease_name, max_disease_prob = max(disease_probs, key=lambda x: x[1]) if disease_probs else (None, 0)
-                healthy_prob = probabilities[healthy_key]
+        
+        # Predict
+        with metrics.timer('cascade.model'):
+            predictions = self.compiled_models[self.current_model_type].predict(img_preprocessed)
+        predicted_class_idx = np.argmax(predictions[0])
+        confidence = float(predictions[0][predicted_class_idx] * 100)
+        
+        # Get class name and format it for database
+        raw_class_name = self.class_names[self.current_model_type][predicted_class_idx]
+        predicted_class = self._format_class_name(raw_class_name)
+        
+        # Get all probabilities with formatted class names
+        probabilities = {
+            self._format_class_name(self.class_names[self.current_model_type][i]): float(predictions[0][i] * 100)
+            for i in range(len(predictions[0]))
+        }
+        
+        # SMART HEALTHY DETECTION LOGIC (Improve Accuracy)
+        # Find the healthy class key
+        healthy_key = next((k for k in probabilities.keys() if 'Healthy' in k), None)
+        if healthy_key:
+            # Get the highest disease probability
+            disease_probs = [(k, v) for k, v in probabilities.items() if k != healthy_key]
+            max_disease_name, max_disease_prob = max(disease_probs, key=lambda x: x[1]) if disease_probs else (None, 0)
+            healthy_prob = probabilities[healthy_key]
+            
+            # Rule 1: If probabilities are close (difference < 15%), default to healthy to avoid false positives
+            if abs(healthy_prob - max_disease_prob) < 15:
+                predicted_class = healthy_key
+                confidence = healthy_prob
+                print(f"[*] Probabilities too close ({healthy_prob:.1f}% vs {max_disease_prob:.1f}%) - Defaulting to HEALTHY")
+            
+            # Rule 2: If a disease is predicted but leaf looks very green/healthy
+            elif 'Healthy' not in predicted_class:
+                green_val = color_stats.get('green_pct', 0)
+                yellow_val = color_stats.get('yellow_pct', 0)
                 
-                # Rule 1: If probabilities are close (difference < 15%), default to healthy to avoid false positives
-                if abs(healthy_prob - max_disease_prob) < 15:
+                # Moderate confidence disease prediction on very green leaf
+                if confidence < 80 and green_val > 50 and yellow_val < 10:
                     predicted_class = healthy_key
-                    confidence = healthy_prob
-                    print(f"[*] Probabilities too close ({healthy_prob:.1f}% vs {max_disease_prob:.1f}%) - Defaulting to HEALTHY")
-                
-                # Rule 2: If a disease is predicted but leaf looks very green/healthy
-                elif 'Healthy' not in predicted_class:
-                    green_val = getattr(self, '_last_green_pct', 0)
-                    yellow_val = getattr(self, '_last_yellow_pct', 0)
+                    confidence = max(healthy_prob, 65.0)
+                    print(f"[*] Image looks visually healthy (green: {green_val:.1f}%, yellow: {yellow_val:.1f}%) - Overriding to HEALTHY")
                     
-                    # Moderate confidence disease prediction on very green leaf
-                    if confidence < 80 and green_val > 50 and yellow_val < 10:
-                        predicted_class = healthy_key
-                        confidence = max(healthy_prob, 65.0)
-                        print(f"[*] Image looks visually healthy (green: {green_val:.1f}%, yellow: {yellow_val:.1f}%) - Overriding to HEALTHY")
-                        
-                    # High confidence disease prediction on EXTREMELY green leaf (likely model bias)
-                    elif green_val > 80:
-                        predicted_class = healthy_key
-                        confidence = max(healthy_prob, 85.0)
-                        print(f"[*] Extremely green image ({green_val:.1f}%) - Overriding high-confidence disease prediction to HEALTHY")
-            
-            # Check confidence threshold (lowered to 20% to allow predictions for valid leaves)
-            if confidence < 20:
-                return {
-                    'success': False,
-                    'error': f'Not a {self.model_configs[self.current_model_type]["display_name"]} Leaf',
-                    'message': f'This model is trained for {self.model_configs[self.current_model_type]["display_name"]} leaves. Your image may be a different type of plant.',
-                    'suggestion': f'Please upload a clear photo of a {self.model_configs[self.current_model_type]["display_name"]} leaf.',
-                    'model_confidence': round(confidence, 2),
-                    'detected_type': self.current_model_type
-                }
-            
-            # Show result with low confidence warning if confidence is between 20-50%
-            result = {
-                'success': True,
-                'disease': predicted_class,
-                'confidence': round(confidence, 2),
-                'probabilities': probabilities,
-                'model_type': self.current_model_type,
-                'model_name': self.model_configs[self.current_model_type]['display_name'],
-                'is_valid': True
-            }
-            
-            # Add warning for low confidence predictions
-            if confidence < 50:
-                result['warning'] = 'Low Confidence'
-                result['warning_message'] = f'The model has low confidence ({round(confidence, 2)}%). The prediction may not be accurate.'
-            
-            return result
-            
-        except Exception as e:
+                # High confidence disease prediction on EXTREMELY green leaf (likely model bias)
+                elif green_val > 80:
+                    predicted_class = healthy_key
+                    confidence = max(healthy_prob, 85.0)
+                    print(f"[*] Extremely green image ({green_val:.1f}%) - Overriding high-confidence disease prediction to HEALTHY")
+        
+        # Check confidence threshold (lowered to 20% to allow predictions for valid leaves)
+        if confidence < 20:
             return {
                 'success': False,
-                'error': 'Prediction failed',
-                'message': str(e)
+                'error': f'Not a {self.model_configs[self.current_model_type]["display_name"]} Leaf',
+                'message': f'This model is trained for {self.model_configs[self.current_model_type]["display_name"]} leaves. Your image may be a different type of plant.',
+                'suggestion': f'Please upload a clear photo of a {self.model_configs[self.current_model_type]["display_name"]} leaf.',
+                'model_confidence': round(confidence, 2),
+                'detected_type': self.current_model_type
             }
+        
+        # Show result with low confidence warning if confidence is between 20-50%
+        result = {
+            'success': True,
+            'disease': predicted_class,
+            'confidence': round(confidence, 2),
+            'probabilities': probabilities,
+            'model_type': self.current_model_type,
+            'model_name': self.model_configs[self.current_model_type]['display_name'],
+            'is_valid': True
+        }
+        
+        # Add warning for low confidence predictions
+        if confidence < 50:
+            result['warning'] = 'Low Confidence'
+            result['warning_message'] = f'The model has low confidence ({round(confidence, 2)}%). The prediction may not be accurate.'
+        
+        return result
+    
+    def get_cascade_metrics(self):
+        """Per-stage exit rates and latency of the prediction cascade"""
+        snapshot = metrics.snapshot()
+        requests = metrics.get_counter('cascade.requests')
+        
+        stages = {}
+        for stage, exit_counter in (('validator', 'cascade.exit.validator'),
+                                    ('gate', 'cascade.exit.gate'),
+                                    ('model', 'cascade.full_model')):
+            count = metrics.get_counter(exit_counter)
+            stages[stage] = {
+                'exits': count,
+                'exit_rate': round(count / requests, 4) if requests else 0,
+                'latency_ms': snapshot['latency_ms'].get(f'cascade.{stage}', {})
+            }
+        
+        summary = {
+            'requests': requests,
+            'gate_loaded': self.leaf_gate.is_loaded,
+            'gate_threshold': self.gate_threshold,
+            'stages': stages
+        }
+        if self.using_pytorch and self.pytorch_detector:
+            summary['dynamic_resolution'] = self.pytorch_detector.get_resolution_metrics()
+        return summary
     
     @property
     def is_trained(self):
@@ -0,0 +1,86 @@
+"""
+Evaluate confidence-driven dynamic input resolution for the black pepper model
+
+Runs every held-out image at both the low resolution and 224px, then reports for
+each escalation threshold how often the dynamic result agrees with full resolution
+and what share of requests would exit early.
+
+Usage:
+    python evaluate_dynamic_resolution.py <held_out_dir> [--margins 0.1,0.2,0.25,0.3] [--low-resolution 160]
+"""
+
+import argparse
+import glob
+import os
+import time
+import numpy as np
+from PIL import Image
+from pytorch_black_pepper_detector import PyTorchBlackPepperDetector
+
+IMAGE_EXTENSIONS = ('*.jpg', '*.jpeg', '*.png', '*.bmp', '*.JPG', '*.JPEG', '*.PNG')
+
+
+def collect_images(directory):
+    paths = []
+    for pattern in IMAGE_EXTENSIONS:
+        paths.extend(glob.glob(os.path.join(directory, '**', pattern), recursive=True))
+    return sorted(set(paths))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dynamic resolution agreement on a held-out set')
+    parser.add_argument('held_out_dir')
+    parser.add_argument('--model-path', default='best_black_pepper_model.pth')
+    parser.add_argument('--low-resolution', type=int, default=160)
+    parser.add_argument('--margins', default='0.1,0.15,0.2,0.25,0.3,0.4')
+    parser.add_argument('--not-leaf-band', type=float, default=0.10)
+    args = parser.parse_args()
+
+    images = collect_images(args.held_out_dir)
+    if not images:
+        print(f"❌ No images found in {args.held_out_dir}")
+        return
+
+    detector = PyTorchBlackPepperDetector(
+        args.model_path,
+        dynamic_resolution=False,
+        low_resolution=args.low_resolution,
+        not_leaf_band=args.not_leaf_band
+    )
+
+    low_probs, full_probs = [], []
+    low_time = full_time = 0.0
+    for path in images:
+        image = Image.open(path).convert('RGB')
+
+        start = time.perf_counter()
+        low_probs.append(detector._class_probabilities(image, detector.low_res_transform))
+        low_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        full_probs.append(detector._class_probabilities(image, detector.transform))
+        full_time += time.perf_counter() - start
+
+    low_pred = np.array([detector._decide(p)[0] for p in low_probs])
+    full_pred = np.array([detector._decide(p)[0] for p in full_probs])
+
+    print("\n" + "="*70)
+    print(f"DYNAMIC RESOLUTION EVALUATION ({len(images)} held-out images)")
+    print("="*70)
+    print(f"Mean latency: {args.low_resolution}px {low_time / len(images) * 1000:.1f}ms, "
+          f"{detector.FULL_RESOLUTION}px {full_time / len(images) * 1000:.1f}ms")
+    print(f"Agreement if always {args.low_resolution}px: {np.mean(low_pred == full_pred) * 100:.2f}%\n")
+
+    print(f"{'margin':>8} {'early exit':>12} {'agreement':>11} {'est. latency':>14}")
+    for margin in [float(m) for m in args.margins.split(',')]:
+        detector.margin_threshold = margin
+        escalate = np.array([detector.needs_full_resolution(p) for p in low_probs])
+        dynamic_pred = np.where(escalate, full_pred, low_pred)
+        est_latency = (low_time + full_time * escalate.mean()) / len(images) * 1000
+        print(f"{margin:>8.2f} {(1 - escalate.mean()) * 100:>11.1f}% "
+              f"{np.mean(dynamic_pred == full_pred) * 100:>10.2f}% {est_latency:>12.1f}ms")
+    print("="*70)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+"""
+Frequently Bought Together
+Co-purchase association rules mined from DELIVERED orders with FP-growth and
+kept in SQLite, so "bought together" for a product (or a basket) is one dict
+lookup instead of a scan over the order history.
+
+- Orders become transactions of distinct product ids; identical baskets are
+  counted once with a weight before the FP-tree is built
+- FP-growth mines every itemset with support >= FBT_MIN_SUPPORT (share of
+  transactions) up to FBT_MAX_LENGTH products, without enumerating pairs
+- Rules antecedent -> one consequent keep support, confidence and lift;
+  rules below FBT_MIN_CONFIDENCE or with lift < FBT_MIN_LIFT are dropped
+
+Usage:
+    python frequently_bought_together.py mine orders.ndjson   (or orders on stdin)
+    python frequently_bought_together.py lookup <product_id>[,<product_id>...] [--limit 5]
+    python frequently_bought_together.py stats
+
+Order records: {"_id", "user", "status", "items": [{"product"}]} (Node / Mongo field names).
+
+Rules are not updated by order events: with ITEM_SIMILARITY_STORE_SYNC=true the
+Node backend re-mines them from an NDJSON export of the DELIVERED orders at
+startup when none exist and then every BOUGHT_TOGETHER_MINE_INTERVAL_HOURS
+(src/services/itemSimilarityStoreSync.js).
+"""
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+from mongo_ids import DELIVERED_STATUS, normalize_id
+
+DEFAULT_DB_PATH = os.environ.get(
+    'FBT_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'frequently_bought_together.db')
+)
+DEFAULT_MIN_SUPPORT = float(os.environ.get('FBT_MIN_SUPPORT', '0.0005'))
+DEFAULT_MIN_CONFIDENCE = float(os.environ.get('FBT_MIN_CONFIDENCE', '0.05'))
+DEFAULT_MIN_LIFT = float(os.environ.get('FBT_MIN_LIFT', '1.0'))
+DEFAULT_MAX_LENGTH = int(os.environ.get('FBT_MAX_LENGTH', '3'))
+
+# Itemsets need at least this many transactions whatever the support share
+MIN_COUNT_FLOOR = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fbt_rules (
+    antecedent TEXT NOT NULL,
+    consequent TEXT NOT NULL,
+    count      INTEGER NOT NULL,
+    support    REAL NOT NULL,
+    confidence REAL NOT NULL,
+    lift       REAL NOT NULL,
+    PRIMARY KEY (antecedent, consequent)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS fbt_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Antecedent key: sorted product ids (Mongo ids never contain commas)
+KEY_SEPARATOR = ','
+
+
+def itemset_key(product_ids):
+    return KEY_SEPARATOR.join(sorted({str(p) for p in product_ids}))
+
+
+def order_transactions(order_records):
+    """Counter of baskets (sorted tuples of distinct product ids) from DELIVERED orders"""
+    baskets = Counter()
+    for record in order_records:
+        if record.get('status') != DELIVERED_STATUS:
+            continue
+        products = {normalize_id(item.get('product')) for item in record.get('items') or []}
+        products.discard(None)
+        if products:
+            baskets[tuple(sorted(products))] += 1
+    return baskets
+
+
+class _FPTree:
+    """FP-tree in parallel lists: node 0 is the root"""
+
+    __slots__ = ('item', 'count', 'parent', 'children', 'header')
+
+    def __init__(self):
+        self.item = [-1]
+        self.count = [0]
+        self.parent = [-1]
+        self.children = {}  # (parent node, item) -> node
+        self.header = {}    # item -> [node, ...]
+
+    def insert(self, items, count):
+        """Add a transaction whose items are already in tree order"""
+        node = 0
+        for item in items:
+            child = self.children.get((node, item))
+            if child is None:
+                child = len(self.item)
+                self.item.append(item)
+                self.count.append(0)
+                self.parent.append(node)
+                self.children[(node, item)] = child
+                self.header.setdefault(item, []).append(child)
+            self.count[child] += count
+            node = child
+
+
+def _mine(tree, suffix, min_count, max_length, out):
+    """Append (itemset, count) for every frequent itemset ending in suffix"""
+    # Least frequent items first (highest rank), as in the original algorithm
+    for item in sorted(tree.header, reverse=True):
+        nodes = tree.header[item]
+        support = sum(tree.count[node] for node in nodes)
+        if support < min_count:
+            continue
+        itemset = suffix + (item,)
+        out.append((itemset, support))
+        if max_length and len(itemset) >= max_length:
+            continue
+
+        # Conditional pattern base: the prefix path above every node of item
+        paths = []
+        conditional = Counter()
+        for node in nodes:
+            count = tree.count[node]
+            path = []
+            parent = tree.parent[node]
+            while parent > 0:
+                path.append(tree.item[parent])
+                parent = tree.parent[parent]
+            if path:
+                paths.append((path, count))
+                for prefix_item in path:
+                    conditional[prefix_item] += count
+
+        frequent = {prefix_item for prefix_item, count in conditional.items() if count >= min_count}
+        if not frequent:
+            continue
+        subtree = _FPTree()
+        for path, count in paths:
+            # Paths are collected leaf-to-root; insert root first
+            subtree.insert([prefix_item for prefix_item in reversed(path) if prefix_item in frequent], count)
+        _mine(subtree, itemset, min_count, max_length, out)
+
+
+def fp_growth(baskets, min_count, max_length=DEFAULT_MAX_LENGTH):
+    """
+    Frequent itemsets from weighted baskets
+
+    baskets: {tuple of items: count}. Returns {frozenset(items): count}.
+    """
+    frequency = Counter()
+    for basket, count in baskets.items():
+        for item in basket:
+            frequency[item] += count
+
+    # Tree order: most frequent first, ties by id, infrequent items dropped
+    ordered = sorted((item for item, count in frequency.items() if count >= min_count),
+                     key=lambda item: (-frequency[item], item))
+    rank = {item: position for position, item in enumerate(ordered)}
+
+    tree = _FPTree()
+    for basket, count in baskets.items():
+        items = sorted(rank[item] for item in basket if item in rank)
+        if items:
+            tree.insert(items, count)
+
+    found = []
+    _mine(tree, (), min_count, max_length, found)
+    return {frozenset(ordered[r] for r in itemset): count for itemset, count in found}
+
+
+def association_rules(itemsets, n_transactions, min_confidence=DEFAULT_MIN_CONFIDENCE,
+                      min_lift=DEFAULT_MIN_LIFT):
+    """
+    Rules (antecedent, consequent, count, support, confidence, lift) with a
+    single-product consequent from every frequent itemset of 2+ products
+    """
+    rules = []
+    for itemset, count in itemsets.items():
+        if len(itemset) < 2:
+            continue
+        for consequent in itemset:
+            antecedent = itemset - {consequent}
+            confidence = count / itemsets[antecedent]
+            lift = confidence / (itemsets[frozenset((consequent,))] / n_transactions)
+            if confidence >= min_confidence and lift >= min_lift:
+                rules.append((antecedent, consequent, count, count / n_transactions, confidence, lift))
+    return rules
+
+
+class BoughtTogetherStore:
+    """SQLite-backed association rules with an in-memory lookup table; safe to share between threads"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._lookup = None
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(_SCHEMA)
+
+    def mine(self, order_records, min_support=DEFAULT_MIN_SUPPORT, min_confidence=DEFAULT_MIN_CONFIDENCE,
+             min_lift=DEFAULT_MIN_LIFT, max_length=DEFAULT_MAX_LENGTH):
+        """Mine the orders and replace the stored rules"""
+        start = time.perf_counter()
+        baskets = order_transactions(order_records)
+        n_transactions = sum(baskets.values())
+        if not n_transactions:
+            raise ValueError('No DELIVERED orders with products to mine')
+        min_count = max(MIN_COUNT_FLOOR, math.ceil(min_support * n_transactions))
+
+        itemsets = fp_growth(baskets, min_count, max_length)
+        rules = association_rules(itemsets, n_transactions, min_confidence, min_lift)
+        elapsed = time.perf_counter() - start
+
+        meta = {
+            'transactions': n_transactions,
+            'distinct_baskets': len(baskets),
+            'min_support': min_support,
+            'min_count': min_count,
+            'min_confidence': min_confidence,
+            'min_lift': min_lift,
+            'max_length': max_length,
+            'itemsets': len(itemsets),
+            'rules': len(rules),
+            'mined_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'seconds': round(elapsed, 3)
+        }
+        with self._lock:
+            with self._conn:
+                self._conn.execute('DELETE FROM fbt_rules')
+                self._conn.executemany(
+                    'INSERT INTO fbt_rules (antecedent, consequent, count, support, confidence, lift) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    ((itemset_key(antecedent), consequent, count, support, confidence, lift)
+                     for antecedent, consequent, count, support, confidence, lift in rules)
+                )
+                self._conn.execute('DELETE FROM fbt_meta')
+                self._conn.executemany('INSERT INTO fbt_meta (key, value) VALUES (?, ?)',
+                                       ((key, json.dumps(value)) for key, value in meta.items()))
+            self._lookup = None
+        return meta
+
+    def _get_lookup(self):
+        """{antecedent key: [rule, ...]} strongest first, loaded once per mining run"""
+        if self._lookup is None:
+            lookup = {}
+            for antecedent, consequent, count, support, confidence, lift in self._conn.execute(
+                    'SELECT antecedent, consequent, count, support, confidence, lift FROM fbt_rules '
+                    'ORDER BY antecedent, confidence DESC, lift DESC, consequent'):
+                lookup.setdefault(antecedent, []).append({
+                    'productId': consequent,
+                    'count': count,
+                    'support': support,
+                    'confidence': confidence,
+                    'lift': lift
+                })
+            self._lookup = lookup
+        return self._lookup
+
+    def bought_together(self, product_ids, limit=5):
+        """Products bought with a product id (or with a whole basket of ids), strongest rule first"""
+        if isinstance(product_ids, str):
+            product_ids = [product_ids]
+        with self._lock:
+            rules = self._get_lookup().get(itemset_key(product_ids), [])
+        return rules[:limit] if limit is not None else list(rules)
+
+    def stats(self):
+        with self._lock:
+            meta = {key: json.loads(value) for key, value in self._conn.execute('SELECT key, value FROM fbt_meta')}
+            stored = self._conn.execute('SELECT COUNT(*), COUNT(DISTINCT antecedent) FROM fbt_rules').fetchone()
+        return {**meta, 'stored_rules': stored[0], 'antecedents': stored[1], 'db_path': self.db_path}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Opened once per process (shared by the engine and the worker daemon)
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_bought_together_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = BoughtTogetherStore()
+    return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Frequently-bought-together rules (FP-growth)')
+    parser.add_argument('command', choices=['mine', 'lookup', 'stats'])
+    parser.add_argument('arg', nargs='?', help='Order export for mine (default stdin) or product id(s) for lookup')
+    parser.add_argument('--limit', type=int, default=5)
+    parser.add_argument('--min-support', type=float, default=DEFAULT_MIN_SUPPORT)
+    parser.add_argument('--min-confidence', type=float, default=DEFAULT_MIN_CONFIDENCE)
+    parser.add_argument('--max-length', type=int, default=DEFAULT_MAX_LENGTH)
+    parser.add_argument('--db', default=DEFAULT_DB_PATH)
+    args = parser.parse_args()
+
+    from ml_stream_io import iter_json_records
+
+    store = BoughtTogetherStore(args.db)
+    try:
+        if args.command == 'mine':
+            options = {'min_support': args.min_support, 'min_confidence': args.min_confidence,
+                       'max_length': args.max_length}
+            if args.arg:
+                with open(args.arg, 'r', encoding='utf-8') as f:
+                    result = store.mine(iter_json_records(f), **options)
+            else:
+                result = store.mine(iter_json_records(sys.stdin), **options)
+        elif args.command == 'lookup':
+            if not args.arg:
+                parser.error('lookup needs a product id')
+            product_ids = args.arg.split(KEY_SEPARATOR)
+            result = {'productIds': product_ids, 'boughtTogether': store.bought_together(product_ids, args.limit)}
+        else:
+            result = store.stats()
+        print(json.dumps({'success': True, **result}))
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,594 @@
+"""
+Item Similarity Store
+Item-based collaborative filtering state for recommendation_engine.py, kept
+in SQLite and updated incrementally as order and browsing events arrive, so an
+online recommendation is a few indexed row lookups instead of a neighbour
+search over the whole user base.
+
+Interaction weights are the same as the KNN engine: 3 per item line of a
+DELIVERED order, plus the browsing view count.
+
+- orders:         last seen state of every order (events are idempotent)
+- browsing:       view count per (user, product)
+- interactions:   current weight per (user, product)
+- item_norms:     squared norm of each product's user-weight column
+- item_pairs:     dot product of every co-interacted product pair (both directions)
+- item_neighbors: top-N cosine neighbours per product, refreshed for the
+                  products an event touched
+- store_meta:     when the store was last rebuilt from a full export
+
+The store only knows the orders and views it has been sent, so it starts out
+not ready: a rebuild from full order and browsing exports has to run first.
+The Node backend does this backfill at startup and afterwards sends every
+order save / update / delete and browsing update as an event
+(src/services/itemSimilarityStoreSync.js, ITEM_SIMILARITY_STORE_SYNC=true).
+
+Usage:
+    python item_similarity_store.py rebuild orders.ndjson [--browsing browsing.ndjson]
+    python item_similarity_store.py record < orders.ndjson          (incremental order events)
+    python item_similarity_store.py remove <order_id>               (order deleted)
+    python item_similarity_store.py browse < browsing.ndjson        (view count updates)
+    python item_similarity_store.py similar <product_id> [--limit 10]
+    python item_similarity_store.py stats
+
+Order records: {"_id", "user", "status", "items": [{"product"}]}; browsing
+records: {"user", "product", "viewCount"} (Node / Mongo field names).
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+from scipy import sparse
+
+from mongo_ids import DELIVERED_STATUS, normalize_id
+
+DEFAULT_DB_PATH = os.environ.get(
+    'ITEM_SIMILARITY_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'item_similarity.db')
+)
+DEFAULT_TOP_N = int(os.environ.get('ITEM_SIMILARITY_TOP_N', '50'))
+
+# Same weights as RecommendationEngine.build_user_vector
+PURCHASE_WEIGHT = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    user_id  TEXT NOT NULL,
+    status   TEXT,
+    items    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS browsing (
+    user_id    TEXT NOT NULL,
+    product_id TEXT NOT NULL,
+    view_count REAL NOT NULL,
+    PRIMARY KEY (user_id, product_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS interactions (
+    user_id    TEXT NOT NULL,
+    product_id TEXT NOT NULL,
+    weight     REAL NOT NULL,
+    PRIMARY KEY (user_id, product_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS item_norms (
+    product_id TEXT PRIMARY KEY,
+    norm_sq    REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS item_pairs (
+    product_id TEXT NOT NULL,
+    other_id   TEXT NOT NULL,
+    dot        REAL NOT NULL,
+    PRIMARY KEY (product_id, other_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS item_neighbors (
+    product_id  TEXT NOT NULL,
+    neighbor_id TEXT NOT NULL,
+    similarity  REAL NOT NULL,
+    PRIMARY KEY (product_id, neighbor_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_ADD_DOT = """
+INSERT INTO item_pairs (product_id, other_id, dot) VALUES (?, ?, ?)
+ON CONFLICT(product_id, other_id) DO UPDATE SET dot = dot + excluded.dot
+"""
+
+
+def order_item_fields(record):
+    """(order_id, user_id, status, [product_id, ...]) from an order record"""
+    order_id = normalize_id(record.get('order_id') or record.get('_id'))
+    user_id = normalize_id(record.get('user_id') or record.get('user'))
+    if not order_id or not user_id:
+        raise ValueError('Order event needs an order id and a user id')
+    products = [normalize_id(item.get('product')) for item in record.get('items') or []]
+    return order_id, user_id, record.get('status'), [p for p in products if p]
+
+
+def browsing_fields(record):
+    """(user_id, product_id, view_count) from a browsing record"""
+    user_id = normalize_id(record.get('user_id') or record.get('user'))
+    product_id = normalize_id(record.get('product_id') or record.get('product'))
+    if not user_id or not product_id:
+        raise ValueError('Browsing record needs a user id and a product id')
+    return user_id, product_id, record.get('viewCount', 1)
+
+
+def _order_weights(status, products):
+    weights = {}
+    if status == DELIVERED_STATUS:
+        for product_id in products:
+            weights[product_id] = weights.get(product_id, 0) + PURCHASE_WEIGHT
+    return weights
+
+
+def top_neighbors(product_id, pairs, norms, norm_sq, top_n):
+    """Top-N (neighbor_id, cosine) from [(other_id, dot)]; ties broken by id"""
+    if norm_sq <= 0:
+        return []
+    scored = [
+        (other_id, dot / math.sqrt(norm_sq * norms[other_id]))
+        for other_id, dot in pairs
+        if other_id != product_id and dot > 0 and norms.get(other_id, 0) > 0
+    ]
+    return heapq.nsmallest(top_n, scored, key=lambda x: (-x[1], x[0]))
+
+
+class ItemSimilarityStore:
+    """SQLite-backed item-item similarity table; safe to share between threads"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, top_n=DEFAULT_TOP_N):
+        self.db_path = db_path
+        self.top_n = top_n
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(_SCHEMA)
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    def _set_weight(self, user_id, product_id, delta, changed):
+        """Change one (user, product) weight and the norms / dot products it feeds"""
+        row = self._conn.execute(
+            'SELECT weight FROM interactions WHERE user_id = ? AND product_id = ?', (user_id, product_id)
+        ).fetchone()
+        old = row[0] if row else 0
+        new = old + delta
+        if new == old:
+            return
+
+        # dot(i, j) += delta * w_uj for every other product j of this user
+        others = self._conn.execute(
+            'SELECT product_id, weight FROM interactions WHERE user_id = ? AND product_id != ?',
+            (user_id, product_id)
+        ).fetchall()
+        self._conn.executemany(_ADD_DOT, (
+            pair for other_id, weight in others
+            for pair in ((product_id, other_id, delta * weight), (other_id, product_id, delta * weight))
+        ))
+        self._conn.execute(
+            'INSERT INTO item_norms (product_id, norm_sq) VALUES (?, ?) '
+            'ON CONFLICT(product_id) DO UPDATE SET norm_sq = norm_sq + excluded.norm_sq',
+            (product_id, new * new - old * old)
+        )
+        if new:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO interactions (user_id, product_id, weight) VALUES (?, ?, ?)',
+                (user_id, product_id, new)
+            )
+        else:
+            self._conn.execute(
+                'DELETE FROM interactions WHERE user_id = ? AND product_id = ?', (user_id, product_id)
+            )
+        changed.add(product_id)
+
+    def _apply_order(self, order_id, user_id, status, products, changed):
+        """Apply one order's change inside the caller's transaction; False if unchanged"""
+        items = json.dumps(products)
+        previous = self._conn.execute(
+            'SELECT user_id, status, items FROM orders WHERE order_id = ?', (order_id,)
+        ).fetchone()
+        if previous == (user_id, status, items):
+            return False
+
+        deltas = {}
+        if previous is not None:
+            for product_id, weight in _order_weights(previous[1], json.loads(previous[2])).items():
+                deltas[(previous[0], product_id)] = -weight
+        for product_id, weight in _order_weights(status, products).items():
+            key = (user_id, product_id)
+            deltas[key] = deltas.get(key, 0) + weight
+        for (user, product_id), delta in deltas.items():
+            if delta:
+                self._set_weight(user, product_id, delta, changed)
+
+        self._conn.execute(
+            'INSERT OR REPLACE INTO orders (order_id, user_id, status, items) VALUES (?, ?, ?, ?)',
+            (order_id, user_id, status, items)
+        )
+        return True
+
+    def _norms(self, product_ids):
+        ids = list(product_ids)
+        norms = {}
+        for start in range(0, len(ids), 900):
+            chunk = ids[start:start + 900]
+            norms.update(self._conn.execute(
+                f'SELECT product_id, norm_sq FROM item_norms WHERE product_id IN ({",".join("?" * len(chunk))})',
+                chunk))
+        return norms
+
+    def _write_neighbors(self, product_id, neighbors):
+        self._conn.execute('DELETE FROM item_neighbors WHERE product_id = ?', (product_id,))
+        self._conn.executemany(
+            'INSERT INTO item_neighbors (product_id, neighbor_id, similarity) VALUES (?, ?, ?)',
+            [(product_id, neighbor_id, similarity) for neighbor_id, similarity in neighbors]
+        )
+
+    def _recompute_neighbors(self, product_id):
+        """Rebuild one product's top-N row from its pair dot products"""
+        norm = self._conn.execute('SELECT norm_sq FROM item_norms WHERE product_id = ?', (product_id,)).fetchone()
+        rows = self._conn.execute(
+            'SELECT p.other_id, p.dot, n.norm_sq FROM item_pairs p '
+            'JOIN item_norms n ON n.product_id = p.other_id WHERE p.product_id = ?',
+            (product_id,)
+        ).fetchall()
+        self._write_neighbors(product_id, top_neighbors(
+            product_id, [(other, dot) for other, dot, _ in rows],
+            {other: norm_sq for other, _, norm_sq in rows}, norm[0] if norm else 0, self.top_n
+        ))
+
+    def _refresh_neighbors(self, changed):
+        """
+        Bring the top-N table up to date after weight changes
+
+        Changed products get their row rebuilt. A product paired with a changed
+        one only sees that pair's similarity move (every other similarity in
+        its row is unchanged), so its row is patched in place; it is rebuilt
+        only when a listed neighbour's similarity dropped, since an unlisted
+        product could then overtake it.
+        """
+        updates = {}  # partner -> [(changed product, dot)]
+        ids = list(changed)
+        for start in range(0, len(ids), 900):
+            chunk = ids[start:start + 900]
+            marks = ",".join("?" * len(chunk))
+            for product_id, other_id, dot in self._conn.execute(
+                    f'SELECT product_id, other_id, dot FROM item_pairs WHERE product_id IN ({marks})', chunk):
+                if other_id not in changed:
+                    updates.setdefault(other_id, []).append((product_id, dot))
+            # Pairs no user shares any more (their partners were collected above)
+            self._conn.execute(
+                f'DELETE FROM item_pairs WHERE dot = 0 AND (product_id IN ({marks}) OR other_id IN ({marks}))',
+                chunk + chunk
+            )
+
+        for product_id in changed:
+            self._recompute_neighbors(product_id)
+
+        norms = self._norms(set(updates) | set(changed))
+        current = self.neighbors_of(updates, locked=True)
+        rebuilt = 0
+        for partner, pairs in updates.items():
+            norm_sq = norms.get(partner, 0)
+            neighbors = dict(current[partner])
+            full = len(neighbors) >= self.top_n
+            rebuild = False
+            for product_id, dot in pairs:
+                other_norm = norms.get(product_id, 0)
+                similarity = dot / math.sqrt(norm_sq * other_norm) if dot > 0 and norm_sq > 0 and other_norm > 0 else None
+                old = neighbors.get(product_id)
+                if old is not None and full and (similarity is None or similarity < old):
+                    rebuild = True
+                    break
+                if similarity is None:
+                    neighbors.pop(product_id, None)
+                else:
+                    neighbors[product_id] = similarity
+            if rebuild:
+                self._recompute_neighbors(partner)
+                rebuilt += 1
+                continue
+            ranked = sorted(neighbors.items(), key=lambda x: (-x[1], x[0]))[:self.top_n]
+            if ranked != sorted(current[partner], key=lambda x: (-x[1], x[0])):
+                self._write_neighbors(partner, ranked)
+        return len(changed) + rebuilt
+
+    def record_orders(self, records):
+        """Apply a batch of order events in one transaction"""
+        applied = 0
+        received = 0
+        changed = set()
+        with self._lock, self._conn:
+            for record in records:
+                received += 1
+                if self._apply_order(*order_item_fields(record), changed):
+                    applied += 1
+            refreshed = self._refresh_neighbors(changed)
+        return {'received': received, 'applied': applied, 'refreshed': refreshed}
+
+    def delete_order(self, order_id):
+        """Remove an order (e.g. hard-deleted in the main database)"""
+        order_id = normalize_id(order_id)
+        changed = set()
+        with self._lock, self._conn:
+            previous = self._conn.execute(
+                'SELECT user_id, status, items FROM orders WHERE order_id = ?', (order_id,)
+            ).fetchone()
+            if previous is None:
+                return False
+            user_id, status, items = previous
+            for product_id, weight in _order_weights(status, json.loads(items)).items():
+                self._set_weight(user_id, product_id, -weight, changed)
+            self._conn.execute('DELETE FROM orders WHERE order_id = ?', (order_id,))
+            self._refresh_neighbors(changed)
+        return True
+
+    def record_browsing(self, records):
+        """Apply view count updates (absolute counts per user and product)"""
+        applied = 0
+        received = 0
+        changed = set()
+        with self._lock, self._conn:
+            for record in records:
+                received += 1
+                user_id, product_id, view_count = browsing_fields(record)
+                row = self._conn.execute(
+                    'SELECT view_count FROM browsing WHERE user_id = ? AND product_id = ?', (user_id, product_id)
+                ).fetchone()
+                delta = view_count - (row[0] if row else 0)
+                if not delta:
+                    continue
+                self._set_weight(user_id, product_id, delta, changed)
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO browsing (user_id, product_id, view_count) VALUES (?, ?, ?)',
+                    (user_id, product_id, view_count)
+                )
+                applied += 1
+            refreshed = self._refresh_neighbors(changed)
+        return {'received': received, 'applied': applied, 'refreshed': refreshed}
+
+    # ------------------------------------------------------------------
+    # Full precompute
+    # ------------------------------------------------------------------
+
+    def rebuild(self, order_records, browsing_records=None):
+        """Recompute interactions, pair dot products and the top-N table from full exports"""
+        orders = {}
+        for record in order_records:
+            order_id, user_id, status, products = order_item_fields(record)
+            orders[order_id] = (user_id, status, products)
+        browsing = {}
+        for record in browsing_records or []:
+            user_id, product_id, view_count = browsing_fields(record)
+            browsing[(user_id, product_id)] = view_count
+
+        weights = {}
+        for user_id, status, products in orders.values():
+            for product_id, weight in _order_weights(status, products).items():
+                weights[(user_id, product_id)] = weights.get((user_id, product_id), 0) + weight
+        for key, view_count in browsing.items():
+            weights[key] = weights.get(key, 0) + view_count
+        weights = {key: weight for key, weight in weights.items() if weight}
+
+        users = {}
+        products = {}
+        rows = np.fromiter((users.setdefault(u, len(users)) for u, _ in weights), dtype=np.int64, count=len(weights))
+        cols = np.fromiter((products.setdefault(p, len(products)) for _, p in weights), dtype=np.int64, count=len(weights))
+        matrix = sparse.csr_matrix(
+            (np.fromiter(weights.values(), dtype=np.float64, count=len(weights)), (rows, cols)),
+            shape=(len(users), len(products))
+        )
+        product_ids = list(products)
+        names = np.array(product_ids, dtype=object)
+
+        # Item x item dot products in one sparse product; the diagonal holds the squared norms
+        gram = (matrix.T @ matrix).tocsr()
+        gram.sort_indices()
+        norms = gram.diagonal()
+        neighbors = []
+        pairs = []
+        for i, product_id in enumerate(product_ids):
+            start, end = gram.indptr[i], gram.indptr[i + 1]
+            cols_i = gram.indices[start:end]
+            dots = gram.data[start:end]
+            keep = (cols_i != i) & (dots != 0)
+            cols_i, dots = cols_i[keep], dots[keep]
+            pairs.extend(zip([product_id] * len(cols_i), names[cols_i], dots.tolist()))
+
+            positive = dots > 0
+            if norms[i] <= 0 or not positive.any():
+                continue
+            cols_p = cols_i[positive]
+            similarity = dots[positive] / np.sqrt(norms[i] * norms[cols_p])
+            order = sorted(range(len(cols_p)), key=lambda k: (-similarity[k], product_ids[cols_p[k]]))[:self.top_n]
+            neighbors.extend((product_id, product_ids[cols_p[k]], float(similarity[k])) for k in order)
+
+        with self._lock, self._conn:
+            for table in ('orders', 'browsing', 'interactions', 'item_norms', 'item_pairs', 'item_neighbors'):
+                self._conn.execute(f'DELETE FROM {table}')
+            self._conn.executemany(
+                'INSERT INTO orders (order_id, user_id, status, items) VALUES (?, ?, ?, ?)',
+                ((order_id, user_id, status, json.dumps(items)) for order_id, (user_id, status, items) in orders.items())
+            )
+            self._conn.executemany(
+                'INSERT INTO browsing (user_id, product_id, view_count) VALUES (?, ?, ?)',
+                ((u, p, v) for (u, p), v in browsing.items())
+            )
+            self._conn.executemany(
+                'INSERT INTO interactions (user_id, product_id, weight) VALUES (?, ?, ?)',
+                ((u, p, w) for (u, p), w in weights.items())
+            )
+            self._conn.executemany(
+                'INSERT INTO item_norms (product_id, norm_sq) VALUES (?, ?)',
+                zip(product_ids, norms.tolist())
+            )
+            self._conn.executemany('INSERT INTO item_pairs (product_id, other_id, dot) VALUES (?, ?, ?)', pairs)
+            self._conn.executemany(
+                'INSERT INTO item_neighbors (product_id, neighbor_id, similarity) VALUES (?, ?, ?)', neighbors
+            )
+            self._conn.execute(
+                'INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)',
+                ('rebuilt_at', json.dumps(datetime.now(timezone.utc).isoformat(timespec='seconds')))
+            )
+        return self.stats()
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def user_items(self, user_id):
+        """{product_id: weight} for one user"""
+        with self._lock:
+            return dict(self._conn.execute(
+                'SELECT product_id, weight FROM interactions WHERE user_id = ?', (str(user_id),)
+            ))
+
+    def similar_items(self, product_id, limit=None):
+        """[(neighbor_id, similarity)] for one product, most similar first"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT neighbor_id, similarity FROM item_neighbors WHERE product_id = ? '
+                'ORDER BY similarity DESC, neighbor_id LIMIT ?',
+                (str(product_id), -1 if limit is None else int(limit))
+            ).fetchall()
+        return rows
+
+    def neighbors_of(self, product_ids, locked=False):
+        """{product_id: [(neighbor_id, similarity)]} for several products"""
+        if not locked:
+            with self._lock:
+                return self.neighbors_of(product_ids, locked=True)
+        ids = [str(p) for p in product_ids]
+        result = {p: [] for p in ids}
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 900):
+            chunk = ids[start:start + 900]
+            for product_id, neighbor_id, similarity in self._conn.execute(
+                    'SELECT product_id, neighbor_id, similarity FROM item_neighbors '
+                    f'WHERE product_id IN ({",".join("?" * len(chunk))})', chunk):
+                result[product_id].append((neighbor_id, similarity))
+        return result
+
+    def neighbor_table(self):
+        """{product_id: {neighbor_id: similarity}} (for checks and exports)"""
+        table = {}
+        with self._lock:
+            for product_id, neighbor_id, similarity in self._conn.execute(
+                    'SELECT product_id, neighbor_id, similarity FROM item_neighbors'):
+                table.setdefault(product_id, {})[neighbor_id] = similarity
+        return table
+
+    def status(self):
+        """Whether the store has been rebuilt from full exports (and can serve recommendations)"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM store_meta WHERE key = 'rebuilt_at'").fetchone()
+        rebuilt_at = json.loads(row[0]) if row else None
+        return {'ready': rebuilt_at is not None, 'rebuilt_at': rebuilt_at}
+
+    def stats(self):
+        with self._lock:
+            counts = {
+                table: self._conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                for table in ('orders', 'interactions', 'item_norms', 'item_pairs', 'item_neighbors')
+            }
+        return {
+            'orders': counts['orders'],
+            'interactions': counts['interactions'],
+            'products': counts['item_norms'],
+            'pairs': counts['item_pairs'] // 2,
+            'neighbors': counts['item_neighbors'],
+            'top_n': self.top_n,
+            'db_path': self.db_path,
+            **self.status()
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Opened once per process (shared by the engine and the worker daemon)
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_item_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ItemSimilarityStore()
+    return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Item-item similarity table for recommendations')
+    parser.add_argument('command', choices=['rebuild', 'record', 'remove', 'browse', 'similar', 'stats'])
+    parser.add_argument('arg', nargs='?',
+                        help='Order export for rebuild (default stdin), order id for remove or product id for similar')
+    parser.add_argument('--browsing', help='Browsing history export for rebuild (JSON array or NDJSON)')
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--db', default=DEFAULT_DB_PATH)
+    args = parser.parse_args()
+
+    from ml_stream_io import iter_json_records
+
+    store = ItemSimilarityStore(args.db)
+    try:
+        if args.command == 'rebuild':
+            browsing_file = open(args.browsing, 'r', encoding='utf-8') if args.browsing else None
+            browsing_records = iter_json_records(browsing_file) if browsing_file else None
+            try:
+                if args.arg:
+                    with open(args.arg, 'r', encoding='utf-8') as f:
+                        result = store.rebuild(iter_json_records(f), browsing_records)
+                else:
+                    result = store.rebuild(iter_json_records(sys.stdin), browsing_records)
+            finally:
+                if browsing_file:
+                    browsing_file.close()
+        elif args.command == 'record':
+            result = store.record_orders(iter_json_records(sys.stdin))
+        elif args.command == 'remove':
+            if not args.arg:
+                parser.error('remove needs an order id')
+            result = {'removed': store.delete_order(args.arg)}
+        elif args.command == 'browse':
+            result = store.record_browsing(iter_json_records(sys.stdin))
+        elif args.command == 'similar':
+            if not args.arg:
+                parser.error('similar needs a product id')
+            result = {'productId': args.arg, 'similar': [
+                {'productId': neighbor_id, 'similarity': similarity}
+                for neighbor_id, similarity in store.similar_items(args.arg, args.limit)
+            ]}
+        else:
+            result = store.stats()
+        print(json.dumps({'success': True, **result}))
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
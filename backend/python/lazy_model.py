@@ -0,0 +1,83 @@
+"""
+Lazy Model Loading
+Thread-safe load-on-first-use holder, so a process hosting several ML services
+only pays for the models that are actually called.
+"""
+
+import threading
+import time
+
+from ml_metrics import metrics
+
+
+class LazyModel:
+    """
+    Builds an expensive object (model, detector, predictor) on first get()
+
+    The factory runs at most once even when several request threads ask for
+    the model at the same time; load time is recorded under model_load.<name>.
+    """
+
+    def __init__(self, name, factory):
+        """
+        Args:
+            name: Short identifier used in logs and metrics
+            factory: Zero-argument callable returning the loaded object
+        """
+        self.name = name
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded = False
+        self._warming = None
+        self.last_error = None
+
+    @property
+    def is_loaded(self):
+        return self._loaded
+
+    @property
+    def state(self):
+        """'loaded', 'loading' (warm-up running), 'failed' (last warm-up raised) or 'not_loaded'"""
+        if self._loaded:
+            return 'loaded'
+        if self._warming is not None and self._warming.is_alive():
+            return 'loading'
+        return 'failed' if self.last_error else 'not_loaded'
+
+    def warm_up(self):
+        """
+        Start loading in a background thread and return immediately
+
+        Health / readiness checks report state instead of calling get(), so
+        they never block on a load; this is how a deployment loads ahead of
+        the first request. Returns the state after starting.
+        """
+        with self._lock:
+            if not self._loaded and (self._warming is None or not self._warming.is_alive()):
+                self.last_error = None
+                self._warming = threading.Thread(target=self._warm, name=f'warm-{self.name}', daemon=True)
+                self._warming.start()
+        return self.state
+
+    def _warm(self):
+        try:
+            self.get()
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"[X] Loading {self.name} failed: {e}")
+
+    def get(self):
+        """Return the object, loading it on the first call"""
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                print(f"[*] Loading {self.name}...")
+                start = time.perf_counter()
+                self._value = self._factory()
+                elapsed = (time.perf_counter() - start) * 1000
+                metrics.observe(f'model_load.{self.name}', elapsed)
+                print(f"[OK] {self.name} ready in {elapsed / 1000:.1f}s")
+                self._loaded = True
+        return self._value
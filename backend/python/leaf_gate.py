@@ -0,0 +1,216 @@
+"""
+Pepper Leaf Gate
+Tiny linear classifier on 64px thumbnails that decides "pepper leaf or not"
+before the full EfficientNet / CNN model runs.
+
+Usage:
+    python leaf_gate.py train --positive pepper_dataset/Healthy "pepper_dataset/Bacterial Spot" --negative not_leaf_images/
+    python leaf_gate.py evaluate --positive <dirs> --negative <dirs>
+"""
+
+import argparse
+import glob
+import os
+import cv2
+import numpy as np
+
+DEFAULT_GATE_PATH = os.path.join(os.path.dirname(__file__), 'models', 'leaf_gate.npz')
+IMAGE_EXTENSIONS = ('*.jpg', '*.jpeg', '*.png', '*.bmp', '*.JPG', '*.JPEG', '*.PNG')
+DEFAULT_THRESHOLD = 0.2
+
+
+def threshold_from_env():
+    """LEAF_GATE_THRESHOLD as a probability in [0, 1]; the default (with a warning) when malformed"""
+    value = os.environ.get('LEAF_GATE_THRESHOLD', '').strip()
+    if not value:
+        return DEFAULT_THRESHOLD
+    try:
+        threshold = float(value)
+        if not 0 <= threshold <= 1:
+            raise ValueError
+    except ValueError:
+        print(f"[!] Invalid LEAF_GATE_THRESHOLD {value!r} (expected 0-1), using {DEFAULT_THRESHOLD}")
+        return DEFAULT_THRESHOLD
+    return threshold
+
+
+class LeafGate:
+    """
+    Logistic-regression gate over colour / texture statistics of a thumbnail
+
+    Inference is numpy only: standardize features, dot with weights, sigmoid.
+    """
+
+    THUMBNAIL_SIZE = 64
+
+    def __init__(self, model_path=DEFAULT_GATE_PATH):
+        self.model_path = model_path
+        self.weights = None
+        self.bias = 0.0
+        self.feature_mean = None
+        self.feature_scale = None
+        self.load()
+
+    @property
+    def is_loaded(self):
+        return self.weights is not None
+
+    def load(self):
+        """Load gate weights if they have been trained"""
+        if not os.path.exists(self.model_path):
+            return False
+        data = np.load(self.model_path)
+        self.weights = data['weights']
+        self.bias = float(data['bias'])
+        self.feature_mean = data['feature_mean']
+        self.feature_scale = data['feature_scale']
+        return True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+        np.savez(
+            self.model_path,
+            weights=self.weights,
+            bias=np.array(self.bias),
+            feature_mean=self.feature_mean,
+            feature_scale=self.feature_scale
+        )
+
+    @classmethod
+    def load_thumbnail(cls, image_path):
+        """Decode at reduced resolution (JPEG DCT scaling) and resize to the gate input size"""
+        img = cv2.imread(image_path, cv2.IMREAD_REDUCED_COLOR_4)
+        if img is None or min(img.shape[:2]) < 16:
+            img = cv2.imread(image_path)
+        if img is None:
+            raise ValueError(f"Failed to load image: {image_path}")
+        return cls.thumbnail_from_array(img)
+
+    @classmethod
+    def thumbnail_from_array(cls, img):
+        """Resize an already decoded BGR image to the gate input size"""
+        return cv2.resize(img, (cls.THUMBNAIL_SIZE, cls.THUMBNAIL_SIZE), interpolation=cv2.INTER_AREA)
+
+    @staticmethod
+    def extract_features(thumbnail):
+        """
+        Features from a BGR thumbnail:
+        - 8x4x4 HSV colour histogram (128)
+        - per-channel HSV mean and std (6)
+        - edge density and gradient magnitude mean/std (3)
+        """
+        hsv = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2HSV)
+        gray = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+        pixels = float(gray.size)
+
+        hist = cv2.calcHist([hsv], [0, 1, 2], None, [8, 4, 4], [0, 180, 0, 256, 0, 256]).flatten() / pixels
+
+        hsv_flat = hsv.reshape(-1, 3).astype(np.float32)
+        channel_stats = np.concatenate([hsv_flat.mean(axis=0) / 255.0, hsv_flat.std(axis=0) / 255.0])
+
+        gx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+        gy = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+        magnitude = np.sqrt(gx * gx + gy * gy) / 255.0
+        edge_density = np.count_nonzero(cv2.Canny(gray, 50, 150)) / pixels
+
+        return np.concatenate([
+            hist,
+            channel_stats,
+            [edge_density, magnitude.mean(), magnitude.std()]
+        ]).astype(np.float32)
+
+    def predict_proba(self, image):
+        """
+        Probability that the image is a pepper leaf (None if the gate is not trained)
+
+        Args:
+            image: Image path, or a decoded BGR array shared with the other stages
+        """
+        if not self.is_loaded:
+            return None
+        if isinstance(image, str):
+            thumbnail = self.load_thumbnail(image)
+        else:
+            thumbnail = self.thumbnail_from_array(image)
+        features = self.extract_features(thumbnail)
+        z = ((features - self.feature_mean) / self.feature_scale) @ self.weights + self.bias
+        return float(1.0 / (1.0 + np.exp(-z)))
+
+    def train(self, positive_paths, negative_paths, C=1.0):
+        """Fit the gate on image paths (positives = pepper leaves)"""
+        from sklearn.linear_model import LogisticRegression
+
+        X, y = _build_dataset(positive_paths, negative_paths)
+
+        self.feature_mean = X.mean(axis=0)
+        self.feature_scale = X.std(axis=0) + 1e-6
+        X_scaled = (X - self.feature_mean) / self.feature_scale
+
+        clf = LogisticRegression(C=C, max_iter=2000, class_weight='balanced')
+        clf.fit(X_scaled, y)
+
+        self.weights = clf.coef_[0].astype(np.float32)
+        self.bias = float(clf.intercept_[0])
+        self.save()
+
+        return {
+            'samples': len(y),
+            'positives': int(y.sum()),
+            'negatives': int(len(y) - y.sum()),
+            'train_accuracy': round(float(clf.score(X_scaled, y)), 4)
+        }
+
+
+def _build_dataset(positive_paths, negative_paths):
+    X, y = [], []
+    for label, paths in ((1, positive_paths), (0, negative_paths)):
+        for path in paths:
+            try:
+                X.append(LeafGate.extract_features(LeafGate.load_thumbnail(path)))
+                y.append(label)
+            except ValueError as e:
+                print(f"[!] Skipping {path}: {e}")
+    return np.array(X), np.array(y)
+
+
+def _collect_images(directories):
+    paths = []
+    for directory in directories:
+        for pattern in IMAGE_EXTENSIONS:
+            paths.extend(glob.glob(os.path.join(directory, '**', pattern), recursive=True))
+    return sorted(set(paths))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train / evaluate the pepper leaf gate')
+    parser.add_argument('action', choices=['train', 'evaluate'])
+    parser.add_argument('--positive', nargs='+', required=True, help='Directories of pepper leaf images')
+    parser.add_argument('--negative', nargs='+', required=True, help='Directories of non-leaf images')
+    parser.add_argument('--model-path', default=DEFAULT_GATE_PATH)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    positives = _collect_images(args.positive)
+    negatives = _collect_images(args.negative)
+    print(f"[*] {len(positives)} positive / {len(negatives)} negative images")
+
+    gate = LeafGate(args.model_path)
+
+    if args.action == 'train':
+        result = gate.train(positives, negatives)
+        print(f"[OK] Gate saved to {args.model_path}: {result}")
+        return
+
+    if not gate.is_loaded:
+        print(f"[X] No gate model at {args.model_path}. Train it first.")
+        return
+
+    pos_scores = np.array([gate.predict_proba(p) for p in positives])
+    neg_scores = np.array([gate.predict_proba(p) for p in negatives])
+    print(f"Threshold {args.threshold}:")
+    print(f"  Pepper leaves wrongly rejected: {np.mean(pos_scores < args.threshold) * 100:.2f}%")
+    print(f"  Non-leaves exiting at the gate: {np.mean(neg_scores < args.threshold) * 100:.2f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+ML Gateway
+Hosts the disease detection, pepper yield and seasonal suitability Flask
+services in one process, each blueprint mounted under its own prefix:
+
+    /disease/...    disease_detection_api   (standalone port 5001)
+    /pepper/...     pepper_ml_api           (standalone port 5002)
+    /seasonal/...   seasonal_suitability_api (standalone port 5003)
+
+One interpreter means numpy / sklearn / OpenCV / TensorFlow are imported once,
+the BLAS and OpenCV thread pools are sized once for the whole box, and every
+service reports into the same metrics registry. Models load on first use;
+/health never triggers a load (probes would time out behind a 20-30 s model
+load), /ready answers 503 until the hosted models are loaded and POST /warmup
+starts loading them in the background.
+
+Usage:
+    python ml_gateway.py [--port 5010] [--services disease,pepper,seasonal] [--preload]
+
+Point Node at it with ML_GATEWAY_URL=http://localhost:5010
+"""
+
+import argparse
+import os
+import sys
+
+# Size the native thread pools before numpy / OpenCV are imported
+_threads = os.environ.get('ML_GATEWAY_THREADS')
+if _threads:
+    for _var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ.setdefault(_var, _threads)
+
+from datetime import datetime
+from flask import Flask, jsonify
+from flask_cors import CORS
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ml_metrics import metrics
+
+SERVICES = {
+    'disease': {'module': 'disease_detection_api', 'prefix': '/disease', 'models': ['_detector', '_pipeline']},
+    'pepper': {'module': 'pepper_ml_api', 'prefix': '/pepper', 'models': ['_predictor']},
+    'seasonal': {'module': 'seasonal_suitability_api', 'prefix': '/seasonal', 'models': ['_predictor']}
+}
+
+
+def _load_service_modules(names):
+    """Import the API modules (cheap: their models are LazyModel instances)"""
+    import importlib
+    return {name: importlib.import_module(SERVICES[name]['module']) for name in names}
+
+
+def _model_status(module, attrs):
+    return {getattr(module, attr).name: getattr(module, attr).is_loaded for attr in attrs}
+
+
+def create_app(service_names=None):
+    """Build the gateway app with the selected services mounted under their prefixes"""
+    service_names = service_names or list(SERVICES)
+    modules = _load_service_modules(service_names)
+
+    if _threads:
+        import cv2
+        cv2.setNumThreads(int(_threads))
+
+    app = Flask(__name__)
+    CORS(app)  # Enable CORS for Node.js integration
+
+    if 'disease' in modules:
+        app.config['UPLOAD_FOLDER'] = modules['disease'].UPLOAD_FOLDER
+        app.config['MAX_CONTENT_LENGTH'] = modules['disease'].MAX_FILE_SIZE
+
+    for name, module in modules.items():
+        app.register_blueprint(module.bp, url_prefix=SERVICES[name]['prefix'])
+
+    @app.route('/health', methods=['GET'])
+    def health_check():
+        """Gateway health plus which models have been loaded so far"""
+        return jsonify({
+            'status': 'healthy',
+            'service': 'ML Gateway',
+            'services': {
+                name: {
+                    'prefix': SERVICES[name]['prefix'],
+                    'models_loaded': _model_status(module, SERVICES[name]['models'])
+                }
+                for name, module in modules.items()
+            },
+            'pid': os.getpid()
+        }), 200
+
+    @app.route('/ready', methods=['GET'])
+    def readiness_check():
+        """200 once every hosted service is ready (its own /ready), 503 with each service's answer until then"""
+        answers = {name: module.readiness_check() for name, module in modules.items()}
+        ready = all(code == 200 for _, code in answers.values())
+        return jsonify({
+            'ready': ready,
+            'services': {name: response.get_json() for name, (response, _) in answers.items()}
+        }), 200 if ready else 503
+
+    @app.route('/warmup', methods=['POST'])
+    def warmup():
+        """Start loading every hosted model in the background"""
+        states = {
+            name: {getattr(module, attr).name: getattr(module, attr).warm_up() for attr in SERVICES[name]['models']}
+            for name, module in modules.items()
+        }
+        ready = all(state == 'loaded' for service in states.values() for state in service.values())
+        return jsonify({'services': states}), 200 if ready else 202
+
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics():
+        """Shared metrics registry for every hosted service"""
+        return jsonify({
+            **metrics.snapshot(),
+            'timestamp': datetime.now().isoformat()
+        })
+
+    @app.errorhandler(404)
+    def not_found(error):
+        return jsonify({
+            'success': False,
+            'error': 'Endpoint not found',
+            'services': {name: SERVICES[name]['prefix'] for name in modules}
+        }), 404
+
+    app.gateway_modules = modules
+    return app
+
+
+def preload(app):
+    """Load every hosted model now instead of on the first request"""
+    for name, module in app.gateway_modules.items():
+        for attr in SERVICES[name]['models']:
+            getattr(module, attr).get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Single-process gateway for the Flask ML services')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('ML_GATEWAY_PORT', 5010)))
+    parser.add_argument('--services', default=','.join(SERVICES),
+                        help='Comma-separated subset of: ' + ', '.join(SERVICES))
+    parser.add_argument('--preload', action='store_true', help='Load all models before serving')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.services.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SERVICES]
+    if unknown:
+        parser.error(f"Unknown services: {', '.join(unknown)}")
+
+    app = create_app(names)
+    if args.preload:
+        preload(app)
+
+    print(f"\n{'='*60}")
+    print("ML Gateway")
+    print(f"{'='*60}")
+    for name in names:
+        print(f"{name:10s} http://localhost:{args.port}{SERVICES[name]['prefix']}")
+    print(f"Health:    http://localhost:{args.port}/health")
+    print(f"Metrics:   http://localhost:{args.port}/metrics")
+    print(f"{'='*60}\n")
+
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
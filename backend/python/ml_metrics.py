@@ -0,0 +1,97 @@
+"""
+ML Service Metrics
+Thread-safe in-process counters, gauges and latency timers for the Flask ML services
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class MetricsRegistry:
+    """
+    Minimal metrics registry
+
+    - counters: monotonically increasing totals (requests, exits, rejections)
+    - gauges: last reported value (queue depth, utilization)
+    - timings: rolling window of latencies in milliseconds
+    """
+
+    def __init__(self, window_size=2048):
+        self._lock = threading.Lock()
+        self._window_size = window_size
+        self._counters = {}
+        self._gauges = {}
+        self._timings = {}
+        self._started_at = time.time()
+
+    def increment(self, name, value=1):
+        """Add value to a counter"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        """Set a gauge to its current value"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name, milliseconds):
+        """Record one latency sample"""
+        with self._lock:
+            if name not in self._timings:
+                self._timings[name] = deque(maxlen=self._window_size)
+            self._timings[name].append(milliseconds)
+
+    @contextmanager
+    def timer(self, name):
+        """Time a block and record it under name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def get_counter(self, name):
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self):
+        """Return all metrics as a JSON-serializable dict"""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            timings = {name: list(samples) for name, samples in self._timings.items()}
+
+        latency = {}
+        for name, samples in timings.items():
+            if not samples:
+                continue
+            values = np.array(samples)
+            latency[name] = {
+                'count': len(values),
+                'mean': round(float(values.mean()), 3),
+                'p50': round(float(np.percentile(values, 50)), 3),
+                'p95': round(float(np.percentile(values, 95)), 3),
+                'max': round(float(values.max()), 3)
+            }
+
+        return {
+            'uptime_seconds': round(time.time() - self._started_at, 1),
+            'counters': counters,
+            'gauges': gauges,
+            'latency_ms': latency
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+            self._started_at = time.time()
+
+
+# Process-wide registry shared by every module that reports metrics
+metrics = MetricsRegistry()
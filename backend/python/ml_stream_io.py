@@ -0,0 +1,249 @@
+"""
+ML Stream I/O
+Incremental JSON input and compact streaming JSON output for the stdin/stdout
+entry points of the ML scripts, so neither the raw request text nor a
+pretty-printed copy of the response has to sit in memory next to the parsed
+data.
+
+Accepted request shapes (all read in chunks):
+- one JSON document, as before: {"orders": [...], "products": [...], ...}
+  Top-level object members that are arrays are decoded element by element.
+- NDJSON: a params object on the first line, then one record per line.
+  Records go to the module's default collection (e.g. "orders"); a line
+  {"$records": "products"} switches the collection for the lines after it.
+- A JSON array or NDJSON of bare records (customer_segmentation).
+
+Exports too large for one worker request are written to a file and passed
+by path instead; iter_json_file reads those the same way.
+"""
+
+import json
+import sys
+
+STREAM_CHUNK_SIZE = 64 * 1024
+RECORDS_SWITCH_KEY = '$records'
+
+# Containers nested deeper than this are written with one json.dumps call
+# (envelope dict -> record list -> record)
+STREAM_WRITE_DEPTH = 2
+
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = frozenset('0123456789.eE+-')
+
+
+class _StreamDecoder:
+    """Chunked reader over a text stream that decodes one JSON value at a time"""
+
+    def __init__(self, stream, chunk_size=STREAM_CHUNK_SIZE, share_keys=False):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        if share_keys:
+            # json.loads shares key strings across one document; decoding value by
+            # value would give every record its own copies of the same keys
+            keys = {}
+            self.decoder = json.JSONDecoder(
+                object_pairs_hook=lambda pairs: {keys.setdefault(k, k): v for k, v in pairs})
+        else:
+            self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size=None):
+        chunk = self.stream.read(size or self.chunk_size)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+
+    def peek(self):
+        """Next non-whitespace character, '' at end of input"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill()
+
+    def take(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' in JSON input, found {found or 'end of input'!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                record, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                end = None
+
+            # A value touching the end of the buffer may continue in the next chunk
+            # (a number cut at "1." or "2e" decodes as its prefix); read at least
+            # as much as is pending so large values stay linear
+            if end is None or (not self.eof and (
+                    end == len(self.buffer) or self._number_cut(record, end))):
+                self._fill(max(self.chunk_size, len(self.buffer) - self.pos))
+                continue
+
+            self.pos = end
+            if self.pos > self.chunk_size:
+                self.buffer = self.buffer[self.pos:]
+                self.pos = 0
+            return record
+
+    def _number_cut(self, record, end):
+        if not isinstance(record, (int, float)) or isinstance(record, bool):
+            return False
+        return all(char in _NUMBER_CHARS for char in self.buffer[end:])
+
+    def array_items(self):
+        """Yield the elements of the array starting at the current position"""
+        self.take('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.take(']')
+            return
+
+    def read_object(self):
+        """Decode an object member by member, array members element by element"""
+        self.take('{')
+        obj = {}
+        if self.peek() == '}':
+            self.pos += 1
+            return obj
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError('Expected a string key in JSON object')
+            self.take(':')
+            obj[key] = list(self.array_items()) if self.peek() == '[' else self.value()
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.take('}')
+            return obj
+
+
+def iter_json_records(stream, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Incrementally parse JSON records from a text stream
+
+    Accepts NDJSON / concatenated JSON values, a single object, or one
+    top-level array (whose elements are yielded one at a time). Only the
+    current chunk and the record being decoded are held in memory.
+    """
+    reader = _StreamDecoder(stream, chunk_size)
+    in_array = None  # unknown until the first value is seen
+
+    while True:
+        char = reader.peek()
+        if not char:
+            break
+        if in_array is None:
+            in_array = char == '['
+            if in_array:
+                reader.pos += 1
+                continue
+        elif in_array and char in ',]':
+            reader.pos += 1
+            in_array = char == ','
+            continue
+        yield reader.value()
+
+    if in_array:
+        raise ValueError('Unterminated JSON array in input')
+
+
+def iter_json_file(path, chunk_size=STREAM_CHUNK_SIZE):
+    """iter_json_records over a file (e.g. a backfill export written by the Node backend)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from iter_json_records(f, chunk_size)
+
+
+def read_request(stream=None, records_key=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Read a handle_request() payload from a stream (stdin by default)
+
+    records_key names the collection that NDJSON record lines after the params
+    object are appended to. Without it, several top-level values are returned
+    as a list of records.
+    """
+    reader = _StreamDecoder(stream or sys.stdin, chunk_size, share_keys=True)
+    char = reader.peek()
+    if not char:
+        raise ValueError('No JSON input received')
+
+    if char == '[':
+        request = list(reader.array_items())
+    elif char == '{':
+        request = reader.read_object()
+    else:
+        request = reader.value()
+
+    if not reader.peek():
+        return request
+
+    if records_key is None or not isinstance(request, dict):
+        records = request if isinstance(request, list) else [request]
+        while reader.peek():
+            records.append(reader.value())
+        return records
+
+    key = records_key
+    while reader.peek():
+        record = reader.value()
+        if isinstance(record, dict) and len(record) == 1 and RECORDS_SWITCH_KEY in record:
+            key = record[RECORDS_SWITCH_KEY]
+            continue
+        target = request.setdefault(key, [])
+        if not isinstance(target, list):
+            raise ValueError(f"Cannot append records to non-list field '{key}'")
+        target.append(record)
+    return request
+
+
+def _json_key(key):
+    """Object key the way json.dumps converts it"""
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, bool):
+        return json.dumps(key)
+    return str(key)
+
+
+def write_json(value, stream=None, depth=STREAM_WRITE_DEPTH):
+    """Write compact JSON, serializing the outer containers piece by piece"""
+    stream = stream or sys.stdout
+    if depth > 0 and isinstance(value, dict):
+        stream.write('{')
+        for i, (key, item) in enumerate(value.items()):
+            stream.write((',' if i else '') + json.dumps(_json_key(key)) + ':')
+            write_json(item, stream, depth - 1)
+        stream.write('}')
+    elif depth > 0 and isinstance(value, (list, tuple)):
+        stream.write('[')
+        for i, item in enumerate(value):
+            if i:
+                stream.write(',')
+            write_json(item, stream, depth - 1)
+        stream.write(']')
+    else:
+        stream.write(json.dumps(value, separators=(',', ':'), default=str))
+
+
+def write_response(result, stream=None):
+    """Write one compact JSON response line and flush"""
+    stream = stream or sys.stdout
+    write_json(result, stream)
+    stream.write('\n')
+    stream.flush()
@@ -0,0 +1,204 @@
+"""
+ML Worker Client
+Stdlib-only client for ml_worker_daemon.py, plus a CLI shim that behaves like
+the original scripts so existing callers keep working:
+
+    python ml_worker_client.py customer_segmentation < customers.json
+    python ml_worker_client.py review_sentiment_classifier < reviews.json
+    python ml_worker_client.py recommendation_engine < input.json
+    python ml_worker_client.py demand_prediction < input.json
+    python ml_worker_client.py cancellation_svm_classifier predict '<json>'
+    python ml_worker_client.py cancellation_svm_classifier train < orders.ndjson
+    python ml_worker_client.py <module> --json < params.json   (raw handle_request params)
+
+stdin may be one JSON document or NDJSON (params object, then one record per
+line); both are parsed incrementally, see ml_stream_io.py.
+
+If the daemon is not running the request is handled in this process instead,
+exactly as the original script would.
+
+Wire format: 4-byte big-endian length prefix + UTF-8 JSON, in both directions.
+    request:  {"id": 1, "method": "demand_prediction", "params": {...}, "timeout": 30}
+    response: {"id": 1, "result": {...}}  or  {"id": 1, "error": {"type": "...", "message": "..."}}
+Responses on one connection may arrive out of order (requests are multiplexed).
+"""
+
+import itertools
+import json
+import os
+import socket
+import struct
+import sys
+import tempfile
+
+from ml_stream_io import read_request, write_response
+
+DEFAULT_SOCKET_PATH = os.environ.get(
+    'ML_WORKER_SOCKET', os.path.join(tempfile.gettempdir(), 'pepper_ml_worker.sock')
+)
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+# Modules exposing handle_request(params) -> dict
+METHODS = (
+    'customer_segmentation',
+    'review_sentiment_classifier',
+    'recommendation_engine',
+    'demand_prediction',
+    'cancellation_svm_classifier'
+)
+
+_HEADER = struct.Struct('>I')
+
+
+class WorkerUnavailable(Exception):
+    """The daemon socket does not exist or refused the connection"""
+
+
+class WorkerError(Exception):
+    """The daemon ran the request and reported an error"""
+
+    def __init__(self, error_type, message):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+def send_frame(sock, payload):
+    data = json.dumps(payload, default=str).encode('utf-8')
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_frame(sock):
+    """Read one frame; None when the peer closed the connection"""
+    header = recv_exactly(sock, _HEADER.size)
+    if header is None:
+        return None
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {length} bytes exceeds limit")
+    body = recv_exactly(sock, length)
+    if body is None:
+        return None
+    return json.loads(body.decode('utf-8'))
+
+
+class MLWorkerClient:
+    """Blocking client; one connection, requests numbered per client"""
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, connect_timeout=1.0):
+        self.socket_path = socket_path
+        self.connect_timeout = connect_timeout
+        self._ids = itertools.count(1)
+        self._sock = None
+
+    def _connect(self):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise WorkerUnavailable('Unix sockets are not supported on this platform')
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.connect_timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise WorkerUnavailable(str(e))
+        sock.settimeout(None)
+        return sock
+
+    def call(self, method, params, timeout=None):
+        """Run method(params) on the daemon and return its result"""
+        if self._sock is None:
+            self._sock = self._connect()
+        request_id = next(self._ids)
+        request = {'id': request_id, 'method': method, 'params': params}
+        if timeout is not None:
+            request['timeout'] = timeout
+        send_frame(self._sock, request)
+
+        while True:
+            response = recv_frame(self._sock)
+            if response is None:
+                self.close()
+                raise WorkerUnavailable('Daemon closed the connection')
+            if response.get('id') != request_id:
+                continue
+            if 'error' in response:
+                raise WorkerError(response['error'].get('type', 'error'), response['error'].get('message', ''))
+            return response['result']
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+def call_in_process(method, params):
+    """Fallback: import the module here and run it like the original script"""
+    import importlib
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    return importlib.import_module(method).handle_request(params)
+
+
+def call(method, params, timeout=None, socket_path=DEFAULT_SOCKET_PATH):
+    """Call the daemon, falling back to in-process execution when it is not running"""
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    client = MLWorkerClient(socket_path)
+    try:
+        return client.call(method, params, timeout=timeout)
+    except WorkerUnavailable:
+        return call_in_process(method, params)
+    finally:
+        client.close()
+
+
+# Collection that NDJSON record lines after the params object belong to
+RECORDS_KEYS = {
+    'review_sentiment_classifier': 'reviews',
+    'recommendation_engine': 'orders',
+    'demand_prediction': 'orders'
+}
+
+
+def _params_from_cli(method, args):
+    """Translate the original script's CLI input into handle_request params"""
+    if args and args[0] == '--json':
+        return read_request(sys.stdin, RECORDS_KEYS.get(method))
+    if method == 'cancellation_svm_classifier':
+        if not args:
+            raise ValueError("Usage: ml_worker_client.py cancellation_svm_classifier <predict|train> [data]")
+        if len(args) > 1:
+            return {'action': args[0], 'data': json.loads(args[1])}
+        # Data on stdin: a JSON document, or NDJSON records for train
+        return {'action': args[0], 'data': read_request(sys.stdin)}
+    return read_request(sys.stdin, RECORDS_KEYS.get(method))
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in METHODS:
+        print(f"Usage: python ml_worker_client.py <{'|'.join(METHODS)}> [args]")
+        sys.exit(1)
+
+    method = sys.argv[1]
+    try:
+        result = call(method, _params_from_cli(method, sys.argv[2:]))
+        write_response(result)
+    except Exception as e:
+        print(json.dumps({
+            'success': False,
+            'error': str(e)
+        }))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""
+ML Worker Daemon
+Long-lived process that keeps the Python ML modules imported and their models
+loaded, and serves them over a Unix socket instead of Node spawning a fresh
+interpreter (and re-importing numpy / sklearn, re-loading pickles) per call.
+
+- Length-prefixed JSON-RPC (see ml_worker_client.py for the wire format)
+- Requests on one connection are multiplexed: each runs on the thread pool and
+  its response is written as soon as it is ready
+- Per-method timeouts: a request that overruns gets a "timeout" error
+  immediately. Python threads cannot be cancelled, so the work itself runs to
+  completion and keeps its pool thread until then; to bound the damage, a
+  method whose overrunning requests hold half the pool is refused
+  ("overloaded") until they finish, leaving the other methods threads to run on
+- Handlers run concurrently against the modules' cached models; mutating
+  actions must not touch a model other requests are reading (the cancellation
+  classifier trains a new instance and swaps it in, the SQLite stores
+  serialize writes with their own locks)
+- --workers N forks N pre-warmed processes sharing the listening socket
+
+Usage:
+    python ml_worker_daemon.py [--socket /tmp/pepper_ml_worker.sock] [--threads 4] [--workers 1]
+"""
+
+import argparse
+import importlib
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ml_metrics import metrics
+from ml_worker_client import DEFAULT_SOCKET_PATH, METHODS, recv_frame, send_frame
+
+# Seconds before a request is answered with a timeout error
+METHOD_TIMEOUTS = {
+    'customer_segmentation': 30,
+    'review_sentiment_classifier': 30,
+    'recommendation_engine': 15,
+    'demand_prediction': 30,
+    'cancellation_svm_classifier': 120  # also serves "train"
+}
+MAX_TIMEOUT = 600
+
+
+class _Connection:
+    """One client connection; responses are serialized by a write lock"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.write_lock = threading.Lock()
+
+    def send(self, payload):
+        with self.write_lock:
+            try:
+                send_frame(self.sock, payload)
+            except OSError:
+                pass  # client went away; nothing to report to
+
+
+class MLWorkerDaemon:
+    """Serves handle_request() of the ML modules over a Unix socket"""
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, threads=None):
+        self.socket_path = socket_path
+        self.threads = threads or int(os.environ.get('ML_WORKER_THREADS', '4'))
+        self.handlers = {}
+        self.executor = None
+        self.listener = None
+        # Requests already answered with a timeout whose work is still running, per method
+        self.overrunning = {}
+        self.overrunning_lock = threading.Lock()
+
+    def warm(self):
+        """Import every module and load the models they keep in memory"""
+        for method in METHODS:
+            start = time.perf_counter()
+            module = importlib.import_module(method)
+            self.handlers[method] = module.handle_request
+            if hasattr(module, 'get_classifier'):
+                module.get_classifier()
+            print(f"[OK] {method} ready in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    def bind(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        self.listener.listen(128)
+
+    def serve_forever(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='ml-worker')
+        while True:
+            try:
+                client, _ = self.listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve_connection, args=(_Connection(client),), daemon=True).start()
+
+    def _serve_connection(self, conn):
+        metrics.increment('worker.connections')
+        try:
+            while True:
+                try:
+                    request = recv_frame(conn.sock)
+                except (OSError, ValueError) as e:
+                    conn.send({'id': None, 'error': {'type': 'protocol', 'message': str(e)}})
+                    break
+                if request is None:
+                    break
+                self._dispatch(conn, request)
+        finally:
+            conn.sock.close()
+
+    def _dispatch(self, conn, request):
+        request_id = request.get('id')
+        method = request.get('method')
+
+        if method == 'ping':
+            conn.send({'id': request_id, 'result': {'pid': os.getpid(), 'methods': list(self.handlers)}})
+            return
+        if method == 'stats':
+            with self.overrunning_lock:
+                overrunning = dict(self.overrunning)
+            conn.send({'id': request_id, 'result': {**metrics.snapshot(), 'overrunning': overrunning}})
+            return
+        handler = self.handlers.get(method)
+        if handler is None:
+            conn.send({'id': request_id, 'error': {'type': 'unknown_method', 'message': f'Unknown method: {method}'}})
+            return
+
+        with self.overrunning_lock:
+            overloaded = self.overrunning.get(method, 0) >= max(1, self.threads // 2)
+        if overloaded:
+            metrics.increment(f'worker.overloaded.{method}')
+            conn.send({'id': request_id, 'error': {
+                'type': 'overloaded', 'message': f'{method} has timed-out requests still running; retry later'}})
+            return
+
+        timeout = min(float(request.get('timeout') or METHOD_TIMEOUTS.get(method, 30)), MAX_TIMEOUT)
+        responded = threading.Event()
+        respond_lock = threading.Lock()
+        started = time.perf_counter()
+        metrics.increment(f'worker.requests.{method}')
+
+        def respond(payload):
+            with respond_lock:
+                if responded.is_set():
+                    return False
+                responded.set()
+            conn.send(payload)
+            return True
+
+        timed_out = threading.Event()
+
+        def on_timeout():
+            if respond({'id': request_id, 'error': {
+                    'type': 'timeout', 'message': f'{method} exceeded {timeout:.0f}s'}}):
+                metrics.increment(f'worker.timeouts.{method}')
+                with self.overrunning_lock:
+                    self.overrunning[method] = self.overrunning.get(method, 0) + 1
+                timed_out.set()
+
+        timer = threading.Timer(timeout, on_timeout)
+        timer.daemon = True
+        timer.start()
+
+        def run():
+            try:
+                result = handler(request.get('params') or {})
+                payload = {'id': request_id, 'result': result}
+            except Exception as e:
+                metrics.increment(f'worker.errors.{method}')
+                payload = {'id': request_id, 'error': {'type': type(e).__name__, 'message': str(e)}}
+            finally:
+                timer.cancel()
+                metrics.observe(f'worker.{method}', (time.perf_counter() - started) * 1000)
+            if not respond(payload):
+                # Answered with a timeout earlier; its thread is free again. on_timeout
+                # sets timed_out right after responding, so this wait is at most that long
+                timed_out.wait()
+                with self.overrunning_lock:
+                    self.overrunning[method] -= 1
+
+        self.executor.submit(run)
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+def _run_prefork(daemon, workers):
+    """Fork pre-warmed children that accept on the shared socket; respawn any that die"""
+    children = set()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            daemon.serve_forever()
+            os._exit(0)
+        children.add(pid)
+
+    def shutdown(signum, frame):
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        daemon.close()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    for _ in range(workers):
+        spawn()
+
+    while True:
+        pid, _ = os.wait()
+        children.discard(pid)
+        print(f"[!] Worker {pid} exited, restarting")
+        spawn()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Persistent ML worker daemon')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH)
+    parser.add_argument('--threads', type=int, default=None, help='Request threads per process')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('ML_WORKER_PROCESSES', '1')),
+                        help='Pre-forked processes sharing the socket')
+    args = parser.parse_args()
+
+    if not hasattr(socket, 'AF_UNIX'):
+        print("[X] Unix sockets are not available on this platform; ml_worker_client.py will run requests in-process")
+        sys.exit(1)
+
+    daemon = MLWorkerDaemon(args.socket, args.threads)
+    daemon.warm()
+    daemon.bind()
+    print(f"[*] ML worker daemon listening on {args.socket} "
+          f"({args.workers} process(es) x {daemon.threads} threads)")
+
+    if args.workers > 1 and hasattr(os, 'fork'):
+        _run_prefork(daemon, args.workers)
+    else:
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            daemon.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,17 @@
+"""
+Mongo IDs
+Id normalization and order statuses shared by the stores and scripts that
+read order / browsing records from the Node backend or mongoexport dumps.
+"""
+
+# Order.status values as the Node backend stores them
+DELIVERED_STATUS = 'DELIVERED'
+CANCELLED_STATUS = 'CANCELLED'
+
+
+def normalize_id(value):
+    """Mongo ids arrive as strings, {"$oid": ...} or populated documents; None stays None"""
+    if isinstance(value, dict):
+        value = value.get('$oid') or value.get('_id')
+        return normalize_id(value)
+    return None if value is None else str(value)
@@ -3,7 +3,7 @@ Flask REST API for Pepper Yield Prediction ML Service
 Exposes endpoints for yield prediction and cultivation recommendations
 """
 
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, request, jsonify
 from flask_cors import CORS
 import os
 import sys
@@ -11,35 +11,69 @@ import sys
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from pepper_yield_predictor import PepperYieldPredictor
+from pepper_yield_predictor import (
+    PepperYieldPredictor, VALID_CROP_STAGES, VALID_SOIL_TYPES, VALID_WATER_AVAILABILITY,
+    IRRIGATION_FREQUENCY_RANGE, validate_input
+)
+from lazy_model import LazyModel
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for Node.js integration
+# Routes live on a blueprint so ml_gateway.py can host them next to the other services
+bp = Blueprint('pepper_ml', __name__)
 
-# Initialize predictor
-predictor = PepperYieldPredictor()
 
-# Load trained models on startup
-print("Loading ML models...")
-if not predictor.load_models():
-    print("Warning: Models not loaded. Train models first by running:")
-    print("  python generate_pepper_training_data.py")
-    print("  python pepper_yield_predictor.py")
+def _create_predictor():
+    predictor = PepperYieldPredictor()
+    print("Loading ML models...")
+    if not predictor.load_models():
+        print("Warning: Models not loaded. Train models first by running:")
+        print("  python generate_pepper_training_data.py")
+        print("  python pepper_yield_predictor.py")
+    return predictor
 
 
-@app.route('/health', methods=['GET'])
+# Models are loaded on first use
+_predictor = LazyModel('pepper_yield', _create_predictor)
+
+
+def get_predictor():
+    return _predictor.get()
+
+
+@bp.route('/health', methods=['GET'])
 def health_check():
     """
-    Health check endpoint
+    Health check endpoint (never loads the models: see /ready and /warmup)
     """
     return jsonify({
         'status': 'healthy',
         'service': 'Pepper Yield Prediction API',
-        'models_loaded': predictor.yield_model is not None
+        'model_state': _predictor.state,
+        'models_loaded': _predictor.is_loaded and _predictor.get().yield_model is not None
     }), 200
 
 
-@app.route('/predict', methods=['POST'])
+@bp.route('/ready', methods=['GET'])
+def readiness_check():
+    """
+    Readiness: 200 once the models are loaded, 503 until then
+    """
+    ready = _predictor.is_loaded and _predictor.get().yield_model is not None
+    return jsonify({
+        'ready': ready,
+        'model_state': _predictor.state
+    }), 200 if ready else 503
+
+
+@bp.route('/warmup', methods=['POST'])
+def warmup():
+    """
+    Start loading the models in the background (202 while loading)
+    """
+    state = _predictor.warm_up()
+    return jsonify({'model_state': state}), 200 if state == 'loaded' else 202
+
+
+@bp.route('/predict', methods=['POST'])
 def predict_yield():
     """
     Main prediction endpoint
@@ -66,6 +100,7 @@ def predict_yield():
         }
     }
     """
+    predictor = get_predictor()
     try:
         # Check if models are loaded
         if predictor.yield_model is None:
@@ -77,47 +112,12 @@ def predict_yield():
         # Get input data
         data = request.get_json()
         
-        # Validate required fields
-        required_fields = ['soil_type', 'water_availability', 'irrigation_frequency', 'crop_stage']
-        missing_fields = [field for field in required_fields if field not in data]
-        
-        if missing_fields:
-            return jsonify({
-                'success': False,
-                'error': f'Missing required fields: {", ".join(missing_fields)}'
-            }), 400
-        
-        # Validate field values
-        valid_soil_types = ['Sandy', 'Loamy', 'Clay']
-        valid_water_avail = ['Low', 'Medium', 'High']
-        valid_crop_stages = ['Seedling', 'Vegetative', 'Flowering', 'Fruiting']
-        
-        if data['soil_type'] not in valid_soil_types:
-            return jsonify({
-                'success': False,
-                'error': f'Invalid soil_type. Must be one of: {", ".join(valid_soil_types)}'
-            }), 400
-        
-        if data['water_availability'] not in valid_water_avail:
-            return jsonify({
-                'success': False,
-                'error': f'Invalid water_availability. Must be one of: {", ".join(valid_water_avail)}'
-            }), 400
-        
-        if data['crop_stage'] not in valid_crop_stages:
+        # Validate required fields and values
+        error = validate_input(data)
+        if error:
             return jsonify({
                 'success': False,
-                'error': f'Invalid crop_stage. Must be one of: {", ".join(valid_crop_stages)}'
-            }), 400
-        
-        try:
-            irrigation_freq = int(data['irrigation_frequency'])
-            if irrigation_freq < 1 or irrigation_freq > 7:
-                raise ValueError
-        except (ValueError, TypeError):
-            return jsonify({
-                'success': False,
-                'error': 'irrigation_frequency must be an integer between 1 and 7'
+                'error': error
             }), 400
         
         # Make prediction
@@ -135,7 +135,7 @@ def predict_yield():
         }), 500
 
 
-@app.route('/batch-predict', methods=['POST'])
+@bp.route('/batch-predict', methods=['POST'])
 def batch_predict():
     """
     Batch prediction endpoint for multiple inputs
@@ -152,6 +152,7 @@ def batch_predict():
         ]
     }
     """
+    predictor = get_predictor()
     try:
         if predictor.yield_model is None:
             return jsonify({
@@ -167,21 +168,8 @@ def batch_predict():
                 'error': 'Request must contain "inputs" array'
             }), 400
         
-        results = []
-        for i, input_data in enumerate(data['inputs']):
-            try:
-                result = predictor.predict(input_data)
-                results.append({
-                    'index': i,
-                    'success': True,
-                    'data': result
-                })
-            except Exception as e:
-                results.append({
-                    'index': i,
-                    'success': False,
-                    'error': str(e)
-                })
+        # One vectorized pass; invalid rows come back as per-row errors
+        results = predictor.predict_batch(data['inputs'])
         
         return jsonify({
             'success': True,
@@ -195,11 +183,12 @@ def batch_predict():
         }), 500
 
 
-@app.route('/model-info', methods=['GET'])
+@bp.route('/model-info', methods=['GET'])
 def model_info():
     """
     Get information about loaded models
     """
+    predictor = get_predictor()
     try:
         if predictor.yield_model is None:
             return jsonify({
@@ -214,10 +203,10 @@ def model_info():
                 'suitability_model': str(type(predictor.suitability_model).__name__),
                 'feature_count': len(predictor.feature_columns),
                 'features': predictor.feature_columns,
-                'supported_soil_types': ['Sandy', 'Loamy', 'Clay'],
-                'supported_water_availability': ['Low', 'Medium', 'High'],
-                'supported_crop_stages': ['Seedling', 'Vegetative', 'Flowering', 'Fruiting'],
-                'irrigation_frequency_range': [1, 7]
+                'supported_soil_types': VALID_SOIL_TYPES,
+                'supported_water_availability': VALID_WATER_AVAILABILITY,
+                'supported_crop_stages': VALID_CROP_STAGES,
+                'irrigation_frequency_range': list(IRRIGATION_FREQUENCY_RANGE)
             }
         }), 200
         
@@ -228,15 +217,7 @@ def model_info():
         }), 500
 
 
-@app.errorhandler(404)
-def not_found(error):
-    return jsonify({
-        'success': False,
-        'error': 'Endpoint not found'
-    }), 404
-
-
-@app.errorhandler(500)
+@bp.errorhandler(500)
 def internal_error(error):
     return jsonify({
         'success': False,
@@ -244,9 +225,28 @@ def internal_error(error):
     }), 500
 
 
+def create_app():
+    """Standalone app serving only this blueprint"""
+    app = Flask(__name__)
+    CORS(app)  # Enable CORS for Node.js integration
+    app.register_blueprint(bp)
+
+    @app.errorhandler(404)
+    def not_found(error):
+        return jsonify({
+            'success': False,
+            'error': 'Endpoint not found'
+        }), 404
+
+    return app
+
+
 if __name__ == '__main__':
-    # Get port from environment or use default
-    port = int(os.environ.get('ML_API_PORT', 5001))
+    # Get port from environment or use default (5002 - 5001 belongs to the disease API)
+    port = int(os.environ.get('ML_API_PORT', 5002))
+    
+    app = create_app()
+    get_predictor()
     
     print(f"\n{'='*60}")
     print(f"Pepper Yield Prediction API")
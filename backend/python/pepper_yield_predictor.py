@@ -12,6 +12,81 @@ from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.metrics import mean_squared_error, r2_score, accuracy_score, classification_report
 
+# Input contract shared by /predict and /batch-predict
+REQUIRED_FIELDS = ['soil_type', 'water_availability', 'irrigation_frequency', 'crop_stage']
+VALID_SOIL_TYPES = ['Sandy', 'Loamy', 'Clay']
+VALID_WATER_AVAILABILITY = ['Low', 'Medium', 'High']
+VALID_CROP_STAGES = ['Seedling', 'Vegetative', 'Flowering', 'Fruiting']
+IRRIGATION_FREQUENCY_RANGE = (1, 7)
+
+# Recommendation text (the last entry of each map is also the fallback)
+IRRIGATION_ADVICE = {
+    'Low': 'Install drip irrigation. Water 4-5 times per week during dry season.',
+    'Medium': 'Maintain consistent watering. 3-4 times per week is optimal.',
+    'High': 'Good water availability. Ensure proper drainage. Water 2-3 times per week.'
+}
+FERTILIZER_ADVICE = {
+    'Seedling': 'NPK 19:19:19 @ 2g/plant weekly. Focus on nitrogen for vegetative growth.',
+    'Vegetative': 'NPK 19:19:19 @ 5g/plant weekly. Add organic compost monthly.',
+    'Flowering': 'NPK 13:40:13 @ 5g/plant weekly. Increase phosphorus for flowering.',
+    'Fruiting': 'NPK 13:00:45 @ 7g/plant weekly. High potassium for fruit development.'
+}
+SOIL_TIPS = {
+    'Sandy': 'Sandy soil drains quickly - increase organic matter and irrigation frequency',
+    'Clay': 'Clay soil retains water - ensure good drainage and avoid overwatering',
+    'Loamy': 'Loamy soil is ideal for pepper cultivation'
+}
+SUITABILITY_TIPS = {
+    'Low': 'Soil suitability is low - consider soil amendment and pH adjustment',
+    'Medium': 'Moderate conditions - optimize water and fertilizer for better results',
+    'High': 'Excellent conditions for pepper cultivation!'
+}
+LOW_IRRIGATION_TIP = 'Increase irrigation frequency for better yield'
+LOW_YIELD_TIP = 'Expected yield is low - review soil health and irrigation practices'
+HIGH_YIELD_TIP = 'Conditions are favorable for high yield - maintain current practices'
+
+# Defaults for inputs the caller does not measure (would be region-specific in production)
+ENVIRONMENT_DEFAULTS = {
+    'temperature': 28.0,  # Celsius
+    'rainfall': 2000.0,  # mm/year
+    'humidity': 75.0,  # percentage
+    'nitrogen_level': 50.0,
+    'phosphorus_level': 30.0,
+    'potassium_level': 40.0
+}
+SOIL_PH = {'Sandy': 6.0, 'Loamy': 6.5, 'Clay': 7.0}
+DEFAULT_PH = 6.5
+DEFAULT_REGION = 'Kerala'
+
+
+def _advice(mapping, key):
+    """Text for a key, or the map's last entry for anything else (the else branch)"""
+    return mapping[key] if key in mapping else list(mapping.values())[-1]
+
+
+def validate_input(input_data):
+    """Error message for an invalid prediction input, None when it is valid"""
+    if not isinstance(input_data, dict):
+        return 'Input must be an object'
+    missing_fields = [field for field in REQUIRED_FIELDS if field not in input_data]
+    if missing_fields:
+        return f'Missing required fields: {", ".join(missing_fields)}'
+    if input_data['soil_type'] not in VALID_SOIL_TYPES:
+        return f'Invalid soil_type. Must be one of: {", ".join(VALID_SOIL_TYPES)}'
+    if input_data['water_availability'] not in VALID_WATER_AVAILABILITY:
+        return f'Invalid water_availability. Must be one of: {", ".join(VALID_WATER_AVAILABILITY)}'
+    if input_data['crop_stage'] not in VALID_CROP_STAGES:
+        return f'Invalid crop_stage. Must be one of: {", ".join(VALID_CROP_STAGES)}'
+    low, high = IRRIGATION_FREQUENCY_RANGE
+    try:
+        irrigation_freq = int(input_data['irrigation_frequency'])
+        if irrigation_freq < low or irrigation_freq > high:
+            raise ValueError
+    except (ValueError, TypeError):
+        return f'irrigation_frequency must be an integer between {low} and {high}'
+    return None
+
+
 class PepperYieldPredictor:
     """
     ML model for predicting pepper yield and providing cultivation recommendations
@@ -204,36 +279,98 @@ class PepperYieldPredictor:
             'fertilizer_recommendation': recommendations['fertilizer'],
             'additional_tips': recommendations['tips']
         }
-    
+
+    def predict_batch(self, inputs):
+        """
+        Predictions for a list of input dicts in one pass
+        Valid rows share one enrichment, one scaling and one call per model;
+        invalid rows get an error entry instead of aborting the batch.
+        Returns [{'index', 'success', 'data' | 'error'}] in input order.
+        """
+        results = [None] * len(inputs)
+        valid_index, valid_rows = [], []
+        for i, input_data in enumerate(inputs):
+            error = validate_input(input_data)
+            if error:
+                results[i] = {'index': i, 'success': False, 'error': error}
+                continue
+            valid_index.append(i)
+            valid_rows.append({**input_data, 'irrigation_frequency': int(input_data['irrigation_frequency'])})
+
+        if valid_rows:
+            df = self._enrich_input_data(pd.DataFrame(valid_rows))
+
+            # Row-level checks the single-row path would raise on
+            errors = pd.Series(None, index=df.index, dtype=object)
+            for col in ('temperature', 'rainfall', 'humidity', 'ph_level',
+                        'nitrogen_level', 'phosphorus_level', 'potassium_level'):
+                values = pd.to_numeric(df[col], errors='coerce')
+                errors = errors.where(errors.notna() | values.notna(), f'{col} must be a number')
+                df[col] = values
+            for col, encoder in self.label_encoders.items():
+                if col in df.columns:
+                    unknown = ~df[col].isin(encoder.classes_)
+                    errors = errors.where(errors.notna() | ~unknown, 'Unknown ' + col + ': ' + df[col].astype(str))
+            for position in np.flatnonzero(errors.notna().to_numpy()):
+                i = valid_index[position]
+                results[i] = {'index': i, 'success': False, 'error': errors.iloc[position]}
+
+            ok = errors.isna().to_numpy()
+            df = df[ok].reset_index(drop=True)
+            valid_index = [i for i, keep in zip(valid_index, ok) if keep]
+
+        if valid_index:
+            X_scaled = self.scaler.transform(self.prepare_features(df, is_training=False))
+
+            yield_preds = self.yield_model.predict(X_scaled)
+            # Same label RandomForestClassifier.predict picks, without a second pass over the trees
+            suitability_proba = self.suitability_model.predict_proba(X_scaled)
+            suitability_preds = self.suitability_model.classes_[suitability_proba.argmax(axis=1)]
+            suitability_confidence = suitability_proba.max(axis=1) * 100
+
+            irrigation = df['water_availability'].map(IRRIGATION_ADVICE).fillna(_advice(IRRIGATION_ADVICE, None))
+            fertilizer = df['crop_stage'].map(FERTILIZER_ADVICE).fillna(_advice(FERTILIZER_ADVICE, None))
+            soil_tips = df['soil_type'].map(SOIL_TIPS).fillna(_advice(SOIL_TIPS, None))
+            suitability_tips = pd.Series(suitability_preds).map(SUITABILITY_TIPS).fillna(_advice(SUITABILITY_TIPS, None))
+            irrigation_tips = np.where(df['irrigation_frequency'].to_numpy() < 3, LOW_IRRIGATION_TIP, None)
+            yield_tips = np.select([yield_preds < 0.5, yield_preds > 1.5], [LOW_YIELD_TIP, HIGH_YIELD_TIP], None)
+
+            for position, i in enumerate(valid_index):
+                tips = [irrigation_tips[position], soil_tips[position], suitability_tips[position], yield_tips[position]]
+                results[i] = {
+                    'index': i,
+                    'success': True,
+                    'data': {
+                        'predicted_yield_kg': round(yield_preds[position], 2),
+                        'soil_suitability': suitability_preds[position],
+                        'suitability_confidence': round(suitability_confidence[position], 2),
+                        'irrigation_recommendation': irrigation[position],
+                        'fertilizer_recommendation': fertilizer[position],
+                        'additional_tips': [tip for tip in tips if tip is not None]
+                    }
+                }
+
+        return results
+
     def _enrich_input_data(self, df):
         """
         Add derived environmental features based on location and inputs
         This simulates looking up environmental data
         """
-        # Default environmental parameters (would be region-specific in production)
-        if 'temperature' not in df.columns:
-            df['temperature'] = 28.0  # Celsius
-        if 'rainfall' not in df.columns:
-            df['rainfall'] = 2000.0  # mm/year
-        if 'humidity' not in df.columns:
-            df['humidity'] = 75.0  # percentage
+        # Default environmental parameters; in a batch, rows without a value get the default too
+        for col in ('temperature', 'rainfall', 'humidity'):
+            df[col] = df[col].fillna(ENVIRONMENT_DEFAULTS[col]) if col in df.columns else ENVIRONMENT_DEFAULTS[col]
         
         # Soil parameters based on soil type
-        if 'ph_level' not in df.columns:
-            soil_ph_map = {'Sandy': 6.0, 'Loamy': 6.5, 'Clay': 7.0}
-            df['ph_level'] = df['soil_type'].map(soil_ph_map).fillna(6.5)
+        soil_ph = df['soil_type'].map(SOIL_PH).fillna(DEFAULT_PH)
+        df['ph_level'] = df['ph_level'].fillna(soil_ph) if 'ph_level' in df.columns else soil_ph
         
         # Default NPK levels (would be soil-test based in production)
-        if 'nitrogen_level' not in df.columns:
-            df['nitrogen_level'] = 50.0
-        if 'phosphorus_level' not in df.columns:
-            df['phosphorus_level'] = 30.0
-        if 'potassium_level' not in df.columns:
-            df['potassium_level'] = 40.0
+        for col in ('nitrogen_level', 'phosphorus_level', 'potassium_level'):
+            df[col] = df[col].fillna(ENVIRONMENT_DEFAULTS[col]) if col in df.columns else ENVIRONMENT_DEFAULTS[col]
         
         # Add region if not present
-        if 'region' not in df.columns:
-            df['region'] = 'Kerala'
+        df['region'] = df['region'].fillna(DEFAULT_REGION) if 'region' in df.columns else DEFAULT_REGION
         
         return df
     
@@ -251,51 +388,25 @@ class PepperYieldPredictor:
         water_avail = input_row['water_availability']
         irrigation_freq = input_row['irrigation_frequency']
         
-        if water_avail == 'Low':
-            recommendations['irrigation'] = 'Install drip irrigation. Water 4-5 times per week during dry season.'
-        elif water_avail == 'Medium':
-            recommendations['irrigation'] = 'Maintain consistent watering. 3-4 times per week is optimal.'
-        else:
-            recommendations['irrigation'] = 'Good water availability. Ensure proper drainage. Water 2-3 times per week.'
+        recommendations['irrigation'] = _advice(IRRIGATION_ADVICE, water_avail)
         
         if irrigation_freq < 3:
-            recommendations['tips'].append('Increase irrigation frequency for better yield')
+            recommendations['tips'].append(LOW_IRRIGATION_TIP)
         
         # Fertilizer recommendations based on crop stage
-        crop_stage = input_row['crop_stage']
-        
-        if crop_stage == 'Seedling':
-            recommendations['fertilizer'] = 'NPK 19:19:19 @ 2g/plant weekly. Focus on nitrogen for vegetative growth.'
-        elif crop_stage == 'Vegetative':
-            recommendations['fertilizer'] = 'NPK 19:19:19 @ 5g/plant weekly. Add organic compost monthly.'
-        elif crop_stage == 'Flowering':
-            recommendations['fertilizer'] = 'NPK 13:40:13 @ 5g/plant weekly. Increase phosphorus for flowering.'
-        else:  # Fruiting
-            recommendations['fertilizer'] = 'NPK 13:00:45 @ 7g/plant weekly. High potassium for fruit development.'
+        recommendations['fertilizer'] = _advice(FERTILIZER_ADVICE, input_row['crop_stage'])
         
         # Soil-specific tips
-        soil_type = input_row['soil_type']
-        
-        if soil_type == 'Sandy':
-            recommendations['tips'].append('Sandy soil drains quickly - increase organic matter and irrigation frequency')
-        elif soil_type == 'Clay':
-            recommendations['tips'].append('Clay soil retains water - ensure good drainage and avoid overwatering')
-        else:
-            recommendations['tips'].append('Loamy soil is ideal for pepper cultivation')
+        recommendations['tips'].append(_advice(SOIL_TIPS, input_row['soil_type']))
         
         # Suitability-based tips
-        if suitability == 'Low':
-            recommendations['tips'].append('Soil suitability is low - consider soil amendment and pH adjustment')
-        elif suitability == 'Medium':
-            recommendations['tips'].append('Moderate conditions - optimize water and fertilizer for better results')
-        else:
-            recommendations['tips'].append('Excellent conditions for pepper cultivation!')
+        recommendations['tips'].append(_advice(SUITABILITY_TIPS, suitability))
         
         # Yield-based tips
         if yield_pred < 0.5:
-            recommendations['tips'].append('Expected yield is low - review soil health and irrigation practices')
+            recommendations['tips'].append(LOW_YIELD_TIP)
         elif yield_pred > 1.5:
-            recommendations['tips'].append('Conditions are favorable for high yield - maintain current practices')
+            recommendations['tips'].append(HIGH_YIELD_TIP)
         
         return recommendations
     
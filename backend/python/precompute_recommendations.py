@@ -0,0 +1,265 @@
+"""
+Offline Recommendation Precompute
+Computes KNN recommendations for every user in one pass and writes them to a
+compact JSON store that the Node recommendations route serves directly, so no
+Python process (and no order collection transfer) sits on the request path.
+
+- One sparse user x product matrix (RecommendationEngine's index) is built once
+  and shared by forked worker processes (copy-on-write)
+- Distances are computed in blocks of target users against all users:
+  |a|^2 + |b|^2 - 2 A.B^T, one sparse product per block
+- Neighbour selection, scoring and the popular-products fallback follow
+  RecommendationEngine exactly; product availability (isActive / stock) is
+  applied by Node when serving, so each user gets a ranked list deeper than
+  the page size
+
+Store format (models/recommendations.json by default):
+    {"generatedAt": "...Z", "k": 5, "depth": 20, "users": 123,
+     "popular": ["<productId>", ...],
+     "recommendations": {"<userId>": ["<productId>", ...], ...}}
+
+Usage:
+    python precompute_recommendations.py orders.ndjson [--browsing browsing.ndjson]
+        [--out models/recommendations.json] [--k 5] [--depth 20] [--workers 4]
+
+The Node backend runs it from src/services/recommendationPrecomputeJob.js (order
+and browsing exports streamed from MongoDB as NDJSON) every
+RECOMMENDATIONS_PRECOMPUTE_INTERVAL_HOURS; mongoexport dumps ({"$oid": ...} ids)
+work as input too.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from scipy import sparse
+
+from ml_stream_io import iter_json_records
+from recommendation_engine import RecommendationEngine
+
+DEFAULT_STORE_PATH = os.environ.get(
+    'RECOMMENDATIONS_STORE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'recommendations.json')
+)
+DEFAULT_DEPTH = 20
+
+# Distance block: target rows x all users, as float64 (~4 MB per worker, so
+# the elementwise passes over a block stay in cache)
+BLOCK_CELLS = 500_000
+
+# Set in the parent before forking; workers read it without copying
+_shared = None
+
+
+def _prepare(engine, k, depth):
+    """Target matrix over the candidate matrix columns, plus everything the workers need"""
+    index = engine._get_index()
+    vectors = index['vectors']
+    products = index['products']
+    targets = [user_id for user_id in vectors if user_id != 'None'] + [
+        user_id for user_id in index['candidates'] if user_id not in vectors
+    ]
+
+    rows, cols, weights = [], [], []
+    target_norms = np.zeros(len(targets))
+    for row, user_id in enumerate(targets):
+        norm = 0
+        for product_id, weight in vectors.get(user_id, {}).items():
+            column = products.get(product_id)
+            if column is not None:
+                rows.append(row)
+                cols.append(column)
+                weights.append(weight)
+            norm += weight * weight
+        target_norms[row] = norm
+    target_matrix = sparse.csr_matrix(
+        (np.asarray(weights, dtype=np.float64), (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))),
+        shape=(len(targets), index['matrix'].shape[1])
+    )
+    return {
+        'index': index,
+        'targets': targets,
+        'target_matrix': target_matrix,
+        'target_norms': target_norms,
+        'candidates_t': index['matrix'].T.tocsr(),
+        'popular': engine._get_popularity().ranking(),
+        'k': k,
+        'depth': depth
+    }
+
+
+def _nearest(distances, k):
+    """find_k_nearest_neighbors selection: K smallest, ties in first-seen order"""
+    if k < len(distances):
+        kth = distances[np.argpartition(distances, k - 1)[:k]].max()
+        nearest = np.flatnonzero(distances <= kth)
+    else:
+        nearest = np.arange(len(distances))
+    return nearest[np.argsort(distances[nearest], kind='stable')][:k]
+
+
+def _nearest_block(squared, k):
+    """
+    _nearest for every row of a block of squared distances at once
+
+    Candidates are picked on squared distances; sqrt is only taken for the
+    few entries at or just above each row's K-th value, so ties are resolved
+    on the same distances find_k_nearest_neighbors compares.
+    Returns (rows, columns, distances) sorted by row, then distance, then column.
+    """
+    part = np.argpartition(squared, k - 1, axis=1)[:, :k]
+    kth = np.maximum(np.take_along_axis(squared, part, axis=1).max(axis=1), 0)
+    kth_distance = np.sqrt(kth)
+    rows, cols = np.nonzero(squared <= (kth * (1 + 1e-9))[:, None])
+    distances = np.sqrt(np.maximum(squared[rows, cols], 0))
+    keep = distances <= kth_distance[rows]
+    rows, cols, distances = rows[keep], cols[keep], distances[keep]
+    order = np.lexsort((cols, distances, rows))
+    rows, cols, distances = rows[order], cols[order], distances[order]
+    starts = np.searchsorted(rows, rows)
+    first_k = np.arange(len(rows)) - starts < k
+    return rows[first_k], cols[first_k], distances[first_k]
+
+
+def _score(user_vector, neighbors, vectors, candidates, popular, depth):
+    """get_recommended_products ranking (before availability filtering)"""
+    scores = {}
+    for row, distance in neighbors:
+        weight = 1 / (1 + distance)
+        for product_id, score in vectors.get(candidates[row], {}).items():
+            if product_id not in user_vector:
+                scores[product_id] = scores.get(product_id, 0) + (score * weight)
+    ranked = [product_id for product_id, _ in sorted(scores.items(), key=lambda x: x[1], reverse=True)]
+    if not ranked:
+        ranked = [product_id for product_id in popular if product_id not in user_vector]
+    return ranked[:depth]
+
+
+def _recommend_block(bounds):
+    """Ranked product ids for targets[start:end]"""
+    start, end = bounds
+    shared = _shared
+    index = shared['index']
+    candidates = index['candidates']
+    vectors = index['vectors']
+    targets = shared['targets'][start:end]
+    k = shared['k']
+
+    # matrix @ dense targets sums each dot product in the same order as the
+    # online matrix-vector product, so distances (and ties) match exactly
+    dots = (index['matrix'] @ shared['target_matrix'][start:end].toarray().T).T
+    squared = index['squared_norms'][None, :] + shared['target_norms'][start:end, None]
+    dots *= 2
+    squared -= dots
+    self_rows = [(offset, index['candidate_rows'].get(user_id)) for offset, user_id in enumerate(targets)]
+    self_rows = [(offset, row) for offset, row in self_rows if row is not None]
+    if self_rows:
+        offsets, rows = zip(*self_rows)
+        squared[list(offsets), list(rows)] = np.inf
+
+    neighbors = [[] for _ in targets]
+    if len(candidates) > 1 and k > 0:
+        if k < len(candidates) - 1:
+            for offset, row, distance in zip(*_nearest_block(squared, k)):
+                neighbors[offset].append((row, float(distance)))
+        else:
+            # Fewer users than K: the per-row path handles the shrinking K
+            for offset, user_id in enumerate(targets):
+                distances = np.sqrt(np.maximum(squared[offset], 0))
+                available = len(candidates) - (user_id in index['candidate_rows'])
+                neighbors[offset] = [
+                    (row, float(distances[row])) for row in _nearest(distances, min(k, available))
+                ]
+
+    return [
+        (user_id, _score(vectors.get(user_id, {}), neighbors[offset], vectors, candidates,
+                         shared['popular'], shared['depth']))
+        for offset, user_id in enumerate(targets)
+    ]
+
+
+def recommend_all(engine, k=5, depth=DEFAULT_DEPTH, workers=None):
+    """{user_id: [product_id, ...]} for every user with orders or browsing history"""
+    global _shared
+    _shared = _prepare(engine, k, depth)
+    n_targets = len(_shared['targets'])
+    block = max(1, BLOCK_CELLS // max(1, len(_shared['index']['candidates'])))
+    bounds = [(start, min(start + block, n_targets)) for start in range(0, n_targets, block)]
+    workers = workers or os.cpu_count() or 1
+
+    try:
+        if workers > 1 and len(bounds) > 1 and hasattr(os, 'fork'):
+            import multiprocessing
+            with multiprocessing.get_context('fork').Pool(workers) as pool:
+                blocks = pool.map(_recommend_block, bounds, chunksize=1)
+        else:
+            blocks = map(_recommend_block, bounds)
+        return {user_id: ranked for results in blocks for user_id, ranked in results}, _shared['popular'][:depth]
+    finally:
+        _shared = None
+
+
+def write_store(recommendations, popular, path, k, depth):
+    """Write the store atomically (readers never see a partial file)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    store = {
+        'generatedAt': datetime.now(timezone.utc).isoformat(timespec='seconds').replace('+00:00', 'Z'),
+        'k': k,
+        'depth': depth,
+        'users': len(recommendations),
+        'popular': popular,
+        'recommendations': recommendations
+    }
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(store, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return store['generatedAt']
+
+
+def _read_records(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(iter_json_records(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute KNN recommendations for every user')
+    parser.add_argument('orders', nargs='?', help='Order export (JSON array or NDJSON; default stdin)')
+    parser.add_argument('--browsing', help='Browsing history export (JSON array or NDJSON)')
+    parser.add_argument('--out', default=DEFAULT_STORE_PATH)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH, help='Ranked products kept per user')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('RECOMMENDATION_WORKERS', '0')) or None)
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+        orders = _read_records(args.orders) if args.orders else list(iter_json_records(sys.stdin))
+        browsing = _read_records(args.browsing) if args.browsing else []
+        print(f"[*] Loaded {len(orders)} orders, {len(browsing)} browsing records "
+              f"in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        start = time.perf_counter()
+        engine = RecommendationEngine(orders, browsing, [])
+        recommendations, popular = recommend_all(engine, args.k, args.depth, args.workers)
+        elapsed = time.perf_counter() - start
+        generated_at = write_store(recommendations, popular, args.out, args.k, args.depth)
+        print(f"[OK] {len(recommendations)} users in {elapsed:.1f}s -> {args.out}", file=sys.stderr)
+        print(json.dumps({
+            'success': True,
+            'users': len(recommendations),
+            'generatedAt': generated_at,
+            'seconds': round(elapsed, 2),
+            'path': args.out
+        }))
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Pipeline-Parallel Prediction
+Runs decode, validation and model inference as separate stages joined by
+bounded queues, so image I/O and the OpenCV checks for one request overlap
+with model inference for another.
+
+Stages:
+    decode     - cv2.imread on a small thread pool (releases the GIL)
+    validation - heuristic validator + leaf gate; rejections complete here
+    inference  - one thread owns the model (set_model_type is not thread safe)
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from ml_metrics import metrics
+
+_STOP = object()
+
+# Utilization is reported over the most recent N seconds of stage work
+STATS_WINDOW_SECONDS = float(os.environ.get('DISEASE_PIPELINE_STATS_WINDOW', '60'))
+
+
+class _Job:
+    __slots__ = ('image_path', 'model_type', 'future', 'image', 'color_stats')
+
+    def __init__(self, image_path, model_type):
+        self.image_path = image_path
+        self.model_type = model_type
+        self.future = Future()
+        self.image = None
+        self.color_stats = None
+
+
+class PredictionPipeline:
+    """
+    Staged executor around a DualModelDetector
+
+    Queues are bounded so a burst of uploads applies back-pressure on submit()
+    instead of holding every decoded image in memory.
+    """
+
+    STAGES = ('decode', 'validation', 'inference')
+
+    def __init__(self, detector, decode_workers=None, validation_workers=None, queue_size=None):
+        """
+        Args:
+            detector: DualModelDetector providing decode_image / run_validation_stage / run_model_stage
+            decode_workers: Decode threads (DISEASE_DECODE_WORKERS, default 2)
+            validation_workers: Validation threads (DISEASE_VALIDATION_WORKERS, default 2)
+            queue_size: Capacity of each inter-stage queue (DISEASE_PIPELINE_QUEUE_SIZE, default 16)
+        """
+        self.detector = detector
+        self.decode_workers = decode_workers or int(os.environ.get('DISEASE_DECODE_WORKERS', '2'))
+        self.validation_workers = validation_workers or int(os.environ.get('DISEASE_VALIDATION_WORKERS', '2'))
+        queue_size = queue_size or int(os.environ.get('DISEASE_PIPELINE_QUEUE_SIZE', '16'))
+
+        self._queues = {stage: queue.Queue(maxsize=queue_size) for stage in self.STAGES}
+        self._workers = {
+            'decode': self.decode_workers,
+            'validation': self.validation_workers,
+            'inference': 1
+        }
+
+        # (finished_at, busy seconds) per stage job within the stats window
+        self._busy_lock = threading.Lock()
+        self._busy_spans = {stage: deque() for stage in self.STAGES}
+        self._started_at = time.perf_counter()
+
+        self._threads = {stage: [] for stage in self.STAGES}
+        handlers = {
+            'decode': self._decode,
+            'validation': self._validate,
+            'inference': self._infer
+        }
+        for stage in self.STAGES:
+            for i in range(self._workers[stage]):
+                thread = threading.Thread(
+                    target=self._run_stage,
+                    args=(stage, handlers[stage]),
+                    name=f'pipeline-{stage}-{i}',
+                    daemon=True
+                )
+                thread.start()
+                self._threads[stage].append(thread)
+
+        print(f"[OK] Prediction pipeline started "
+              f"(decode: {self.decode_workers}, validation: {self.validation_workers}, inference: 1)")
+
+    def submit(self, image_path, model_type=None):
+        """Queue one image; returns a Future resolving to the detector's result dict"""
+        job = _Job(image_path, model_type)
+        self._queues['decode'].put(job)
+        return job.future
+
+    def predict(self, image_path, model_type=None, timeout=None):
+        """Blocking equivalent of DualModelDetector.predict"""
+        return self.submit(image_path, model_type).result(timeout=timeout)
+
+    def _run_stage(self, stage, handler):
+        inbox = self._queues[stage]
+        while True:
+            job = inbox.get()
+            if job is _STOP:
+                break
+            start = time.perf_counter()
+            try:
+                next_stage = handler(job)
+            except Exception as e:
+                next_stage = None
+                job.future.set_result({
+                    'success': False,
+                    'error': 'Prediction failed',
+                    'message': str(e)
+                })
+            finished = time.perf_counter()
+            elapsed = finished - start
+            with self._busy_lock:
+                spans = self._busy_spans[stage]
+                spans.append((finished, elapsed))
+                while spans and spans[0][0] < finished - STATS_WINDOW_SECONDS:
+                    spans.popleft()
+            metrics.observe(f'pipeline.{stage}', elapsed * 1000)
+            metrics.set_gauge(f'pipeline.{stage}.queue_depth', inbox.qsize())
+
+            if next_stage is not None:
+                self._queues[next_stage].put(job)
+
+    def _decode(self, job):
+        job.image = self.detector.decode_image(job.image_path)
+        return 'validation'
+
+    def _validate(self, job):
+        rejection, job.color_stats = self.detector.run_validation_stage(job.image)
+        if rejection is not None:
+            job.image = None
+            job.future.set_result(rejection)
+            return None
+        return 'inference'
+
+    def _infer(self, job):
+        if job.model_type is not None:
+            self.detector.set_model_type(job.model_type)
+        result = self.detector.run_model_stage(job.image, job.color_stats)
+        job.image = None
+        job.future.set_result(result)
+        return None
+
+    def get_stats(self):
+        """
+        Queue depths and per-stage utilization over the last
+        DISEASE_PIPELINE_STATS_WINDOW seconds (read-only: any number of readers
+        see the same numbers)
+        """
+        now = time.perf_counter()
+        window_start = max(now - STATS_WINDOW_SECONDS, self._started_at)
+        window = max(now - window_start, 1e-9)
+        with self._busy_lock:
+            # Only the part of each job that falls inside the window counts
+            busy = {
+                stage: sum(min(elapsed, finished - window_start)
+                           for finished, elapsed in spans if finished > window_start)
+                for stage, spans in self._busy_spans.items()
+            }
+
+        stages = {}
+        for stage in self.STAGES:
+            depth = self._queues[stage].qsize()
+            utilization = round(busy[stage] / (window * self._workers[stage]), 4)
+            stages[stage] = {
+                'workers': self._workers[stage],
+                'queue_depth': depth,
+                'utilization': utilization
+            }
+
+        return {
+            'window_seconds': round(window, 2),
+            'stages': stages
+        }
+
+    def close(self):
+        """Stop the stage threads in order, after the queued work drains"""
+        for stage in self.STAGES:
+            for _ in self._threads[stage]:
+                self._queues[stage].put(_STOP)
+            for thread in self._threads[stage]:
+                thread.join()
@@ -7,7 +7,9 @@ import torch.nn as nn
 from torchvision import transforms
 from torchvision.models import efficientnet_b0
 from PIL import Image
+import numpy as np
 import os
+from ml_metrics import metrics
 
 
 class EfficientNetB0BlackPepper(nn.Module):
@@ -42,8 +44,23 @@ class PyTorchBlackPepperDetector:
     
     # EXACT class names from training - DO NOT MODIFY
     CLASS_NAMES = ['Footrot', 'Healthy', 'Not_Pepper_Leaf', 'Pollu_Disease', 'Slow-Decline']
+    NOT_PEPPER_LEAF_IDX = 2
+    NOT_PEPPER_LEAF_THRESHOLD = 0.85
+    FULL_RESOLUTION = 224
     
-    def __init__(self, model_path='best_black_pepper_model.pth'):
+    def __init__(self, model_path='best_black_pepper_model.pth', dynamic_resolution=None,
+                 low_resolution=None, margin_threshold=None, not_leaf_band=None):
+        """
+        Args:
+            model_path: Trained EfficientNet-B0 checkpoint
+            dynamic_resolution: Run a low-resolution pass first and only escalate to
+                                224px when the result is uncertain (env BP_DYNAMIC_RESOLUTION, default on)
+            low_resolution: Side of the first pass in px (env BP_LOW_RESOLUTION, default 160)
+            margin_threshold: Escalate when top-1 minus top-2 probability is below this
+                              (env BP_MARGIN_THRESHOLD, default 0.25)
+            not_leaf_band: Escalate when Not_Pepper_Leaf is top-1 and within this distance
+                           of the 0.85 rejection threshold (env BP_NOT_LEAF_BAND, default 0.10)
+        """
         print(f"[*] Initializing PyTorch Black Pepper Detector...")
         
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
@@ -58,12 +75,22 @@ class PyTorchBlackPepperDetector:
         self.model = self._load_model(model_path)
         
         # Define preprocessing - EXACT match to training
-        self.transform = transforms.Compose([
-            transforms.Resize((224, 224)),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                               std=[0.229, 0.224, 0.225])
-        ])
+        self.transform = self._build_transform(self.FULL_RESOLUTION)
+        
+        # Confidence-driven dynamic input resolution
+        if dynamic_resolution is None:
+            dynamic_resolution = os.environ.get('BP_DYNAMIC_RESOLUTION', '1').lower() in ('1', 'true', 'yes')
+        self.dynamic_resolution = dynamic_resolution
+        self.low_resolution = int(low_resolution or os.environ.get('BP_LOW_RESOLUTION', 160))
+        self.margin_threshold = float(margin_threshold if margin_threshold is not None
+                                      else os.environ.get('BP_MARGIN_THRESHOLD', 0.25))
+        self.not_leaf_band = float(not_leaf_band if not_leaf_band is not None
+                                   else os.environ.get('BP_NOT_LEAF_BAND', 0.10))
+        self.low_res_transform = self._build_transform(self.low_resolution)
+        
+        if self.dynamic_resolution:
+            print(f"[*] Dynamic resolution: {self.low_resolution}px first, "
+                  f"{self.FULL_RESOLUTION}px when margin < {self.margin_threshold}")
         
         print(f"[OK] PyTorch Black Pepper Detector ready!")
     
@@ -102,34 +129,110 @@ class PyTorchBlackPepperDetector:
         model.eval()
         return model
     
+    @staticmethod
+    def _build_transform(size):
+        return transforms.Compose([
+            transforms.Resize((size, size)),
+            transforms.ToTensor(),
+            transforms.Normalize(mean=[0.485, 0.456, 0.406],
+                               std=[0.229, 0.224, 0.225])
+        ])
+    
+    def _class_probabilities(self, image, transform):
+        """Run the model on one PIL image and return softmax probabilities as numpy"""
+        image_tensor = transform(image).unsqueeze(0).to(self.device)
+        with torch.no_grad():
+            outputs = self.model(image_tensor)
+            probabilities = torch.softmax(outputs, dim=1)[0]  # Get first batch item
+        return probabilities.cpu().numpy()
+    
+    def _decide(self, probs_np):
+        """
+        Apply the NOT_PEPPER_LEAF threshold logic
+        
+        Returns:
+            (predicted_idx, adjusted probabilities)
+        """
+        probs_np = probs_np.copy()
+        idx = self.NOT_PEPPER_LEAF_IDX
+        if probs_np[idx] == probs_np.max() and probs_np[idx] < self.NOT_PEPPER_LEAF_THRESHOLD:
+            # Set Not_Pepper_Leaf probability to 0 and pick next highest
+            probs_np[idx] = 0.0
+        return int(probs_np.argmax()), probs_np
+    
+    def needs_full_resolution(self, probs_np):
+        """True when a low-resolution result is too close to a decision boundary"""
+        idx = self.NOT_PEPPER_LEAF_IDX
+        if probs_np[idx] == probs_np.max() and \
+                abs(probs_np[idx] - self.NOT_PEPPER_LEAF_THRESHOLD) < self.not_leaf_band:
+            return True
+        
+        _, adjusted = self._decide(probs_np)
+        top_two = np.sort(adjusted)[-2:]
+        return (top_two[1] - top_two[0]) < self.margin_threshold
+    
+    def predict_probabilities(self, image):
+        """
+        Class probabilities for a PIL image, low resolution first when enabled
+        
+        Returns:
+            (probabilities, input_resolution)
+        """
+        if not self.dynamic_resolution:
+            return self._class_probabilities(image, self.transform), self.FULL_RESOLUTION
+        
+        metrics.increment('dynamic_resolution.requests')
+        probs_np = self._class_probabilities(image, self.low_res_transform)
+        if not self.needs_full_resolution(probs_np):
+            metrics.increment('dynamic_resolution.early_exit')
+            return probs_np, self.low_resolution
+        
+        metrics.increment('dynamic_resolution.escalated')
+        return self._class_probabilities(image, self.transform), self.FULL_RESOLUTION
+    
+    def get_resolution_metrics(self):
+        """Share of requests answered at low resolution"""
+        requests = metrics.get_counter('dynamic_resolution.requests')
+        early_exits = metrics.get_counter('dynamic_resolution.early_exit')
+        return {
+            'enabled': self.dynamic_resolution,
+            'low_resolution': self.low_resolution,
+            'margin_threshold': self.margin_threshold,
+            'not_leaf_band': self.not_leaf_band,
+            'requests': requests,
+            'early_exits': early_exits,
+            'early_exit_rate': round(early_exits / requests, 4) if requests else 0
+        }
+    
     def predict(self, image_path):
         """
         Predict disease from image
         Returns dict compatible with the API format
         """
         try:
-            # Load and preprocess image
+            # Load image
             image = Image.open(image_path).convert('RGB')
-            image_tensor = self.transform(image).unsqueeze(0).to(self.device)
-            
-            # Predict
-            with torch.no_grad():
-                outputs = self.model(image_tensor)
-                probabilities = torch.softmax(outputs, dim=1)[0]  # Get first batch item
-            
-            # Convert to numpy for easier manipulation
-            probs_np = probabilities.cpu().numpy()
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'message': f'Failed to process image: {str(e)}'
+            }
+        
+        return self.predict_image(image)
+    
+    def predict_image(self, image):
+        """
+        Predict disease from an already decoded RGB PIL image
+        Returns dict compatible with the API format
+        """
+        try:
+            # Predict (160px first, 224px only when uncertain)
+            probs_np, input_resolution = self.predict_probabilities(image)
             
             # NOT_PEPPER_LEAF threshold logic
-            # Index 2 is Not_Pepper_Leaf
-            if probs_np[2] == probs_np.max() and probs_np[2] < 0.85:
-                # Set Not_Pepper_Leaf probability to 0 and pick next highest
-                probs_np[2] = 0.0
-                predicted_idx = probs_np.argmax()
-                confidence = float(probs_np[predicted_idx] * 100)
-            else:
-                predicted_idx = probs_np.argmax()
-                confidence = float(probs_np[predicted_idx] * 100)
+            predicted_idx, probs_np = self._decide(probs_np)
+            confidence = float(probs_np[predicted_idx] * 100)
             
             # Get predicted class name (exact string from CLASS_NAMES)
             predicted_class = self.class_names[predicted_idx]
@@ -147,7 +250,8 @@ class PyTorchBlackPepperDetector:
                 'confidence': round(confidence, 2),
                 'all_predictions': all_probabilities,
                 'model_framework': 'pytorch',
-                'model_architecture': 'EfficientNet-B0'
+                'model_architecture': 'EfficientNet-B0',
+                'input_resolution': input_resolution
             }
             
             return result
@@ -1,8 +1,120 @@
+import heapq
 import json
+import os
 import sys
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Dict, Tuple
-from math import sqrt
+from math import exp, log, sqrt
+
+import numpy as np
+from scipy import sparse
+
+from ml_stream_io import iter_json_file, read_request, write_response
+from mongo_ids import normalize_id
+from user_ann_index import UserLSHIndex
+
+# knn: user-based neighbours computed per request from the shipped orders
+# item: precomputed item-item similarity table (item_similarity_store.py)
+RECOMMENDATION_MODES = ('knn', 'item')
+DEFAULT_MODE = os.environ.get('RECOMMENDATION_MODE', 'knn')
+
+# exact: distances to every user; lsh: approximate neighbours from the LSH
+# index (user_ann_index.py), see benchmark_recommendations.py --ann for recall.
+# lsh only pays off for an engine that outlives many queries (the index is
+# built on the first query, then updated by track_browsing);
+# the per-request engines of get_recommendations always search exactly.
+NEIGHBOR_SEARCH_MODES = ('exact', 'lsh')
+
+# Actions answered by the FP-growth co-purchase rules (frequently_bought_together.py)
+BOUGHT_TOGETHER_ACTIONS = ('mine_bought_together', 'bought_together', 'bought_together_stats')
+
+# Delivered order lines lose half their popularity weight every N days
+POPULARITY_HALF_LIFE_DAYS = float(os.environ.get('RECOMMENDATION_POPULARITY_HALF_LIFE_DAYS', '30'))
+POPULARITY_TOP_DEPTH = 50
+
+
+def _id_key(value) -> str:
+    """Id as a dict key: Mongo {"$oid"} / populated documents normalized, anything else str()"""
+    return str(normalize_id(value))
+
+
+def _timestamp(value) -> float:
+    """Epoch seconds from an ISO string / datetime / Mongo {"$date"}, None if missing or invalid"""
+    if isinstance(value, dict):
+        value = value.get('$date')
+    if isinstance(value, datetime):
+        moment = value
+    elif isinstance(value, str) and value:
+        try:
+            # Node's toISOString() ends in "Z", which fromisoformat rejects before Python 3.11
+            moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    else:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class DecayedPopularity:
+    """
+    Time-decayed purchase counts over delivered order lines, built in one pass
+
+    Each line adds 2^((t - reference) / half_life) to its product, which
+    equals its decayed weight up to one factor shared by every product, so
+    rankings never need recomputing as time passes. Lines without a
+    timestamp count at the reference time (weight 1); with no timestamps at
+    all the scores are plain counts. Ties keep first-seen product order.
+    """
+    
+    def __init__(self, orders=(), half_life_days: float = POPULARITY_HALF_LIFE_DAYS,
+                 depth: int = POPULARITY_TOP_DEPTH):
+        self.rate = log(2) / (half_life_days * 86400)
+        self.reference = None
+        self.scores = {}  # product id -> score, in first-seen order
+        for order in orders:
+            self._add_order(order)
+        # nlargest keeps first-seen order among equal scores, like the stable sort in ranking()
+        self.top_ids = heapq.nlargest(depth, self.scores, key=self.scores.get)
+    
+    def _add_order(self, order: Dict):
+        if order.get('status') != 'DELIVERED':
+            return
+        timestamp = _timestamp(order.get('createdAt'))
+        if timestamp is None:
+            factor = 1
+        else:
+            if self.reference is None:
+                self.reference = timestamp
+            exponent = (timestamp - self.reference) * self.rate
+            if exponent > 500:
+                self._rebase(timestamp)
+                exponent = 0
+            factor = exp(exponent)
+        scores = self.scores
+        for item in order.get('items', []):
+            product_id = _id_key(item.get('product', ''))
+            if product_id:
+                scores[product_id] = scores.get(product_id, 0) + factor
+    
+    def _rebase(self, timestamp: float):
+        """Move the reference forward before scores overflow (ranking unchanged)"""
+        scale = exp(-(timestamp - self.reference) * self.rate)
+        self.scores = {product_id: score * scale for product_id, score in self.scores.items()}
+        self.reference = timestamp
+    
+    def ranking(self) -> List[str]:
+        """Every product id, most popular first"""
+        return sorted(self.scores, key=self.scores.get, reverse=True)
+    
+    def top(self, limit: int, exclude=()) -> List[str]:
+        """Most popular product ids, skipping exclude"""
+        ranked = [product_id for product_id in self.top_ids if product_id not in exclude][:limit]
+        if len(ranked) < limit and len(self.top_ids) < len(self.scores):
+            # Exclusions ate into the precomputed list: rank everything
+            ranked = [product_id for product_id in self.ranking() if product_id not in exclude][:limit]
+        return ranked
 
 
 class RecommendationEngine:
@@ -11,7 +123,7 @@ class RecommendationEngine:
     Recommends pepper plant varieties based on user similarity
     """
     
-    def __init__(self, orders_data=None, browsing_data=None, products_data=None):
+    def __init__(self, orders_data=None, browsing_data=None, products_data=None, neighbor_search='exact'):
         """
         Initialize with data sources
         In production, this would connect to MongoDB
@@ -19,6 +131,15 @@ class RecommendationEngine:
         self.orders = orders_data or []
         self.browsing_history = browsing_data or []
         self.products = products_data or []
+        self.neighbor_search = neighbor_search
+        if self.neighbor_search not in NEIGHBOR_SEARCH_MODES:
+            raise ValueError(f"Unknown neighbor search: {self.neighbor_search} "
+                             f"(expected one of {', '.join(NEIGHBOR_SEARCH_MODES)})")
+        self._index = None
+        self._ann = None
+        self._product_index = None
+        self._browse_index = None
+        self._popularity = None
     
     def calculate_distance(self, vector1: Dict, vector2: Dict) -> float:
         """Calculate Euclidean distance between two user vectors"""
@@ -36,29 +157,202 @@ class RecommendationEngine:
         """
         Build user interaction vector from purchase and browsing history
         """
+        return dict(self._get_index()['vectors'].get(_id_key(user_id), {}))
+    
+    def build_user_vector_iterative(self, user_id: str) -> Dict:
+        """
+        Build one user's vector by scanning every order and browsing row
+        (reference implementation for the indexed path)
+        """
         vector = {}
         
         # Add purchases with higher weight (weight: 3)
         for order in self.orders:
-            if str(order.get('user')) == str(user_id) and order.get('status') == 'DELIVERED':
+            if _id_key(order.get('user')) == _id_key(user_id) and order.get('status') == 'DELIVERED':
                 for item in order.get('items', []):
-                    product_id = str(item.get('product', ''))
+                    product_id = _id_key(item.get('product', ''))
                     if product_id:
                         vector[product_id] = vector.get(product_id, 0) + 3
         
         # Add browsing with weight based on view count (default: 1)
         for browse in self.browsing_history:
-            if str(browse.get('user')) == str(user_id):
-                product_id = str(browse.get('product', ''))
+            if _id_key(browse.get('user')) == _id_key(user_id):
+                product_id = _id_key(browse.get('product', ''))
                 if product_id:
                     view_count = browse.get('viewCount', 1)
                     vector[product_id] = vector.get(product_id, 0) + view_count
         
         return vector
     
+    def _get_index(self) -> Dict:
+        """
+        Per-user vectors and the sparse user x product weight matrix, built in
+        one pass over orders and browsing history (vector key order matches
+        build_user_vector_iterative)
+        """
+        if self._index is not None:
+            return self._index
+        
+        vectors = {}
+        candidates = {}  # users with any order, in first-seen order
+        
+        # Purchases (weight: 3)
+        for order in self.orders:
+            user = order.get('user')
+            if user:
+                candidates.setdefault(_id_key(user), None)
+            if order.get('status') == 'DELIVERED':
+                vector = vectors.setdefault(_id_key(user), {})
+                for item in order.get('items', []):
+                    product_id = _id_key(item.get('product', ''))
+                    if product_id:
+                        vector[product_id] = vector.get(product_id, 0) + 3
+        
+        # Browsing (weight: view count, default 1)
+        for browse in self.browsing_history:
+            product_id = _id_key(browse.get('product', ''))
+            if product_id:
+                vector = vectors.setdefault(_id_key(browse.get('user')), {})
+                vector[product_id] = vector.get(product_id, 0) + browse.get('viewCount', 1)
+        
+        candidate_ids = list(candidates)
+        product_index = {}
+        rows, cols, weights = [], [], []
+        for row, user_id in enumerate(candidate_ids):
+            for product_id, weight in vectors.get(user_id, {}).items():
+                rows.append(row)
+                cols.append(product_index.setdefault(product_id, len(product_index)))
+                weights.append(weight)
+        
+        matrix = sparse.csr_matrix(
+            (np.asarray(weights, dtype=np.float64), (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))),
+            shape=(len(candidate_ids), len(product_index))
+        )
+        self._index = {
+            'vectors': vectors,
+            'candidates': candidate_ids,
+            'candidate_rows': {user_id: row for row, user_id in enumerate(candidate_ids)},
+            'products': product_index,
+            'matrix': matrix,
+            'squared_norms': np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel()
+        }
+        return self._index
+    
+    def _get_product_index(self) -> Dict:
+        """product id -> product (first occurrence, as the old scans matched)"""
+        if self._product_index is None:
+            self._product_index = {}
+            for product in self.products:
+                self._product_index.setdefault(_id_key(product.get('_id')), product)
+        return self._product_index
+    
+    def _get_browse_index(self) -> Dict:
+        """(user id, product id) -> browsing record"""
+        if self._browse_index is None:
+            self._browse_index = {}
+            for browse in self.browsing_history:
+                key = (_id_key(browse.get('user')), _id_key(browse.get('product')))
+                self._browse_index.setdefault(key, browse)
+        return self._browse_index
+    
+    def _get_popularity(self) -> DecayedPopularity:
+        """Decayed delivered-line counts, built once per engine"""
+        if self._popularity is None:
+            self._popularity = DecayedPopularity(self.orders)
+        return self._popularity
+    
+    def _available_products(self, product_ids: List[str]) -> List[Dict]:
+        """Active, in-stock products for the ids, in the same order"""
+        product_index = self._get_product_index()
+        available = []
+        for product_id in product_ids:
+            product = product_index.get(_id_key(product_id))
+            if product is not None and product.get('isActive') and product.get('available_stock', 0) > 0:
+                available.append(product)
+        return available
+    
+    def _get_ann_index(self) -> UserLSHIndex:
+        """LSH index over the users with orders, built once and then updated in place"""
+        if self._ann is None:
+            index = self._get_index()
+            self._ann = UserLSHIndex()
+            self._ann.add_many((user_id, index['vectors'].get(user_id, {})) for user_id in index['candidates'])
+        return self._ann
+    
+    def find_k_nearest_neighbors_approximate(self, user_id: str, k: int = 5) -> List[Dict]:
+        """
+        Get K approximate nearest neighbors from the LSH index (exact distances,
+        approximate recall)
+        """
+        try:
+            ann = self._get_ann_index()
+            user_id = _id_key(user_id)
+            vector = ann.vector(user_id) if user_id in ann.rows else self.build_user_vector(user_id)
+            return ann.query(vector, k, user_id)
+        
+        except Exception as e:
+            print(f"Error finding approximate neighbors: {str(e)}", file=sys.stderr)
+            return []
+    
     def find_k_nearest_neighbors(self, user_id: str, k: int = 5) -> List[Dict]:
         """
         Get K nearest neighbors (similar users)
+        
+        Distances to every user with an order come from one sparse
+        matrix-vector product (|a - b|^2 = |a|^2 + |b|^2 - 2 a.b); the K
+        smallest are picked with argpartition. Ties keep first-seen user order.
+        """
+        if self.neighbor_search == 'lsh':
+            return self.find_k_nearest_neighbors_approximate(user_id, k)
+        
+        try:
+            index = self._get_index()
+            candidates = index['candidates']
+            
+            if len(candidates) <= 1 or k <= 0:
+                return []
+            
+            user_id = _id_key(user_id)
+            target = np.zeros(index['matrix'].shape[1])
+            target_norm = 0
+            for product_id, weight in index['vectors'].get(user_id, {}).items():
+                column = index['products'].get(product_id)
+                if column is not None:
+                    target[column] = weight
+                target_norm += weight * weight
+            
+            squared = index['squared_norms'] + target_norm - 2 * (index['matrix'] @ target)
+            distances = np.sqrt(np.maximum(squared, 0))
+            
+            target_row = index['candidate_rows'].get(user_id)
+            if target_row is not None:
+                distances[target_row] = np.inf
+                available = len(candidates) - 1
+            else:
+                available = len(candidates)
+            k = min(k, available)
+            
+            # K smallest (plus anything tied with the K-th), then a stable sort
+            if k < len(distances):
+                kth = distances[np.argpartition(distances, k - 1)[:k]].max()
+                nearest = np.flatnonzero(distances <= kth)
+            else:
+                nearest = np.arange(len(distances))
+            nearest = nearest[np.argsort(distances[nearest], kind='stable')][:k]
+            
+            return [
+                {'userId': candidates[row], 'distance': float(distances[row])}
+                for row in nearest
+            ]
+        
+        except Exception as e:
+            print(f"Error finding K-nearest neighbors: {str(e)}", file=sys.stderr)
+            return []
+    
+    def find_k_nearest_neighbors_iterative(self, user_id: str, k: int = 5) -> List[Dict]:
+        """
+        Get K nearest neighbors by rebuilding every user's vector
+        (reference implementation, O(users x (orders + browsing)))
         """
         try:
             # Get all unique users
@@ -66,26 +360,26 @@ class RecommendationEngine:
             for order in self.orders:
                 user = order.get('user')
                 if user:
-                    all_users.add(str(user))
+                    all_users.add(_id_key(user))
             
             all_users_list = list(all_users)
             
             if len(all_users_list) <= 1:
                 return []
             
-            target_user_vector = self.build_user_vector(user_id)
+            target_user_vector = self.build_user_vector_iterative(user_id)
             distances = []
             
             # Calculate distance to all other users
             for other_user_id in all_users_list:
-                if str(other_user_id) == str(user_id):
+                if _id_key(other_user_id) == _id_key(user_id):
                     continue
                 
-                other_user_vector = self.build_user_vector(other_user_id)
+                other_user_vector = self.build_user_vector_iterative(other_user_id)
                 distance = self.calculate_distance(target_user_vector, other_user_vector)
                 
                 distances.append({
-                    'userId': str(other_user_id),
+                    'userId': _id_key(other_user_id),
                     'distance': distance
                 })
             
@@ -121,7 +415,7 @@ class RecommendationEngine:
                 
                 # Only consider products the target user hasn't interacted with
                 for product_id, score in neighbor_products.items():
-                    if product_id not in user_product_ids:
+                    if product_id not in user_vector:
                         # Weight score by distance (closer users have more influence)
                         weight = 1 / (1 + neighbor['distance'])
                         neighbor_product_scores[product_id] = neighbor_product_scores.get(product_id, 0) + (score * weight)
@@ -134,13 +428,7 @@ class RecommendationEngine:
             recommended_product_ids = [product_id for product_id, _ in sorted_products[:limit]]
             
             # Fetch product details
-            recommended_products = []
-            for product_id in recommended_product_ids:
-                for product in self.products:
-                    if str(product.get('_id')) == str(product_id):
-                        if product.get('isActive') and product.get('available_stock', 0) > 0:
-                            recommended_products.append(product)
-                        break
+            recommended_products = self._available_products(recommended_product_ids)
             
             return recommended_products
         
@@ -156,36 +444,11 @@ class RecommendationEngine:
             if exclude_product_ids is None:
                 exclude_product_ids = []
             
-            exclude_product_ids = [str(id) for id in exclude_product_ids]
-            
-            # Count product occurrences in delivered orders
-            product_counts = {}
-            
-            for order in self.orders:
-                if order.get('status') == 'DELIVERED':
-                    for item in order.get('items', []):
-                        product_id = str(item.get('product', ''))
-                        if product_id and product_id not in exclude_product_ids:
-                            product_counts[product_id] = product_counts.get(product_id, 0) + 1
+            exclude_product_ids = {_id_key(id) for id in exclude_product_ids}
             
-            # Sort by count
-            sorted_product_ids = sorted(product_counts.items(), key=lambda x: x[1], reverse=True)
-            popular_product_ids = [product_id for product_id, _ in sorted_product_ids[:limit * 2]]
-            
-            # Filter out excluded products
-            popular_product_ids = [
-                id for id in popular_product_ids 
-                if id not in exclude_product_ids
-            ][:limit]
-            
-            # Fetch product details
-            popular_products = []
-            for product_id in popular_product_ids:
-                for product in self.products:
-                    if str(product.get('_id')) == str(product_id):
-                        if product.get('isActive') and product.get('available_stock', 0) > 0:
-                            popular_products.append(product)
-                        break
+            # Precomputed decayed ranking, then product details
+            popular_product_ids = self._get_popularity().top(limit, exclude_product_ids)
+            popular_products = self._available_products(popular_product_ids)
             
             return popular_products
         
@@ -198,15 +461,23 @@ class RecommendationEngine:
         Track user browsing activity
         """
         try:
-            user_id = str(user_id)
-            product_id = str(product_id)
+            user_id = _id_key(user_id)
+            product_id = _id_key(product_id)
+            
+            # The LSH index takes the new view as a re-insert; the exact index is rebuilt
+            if self._ann is not None and user_id in self._ann.rows:
+                vector = self._ann.vector(user_id)
+                vector[product_id] = vector.get(product_id, 0) + 1
+                self._ann.add(user_id, vector)
+            self._index = None
             
             # Find existing browsing record
-            for browse in self.browsing_history:
-                if str(browse.get('user')) == user_id and str(browse.get('product')) == product_id:
-                    browse['viewCount'] = browse.get('viewCount', 1) + 1
-                    browse['lastViewedAt'] = datetime.now().isoformat()
-                    return browse
+            browse_index = self._get_browse_index()
+            browse = browse_index.get((user_id, product_id))
+            if browse is not None:
+                browse['viewCount'] = browse.get('viewCount', 1) + 1
+                browse['lastViewedAt'] = datetime.now().isoformat()
+                return browse
             
             # Create new browsing record
             new_browse = {
@@ -216,6 +487,7 @@ class RecommendationEngine:
                 'lastViewedAt': datetime.now().isoformat()
             }
             self.browsing_history.append(new_browse)
+            browse_index[(user_id, product_id)] = new_browse
             return new_browse
         
         except Exception as e:
@@ -227,18 +499,18 @@ class RecommendationEngine:
         Get user's recommendation insights
         """
         try:
-            user_id = str(user_id)
+            user_id = _id_key(user_id)
             
             # Count delivered orders
             user_orders = sum(
                 1 for order in self.orders 
-                if str(order.get('user')) == user_id and order.get('status') == 'DELIVERED'
+                if _id_key(order.get('user')) == user_id and order.get('status') == 'DELIVERED'
             )
             
             # Count browsing history
             user_browsing = sum(
                 1 for browse in self.browsing_history 
-                if str(browse.get('user')) == user_id
+                if _id_key(browse.get('user')) == user_id
             )
             
             user_vector = self.build_user_vector(user_id)
@@ -275,7 +547,7 @@ def get_recommendations(user_id: str, input_data: Dict, k: int = 5, limit: int =
         
         return {
             'success': True,
-            'userId': str(user_id),
+            'userId': _id_key(user_id),
             'recommendations': recommended_products,
             'insights': insights,
             'count': len(recommended_products)
@@ -288,15 +560,161 @@ def get_recommendations(user_id: str, input_data: Dict, k: int = 5, limit: int =
         }
 
 
-if __name__ == '__main__':
+def _active_products(product_ids: List[str], products: List[Dict], limit: int) -> List[Dict]:
+    """Product documents for ranked ids, keeping active in-stock ones (same rule as the KNN path)"""
+    by_id = {_id_key(product.get('_id')): product for product in products}
+    selected = []
+    for product_id in product_ids:
+        product = by_id.get(product_id)
+        if product and product.get('isActive') and product.get('available_stock', 0) > 0:
+            selected.append(product)
+            if len(selected) == limit:
+                break
+    return selected
+
+
+def get_item_based_recommendations(user_id: str, input_data: Dict, limit: int = 5, store=None) -> Dict:
+    """
+    Item-based recommendations from the precomputed similarity table:
+    score(j) = sum over the user's products i of weight(u, i) * similarity(i, j)
+
+    Until the store has been rebuilt from full exports it only knows recent
+    events, so requests that carry the order history get the KNN path instead.
+    """
     try:
-        input_data = json.loads(sys.stdin.read())
-        user_id = input_data.get('userId')
-        k = input_data.get('k', 5)
-        limit = input_data.get('limit', 5)
+        if store is None:
+            from item_similarity_store import get_item_store
+            store = get_item_store()
+        
+        if input_data.get('orders') and not store.status()['ready']:
+            return get_recommendations(user_id, input_data, input_data.get('k', 5), limit)
+        
+        user_items = store.user_items(user_id)
+        scores = {}
+        for product_id, neighbors in store.neighbors_of(user_items).items():
+            weight = user_items[product_id]
+            for neighbor_id, similarity in neighbors:
+                if neighbor_id not in user_items:
+                    scores[neighbor_id] = scores.get(neighbor_id, 0) + weight * similarity
+        
+        ranked = [product_id for product_id, _ in sorted(scores.items(), key=lambda x: (-x[1], x[0]))]
+        products = input_data.get('products')
+        if products is not None:
+            recommendations = _active_products(ranked, products, limit)
+            if not recommendations and input_data.get('orders'):
+                engine = RecommendationEngine(input_data.get('orders'), input_data.get('browsingHistory'), products)
+                recommendations = engine.get_popular_products(list(user_items), limit)
+        else:
+            recommendations = [{'_id': product_id, 'score': scores[product_id]} for product_id in ranked[:limit]]
         
-        result = get_recommendations(user_id, input_data, k, limit)
-        print(json.dumps(result, indent=2, default=str))
+        return {
+            'success': True,
+            'userId': _id_key(user_id),
+            'mode': 'item',
+            'recommendations': recommendations,
+            'count': len(recommendations)
+        }
+    
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+
+def _handle_item_action(request: Dict) -> Dict:
+    """Maintain / query the item-item similarity table"""
+    from item_similarity_store import get_item_store
+    store = get_item_store()
+    action = request['action']
+    
+    if action == 'record_orders':
+        return {'success': True, **store.record_orders(request.get('orders', []))}
+    if action == 'remove_order':
+        if 'orderIds' in request:
+            return {'success': True, 'removed': sum(store.delete_order(order_id) for order_id in request['orderIds'])}
+        return {'success': True, 'removed': store.delete_order(request.get('orderId'))}
+    if action == 'record_browsing':
+        return {'success': True, **store.record_browsing(request.get('browsingHistory', []))}
+    if action == 'rebuild':
+        # Full exports come as files (ordersFile / browsingHistoryFile) when too large for one request
+        orders = iter_json_file(request['ordersFile']) if request.get('ordersFile') else request.get('orders', [])
+        browsing = (iter_json_file(request['browsingHistoryFile']) if request.get('browsingHistoryFile')
+                    else request.get('browsingHistory', []))
+        return {'success': True, **store.rebuild(orders, browsing)}
+    if action == 'similar_items':
+        product_id = _id_key(request.get('productId'))
+        return {
+            'success': True,
+            'productId': product_id,
+            'similar': [
+                {'productId': neighbor_id, 'similarity': similarity}
+                for neighbor_id, similarity in store.similar_items(product_id, request.get('limit', 10))
+            ]
+        }
+    if action == 'store_status':
+        return {'success': True, **store.status()}
+    if action == 'stats':
+        return {'success': True, **store.stats()}
+    raise ValueError(f"Unknown action: {action}")
+
+
+def _handle_bought_together_action(request: Dict) -> Dict:
+    """Mine / query frequently-bought-together rules"""
+    from frequently_bought_together import get_bought_together_store
+    store = get_bought_together_store()
+    
+    if request['action'] == 'bought_together_stats':
+        return {'success': True, **store.stats()}
+    if request['action'] == 'mine_bought_together':
+        options = {key: request[name] for name, key in (
+            ('minSupport', 'min_support'), ('minConfidence', 'min_confidence'),
+            ('minLift', 'min_lift'), ('maxLength', 'max_length')) if name in request}
+        orders = iter_json_file(request['ordersFile']) if request.get('ordersFile') else request.get('orders', [])
+        return {'success': True, **store.mine(orders, **options)}
+    
+    product_ids = request.get('productIds') or [request.get('productId')]
+    product_ids = [_id_key(p) for p in product_ids if p]
+    if not product_ids:
+        raise ValueError('bought_together needs productId or productIds')
+    return {
+        'success': True,
+        'productIds': product_ids,
+        'boughtTogether': store.bought_together(product_ids, request.get('limit', 5))
+    }
+
+
+def handle_request(input_data: Dict) -> Dict:
+    """
+    CLI / worker entry point: input carries userId, k, limit, orders, browsingHistory, products
+
+    "mode": "item" answers from the precomputed item-item table instead; a dict
+    with an "action" maintains it: record_orders, remove_order, record_browsing,
+    rebuild, similar_items, store_status, stats; mine_bought_together /
+    bought_together / bought_together_stats use the FP-growth co-purchase
+    rules (frequently_bought_together.py)
+    """
+    if input_data.get('action') in BOUGHT_TOGETHER_ACTIONS:
+        return _handle_bought_together_action(input_data)
+    if 'action' in input_data:
+        return _handle_item_action(input_data)
+    
+    user_id = input_data.get('userId')
+    k = input_data.get('k', 5)
+    limit = input_data.get('limit', 5)
+    mode = input_data.get('mode', DEFAULT_MODE)
+    if mode == 'item':
+        return get_item_based_recommendations(user_id, input_data, limit)
+    if mode != 'knn':
+        return {'success': False, 'error': f"Unknown mode: {mode} (expected one of {', '.join(RECOMMENDATION_MODES)})"}
+    return get_recommendations(user_id, input_data, k, limit)
+
+
+if __name__ == '__main__':
+    try:
+        input_data = read_request(sys.stdin, records_key='orders')
+        result = handle_request(input_data)
+        write_response(result)
     
     except Exception as e:
         output = {
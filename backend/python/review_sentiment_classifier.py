@@ -18,6 +18,8 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
 warnings.filterwarnings('ignore')
 
+from ml_stream_io import read_request, write_response
+
 
 class ReviewSentimentClassifier:
     """SVM-based Review Sentiment Classifier"""
@@ -241,4 +243,59 @@ class ReviewSentimentClassifier:
             }
         
         except Exception as e:
-            raise Exception(f'Sentiment summary generation failed: {str(e)}')
\ No newline at end of file
+            raise Exception(f'Sentiment summary generation failed: {str(e)}')
+
+
+# Loaded once per process (the ML worker daemon keeps it warm between calls)
+_classifier = None
+
+
+def get_classifier():
+    global _classifier
+    if _classifier is None:
+        _classifier = ReviewSentimentClassifier()
+    return _classifier
+
+
+def handle_request(input_data):
+    """
+    CLI / worker entry point
+
+    Expected input format:
+    {
+      "reviews": [...],
+      "method": "analyze" | "summary"
+    }
+    """
+    reviews = input_data.get('reviews', [])
+    method = input_data.get('method', 'analyze')
+    classifier = get_classifier()
+
+    if method == 'analyze':
+        return {
+            'success': True,
+            'reviews': classifier.analyze_reviews(reviews)
+        }
+    if method == 'summary':
+        return {
+            'success': True,
+            'summary': classifier.get_sentiment_summary(reviews)
+        }
+    return {
+        'success': False,
+        'error': f'Unknown method: {method}'
+    }
+
+
+if __name__ == '__main__':
+    try:
+        input_data = read_request(sys.stdin, records_key='reviews')
+        output = handle_request(input_data)
+        write_response(output)
+
+    except Exception as e:
+        print(json.dumps({
+            'success': False,
+            'error': str(e)
+        }))
+        sys.exit(1)
@@ -0,0 +1,259 @@
+"""
+Sales Aggregate Store
+Per-product monthly sales quantities for demand_prediction.py, kept in SQLite
+and extended incrementally, so a prediction reads a product's month series
+instead of re-aggregating (and receiving) the full populated order history.
+
+- sales_monthly: quantity and order-line count per (product, YYYY-MM), with
+  the same month bucketing as DemandPredictionService (product createdAt,
+  else order createdAt)
+- sales_meta:    the watermark (newest ingested order createdAt, UTC) and the
+  ids of the orders at exactly that instant
+
+Ingestion is append-only: orders created after the watermark (or at it but
+not yet seen) are added, older ones are ignored, so the same export can be
+replayed safely. Each batch must therefore hold every order created since
+the watermark (an export with createdAt >= watermark). CANCELLED orders are skipped, as in the Node order query.
+Orders cancelled after ingestion stay counted until a rebuild.
+
+Usage:
+    python sales_aggregate_store.py ingest orders.ndjson     (or orders on stdin)
+    python sales_aggregate_store.py rebuild orders.ndjson
+    python sales_aggregate_store.py series <product_id> [--months-back 6]
+    python sales_aggregate_store.py stats
+
+Order records: {"_id", "status", "createdAt", "items": [{"product", "quantity"}]}
+with populated products (Node / Mongo field names).
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from mongo_ids import CANCELLED_STATUS, normalize_id
+
+DEFAULT_DB_PATH = os.environ.get(
+    'DEMAND_AGGREGATES_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'sales_aggregates.db')
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sales_monthly (
+    product_id TEXT NOT NULL,
+    month      TEXT NOT NULL,
+    quantity   NUMERIC NOT NULL,
+    lines      INTEGER NOT NULL,
+    PRIMARY KEY (product_id, month)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sales_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def order_time(order):
+    """Order createdAt as an aware UTC datetime (naive values are taken as UTC); None if missing or invalid"""
+    value = order.get('createdAt')
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class SalesAggregateStore:
+    """SQLite-backed monthly sales per product; safe to share between threads"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(_SCHEMA)
+
+    def _meta(self):
+        return {key: json.loads(value) for key, value in self._conn.execute('SELECT key, value FROM sales_meta')}
+
+    def watermark(self):
+        """ISO timestamp of the newest ingested order (None before the first ingest)"""
+        with self._lock:
+            return self._meta().get('watermark')
+
+    def ingest(self, order_records):
+        """Add orders newer than the watermark to the monthly aggregates"""
+        from demand_prediction import DemandPredictionService
+
+        start = time.perf_counter()
+        with self._lock:
+            meta = self._meta()
+            watermark = datetime.fromisoformat(meta['watermark']) if meta.get('watermark') else None
+            at_watermark = set(meta.get('watermark_orders', []))
+
+            new_orders, skipped, already_seen = [], 0, 0
+            newest, newest_ids = watermark, set(at_watermark)
+            for order in order_records:
+                if order.get('status') == CANCELLED_STATUS:
+                    continue
+                created = order_time(order)
+                if created is None:
+                    skipped += 1
+                    continue
+                order_id = normalize_id(order.get('_id'))
+                if watermark is not None and (created < watermark or (created == watermark and order_id in at_watermark)):
+                    already_seen += 1
+                    continue
+                new_orders.append(order)
+                if newest is None or created > newest:
+                    newest, newest_ids = created, {order_id}
+                elif created == newest:
+                    newest_ids.add(order_id)
+
+            cube = DemandPredictionService.build_sales_cube(new_orders)
+            quantities, lines = cube.quantities.tolist(), cube.lines.tolist()
+            cells = [
+                (product_id, cube.months[column], quantities[row][column], lines[row][column])
+                for row, product_id in enumerate(cube.product_ids)
+                for column in cube.month_order[row]
+            ]
+            with self._conn:
+                self._conn.executemany(
+                    'INSERT INTO sales_monthly (product_id, month, quantity, lines) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (product_id, month) DO UPDATE SET '
+                    'quantity = quantity + excluded.quantity, lines = lines + excluded.lines',
+                    cells
+                )
+                updates = {
+                    'orders': meta.get('orders', 0) + len(new_orders),
+                    'updated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+                }
+                if newest is not None:
+                    updates['watermark'] = newest.isoformat()
+                    updates['watermark_orders'] = sorted(newest_ids)
+                self._conn.executemany('INSERT OR REPLACE INTO sales_meta (key, value) VALUES (?, ?)',
+                                       ((key, json.dumps(value)) for key, value in updates.items()))
+
+        return {
+            'ingested': len(new_orders),
+            'alreadySeen': already_seen,
+            'skipped': skipped,
+            'cells': len(cells),
+            'watermark': updates.get('watermark', meta.get('watermark')),
+            'seconds': round(time.perf_counter() - start, 3)
+        }
+
+    def rebuild(self, order_records):
+        """Drop the aggregates and ingest the orders from scratch"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute('DELETE FROM sales_monthly')
+                self._conn.execute('DELETE FROM sales_meta')
+        return self.ingest(order_records)
+
+    def monthly(self, product_id=None, since_month=None):
+        """(product_id, month, quantity, lines) rows, by product then month"""
+        query = 'SELECT product_id, month, quantity, lines FROM sales_monthly WHERE 1 = 1'
+        params = []
+        if product_id is not None:
+            query += ' AND product_id = ?'
+            params.append(str(product_id))
+        if since_month is not None:
+            query += ' AND month >= ?'
+            params.append(since_month)
+        with self._lock:
+            return self._conn.execute(query + ' ORDER BY product_id, month', params).fetchall()
+
+    def month_range(self):
+        """(first, last) stored month, (None, None) when empty"""
+        with self._lock:
+            return self._conn.execute('SELECT MIN(month), MAX(month) FROM sales_monthly').fetchone()
+
+    def stats(self):
+        with self._lock:
+            meta = self._meta()
+            stored = self._conn.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT product_id), MIN(month), MAX(month) FROM sales_monthly'
+            ).fetchone()
+        return {
+            **meta,
+            'cells': stored[0],
+            'products': stored[1],
+            'first_month': stored[2],
+            'last_month': stored[3],
+            'db_path': self.db_path
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Opened once per process (shared by demand_prediction and the worker daemon)
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_sales_aggregate_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SalesAggregateStore()
+    return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Persisted monthly sales aggregates for demand prediction')
+    parser.add_argument('command', choices=['ingest', 'rebuild', 'series', 'stats'])
+    parser.add_argument('arg', nargs='?', help='Order export for ingest / rebuild (default stdin) or a product id')
+    parser.add_argument('--months-back', type=int, help='Only months from this many months ago (series)')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH)
+    args = parser.parse_args()
+
+    from ml_stream_io import iter_json_records
+
+    store = SalesAggregateStore(args.db)
+    try:
+        if args.command in ('ingest', 'rebuild'):
+            load = store.ingest if args.command == 'ingest' else store.rebuild
+            if args.arg:
+                with open(args.arg, 'r', encoding='utf-8') as f:
+                    result = load(iter_json_records(f))
+            else:
+                result = load(iter_json_records(sys.stdin))
+        elif args.command == 'series':
+            if not args.arg:
+                parser.error('series needs a product id')
+            from demand_prediction import DemandPredictionService
+            since = DemandPredictionService.window_start_month(args.months_back) if args.months_back else None
+            result = {
+                'productId': args.arg,
+                'series': [{'month': month, 'sales': quantity, 'lines': lines}
+                           for _, month, quantity, lines in store.monthly(args.arg, since)]
+            }
+        else:
+            result = store.stats()
+        print(json.dumps({'success': True, **result}))
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
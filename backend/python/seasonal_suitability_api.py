@@ -3,7 +3,7 @@ Seasonal Suitability Prediction API
 Flask REST API for pepper variety seasonal suitability predictions
 """
 
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, request, jsonify
 from flask_cors import CORS
 import os
 import sys
@@ -12,36 +12,63 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from seasonal_suitability_model import SeasonalSuitabilityModel
+from lazy_model import LazyModel
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for Node.js integration
+# Routes live on a blueprint so ml_gateway.py can host them next to the other services
+bp = Blueprint('seasonal_suitability', __name__)
 
-# Initialize model
-predictor = SeasonalSuitabilityModel()
-model_loaded = False
 
-# Load trained model on startup
-print("Loading Seasonal Suitability ML model...")
-if predictor.load_model():
-    model_loaded = True
-    print("✓ Model loaded successfully")
-else:
-    print("⚠ Warning: Model not loaded. Train model first by running:")
-    print("  python seasonal_suitability_model.py")
+def _create_predictor():
+    predictor = SeasonalSuitabilityModel()
+    print("Loading Seasonal Suitability ML model...")
+    model_loaded = predictor.load_model()
+    if model_loaded:
+        print("✓ Model loaded successfully")
+    else:
+        print("⚠ Warning: Model not loaded. Train model first by running:")
+        print("  python seasonal_suitability_model.py")
+    return predictor, model_loaded
 
 
-@app.route('/health', methods=['GET'])
+# Model is loaded on first use
+_predictor = LazyModel('seasonal_suitability', _create_predictor)
+
+
+def get_predictor():
+    """Return (predictor, model_loaded)"""
+    return _predictor.get()
+
+
+@bp.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (never loads the model: see /ready and /warmup)"""
     return jsonify({
         'status': 'healthy',
         'service': 'Seasonal Suitability Prediction API',
-        'model_loaded': model_loaded,
+        'model_state': _predictor.state,
+        'model_loaded': _predictor.is_loaded and _predictor.get()[1],
         'version': '1.0.0'
     }), 200
 
 
-@app.route('/predict', methods=['POST'])
+@bp.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: 200 once the model is loaded, 503 until then"""
+    ready = _predictor.is_loaded and _predictor.get()[1]
+    return jsonify({
+        'ready': ready,
+        'model_state': _predictor.state
+    }), 200 if ready else 503
+
+
+@bp.route('/warmup', methods=['POST'])
+def warmup():
+    """Start loading the model in the background (202 while loading)"""
+    state = _predictor.warm_up()
+    return jsonify({'model_state': state}), 200 if state == 'loaded' else 202
+
+
+@bp.route('/predict', methods=['POST'])
 def predict_suitability():
     """
     Main prediction endpoint
@@ -71,6 +98,7 @@ def predict_suitability():
         "input": {...}
     }
     """
+    predictor, model_loaded = get_predictor()
     if not model_loaded:
         return jsonify({
             'success': False,
@@ -149,7 +177,7 @@ def predict_suitability():
         }), 500
 
 
-@app.route('/batch_predict', methods=['POST'])
+@bp.route('/batch_predict', methods=['POST'])
 def batch_predict_suitability():
     """
     Batch prediction endpoint for multiple inputs
@@ -168,6 +196,7 @@ def batch_predict_suitability():
     
     Returns array of predictions
     """
+    predictor, model_loaded = get_predictor()
     if not model_loaded:
         return jsonify({
             'success': False,
@@ -215,9 +244,10 @@ def batch_predict_suitability():
         }), 500
 
 
-@app.route('/model_info', methods=['GET'])
+@bp.route('/model_info', methods=['GET'])
 def model_info():
     """Get information about the loaded model"""
+    predictor, model_loaded = get_predictor()
     if not model_loaded:
         return jsonify({
             'success': False,
@@ -242,12 +272,13 @@ def model_info():
     }), 200
 
 
-@app.route('/validate_input', methods=['POST'])
+@bp.route('/validate_input', methods=['POST'])
 def validate_input():
     """
     Validate input data without making prediction
     Useful for frontend validation
     """
+    predictor, model_loaded = get_predictor()
     try:
         data = request.get_json()
         
@@ -307,16 +338,27 @@ def validate_input():
         }), 200
 
 
+def create_app():
+    """Standalone app serving only this blueprint"""
+    app = Flask(__name__)
+    CORS(app)  # Enable CORS for Node.js integration
+    app.register_blueprint(bp)
+    return app
+
+
 if __name__ == '__main__':
     import argparse
     
     parser = argparse.ArgumentParser(description='Seasonal Suitability Prediction API')
     parser.add_argument('--host', default='127.0.0.1', help='Host to bind to')
-    parser.add_argument('--port', type=int, default=5001, help='Port to bind to')
+    parser.add_argument('--port', type=int, default=5003, help='Port to bind to')
     parser.add_argument('--debug', action='store_true', help='Enable debug mode')
     
     args = parser.parse_args()
     
+    app = create_app()
+    predictor, model_loaded = get_predictor()
+    
     print("\n" + "="*60)
     print("Seasonal Suitability Prediction API")
     print("="*60)
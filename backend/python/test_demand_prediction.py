@@ -0,0 +1,115 @@
+"""
+Tests for demand_prediction: the sales cube matches the per-item aggregation
+whether it is built from orders or from order line columns, and forecasts
+cover the months after the current one from a history that runs up to now.
+
+Run with pytest or directly: python test_demand_prediction.py
+"""
+
+import sys
+
+from demand_prediction import (
+    DemandPredictionService, SalesCube, SeasonalForecaster, _month_key_from_number, _month_number, handle_request
+)
+
+PRODUCTS = [
+    {'_id': 'p1', 'name': 'Panniyur 1', 'type': 'Climber', 'category': 'Pepper', 'price': 120, 'stock': 4},
+    {'_id': 'p2', 'name': 'Karimunda', 'type': 'Bush', 'category': 'Pepper', 'price': 90, 'stock': 40},
+]
+
+ORDERS = [
+    {'_id': 'o1', 'createdAt': '2026-01-10T08:00:00.000Z',
+     'items': [{'product': {'_id': 'p1'}, 'quantity': 3}, {'product': {'_id': 'p2'}, 'quantity': 1}]},
+    {'_id': 'o2', 'createdAt': '2026-02-03T12:30:00+05:30',
+     'items': [{'product': {'_id': 'p1'}, 'quantity': 5}]},
+    {'_id': 'o3', 'createdAt': '2026-03-28T23:59:59.999Z',
+     'items': [{'product': {'_id': 'p1', 'createdAt': '2025-12-01T00:00:00Z'}, 'quantity': 2},
+               {'product': {'_id': 'p2'}, 'quantity': 0}, {'product': {}, 'quantity': 9}]},
+]
+
+
+def _order_lines(orders):
+    lines = {'product': [], 'createdAt': [], 'quantity': []}
+    for order in orders:
+        for item in order['items']:
+            if not item['product'].get('_id'):
+                continue
+            lines['product'].append(item['product']['_id'])
+            lines['createdAt'].append(item['product'].get('createdAt') or order['createdAt'])
+            lines['quantity'].append(item['quantity'])
+    return lines
+
+
+def test_cube_from_orders_and_lines():
+    expected = {
+        'p1': {'byMonth': {'2026-01': 3, '2026-02': 5, '2025-12': 2}, 'total': 10, 'orderCount': 3},
+        'p2': {'byMonth': {'2026-01': 1, '2026-03': 0}, 'total': 1, 'orderCount': 2},
+    }
+    assert SalesCube.from_orders(ORDERS).to_sales_data() == expected
+    assert DemandPredictionService.build_sales_cube(_order_lines(ORDERS)).to_sales_data() == expected
+
+
+def test_order_lines_request():
+    request = {'action': 'generatePredictions', 'products': PRODUCTS, 'forecast': False}
+    from_orders = handle_request({**request, 'orders': ORDERS})
+    from_lines = handle_request({**request, 'orderLines': _order_lines(ORDERS)})
+    assert from_orders['success'] and from_lines['success']
+    assert from_lines['data'] == from_orders['data']
+
+    try:
+        handle_request({**request, 'orderLines': {'product': ['p1'], 'createdAt': [], 'quantity': [1]}})
+    except Exception as error:
+        assert 'same length' in str(error)
+    else:
+        raise AssertionError('columns of different lengths must be rejected')
+
+
+def _monthly_orders(first, last, quantity=10):
+    """One order of `quantity` units of p2 in each month first..last (months relative to now)"""
+    now = _month_number(SeasonalForecaster.current_month())
+    return [
+        {'_id': f'o{offset}', 'createdAt': f'{_month_key_from_number(now + offset)}-15T10:00:00.000Z',
+         'items': [{'product': {'_id': 'p2'}, 'quantity': quantity}]}
+        for offset in range(first, last + 1)
+    ]
+
+
+def _forecast(orders):
+    request = {'action': 'getPredictionForProduct', 'productId': 'p2', 'products': PRODUCTS, 'forecast': True}
+    result = handle_request({**request, 'orders': orders})
+    assert result['success'], result.get('error')
+    return result['data']['forecast']
+
+
+def test_forecast_starts_after_the_current_month():
+    now = _month_number(SeasonalForecaster.current_month())
+    upcoming = [_month_key_from_number(now + h) for h in (1, 2, 3)]
+
+    # Steady sales that stopped half a year ago: the months since count as 0
+    stale = _forecast(_monthly_orders(-18, -7))
+    assert stale['months'] == upcoming
+    assert stale['demand'][0] < 10
+
+    # The current month is partial and stays out of the history
+    steady = _forecast(_monthly_orders(-24, -1))
+    assert steady['months'] == upcoming
+    assert _forecast(_monthly_orders(-24, -1) + _monthly_orders(0, 0, quantity=1)) == steady
+    assert abs(steady['demand'][0] - 10) < 0.5
+
+
+def main():
+    tests = [(name, fn) for name, fn in globals().items() if name.startswith('test_') and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"✓ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
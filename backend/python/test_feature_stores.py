@@ -0,0 +1,258 @@
+"""
+Tests for the incremental feature stores: order events must leave the stores
+exactly where a full rebuild from the same data would.
+
+Run with pytest or directly: python test_feature_stores.py
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from customer_feature_store import CustomerFeatureStore
+from customer_segmentation import (BayesianCustomerSegmenter, get_incremental_segments, get_incremental_summary,
+                                   refresh_segments)
+from item_similarity_store import ItemSimilarityStore
+from ml_stream_io import iter_json_file
+from sales_aggregate_store import SalesAggregateStore
+
+NOW = datetime(2026, 3, 1, 12, 0, 0)
+
+
+def _orders(n_orders=60, n_users=8, n_products=12, seed=7):
+    rng = random.Random(seed)
+    orders = []
+    for i in range(n_orders):
+        created = NOW - timedelta(days=rng.randint(0, 200), minutes=rng.randint(0, 1440))
+        orders.append({
+            '_id': f'o{i}',
+            'user': f'u{rng.randrange(n_users)}',
+            'status': rng.choice(['DELIVERED', 'DELIVERED', 'PENDING', 'CANCELLED']),
+            'totalAmount': rng.randint(100, 5000),
+            'createdAt': created.isoformat() + 'Z',
+            'items': [{'product': f'p{p}', 'quantity': rng.randint(1, 3)}
+                      for p in rng.sample(range(n_products), rng.randint(1, 4))]
+        })
+    return orders
+
+
+def _customers(n_users=8):
+    return [{'_id': f'u{i}', 'createdAt': (NOW - timedelta(days=20 + 15 * i)).isoformat() + 'Z',
+             'email': f'u{i}@example.com', 'firstName': 'User', 'lastName': str(i)} for i in range(n_users)]
+
+
+def _feature_snapshot(store, n_users=8):
+    return store.get_many([f'u{i}' for i in range(n_users)])
+
+
+# ----------------------------------------------------------------------
+# customer_feature_store
+# ----------------------------------------------------------------------
+
+def test_customer_deltas_match_rebuild():
+    """Replayed, updated, moved and deleted orders end up where a rebuild would"""
+    orders = _orders()
+    incremental = CustomerFeatureStore(':memory:')
+    incremental.rebuild([], _customers())
+    incremental.record_orders(orders)
+    assert incremental.record_orders(orders)['applied'] == 0, 'replaying the same events must be a no-op'
+
+    final = [dict(order) for order in orders]
+    final[3]['status'] = 'CANCELLED'
+    final[5]['user'] = 'u7' if final[5]['user'] != 'u7' else 'u6'
+    final[8]['totalAmount'] = 12.5
+    incremental.record_orders([final[3], final[5], final[8]])
+    incremental.record_orders([final[3]])
+    assert incremental.delete_order({'$oid': 'o10'})
+    assert not incremental.delete_order('o10')
+    del final[10]
+
+    rebuilt = CustomerFeatureStore(':memory:')
+    rebuilt.rebuild(final, _customers())
+    assert _feature_snapshot(incremental) == _feature_snapshot(rebuilt)
+
+
+def test_customer_store_readiness():
+    store = CustomerFeatureStore(':memory:')
+    store.record_orders(_orders(5))
+    assert store.status()['ready'] is False, 'events alone must not make the store ready'
+    store.rebuild(_orders(5))
+    status = store.status()
+    assert status['ready'] and not status['customers_ready']
+    store.rebuild(_orders(5), _customers())
+    assert store.status()['customers_ready']
+
+
+def test_customer_rebuild_from_export_files():
+    """rebuild_store's orders_file / customers_file stream to the same store as inline records"""
+    orders = _orders()
+    inline = CustomerFeatureStore(':memory:')
+    inline.rebuild(orders, _customers())
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for name, records in (('orders', orders), ('customers', _customers())):
+            paths[name] = os.path.join(tmp, f'{name}.ndjson')
+            with open(paths[name], 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(record) + '\n' for record in records)
+        from_files = CustomerFeatureStore(':memory:')
+        from_files.rebuild(iter_json_file(paths['orders']), iter_json_file(paths['customers']))
+    assert _feature_snapshot(from_files) == _feature_snapshot(inline)
+    assert from_files.status()['customers_ready']
+
+
+# ----------------------------------------------------------------------
+# customer_segmentation review_at scheduling
+# ----------------------------------------------------------------------
+
+def _live_segments(orders, customers, now):
+    by_user = {}
+    for order in orders:
+        by_user.setdefault(order['user'], []).append(order)
+    data = [{**customer, 'orders': by_user.get(customer['_id'], [])} for customer in customers]
+    return {d['_id']: d['segment'] for d in
+            (dict(r, _id=c['_id']) for r, c in zip(BayesianCustomerSegmenter().classify_columnar(data, now), data))}
+
+
+def test_review_at_reclassifies_on_schedule():
+    """Stored segments only move when review_at passes, and then match a live classification"""
+    orders = _orders()
+    customers = _customers()
+    store = CustomerFeatureStore(':memory:')
+    store.rebuild(orders, customers)
+    assert refresh_segments(store, NOW) == len(customers)
+    assert refresh_segments(store, NOW) == 0, 'nothing changed and no review time has passed'
+
+    review_times = sorted(datetime.fromisoformat(row[0]) for row in store._conn.execute(
+        'SELECT review_at FROM customer_segments WHERE review_at IS NOT NULL'))
+    assert review_times, 'customers with orders always have a next threshold'
+    first = review_times[0]
+    assert refresh_segments(store, first - timedelta(microseconds=1)) == 0
+    assert refresh_segments(store, first) >= 1
+
+    for days in (0, 15, 45, 95, 400):
+        now = NOW + timedelta(days=days)
+        stored = {row['_id']: row['segment'] for row in get_incremental_segments(store, now=now)}
+        assert stored == _live_segments(orders, customers, now), f'stored segments drifted after {days} days'
+
+
+def test_summary_counts_customers_only():
+    """Accounts outside the customer list (admins with orders, removed users) are not segmented"""
+    orders = _orders()
+    orders.append({'_id': 'admin-order', 'user': 'admin1', 'status': 'DELIVERED', 'totalAmount': 900,
+                   'createdAt': NOW.isoformat() + 'Z'})
+    customers = _customers()
+    store = CustomerFeatureStore(':memory:')
+    store.rebuild(orders, customers)
+
+    def total(summary):
+        return sum(s['count'] for s in summary.values())
+
+    assert total(get_incremental_summary(store, NOW)) == len(customers)
+    store.record_orders([dict(orders[-1], totalAmount=950)])
+    assert total(get_incremental_summary(store, NOW)) == len(customers)
+
+    assert store.remove_customers(['u2', {'$oid': 'u5'}, 'unknown'])['removed'] == 2
+    remaining = [c for c in customers if c['_id'] not in ('u2', 'u5')]
+    summary = get_incremental_summary(store, NOW)
+    live = _live_segments(orders, remaining, NOW)
+    assert total(summary) == len(remaining)
+    assert {seg: s['count'] for seg, s in summary.items() if s['count']} == \
+        {seg: list(live.values()).count(seg) for seg in set(live.values())}
+    assert {row['_id'] for row in get_incremental_segments(store, now=NOW)} == {c['_id'] for c in remaining}
+
+
+# ----------------------------------------------------------------------
+# item_similarity_store top-N patching
+# ----------------------------------------------------------------------
+
+def _rounded(table):
+    return {p: {n: round(s, 9) for n, s in neighbors.items()} for p, neighbors in table.items()}
+
+
+def test_item_neighbors_match_rebuild():
+    """Incremental top-N patching (with a small N, so entries fall out and back in) equals a rebuild"""
+    rng = random.Random(3)
+    orders = _orders(120, n_users=15, n_products=20)
+    browsing = [{'user': f'u{rng.randrange(15)}', 'product': f'p{rng.randrange(20)}', 'viewCount': rng.randint(1, 5)}
+                for _ in range(40)]
+
+    incremental = ItemSimilarityStore(':memory:', top_n=3)
+    incremental.rebuild(orders[:40])
+    for start in range(40, len(orders), 7):
+        incremental.record_orders(orders[start:start + 7])
+    incremental.record_browsing(browsing)
+    final = [dict(order) for order in orders]
+    for i in range(0, 120, 9):
+        final[i]['status'] = 'CANCELLED' if final[i]['status'] == 'DELIVERED' else 'DELIVERED'
+    incremental.record_orders(final[::9])
+    for i in (4, 50, 77):
+        incremental.delete_order(f'o{i}')
+    final = [order for order in final if order['_id'] not in ('o4', 'o50', 'o77')]
+
+    rebuilt = ItemSimilarityStore(':memory:', top_n=3)
+    rebuilt.rebuild(final, browsing)
+    assert _rounded(incremental.neighbor_table()) == _rounded(rebuilt.neighbor_table())
+
+
+# ----------------------------------------------------------------------
+# sales_aggregate_store watermark ingest
+# ----------------------------------------------------------------------
+
+def _sales_orders():
+    base = datetime(2026, 1, 10, 8, 0, 0)
+    orders = []
+    for i in range(12):
+        orders.append({
+            '_id': f's{i}',
+            'status': 'CANCELLED' if i % 6 == 3 else 'DELIVERED',
+            # Pairs of orders share an instant, so the watermark lands between same-time orders
+            'createdAt': (base + timedelta(days=9 * (i // 2))).isoformat() + 'Z',
+            'items': [{'product': {'_id': f'p{i % 3}'}, 'quantity': i + 1}]
+        })
+    return orders
+
+
+def test_sales_watermark_ingest_matches_rebuild():
+    orders = _sales_orders()
+    incremental = SalesAggregateStore(':memory:')
+    # s4 and s5 share an instant: the first export stops between them
+    incremental.ingest(orders[:5])
+    # The next export starts at the watermark, so s4 comes round again
+    result = incremental.ingest(orders[4:9])
+    assert result['ingested'] == 4 and result['alreadySeen'] == 1
+    replay = incremental.ingest(orders)
+    assert replay['ingested'] == 2 and replay['alreadySeen'] == 8
+
+    rebuilt = SalesAggregateStore(':memory:')
+    rebuilt.rebuild(orders)
+    assert incremental.monthly() == rebuilt.monthly()
+    assert incremental.watermark() == rebuilt.watermark()
+    assert incremental.ingest(orders)['ingested'] == 0
+
+
+def test_sales_ingest_skips_cancelled():
+    store = SalesAggregateStore(':memory:')
+    store.ingest([{'_id': 'c1', 'status': 'CANCELLED', 'createdAt': '2026-01-01T00:00:00Z',
+                   'items': [{'product': {'_id': 'p1'}, 'quantity': 5}]}])
+    assert store.monthly() == []
+
+
+def main():
+    tests = [(name, fn) for name, fn in globals().items() if name.startswith('test_') and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"✓ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Tests for frequently_bought_together: FP-growth must find exactly the
+itemsets brute-force subset counting finds, rules must carry the right
+confidence and lift, and mining from an NDJSON export file must equal
+mining the same records inline.
+
+Run with pytest or directly: python test_frequently_bought_together.py
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+from collections import Counter
+from itertools import combinations
+
+from frequently_bought_together import BoughtTogetherStore, fp_growth, order_transactions
+from ml_stream_io import iter_json_file
+
+
+def _orders(n_orders=400, n_products=12, seed=3):
+    rng = random.Random(seed)
+    orders = []
+    for i in range(n_orders):
+        # A few products are usually bought together, so there are rules to find
+        products = rng.sample(range(n_products), rng.randint(1, 4))
+        if 0 in products and rng.random() < 0.7:
+            products.append(1)
+        orders.append({
+            '_id': f'o{i}',
+            'user': f'u{rng.randrange(50)}',
+            'status': rng.choice(['DELIVERED', 'DELIVERED', 'DELIVERED', 'CANCELLED']),
+            'items': [{'product': {'$oid': f'p{p}'}} for p in products]
+        })
+    return orders
+
+
+def _brute_force(baskets, min_count, max_length):
+    counts = Counter()
+    for basket, count in baskets.items():
+        for length in range(1, max_length + 1):
+            for itemset in combinations(basket, length):
+                counts[frozenset(itemset)] += count
+    return {itemset: count for itemset, count in counts.items() if count >= min_count}
+
+
+def test_fp_growth_matches_brute_force():
+    baskets = order_transactions(_orders())
+    assert all(len(set(basket)) == len(basket) for basket in baskets), 'baskets hold distinct products'
+    for min_count, max_length in ((2, 3), (5, 2), (12, 4)):
+        assert fp_growth(baskets, min_count, max_length) == _brute_force(baskets, min_count, max_length), \
+            f'min_count={min_count} max_length={max_length}'
+
+
+def test_rules_confidence_and_lift():
+    orders = _orders()
+    baskets = order_transactions(orders)
+    n = sum(baskets.values())
+    store = BoughtTogetherStore(':memory:')
+    meta = store.mine(orders, min_support=0.01, min_confidence=0.2)
+    assert meta['transactions'] == sum(order['status'] == 'DELIVERED' for order in orders)
+
+    def support(*items):
+        return sum(count for basket, count in baskets.items() if set(items) <= set(basket))
+
+    rules = store.bought_together('p0', limit=None)
+    assert rules and rules[0]['productId'] == 'p1', 'p1 is bought with p0 most of the time'
+    for rule in rules:
+        confidence = support('p0', rule['productId']) / support('p0')
+        assert abs(rule['confidence'] - confidence) < 1e-9
+        assert abs(rule['lift'] - confidence / (support(rule['productId']) / n)) < 1e-9
+        assert rule['confidence'] >= 0.2
+    assert [r['confidence'] for r in rules] == sorted((r['confidence'] for r in rules), reverse=True)
+    assert store.stats()['mined_at'] == meta['mined_at']
+
+
+def test_mining_from_export_file():
+    orders = _orders()
+    inline = BoughtTogetherStore(':memory:')
+    inline.mine(orders)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'orders.ndjson')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(order) + '\n' for order in orders)
+        from_file = BoughtTogetherStore(':memory:')
+        from_file.mine(iter_json_file(path))
+    for product in range(12):
+        assert from_file.bought_together(f'p{product}', None) == inline.bought_together(f'p{product}', None)
+
+
+def test_mining_without_delivered_orders_fails():
+    try:
+        BoughtTogetherStore(':memory:').mine([{'_id': 'o1', 'status': 'PENDING', 'items': [{'product': 'p1'}]}])
+    except ValueError:
+        return
+    raise AssertionError('mining no DELIVERED orders must raise ValueError')
+
+
+def main():
+    tests = [(name, fn) for name, fn in globals().items() if name.startswith('test_') and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"✓ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
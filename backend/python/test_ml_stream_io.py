@@ -0,0 +1,85 @@
+"""
+Tests for ml_stream_io: records must decode the same whatever the chunk
+boundaries (inside strings, numbers, escapes and multibyte characters).
+
+Run with pytest or directly: python test_ml_stream_io.py
+"""
+
+import io
+import json
+import sys
+
+from ml_stream_io import iter_json_records, read_request, write_response
+
+RECORDS = [
+    {'_id': 'o1', 'user': {'$oid': 'u1'}, 'totalAmount': 1234567.25, 'note': 'Kérala — 🌶 pepper'},
+    {'_id': 'o2', 'user': 'u2', 'totalAmount': -12, 'exp': 1.5e-7, 'note': 'tab\tquote" \\ é'},
+    {'_id': 'o3', 'user': 'u3', 'totalAmount': 0, 'items': [{'product': 'p1', 'quantity': 10}], 'ok': True},
+]
+
+# Small enough to split every token somewhere
+CHUNK_SIZES = [1, 2, 3, 5, 7, 64]
+
+
+def _text_stream(text):
+    """stdin-like stream: UTF-8 bytes decoded through a one-byte buffer"""
+    raw = io.BufferedReader(io.BytesIO(text.encode('utf-8')), buffer_size=1)
+    return io.TextIOWrapper(raw, encoding='utf-8')
+
+
+def test_ndjson_records_across_chunks():
+    text = '\n'.join(json.dumps(record, ensure_ascii=False) for record in RECORDS) + '\n'
+    for chunk_size in CHUNK_SIZES:
+        assert list(iter_json_records(_text_stream(text), chunk_size)) == RECORDS, f'chunk_size={chunk_size}'
+
+
+def test_array_records_across_chunks():
+    text = json.dumps(RECORDS, ensure_ascii=False, indent=2)
+    for chunk_size in CHUNK_SIZES:
+        assert list(iter_json_records(_text_stream(text), chunk_size)) == RECORDS, f'chunk_size={chunk_size}'
+
+
+def test_unterminated_array():
+    try:
+        list(iter_json_records(io.StringIO('[{"a": 1}, {"b": 2}'), 4))
+    except ValueError:
+        return
+    raise AssertionError('an unterminated array must raise ValueError')
+
+
+def test_read_request_document_and_ndjson():
+    document = {'userId': 'u1', 'k': 5, 'orders': RECORDS, 'products': [{'_id': 'p1', 'name': 'Pépper'}]}
+    ndjson = '\n'.join([
+        json.dumps({'userId': 'u1', 'k': 5}),
+        *(json.dumps(record, ensure_ascii=False) for record in RECORDS),
+        json.dumps({'$records': 'products'}),
+        json.dumps({'_id': 'p1', 'name': 'Pépper'}, ensure_ascii=False)
+    ])
+    for chunk_size in CHUNK_SIZES:
+        for text in (json.dumps(document, ensure_ascii=False), ndjson):
+            assert read_request(_text_stream(text), 'orders', chunk_size) == document, f'chunk_size={chunk_size}'
+
+
+def test_write_response_round_trip():
+    result = {'success': True, 'recommendations': RECORDS, 'count': len(RECORDS)}
+    out = io.StringIO()
+    write_response(result, out)
+    assert json.loads(out.getvalue()) == result
+
+
+def main():
+    tests = [(name, fn) for name, fn in globals().items() if name.startswith('test_') and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"✓ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Tests for PepperYieldPredictor.predict_batch: a bad row gets its own error
+entry, and every good row gets exactly what predict() returns for it.
+
+Trains small models in a temporary directory (the shipped models are untouched).
+Run with pytest or directly: python test_pepper_batch_predict.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import warnings
+
+from generate_pepper_training_data import generate_pepper_training_data
+from pepper_yield_predictor import PepperYieldPredictor
+
+VALID_ROW = {'soil_type': 'Loamy', 'water_availability': 'High', 'irrigation_frequency': 3, 'crop_stage': 'Flowering'}
+
+_predictor = None
+
+
+def _trained_predictor():
+    global _predictor
+    if _predictor is None:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_path = os.path.join(tmp, 'pepper_training_data.csv')
+            predictor = PepperYieldPredictor()
+            predictor.models_dir = tmp
+            with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                generate_pepper_training_data(300).to_csv(data_path, index=False)
+                predictor.train(data_path)
+        _predictor = predictor
+    return _predictor
+
+
+def test_row_errors_do_not_abort_the_batch():
+    rows = [
+        VALID_ROW,
+        {**VALID_ROW, 'region': 'Atlantis'},
+        {**VALID_ROW, 'temperature': 'hot'},
+        'not an object',
+        {**VALID_ROW, 'irrigation_frequency': 9},
+        {key: value for key, value in VALID_ROW.items() if key != 'crop_stage'},
+        {**VALID_ROW, 'soil_type': 'Peat'},
+        {**VALID_ROW, 'region': 'Kerala', 'temperature': 30},
+    ]
+    results = _trained_predictor().predict_batch(rows)
+
+    assert [r['index'] for r in results] == list(range(len(rows)))
+    assert [r['success'] for r in results] == [True, False, False, False, False, False, False, True]
+    errors = [r.get('error') for r in results]
+    assert errors[1] == 'Unknown region: Atlantis'
+    assert errors[2] == 'temperature must be a number'
+    assert errors[3] == 'Input must be an object'
+    assert errors[4].startswith('irrigation_frequency must be an integer')
+    assert errors[5] == 'Missing required fields: crop_stage'
+    assert errors[6].startswith('Invalid soil_type')
+
+
+def test_batch_matches_single_predictions():
+    predictor = _trained_predictor()
+    rows = [
+        VALID_ROW,
+        {**VALID_ROW, 'irrigation_frequency': 2, 'crop_stage': 'Seedling'},
+        {**VALID_ROW, 'region': 'Karnataka', 'temperature': 24.5, 'soil_type': 'Clay'},
+        {**VALID_ROW, 'water_availability': 'Low', 'region': 'Tamil Nadu'},
+    ]
+    results = predictor.predict_batch(rows)
+    for row, result in zip(rows, results):
+        assert result['success'], result.get('error')
+        assert result['data'] == predictor.predict(row), f'batch and single prediction differ for {row}'
+
+    # Numeric strings are accepted like validate_input accepts them (predict() alone cannot take them)
+    as_text = predictor.predict_batch([{**rows[1], 'irrigation_frequency': '2'}])[0]
+    assert as_text['success'] and as_text['data'] == results[1]['data']
+
+
+def test_empty_batch():
+    assert _trained_predictor().predict_batch([]) == []
+
+
+def main():
+    tests = [(name, fn) for name, fn in globals().items() if name.startswith('test_') and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"✓ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
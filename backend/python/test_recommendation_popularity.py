@@ -0,0 +1,81 @@
+"""
+Tests for recommendation_engine.DecayedPopularity: rankings must match the
+directly decayed weights, ties keep first-seen order, and the top-N list
+falls back to the full ranking when exclusions exhaust it.
+
+Run with pytest or directly: python test_recommendation_popularity.py
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta
+
+from recommendation_engine import DecayedPopularity
+
+NOW = datetime(2026, 10, 19, 12, 0, 0)
+
+
+def _order(products, days_ago=None, status='DELIVERED'):
+    order = {'status': status, 'items': [{'product': product} for product in products]}
+    if days_ago is not None:
+        order['createdAt'] = (NOW - timedelta(days=days_ago)).isoformat() + 'Z'
+    return order
+
+
+def test_recent_purchases_outrank_old_ones():
+    orders = [_order(['old'], days_ago=120) for _ in range(3)] + [_order(['new'], days_ago=0)]
+    # Three purchases four half-lives ago weigh 3/16 of one purchase today
+    assert DecayedPopularity(orders, half_life_days=30).ranking() == ['new', 'old']
+    assert DecayedPopularity(orders, half_life_days=365).ranking() == ['old', 'new']
+
+
+def test_ranking_matches_decayed_weights():
+    rng = random.Random(5)
+    orders = [_order(rng.sample([f'p{i}' for i in range(30)], rng.randint(1, 3)), days_ago=rng.uniform(0, 400),
+                     status=rng.choice(['DELIVERED', 'DELIVERED', 'CANCELLED']))
+              for _ in range(500)]
+    weights = {}
+    for order in orders:
+        if order['status'] != 'DELIVERED':
+            continue
+        age_days = (NOW - datetime.fromisoformat(order['createdAt'][:-1])).total_seconds() / 86400
+        for item in order['items']:
+            weights[item['product']] = weights.get(item['product'], 0) + 0.5 ** (age_days / 30)
+
+    popularity = DecayedPopularity(orders, half_life_days=30, depth=10)
+    ranking = popularity.ranking()
+    assert set(ranking) == set(weights), 'only delivered lines count'
+    expected = sorted(weights, key=weights.get, reverse=True)
+    assert [round(weights[p], 9) for p in ranking] == [round(weights[p], 9) for p in expected]
+    assert popularity.top(10) == ranking[:10]
+
+
+def test_untimed_orders_are_plain_counts_in_first_seen_order():
+    orders = [_order(['b']), _order(['a', 'c']), _order(['c']), _order(['a']), _order(['d'], status='PENDING')]
+    assert DecayedPopularity(orders).ranking() == ['a', 'c', 'b']
+
+
+def test_exclusions_fall_back_to_full_ranking():
+    orders = [_order([f'p{i}']) for i in range(6) for _ in range(6 - i)]
+    popularity = DecayedPopularity(orders, depth=2)
+    assert popularity.top_ids == ['p0', 'p1']
+    assert popularity.top(3, exclude={'p0'}) == ['p1', 'p2', 'p3']
+    assert DecayedPopularity([]).top(5) == []
+
+
+def main():
+    tests = [(name, fn) for name, fn in globals().items() if name.startswith('test_') and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"✓ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
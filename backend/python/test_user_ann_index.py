@@ -0,0 +1,67 @@
+"""
+Tests for user_ann_index.UserLSHIndex: compacting away re-inserted rows must
+not change any query answer, and must keep the row matrix bounded.
+
+Run with pytest or directly: python test_user_ann_index.py
+"""
+
+import random
+import sys
+
+from user_ann_index import UserLSHIndex
+
+
+def _vector(rng, n_products=40):
+    return {f'p{p}': float(rng.randint(1, 6)) for p in rng.sample(range(n_products), rng.randint(1, 6))}
+
+
+def _replay(index, seed=11, n_users=60, rounds=4):
+    """Bulk insert, then re-insert every user a few times with grown vectors"""
+    rng = random.Random(seed)
+    vectors = {f'u{i}': _vector(rng) for i in range(n_users)}
+    index.add_many(vectors.items())
+    for _ in range(rounds):
+        for user_id in rng.sample(sorted(vectors), n_users):
+            vectors[user_id].update(_vector(rng, 50))
+            index.add(user_id, vectors[user_id])
+        index.query({}, 1)
+    return vectors
+
+
+def test_compaction_keeps_query_results():
+    compacted = UserLSHIndex()
+    uncompacted = UserLSHIndex()
+    uncompacted._compact = lambda: None
+    vectors = _replay(compacted)
+    _replay(uncompacted)
+
+    assert compacted._matrix.shape[0] <= 2 * len(vectors)
+    assert uncompacted._matrix.shape[0] == len(vectors) * 5
+    for user_id, vector in vectors.items():
+        assert compacted.vector(user_id) == vector
+        assert compacted.query(vector, 5, user_id) == uncompacted.query(vector, 5, user_id), user_id
+    assert compacted.stats() == uncompacted.stats()
+
+
+def test_empty_buckets_are_dropped():
+    index = UserLSHIndex()
+    _replay(index)
+    assert all(rows for table in index.buckets for rows in table.values())
+
+
+def main():
+    tests = [(name, fn) for name, fn in globals().items() if name.startswith('test_') and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"✓ {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"✗ {name}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+Approximate Nearest-Neighbour Index for User Interaction Vectors
+Euclidean (p-stable) locality-sensitive hashing over the sparse user x product
+weights used by RecommendationEngine, so neighbour search touches a few
+hundred bucket-mates instead of every user.
+
+- Each of L tables hashes a vector with m random projections:
+  h(v) = floor((a.v + b) / w), a ~ N(0, I); nearby vectors share buckets
+- Candidates from all tables (plus the few users nearest the origin) are
+  re-ranked with exact distances, so returned distances are exact and only
+  recall is approximate
+- Users are inserted (or re-inserted after new interactions) one at a time or
+  in bulk; projection rows for unseen products are drawn on demand, which
+  leaves the hashes of existing users unchanged. A re-insert appends a new
+  row; once replaced rows outnumber current ones the matrix is compacted
+
+Recall versus latency is tuned with n_tables / n_hashes / bucket_width;
+benchmark_recommendations.py --ann reports both against exact KNN.
+"""
+
+import os
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+DEFAULT_TABLES = int(os.environ.get('ANN_TABLES', '32'))
+DEFAULT_HASHES = int(os.environ.get('ANN_HASHES', '4'))
+DEFAULT_BUCKET_WIDTH = float(os.environ.get('ANN_BUCKET_WIDTH', '12'))
+
+
+class UserLSHIndex:
+    """
+    LSH index keyed by user id over {product_id: weight} vectors
+    """
+
+    def __init__(self, n_tables: int = DEFAULT_TABLES, n_hashes: int = DEFAULT_HASHES,
+                 bucket_width: float = DEFAULT_BUCKET_WIDTH, origin_candidates: int = 32, seed: int = 42):
+        self.n_tables = n_tables
+        self.n_hashes = n_hashes
+        self.bucket_width = bucket_width
+        self._rng = np.random.default_rng(seed)
+        self._offsets = self._rng.uniform(0, bucket_width, n_tables * n_hashes)
+        self._projections = np.empty((0, n_tables * n_hashes))
+
+        self.products: Dict[str, int] = {}  # product id -> projection row / column
+        self.ids: List[str] = []             # row -> user id, in insertion order
+        self.rows: Dict[str, int] = {}       # user id -> current row
+        self._keys: List[Tuple] = []         # row -> bucket key per table (None once replaced)
+        self.buckets: List[Dict[Tuple, List[int]]] = [{} for _ in range(n_tables)]
+
+        # Rows are kept as one CSR matrix plus inserts not yet stacked onto it
+        self._matrix = sparse.csr_matrix((0, 0))
+        self._pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._norms = np.zeros(0)
+        self._pending_norms: List[float] = []
+        self.origin_candidates = origin_candidates
+        self._origin = None
+        self._product_ids = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _columns(self, vector: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        columns = np.fromiter((self.products.setdefault(p, len(self.products)) for p in vector),
+                              dtype=np.int64, count=len(vector))
+        weights = np.fromiter(vector.values(), dtype=np.float64, count=len(vector))
+        return columns, weights
+
+    def _grow_projections(self):
+        missing = len(self.products) - len(self._projections)
+        if missing > 0:
+            extra = self._rng.standard_normal((missing, self._projections.shape[1]))
+            self._projections = np.vstack([self._projections, extra])
+
+    def _hash(self, projected: np.ndarray) -> np.ndarray:
+        """Bucket coordinates, shape (n, n_tables, n_hashes)"""
+        codes = np.floor((projected + self._offsets) / self.bucket_width).astype(np.int64)
+        return codes.reshape(len(projected), self.n_tables, self.n_hashes)
+
+    def _insert(self, user_id: str, codes: np.ndarray, columns: np.ndarray, weights: np.ndarray):
+        old = self.rows.get(user_id)
+        if old is not None:
+            for table, key in enumerate(self._keys[old]):
+                self.buckets[table][key].remove(old)
+            self._keys[old] = None
+
+        row = len(self.ids)
+        keys = tuple(tuple(code) for code in codes.tolist())
+        for table, key in enumerate(keys):
+            self.buckets[table].setdefault(key, []).append(row)
+        self.ids.append(user_id)
+        self.rows[user_id] = row
+        self._keys.append(keys)
+        self._pending.append((columns, weights))
+        self._pending_norms.append(float(weights @ weights))
+        self._origin = None
+
+    def add(self, user_id: str, vector: Dict):
+        """Insert a user, or replace their vector after new interactions"""
+        user_id = str(user_id)
+        columns, weights = self._columns(vector)
+        self._grow_projections()
+        codes = self._hash((weights @ self._projections[columns])[None, :])[0]
+        self._insert(user_id, codes, columns, weights)
+
+    def add_many(self, items: Iterable[Tuple[str, Dict]]):
+        """Bulk insert: one sparse product hashes every vector"""
+        items = [(str(user_id), vector) for user_id, vector in items]
+        if not items:
+            return
+        encoded = [self._columns(vector) for _, vector in items]
+        self._grow_projections()
+        indptr = np.zeros(len(items) + 1, dtype=np.int64)
+        np.cumsum([len(columns) for columns, _ in encoded], out=indptr[1:])
+        batch = sparse.csr_matrix(
+            (np.concatenate([w for _, w in encoded]) if encoded else np.zeros(0),
+             np.concatenate([c for c, _ in encoded]) if encoded else np.zeros(0, dtype=np.int64),
+             indptr),
+            shape=(len(items), len(self.products))
+        )
+        codes = self._hash(batch @ self._projections)
+        for (user_id, _), (columns, weights), user_codes in zip(items, encoded, codes):
+            self._insert(user_id, user_codes, columns, weights)
+
+    def vector(self, user_id: str) -> Dict:
+        """Stored {product_id: weight} for a user ({} if not indexed)"""
+        row = self.rows.get(str(user_id))
+        if row is None:
+            return {}
+        flushed = self._matrix.shape[0]
+        if row < flushed:
+            start, end = self._matrix.indptr[row], self._matrix.indptr[row + 1]
+            columns, weights = self._matrix.indices[start:end], self._matrix.data[start:end]
+        else:
+            columns, weights = self._pending[row - flushed]
+        if self._product_ids is None or len(self._product_ids) < len(self.products):
+            self._product_ids = list(self.products)
+        return {self._product_ids[c]: float(w) for c, w in zip(columns.tolist(), weights.tolist())}
+
+    def _flush(self):
+        """Stack pending inserts onto the row matrix"""
+        if not self._pending:
+            if self._matrix.shape[1] < len(self.products):
+                self._matrix.resize((self._matrix.shape[0], len(self.products)))
+            return
+        indptr = np.zeros(len(self._pending) + 1, dtype=np.int64)
+        np.cumsum([len(columns) for columns, _ in self._pending], out=indptr[1:])
+        new_rows = sparse.csr_matrix(
+            (np.concatenate([w for _, w in self._pending]),
+             np.concatenate([c for c, _ in self._pending]),
+             indptr),
+            shape=(len(self._pending), len(self.products))
+        )
+        self._matrix.resize((self._matrix.shape[0], len(self.products)))
+        self._matrix = sparse.vstack([self._matrix, new_rows], format='csr')
+        self._norms = np.concatenate([self._norms, self._pending_norms])
+        self._pending = []
+        self._pending_norms = []
+        if len(self.ids) - len(self.rows) > len(self.rows):
+            self._compact()
+
+    def _compact(self):
+        """Drop the rows of replaced vectors; current rows keep their relative order"""
+        live = np.sort(np.fromiter(self.rows.values(), dtype=np.int64, count=len(self.rows)))
+        renumber = np.full(len(self.ids), -1, dtype=np.int64)
+        renumber[live] = np.arange(len(live))
+        self._matrix = self._matrix[live]
+        self._norms = self._norms[live]
+        self.ids = [self.ids[row] for row in live.tolist()]
+        self._keys = [self._keys[row] for row in live.tolist()]
+        self.rows = {user_id: row for row, user_id in enumerate(self.ids)}
+        for table in self.buckets:
+            for key in list(table):
+                if table[key]:
+                    table[key] = renumber[table[key]].tolist()
+                else:
+                    del table[key]
+        self._origin = None
+
+    def candidates(self, user_id: str = None, vector: Dict = None) -> np.ndarray:
+        """Rows sharing a bucket with the query in any table (current rows only)"""
+        if user_id is not None and str(user_id) in self.rows:
+            keys = self._keys[self.rows[str(user_id)]]
+        else:
+            known = {p: w for p, w in (vector or {}).items() if p in self.products}
+            projected = np.zeros((1, self._projections.shape[1]))
+            if known:
+                columns = np.fromiter((self.products[p] for p in known), dtype=np.int64, count=len(known))
+                weights = np.fromiter(known.values(), dtype=np.float64, count=len(known))
+                projected = (weights @ self._projections[columns])[None, :]
+            keys = tuple(tuple(code) for code in self._hash(projected)[0].tolist())
+        found = set(self._origin_rows())
+        for table, key in enumerate(keys):
+            found.update(self.buckets[table].get(key, ()))
+        return np.sort(np.fromiter(found, dtype=np.int64, count=len(found)))
+
+    def _origin_rows(self) -> List[int]:
+        """
+        The lowest-norm users, always candidates: with no shared products the
+        nearest users are simply the ones closest to the origin, which hash
+        near zero rather than near the query
+        """
+        if self._origin is None:
+            self._flush()
+            norms = self._norms
+            live = np.fromiter(self.rows.values(), dtype=np.int64, count=len(self.rows))
+            order = live[np.lexsort((live, norms[live]))]
+            self._origin = order[:self.origin_candidates].tolist()
+        return self._origin
+
+    def query(self, vector: Dict, k: int = 5, user_id: str = None) -> List[Dict]:
+        """
+        Approximate K nearest users to vector (excluding user_id), with exact
+        distances; ties keep insertion order
+        """
+        if k <= 0 or not self.rows:
+            return []
+        self._flush()
+        rows = self.candidates(user_id, vector)
+        exclude = self.rows.get(str(user_id)) if user_id is not None else None
+        if exclude is not None:
+            rows = rows[rows != exclude]
+        if len(rows) == 0:
+            return []
+
+        target = np.zeros(len(self.products))
+        target_norm = 0
+        for product_id, weight in vector.items():
+            column = self.products.get(product_id)
+            if column is not None:
+                target[column] = weight
+            target_norm += weight * weight
+
+        norms = self._norms[rows]
+        squared = norms + target_norm - 2 * (self._matrix[rows] @ target)
+        distances = np.sqrt(np.maximum(squared, 0))
+        if k < len(distances):
+            kth = distances[np.argpartition(distances, k - 1)[:k]].max()
+            nearest = np.flatnonzero(distances <= kth)
+        else:
+            nearest = np.arange(len(distances))
+        nearest = nearest[np.argsort(distances[nearest], kind='stable')][:k]
+        return [
+            {'userId': self.ids[rows[i]], 'distance': float(distances[i])}
+            for i in nearest
+        ]
+
+    def stats(self) -> Dict:
+        sizes = [len(rows) for table in self.buckets for rows in table.values() if rows]
+        return {
+            'users': len(self.rows),
+            'products': len(self.products),
+            'tables': self.n_tables,
+            'hashesPerTable': self.n_hashes,
+            'bucketWidth': self.bucket_width,
+            'buckets': len(sizes),
+            'meanBucketSize': float(np.mean(sizes)) if sizes else 0.0
+        }
@@ -116,6 +116,25 @@ export async function requireAuth(req, res, next) {
   }
 }
 
+// 🔹 Identify the caller when a valid token is sent, but never reject (public routes)
+export async function optionalAuth(req, res, next) {
+  const header = req.headers.authorization || '';
+  const [scheme, token] = header.split(' ');
+  if (scheme !== 'Bearer' || !token) return next();
+  try {
+    const decodedToken = await admin.auth().verifyIdToken(token);
+    req.user = {
+      uid: decodedToken.uid,
+      email: (decodedToken.email || '').toLowerCase(),
+      provider: decodedToken.firebase?.sign_in_provider || 'firebase'
+    };
+    req.firebaseUid = decodedToken.uid;
+  } catch (err) {
+    // Invalid or expired token: continue as an anonymous caller
+  }
+  next();
+}
+
 // 🔹 Special middleware for Admin-only routes
 export function requireAdmin(req, res, next) {
   if (req.userRole === 'admin') {
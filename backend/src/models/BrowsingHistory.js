@@ -1,4 +1,5 @@
 import mongoose from 'mongoose';
+import itemSimilarityStoreSync from '../services/itemSimilarityStoreSync.js';
 
 const browsingHistorySchema = new mongoose.Schema(
   {
@@ -13,4 +14,20 @@ const browsingHistorySchema = new mongoose.Schema(
 // Index for efficient user-based queries
 browsingHistorySchema.index({ user: 1, product: 1 }, { unique: true });
 
+// View count changes feed the item similarity store (see itemSimilarityStoreSync)
+browsingHistorySchema.post('save', function (doc) {
+  itemSimilarityStoreSync.recordBrowsing(doc);
+});
+
+browsingHistorySchema.post('findOneAndUpdate', async function (doc) {
+  if (!itemSimilarityStoreSync.isEnabled()) return;
+  // doc is the pre-update document (or null for an upsert) unless the caller asked for { new: true }
+  try {
+    const current = await this.model.findOne(this.getFilter()).select('user product viewCount').lean();
+    itemSimilarityStoreSync.recordBrowsing(current);
+  } catch (err) {
+    console.error('Item similarity store sync failed:', err.message);
+  }
+});
+
 export default mongoose.model('BrowsingHistory', browsingHistorySchema);
\ No newline at end of file
@@ -1,4 +1,6 @@
 import mongoose from 'mongoose';
+import customerFeatureStoreSync from '../services/customerFeatureStoreSync.js';
+import itemSimilarityStoreSync from '../services/itemSimilarityStoreSync.js';
 
 const OrderItemSchema = new mongoose.Schema(
   {
@@ -93,4 +95,30 @@ const OrderSchema = new mongoose.Schema(
   { timestamps: true }
 );
 
+// Keep the customer feature store (cancellation features, incremental segmentation) in step
+// with every order write: save(), findByIdAndUpdate / findOneAndUpdate and findByIdAndDelete.
+// Bulk updateMany / deleteMany (maintenance scripts) are not seen: rebuild the store afterwards.
+OrderSchema.post('save', function (doc) {
+  customerFeatureStoreSync.recordOrder(doc);
+  itemSimilarityStoreSync.recordOrder(doc);
+});
+
+OrderSchema.post('findOneAndUpdate', async function (doc) {
+  if (!doc || !(customerFeatureStoreSync.isEnabled() || itemSimilarityStoreSync.isEnabled())) return;
+  // doc is the pre-update document unless the caller asked for { new: true }
+  try {
+    const current = await this.model.findById(doc._id).select('user status totalAmount createdAt items.product').lean();
+    customerFeatureStoreSync.recordOrder(current);
+    itemSimilarityStoreSync.recordOrder(current);
+  } catch (err) {
+    console.error('Order store sync failed:', err.message);
+  }
+});
+
+OrderSchema.post('findOneAndDelete', function (doc) {
+  if (!doc) return;
+  customerFeatureStoreSync.removeOrder(doc._id);
+  itemSimilarityStoreSync.removeOrder(doc._id);
+});
+
 export default mongoose.model('Order', OrderSchema);
\ No newline at end of file
@@ -1,5 +1,6 @@
 import mongoose from 'mongoose';
 import { validateMeaningfulEmail } from '../middleware/emailValidation.js';
+import customerFeatureStoreSync from '../services/customerFeatureStoreSync.js';
 
 const AddressSchema = new mongoose.Schema(
   {
@@ -83,4 +84,24 @@ userSchema.methods.toJSON = function () {
   return obj;
 };
 
+// Keep the customer feature store (incremental segmentation) in step with customer accounts
+userSchema.post('save', function (doc) {
+  customerFeatureStoreSync.recordCustomers([doc]);
+});
+
+userSchema.post('findOneAndUpdate', async function (doc) {
+  if (!doc || !customerFeatureStoreSync.isEnabled()) return;
+  // doc is the pre-update document unless the caller asked for { new: true }
+  try {
+    const current = await this.model.findById(doc._id).select('role createdAt email firstName lastName').lean();
+    customerFeatureStoreSync.recordCustomers([current]);
+  } catch (err) {
+    console.error('Customer feature store sync failed:', err.message);
+  }
+});
+
+userSchema.post('findOneAndDelete', function (doc) {
+  if (doc) customerFeatureStoreSync.removeCustomer(doc._id);
+});
+
 export default mongoose.model('User', userSchema);
\ No newline at end of file
@@ -11,6 +11,7 @@ import admin from '../config/firebase.js';
 import { getFirestore } from 'firebase-admin/firestore';
 import DemandPredictionService from '../services/demandPredictionService.js';
 import CustomerSegmentationService from '../services/customerSegmentationService.js';
+import customerFeatureStoreSync from '../services/customerFeatureStoreSync.js';
 import { createOrderDispatchedNotification, createOrderDeliveredNotification } from '../services/notificationService.js';
 
 const router = express.Router();
@@ -179,6 +180,7 @@ router.delete('/users/:id', asyncHandler(async (req, res) => {
 
   // Finally remove from MongoDB
   await User.deleteOne({ _id: mongoUser._id });
+  customerFeatureStoreSync.removeCustomer(mongoUser._id);
 
   return res.json({ success: true, message: 'User deleted from Firebase (if present), Firestore, and MongoDB' });
 }));
@@ -759,6 +761,20 @@ router.get('/demand-predictions/:productId', asyncHandler(async (req, res) => {
 }));
 
 // Customer Segmentation Routes
+// Live segmentation input: each user with their order history
+const withOrders = (users) => Promise.all(
+  users.map(async (user) => {
+    const orders = await Order.find({ user: user._id })
+      .select('totalAmount createdAt status')
+      .sort({ createdAt: -1 })
+      .lean();
+    return {
+      ...user,
+      orders: orders || []
+    };
+  })
+);
+
 // GET /api/admin/customer-segments - Get all customer segments
 router.get('/customer-segments', asyncHandler(async (req, res) => {
   try {
@@ -784,18 +800,32 @@ router.get('/customer-segments', asyncHandler(async (req, res) => {
       .limit(limit)
       .lean();
 
-    const customersWithOrders = await Promise.all(
-      users.map(async (user) => {
-        const orders = await Order.find({ user: user._id })
-          .select('totalAmount createdAt status')
-          .sort({ createdAt: -1 })
-          .lean();
-        return {
-          ...user,
-          orders: orders || []
-        };
-      })
-    );
+    if (CustomerSegmentationService.isIncremental()) {
+      // Segments come from the stored per-customer aggregates: no order history queries
+      const stored = await CustomerSegmentationService.getStoredSegments(users.map(user => user._id));
+      const byId = new Map((stored.customers || []).map(customer => [customer._id, customer]));
+
+      // Accounts the store has not seen (e.g. a missed sync event) are segmented live and sent to the store
+      const unknown = users.filter(user => !byId.has(String(user._id)));
+      let summary = stored.summary || {};
+      if (unknown.length > 0) {
+        const merged = await CustomerSegmentationService.getStoredSegments([...byId.keys()], await withOrders(unknown));
+        (merged.customers || []).forEach(customer => byId.set(String(customer._id), customer));
+        summary = merged.summary || {};
+        customerFeatureStoreSync.recordCustomers(unknown);
+      }
+
+      return res.json({
+        success: true,
+        customers: users.map(user => byId.get(String(user._id))).filter(Boolean),
+        summary,
+        page,
+        limit,
+        total: users.length
+      });
+    }
+
+    const customersWithOrders = await withOrders(users);
 
     const segmentationResult = await CustomerSegmentationService.segmentCustomers(customersWithOrders);
 
@@ -819,23 +849,41 @@ router.get('/customer-segments', asyncHandler(async (req, res) => {
 // GET /api/admin/customer-segments/stats - Get segmentation statistics
 router.get('/customer-segments/stats', asyncHandler(async (req, res) => {
   try {
+    let storeMissingCustomers = false;
+    if (CustomerSegmentationService.isIncremental()) {
+      // Summary maintained incrementally; only changed customers are reclassified
+      const [{ summary, totalCustomers }, userCount] = await Promise.all([
+        CustomerSegmentationService.getStoredSummary(),
+        User.countDocuments({ role: 'user' })
+      ]);
+      // Accounts missing from the store (e.g. a missed sync event): answer from the live path below
+      storeMissingCustomers = totalCustomers < userCount;
+      if (!storeMissingCustomers) {
+        return res.json({
+          success: true,
+          summary,
+          totalCustomers,
+          generatedAt: new Date(),
+          segments: {
+            new: summary.New || { count: 0, percentage: 0, avg_confidence: 0 },
+            regular: summary.Regular || { count: 0, percentage: 0, avg_confidence: 0 },
+            loyal: summary.Loyal || { count: 0, percentage: 0, avg_confidence: 0 },
+            inactive: summary.Inactive || { count: 0, percentage: 0, avg_confidence: 0 }
+          }
+        });
+      }
+    }
+
     const filter = { role: 'user' };
     const users = await User.find(filter)
       .select('-__v -passwordHash')
       .lean();
 
-    const customersWithOrders = await Promise.all(
-      users.map(async (user) => {
-        const orders = await Order.find({ user: user._id })
-          .select('totalAmount createdAt status')
-          .sort({ createdAt: -1 })
-          .lean();
-        return {
-          ...user,
-          orders: orders || []
-        };
-      })
-    );
+    const customersWithOrders = await withOrders(users);
+    if (storeMissingCustomers) {
+      // Unchanged accounts are skipped by the store; the missing ones are added
+      customerFeatureStoreSync.recordCustomers(users);
+    }
 
     const segmentationResult = await CustomerSegmentationService.segmentCustomers(customersWithOrders);
     const summary = segmentationResult.summary || {};
@@ -3,48 +3,68 @@ import asyncHandler from 'express-async-handler';
 import Order from '../models/Order.js';
 import User from '../models/User.js';
 import { requireAuth, requireAdmin } from '../middleware/auth.js';
-import { PythonShell } from 'python-shell';
-import path from 'path';
-import { fileURLToPath } from 'url';
+import mlWorkerClient from '../services/mlWorkerClient.js';
+import customerFeatureStoreSync from '../services/customerFeatureStoreSync.js';
 
 const router = express.Router();
 router.use(requireAuth, requireAdmin);
 
-const __filename = fileURLToPath(import.meta.url);
-const __dirname = path.dirname(__filename);
-
-// Helper: Call Python SVM classifier
+// Helper: Call Python SVM classifier (warm ML worker daemon, or a one-off process as fallback)
 const predictCancellation = async (order, customer, customerOrders) => {
-  return new Promise((resolve, reject) => {
-    const scriptPath = path.join(__dirname, '..', '..', 'python', 'cancellation_svm_classifier.py');
-    const data = {
+  return mlWorkerClient.call('cancellation_svm_classifier', {
+    action: 'predict',
+    data: {
       order,
       customer,
       customer_orders: customerOrders
-    };
-    
-    const pyshell = new PythonShell('cancellation_svm_classifier.py', {
-      pythonPath: process.env.PYTHON_PATH || 'python',
-      scriptPath: path.dirname(scriptPath),
-      args: ['predict', JSON.stringify(data)]
-    });
-    
-    let result = '';
-    pyshell.on('message', msg => result += msg);
-    pyshell.end(err => {
-      if (err) {
-        console.error('Python error:', err);
-        reject(err);
-      } else {
-        try {
-          const parsed = JSON.parse(result);
-          resolve(parsed);
-        } catch (e) {
-          reject(new Error(`Failed to parse Python response: ${result}`));
-        }
-      }
-    });
-  });
+    }
+  }, { timeout: 10000 });
+};
+
+// Helper: Score many orders in one classifier call (results ranked by risk)
+// Customer histories come from a single $in query instead of one query per order
+const predictCancellationBatch = async (allOrders) => {
+  const orders = allOrders.filter(order => order.customer);
+  if (orders.length === 0) return new Map();
+
+  const customers = new Map();
+  orders.forEach(order => customers.set(String(order.customer._id), order.customer));
+
+  // Once the synced feature store is backfilled, customer aggregates are looked up in Python
+  const useFeatureStore = customerFeatureStoreSync.isReady();
+  const history = useFeatureStore ? null : await Order.find({ customer: { $in: [...customers.keys()] } })
+    .select('customer totalAmount status')
+    .lean();
+
+  const result = await mlWorkerClient.call('cancellation_svm_classifier', {
+    action: 'predict_batch',
+    data: {
+      orders: orders.map(order => ({
+        _id: String(order._id),
+        customerId: String(order.customer._id),
+        totalAmount: order.totalAmount,
+        paymentMethod: order.paymentMethod || 'UNKNOWN',
+        status: order.status,
+        createdAt: order.createdAt.toISOString()
+      })),
+      customers: [...customers.values()].map(customer => ({
+        _id: String(customer._id),
+        createdAt: customer.createdAt.toISOString()
+      })),
+      history: history && history.map(o => ({
+        customerId: String(o.customer),
+        totalAmount: o.totalAmount,
+        status: o.status
+      }))
+    }
+  }, { timeout: 30000 });
+
+  if (!result.success) {
+    throw new Error(result.message || 'Batch prediction failed');
+  }
+
+  // Map preserves the ranked order
+  return new Map(result.predictions.map(prediction => [prediction.order_id, prediction]));
 };
 
 // Route 1: Batch Predictions & Analytics
@@ -93,74 +113,58 @@ router.get('/analytics', asyncHandler(async (req, res) => {
   let totalRiskScore = 0;
   const riskScores = [];
   
-  // Predict each order
-  for (const order of orders) {
-    try {
-      const customerOrders = await Order.find({ customer: order.customer._id });
-      const prediction = await predictCancellation(
-        {
-          _id: order._id,
-          totalAmount: order.totalAmount,
-          paymentMethod: order.paymentMethod || 'UNKNOWN',
-          status: order.status,
-          createdAt: order.createdAt.toISOString()
-        },
-        {
-          _id: order.customer._id,
-          createdAt: order.customer.createdAt.toISOString()
-        },
-        customerOrders.map(o => ({
-          _id: o._id,
-          totalAmount: o.totalAmount,
-          status: o.status,
-          createdAt: o.createdAt.toISOString()
-        }))
-      );
-      
-      predictions.push({
+  // Score every order in one batch call
+  const ordersById = new Map(orders.map(order => [String(order._id), order]));
+  let ranked = new Map();
+  try {
+    ranked = await predictCancellationBatch(orders);
+  } catch (err) {
+    console.error('Error predicting orders:', err);
+  }
+  
+  for (const [orderId, prediction] of ranked) {
+    const order = ordersById.get(orderId);
+    if (!order) continue;
+    
+    predictions.push({
+      orderId: order._id,
+      customerName: order.customer.firstName + ' ' + order.customer.lastName,
+      customerPhone: order.customer.phone,
+      amount: order.totalAmount,
+      paymentMethod: order.paymentMethod,
+      createdAt: order.createdAt,
+      ...prediction
+    });
+    
+    // Update statistics
+    if (prediction.risk_level === 'HIGH') {
+      stats.highRiskCount++;
+      stats.totalRevenueAtRisk += order.totalAmount || 0;
+    } else if (prediction.risk_level === 'MEDIUM') {
+      stats.mediumRiskCount++;
+    } else if (prediction.risk_level === 'LOW') {
+      stats.lowRiskCount++;
+    }
+    
+    totalRiskScore += prediction.risk_score;
+    riskScores.push(prediction.risk_score);
+    
+    // Risk distribution
+    if (prediction.risk_level && stats.riskDistribution[prediction.risk_level]) {
+      stats.riskDistribution[prediction.risk_level].push({
         orderId: order._id,
-        customerName: order.customer.firstName + ' ' + order.customer.lastName,
-        customerPhone: order.customer.phone,
         amount: order.totalAmount,
-        paymentMethod: order.paymentMethod,
-        createdAt: order.createdAt,
-        ...prediction
+        riskScore: prediction.risk_score
       });
-      
-      // Update statistics
+    }
+    
+    // Payment method analysis
+    const pm = order.paymentMethod || 'UNKNOWN';
+    if (stats.paymentMethodAnalysis[pm]) {
+      stats.paymentMethodAnalysis[pm].total++;
       if (prediction.risk_level === 'HIGH') {
-        stats.highRiskCount++;
-        stats.totalRevenueAtRisk += order.totalAmount || 0;
-      } else if (prediction.risk_level === 'MEDIUM') {
-        stats.mediumRiskCount++;
-      } else if (prediction.risk_level === 'LOW') {
-        stats.lowRiskCount++;
-      }
-      
-      totalRiskScore += prediction.risk_score;
-      riskScores.push(prediction.risk_score);
-      
-      // Risk distribution
-      if (prediction.risk_level && stats.riskDistribution[prediction.risk_level]) {
-        stats.riskDistribution[prediction.risk_level].push({
-          orderId: order._id,
-          amount: order.totalAmount,
-          riskScore: prediction.risk_score
-        });
-      }
-      
-      // Payment method analysis
-      const pm = order.paymentMethod || 'UNKNOWN';
-      if (stats.paymentMethodAnalysis[pm]) {
-        stats.paymentMethodAnalysis[pm].total++;
-        if (prediction.risk_level === 'HIGH') {
-          stats.paymentMethodAnalysis[pm].highRisk++;
-        }
+        stats.paymentMethodAnalysis[pm].highRisk++;
       }
-      
-    } catch (err) {
-      console.error(`Error predicting order ${order._id}:`, err);
-      // Continue with next order
     }
   }
   
@@ -169,10 +173,8 @@ router.get('/analytics', asyncHandler(async (req, res) => {
     ? Math.round(totalRiskScore / stats.totalOrders) 
     : 0;
   
-  // Top risk orders
-  stats.topRiskOrders = predictions
-    .sort((a, b) => b.risk_score - a.risk_score)
-    .slice(0, 10);
+  // Top risk orders (predictions are already ranked by risk)
+  stats.topRiskOrders = predictions.slice(0, 10);
   
   // Trend data: group by date
   const trendData = {};
@@ -290,34 +292,17 @@ router.get('/dashboard-summary', asyncHandler(async (req, res) => {
   const sampleOrders = orders.slice(0, sampleSize);
   
   let sampleHighRisk = 0;
-  for (const order of sampleOrders) {
-    try {
-      const customerOrders = await Order.find({ customer: order.customer._id });
-      const prediction = await predictCancellation(
-        {
-          _id: order._id,
-          totalAmount: order.totalAmount,
-          paymentMethod: order.paymentMethod,
-          status: order.status,
-          createdAt: order.createdAt.toISOString()
-        },
-        {
-          _id: order.customer._id,
-          createdAt: order.customer.createdAt.toISOString()
-        },
-        customerOrders.map(o => ({
-          totalAmount: o.totalAmount,
-          status: o.status
-        }))
-      );
-      
+  try {
+    const ordersById = new Map(sampleOrders.map(order => [String(order._id), order]));
+    const ranked = await predictCancellationBatch(sampleOrders);
+    for (const [orderId, prediction] of ranked) {
       if (prediction.risk_level === 'HIGH') {
         sampleHighRisk++;
-        summary.totalRevenueAtRisk += order.totalAmount;
+        summary.totalRevenueAtRisk += ordersById.get(orderId)?.totalAmount || 0;
       }
-    } catch (err) {
-      console.error('Prediction error:', err);
     }
+  } catch (err) {
+    console.error('Prediction error:', err);
   }
   
   // Extrapolate to all orders
@@ -342,38 +327,27 @@ router.get('/payment-analysis', asyncHandler(async (req, res) => {
     OTHER: { total: 0, predictions: [] }
   };
   
+  let ranked = new Map();
+  try {
+    ranked = await predictCancellationBatch(orders);
+  } catch (err) {
+    console.error('Error:', err);
+  }
+  
   for (const order of orders) {
+    const prediction = ranked.get(String(order._id));
+    if (!prediction) continue;
+    
     const pm = order.paymentMethod || 'OTHER';
     const key = analysis[pm] ? pm : 'OTHER';
     
-    try {
-      const customerOrders = await Order.find({ customer: order.customer._id });
-      const prediction = await predictCancellation(
-        {
-          totalAmount: order.totalAmount,
-          paymentMethod: order.paymentMethod,
-          status: order.status,
-          createdAt: order.createdAt.toISOString()
-        },
-        {
-          createdAt: order.customer.createdAt.toISOString()
-        },
-        customerOrders.map(o => ({
-          totalAmount: o.totalAmount,
-          status: o.status
-        }))
-      );
-      
-      analysis[key].total++;
-      analysis[key].predictions.push({
-        orderId: order._id,
-        amount: order.totalAmount,
-        riskScore: prediction.risk_score,
-        riskLevel: prediction.risk_level
-      });
-    } catch (err) {
-      console.error('Error:', err);
-    }
+    analysis[key].total++;
+    analysis[key].predictions.push({
+      orderId: order._id,
+      amount: order.totalAmount,
+      riskScore: prediction.risk_score,
+      riskLevel: prediction.risk_level
+    });
   }
   
   // Calculate averages
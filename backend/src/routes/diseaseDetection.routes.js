@@ -8,10 +8,17 @@ import multer from 'multer';
 import path from 'path';
 import fs from 'fs';
 import diseaseDetectionService from '../services/diseaseDetectionService.js';
-// import { protect } from '../middleware/authMiddleware.js'; // Uncomment if you have auth
+import { optionalAuth } from '../middleware/auth.js';
 
 const router = express.Router();
 
+// Signed-in callers are identified (req.user); anonymous callers are still served
+router.use(optionalAuth);
+
+// ML API admission-control key: the signed-in user, else the end user's address
+// (without it every request is keyed on this server's address and shares one bucket)
+const clientKey = (req) => (req.user?.uid ? `user:${req.user.uid}` : `ip:${req.ip}`);
+
 // Configure multer for file uploads
 const storage = multer.diskStorage({
   destination: (req, file, cb) => {
@@ -160,7 +167,7 @@ router.post('/predict', upload.single('image'), async (req, res) => {
     
     // Get metadata from request
     const metadata = {
-      userId: req.user?.id || req.body.userId || null,
+      userId: req.user?.uid || req.body.userId || null,
       userEmail: req.user?.email || req.body.userEmail || null,
       location: req.body.location ? JSON.parse(req.body.location) : null,
       plantAge: req.body.plantAge || null,
@@ -173,12 +180,19 @@ router.post('/predict', upload.single('image'), async (req, res) => {
 
     // Get prediction from ML service
     const prediction = await diseaseDetectionService.predictFromFile(imagePath, {
+      client_id: clientKey(req),
       user_id: metadata.userId,
       location: metadata.location?.address,
       notes: metadata.notes,
       pepper_type: metadata.pepperType
     });
 
+    // ML API shed the request (rate limited / overloaded) - pass status and Retry-After through
+    if (prediction.statusCode === 429 || prediction.statusCode === 503) {
+      res.set('Retry-After', String(prediction.retryAfter));
+      return res.status(prediction.statusCode).json(prediction);
+    }
+
     // Check for validation errors or other failures returned as objects
     if (!prediction.success) {
       return res.status(400).json(prediction);
@@ -236,9 +250,15 @@ router.post('/predict-url', async (req, res) => {
 
     console.log('🔗 Calling Flask with URL:', finalImageUrl);
     console.log('🌶️ Pepper type:', finalPepperType);
-    const prediction = await diseaseDetectionService.predictFromUrl(finalImageUrl, finalPepperType);
+    const prediction = await diseaseDetectionService.predictFromUrl(finalImageUrl, finalPepperType, clientKey(req));
     console.log('✅ Got Flask response:', prediction);
 
+    // ML API shed the request (rate limited / overloaded) - pass status and Retry-After through
+    if (prediction.statusCode === 429 || prediction.statusCode === 503) {
+      res.set('Retry-After', String(prediction.retryAfter));
+      return res.status(prediction.statusCode).json(prediction);
+    }
+
     // Check for validation errors or other failures
     if (!prediction.success) {
       return res.status(400).json(prediction);
@@ -246,7 +266,7 @@ router.post('/predict-url', async (req, res) => {
 
     // Optionally save to database
     const metadata = {
-      userId: req.user?.id || null,
+      userId: req.user?.uid || null,
       userEmail: req.user?.email || null,
       imageUrl: finalImageUrl,
       originalFilename: 'url_image.jpg'
@@ -285,7 +305,12 @@ router.post('/batch-predict', upload.array('images', 10), async (req, res) => {
     }
 
     const imagePaths = req.files.map(file => file.path);
-    const results = await diseaseDetectionService.batchPredict(imagePaths);
+    const results = await diseaseDetectionService.batchPredict(imagePaths, clientKey(req));
+
+    if (results.statusCode === 429 || results.statusCode === 503) {
+      res.set('Retry-After', String(results.retryAfter));
+      return res.status(results.statusCode).json(results);
+    }
 
     res.json({
       success: true,
@@ -2,6 +2,8 @@ import express from 'express';
 import asyncHandler from 'express-async-handler';
 import admin from '../config/firebase.js';
 import recommendationService from '../services/recommendationService.js';
+import mlWorkerClient from '../services/mlWorkerClient.js';
+import Product from '../models/Product.js';
 import User from '../models/User.js';
 
 const router = express.Router();
@@ -40,16 +42,76 @@ router.get(
       return res.status(404).json({ message: 'User not found' });
     }
 
-    const recommendations = await recommendationService.getRecommendedProducts(
+    // Precomputed lists when the offline job has run recently, live KNN otherwise
+    const precomputed = await recommendationService.getPrecomputedRecommendations(
       user._id,
       parseInt(k),
       parseInt(limit)
     );
+    const recommendations = precomputed
+      ? precomputed.products
+      : await recommendationService.getRecommendedProducts(
+        user._id,
+        parseInt(k),
+        parseInt(limit)
+      );
 
     res.json({
       success: true,
       count: recommendations.length,
-      recommendations: recommendations
+      recommendations: recommendations,
+      source: precomputed ? 'precomputed' : 'live',
+      ...(precomputed && { generatedAt: precomputed.generatedAt })
+    });
+  })
+);
+
+/**
+ * GET /api/recommendations/bought-together/:productId
+ * Products frequently bought together with a product (mined co-purchase rules)
+ */
+router.get(
+  '/bought-together/:productId',
+  asyncHandler(async (req, res) => {
+    const limit = parseInt(req.query.limit) || 5;
+
+    // Ask for extra rules so inactive / out-of-stock products can be skipped
+    const result = await mlWorkerClient.call('recommendation_engine', {
+      action: 'bought_together',
+      productId: req.params.productId,
+      limit: limit * 2
+    });
+    if (!result.success) {
+      return res.status(500).json({ message: 'Bought-together lookup failed', error: result.error });
+    }
+
+    const rules = result.boughtTogether;
+    const products = await Product.find(
+      {
+        _id: { $in: rules.map(rule => rule.productId) },
+        isActive: true,
+        available_stock: { $gt: 0 }
+      },
+      null,
+      { lean: true }
+    );
+
+    // Maintain the rule order
+    const byId = new Map(products.map(p => [p._id.toString(), p]));
+    const boughtTogether = rules
+      .filter(rule => byId.has(rule.productId))
+      .slice(0, limit)
+      .map(rule => ({
+        product: byId.get(rule.productId),
+        confidence: rule.confidence,
+        lift: rule.lift,
+        support: rule.support
+      }));
+
+    res.json({
+      success: true,
+      count: boughtTogether.length,
+      boughtTogether
     });
   })
 );
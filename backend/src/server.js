@@ -27,6 +27,9 @@ import videosRouter from './routes/videos.routes.js';
 import invoiceRouter from './routes/invoice.routes.js';
 import seasonalSuitabilityRouter from './routes/seasonalSuitability.routes.js';
 import diseaseDetectionRouter from './routes/diseaseDetection.routes.js';
+import customerFeatureStoreSync from './services/customerFeatureStoreSync.js';
+import recommendationPrecomputeJob from './services/recommendationPrecomputeJob.js';
+import itemSimilarityStoreSync from './services/itemSimilarityStoreSync.js';
 
 // Get directory path for ES modules
 const __filename = fileURLToPath(import.meta.url);
@@ -117,6 +120,13 @@ connectDB()
     app.listen(PORT, () => {
       console.log(`🚀 Server running on http://localhost:${PORT}`);
     });
+    // One-time backfill of the customer feature store (live order queries until it is ready)
+    customerFeatureStoreSync.ensureBackfilled();
+    itemSimilarityStoreSync.ensureBackfilled();
+    // Bought-together rules are mined from full order exports, not kept up by events
+    itemSimilarityStoreSync.startBoughtTogetherMining();
+    // Precomputed recommendation store (when RECOMMENDATIONS_PRECOMPUTE_INTERVAL_HOURS is set)
+    recommendationPrecomputeJob.start();
   })
   .catch((err) => {
     console.error('❌ Failed to connect to DB:', err);
@@ -0,0 +1,173 @@
+import path from 'path';
+import mongoose from 'mongoose';
+import mlWorkerClient from './mlWorkerClient.js';
+import StoreEventBatcher from './storeEventBatcher.js';
+import { exportNdjson, withExportDir } from './ndjsonExport.js';
+
+const EVENT_TIMEOUT = 5000;
+const REBUILD_TIMEOUT = 600000; // full backfill, once per store
+
+const ORDER_FIELDS = 'user status totalAmount createdAt';
+const CUSTOMER_FIELDS = 'createdAt email firstName lastName';
+
+const orderEvent = (order) => ({
+  _id: String(order._id),
+  user: String(order.user?._id || order.user),
+  status: order.status,
+  totalAmount: order.totalAmount,
+  createdAt: order.createdAt?.toISOString()
+});
+
+const customerRecord = (user) => ({
+  _id: String(user._id),
+  createdAt: user.createdAt?.toISOString(),
+  email: user.email,
+  firstName: user.firstName,
+  lastName: user.lastName
+});
+
+/**
+ * Customer Feature Store Sync
+ * Keeps python/customer_feature_store.py (cancellation features, incremental
+ * segmentation) in step with MongoDB when CUSTOMER_FEATURE_STORE_SYNC=true:
+ * - the Order / User model hooks queue every save, findOneAndUpdate and
+ *   findOneAndDelete as an event (users that are deleted or stop being
+ *   role 'user' are removed from the segmentation); queued events go out in batches
+ *   (storeEventBatcher.js)
+ * - at startup the store is backfilled from full order and customer exports
+ *   if it has never been rebuilt; the exports are streamed to NDJSON files
+ *   and the worker reads them from disk (ndjsonExport.js)
+ * Until the backfill has finished, isReady() is false and callers keep using
+ * the live order history queries.
+ */
+class CustomerFeatureStoreSync {
+  constructor() {
+    this.ready = false;
+    this.customersReady = false;
+    this.backfill = null;
+    this.orderEvents = new StoreEventBatcher({
+      upsert: orders => this._send('record_orders', { orders }),
+      remove: orderIds => this._send('remove_order', { order_ids: orderIds }),
+      onError: err => console.error('Customer feature store sync failed:', err.message)
+    });
+    this.customerEvents = new StoreEventBatcher({
+      upsert: customers => mlWorkerClient.call('customer_segmentation', {
+        action: 'record_customers',
+        customers
+      }, { timeout: EVENT_TIMEOUT }),
+      remove: customerIds => mlWorkerClient.call('customer_segmentation', {
+        action: 'remove_customers',
+        customer_ids: customerIds
+      }, { timeout: EVENT_TIMEOUT }),
+      onError: err => console.error('Customer feature store sync failed:', err.message)
+    });
+  }
+
+  isEnabled() {
+    return process.env.CUSTOMER_FEATURE_STORE_SYNC === 'true';
+  }
+
+  // Order aggregates can replace the live history queries
+  isReady() {
+    return this.isEnabled() && this.ready;
+  }
+
+  // Every customer account is in the store as well (segmentation)
+  isCustomersReady() {
+    return this.isReady() && this.customersReady;
+  }
+
+  _send(action, data, timeout = EVENT_TIMEOUT) {
+    return mlWorkerClient.call('cancellation_svm_classifier', { action, data }, { timeout });
+  }
+
+  recordOrder(order) {
+    if (!this.isEnabled() || !order) return;
+    this.orderEvents.upsert(String(order._id), orderEvent(order));
+  }
+
+  removeOrder(orderId) {
+    if (!this.isEnabled() || !orderId) return;
+    this.orderEvents.remove(String(orderId));
+  }
+
+  // Accounts that are not (or no longer) customers leave the segmentation
+  recordCustomers(users) {
+    if (!this.isEnabled()) return;
+    for (const user of users) {
+      if (!user) continue;
+      if (user.role === 'user') {
+        this.customerEvents.upsert(String(user._id), customerRecord(user));
+      } else {
+        this.customerEvents.remove(String(user._id));
+      }
+    }
+  }
+
+  removeCustomer(userId) {
+    if (!this.isEnabled() || !userId) return;
+    this.customerEvents.remove(String(userId));
+  }
+
+  /**
+   * Rebuild the store from full exports unless it already has been
+   * (force: rebuild anyway). Safe to call more than once; runs one backfill at a time.
+   */
+  ensureBackfilled({ force = false } = {}) {
+    if (!this.isEnabled()) return Promise.resolve(false);
+    if (!this.backfill) {
+      this.backfill = this._backfill(force)
+        .catch((err) => {
+          console.error('Customer feature store backfill failed (using live order queries):', err.message);
+          return false;
+        })
+        .finally(() => { this.backfill = null; });
+    }
+    return this.backfill;
+  }
+
+  async _backfill(force) {
+    const status = await this._send('store_status', {});
+    if (!force && status.ready && status.customers_ready) {
+      this.ready = true;
+      this.customersReady = true;
+      return true;
+    }
+
+    // Models are looked up by name: they import this service for their hooks
+    const Order = mongoose.model('Order');
+    const User = mongoose.model('User');
+    const exportedAt = new Date();
+    console.log('Backfilling the customer feature store from MongoDB...');
+    const counts = await withExportDir('customer-features-', async (dir) => {
+      const ordersFile = path.join(dir, 'orders.ndjson');
+      const customersFile = path.join(dir, 'customers.ndjson');
+      const [orders, customers] = await Promise.all([
+        exportNdjson(Order.find().select(ORDER_FIELDS).lean().cursor(), ordersFile, orderEvent),
+        exportNdjson(User.find({ role: 'user' }).select(CUSTOMER_FIELDS).lean().cursor(), customersFile, customerRecord)
+      ]);
+      const result = await this._send('rebuild_store', {
+        orders_file: ordersFile,
+        customers_file: customersFile
+      }, REBUILD_TIMEOUT);
+      if (!result.success) throw new Error(result.error || 'Rebuild failed');
+      return { orders, customers };
+    });
+
+    // Changes made while the export was being rebuilt (deletes in that window need another rebuild)
+    for await (const order of Order.find({ updatedAt: { $gte: exportedAt } }).select(ORDER_FIELDS).lean().cursor()) {
+      this.orderEvents.upsert(String(order._id), orderEvent(order));
+    }
+    for await (const user of User.find({ role: 'user', updatedAt: { $gte: exportedAt } }).select(CUSTOMER_FIELDS).lean().cursor()) {
+      this.customerEvents.upsert(String(user._id), customerRecord(user));
+    }
+    await Promise.all([this.orderEvents.flush(), this.customerEvents.flush()]);
+
+    this.ready = true;
+    this.customersReady = true;
+    console.log(`Customer feature store ready (${counts.orders} orders, ${counts.customers} customers)`);
+    return true;
+  }
+}
+
+export default new CustomerFeatureStoreSync();
@@ -1,52 +1,38 @@
-import { spawn } from 'child_process';
-import path from 'path';
-import { fileURLToPath } from 'url';
-
-const __filename = fileURLToPath(import.meta.url);
-const __dirname = path.dirname(__filename);
+import mlWorkerClient from './mlWorkerClient.js';
+import customerFeatureStoreSync from './customerFeatureStoreSync.js';
 
 class CustomerSegmentationService {
   static async segmentCustomers(customersData) {
-    return new Promise((resolve, reject) => {
-      const pythonProcess = spawn('python', [
-        path.join(__dirname, '../../python/customer_segmentation.py')
-      ]);
-
-      let output = '';
-      let errorOutput = '';
-
-      pythonProcess.stdout.on('data', (data) => {
-        output += data.toString();
-      });
-
-      pythonProcess.stderr.on('data', (data) => {
-        errorOutput += data.toString();
-      });
+    // Runs on the warm ML worker daemon (falls back to a one-off Python process)
+    const result = await mlWorkerClient.call('customer_segmentation', customersData);
+    if (!result.success) {
+      throw new Error(result.error || 'Unknown error');
+    }
+    return result;
+  }
 
-      pythonProcess.on('close', (code) => {
-        if (code !== 0) {
-          return reject(new Error(`Python process failed: ${errorOutput}`));
-        }
+  static async segmentSingleCustomer(customerData) {
+    return this.segmentCustomers(customerData);
+  }
 
-        try {
-          const result = JSON.parse(output);
-          if (result.success) {
-            resolve(result);
-          } else {
-            reject(new Error(result.error || 'Unknown error'));
-          }
-        } catch (err) {
-          reject(new Error(`Failed to parse Python output: ${err.message}`));
-        }
-      });
+  // Incremental segmentation over the persisted customer feature store: kept in sync by
+  // the User / Order model hooks when CUSTOMER_FEATURE_STORE_SYNC=true, used once the
+  // startup backfill (orders and customer accounts) has finished
+  static isIncremental() {
+    return customerFeatureStoreSync.isCustomersReady();
+  }
 
-      pythonProcess.stdin.write(JSON.stringify(customersData));
-      pythonProcess.stdin.end();
-    });
+  static async getStoredSummary() {
+    return this.segmentCustomers({ action: 'summary' });
   }
 
-  static async segmentSingleCustomer(customerData) {
-    return this.segmentCustomers(customerData);
+  // liveCustomers: users (with orders) the store does not know yet, segmented live into the same result
+  static async getStoredSegments(customerIds, liveCustomers = undefined) {
+    return this.segmentCustomers({
+      action: 'segments',
+      customer_ids: customerIds.map(String),
+      live_customers: liveCustomers
+    });
   }
 }
 
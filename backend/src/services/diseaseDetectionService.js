@@ -10,10 +10,43 @@ import DiseaseDetection from '../models/DiseaseDetection.js';
 
 class DiseaseDetectionService {
   constructor() {
-    this.apiUrl = process.env.DISEASE_API_URL || 'http://localhost:5001';
+    // Standalone disease_detection_api.py listens on 5001; behind ml_gateway.py it is mounted at /disease
+    this.apiUrl = process.env.DISEASE_API_URL ||
+      (process.env.ML_GATEWAY_URL ? `${process.env.ML_GATEWAY_URL}/disease` : 'http://localhost:5001');
     this.timeout = 30000; // 30 seconds for image processing
   }
 
+  /**
+   * Header naming the end user for the ML API's per-client admission control
+   * (without it every call is keyed on this server's address and shares one bucket)
+   * @param {string|null} clientId - Signed-in user or end-user address key
+   */
+  clientHeaders(clientId) {
+    return clientId ? { 'X-User-Id': String(clientId) } : {};
+  }
+
+  /**
+   * Structured response for load-shedding rejections (429 rate limited / 503 overloaded)
+   * @param {Error} error - Axios error
+   * @returns {Object|null} Error payload with statusCode and retryAfter, or null for other errors
+   */
+  overloadResponse(error) {
+    const status = error.response?.status;
+    if (status !== 429 && status !== 503) return null;
+
+    const retryAfter = parseInt(error.response.headers?.['retry-after'], 10) || 1;
+    return {
+      success: false,
+      error: status === 429 ? 'Rate limit exceeded' : 'Service overloaded',
+      message: status === 429
+        ? `Too many disease detection requests. Please retry in ${retryAfter} seconds.`
+        : `Disease detection service is busy. Please retry in ${retryAfter} seconds.`,
+      ...(error.response.data || {}),
+      statusCode: status,
+      retryAfter
+    };
+  }
+
   /**
    * Check if Disease Detection API is healthy and ready
    */
@@ -71,12 +104,17 @@ class DiseaseDetectionService {
         formData,
         {
           timeout: this.timeout,
-          headers: formData.getHeaders()
+          headers: { ...formData.getHeaders(), ...this.clientHeaders(metadata.client_id || metadata.user_id) }
         }
       );
 
       return response.data;
     } catch (error) {
+      const overload = this.overloadResponse(error);
+      if (overload) {
+        console.warn(`Disease prediction shed by ML API (${overload.statusCode}), retry after ${overload.retryAfter}s`);
+        return overload;
+      }
       console.error('Disease prediction failed:', error.message);
       if (error.response && error.response.data) {
         return error.response.data; // Return the structured error from Python API
@@ -89,8 +127,9 @@ class DiseaseDetectionService {
    * Predict disease from image URL
    * @param {string} imageUrl - URL of the image
    * @param {string} pepperType - Type of pepper (bell_pepper or black_pepper)
+   * @param {string} clientId - Caller key for the ML API's per-client admission control
    */
-  async predictFromUrl(imageUrl, pepperType = 'black_pepper') {
+  async predictFromUrl(imageUrl, pepperType = 'black_pepper', clientId = null) {
     try {
       const response = await axios.post(
         `${this.apiUrl}/predict-url`,
@@ -101,13 +140,19 @@ class DiseaseDetectionService {
         {
           timeout: this.timeout,
           headers: {
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            ...this.clientHeaders(clientId)
           }
         }
       );
 
       return response.data;
     } catch (error) {
+      const overload = this.overloadResponse(error);
+      if (overload) {
+        console.warn(`URL prediction shed by ML API (${overload.statusCode}), retry after ${overload.retryAfter}s`);
+        return overload;
+      }
       console.error('URL prediction failed:', error.message);
       if (error.response && error.response.data) {
         return error.response.data;
@@ -119,8 +164,9 @@ class DiseaseDetectionService {
   /**
    * Batch predict diseases from multiple images
    * @param {Array<string>} imagePaths - Array of image file paths
+   * @param {string} clientId - Caller key for the ML API's per-client admission control
    */
-  async batchPredict(imagePaths) {
+  async batchPredict(imagePaths, clientId = null) {
     try {
       const formData = new FormData();
       
@@ -133,12 +179,17 @@ class DiseaseDetectionService {
         formData,
         {
           timeout: this.timeout * 2, // Double timeout for batch
-          headers: formData.getHeaders()
+          headers: { ...formData.getHeaders(), ...this.clientHeaders(clientId) }
         }
       );
 
       return response.data;
     } catch (error) {
+      const overload = this.overloadResponse(error);
+      if (overload) {
+        console.warn(`Batch prediction shed by ML API (${overload.statusCode}), retry after ${overload.retryAfter}s`);
+        return overload;
+      }
       console.error('Batch prediction failed:', error.message);
       if (error.response && error.response.data) {
         return error.response.data;
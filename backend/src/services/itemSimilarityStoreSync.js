@@ -0,0 +1,182 @@
+import path from 'path';
+import mongoose from 'mongoose';
+import mlWorkerClient from './mlWorkerClient.js';
+import StoreEventBatcher from './storeEventBatcher.js';
+import { exportNdjson, withExportDir } from './ndjsonExport.js';
+
+const EVENT_TIMEOUT = 5000;
+const REBUILD_TIMEOUT = 600000; // full backfill / mining run
+
+const ORDER_FIELDS = 'user status items.product';
+const BROWSING_FIELDS = 'user product viewCount';
+
+const orderEvent = (order) => ({
+  _id: String(order._id),
+  user: String(order.user?._id || order.user),
+  status: order.status,
+  items: (order.items || []).map(item => ({ product: String(item.product?._id || item.product) }))
+});
+
+const browsingEvent = (browse) => ({
+  user: String(browse.user?._id || browse.user),
+  product: String(browse.product?._id || browse.product),
+  viewCount: browse.viewCount
+});
+
+/**
+ * Item Similarity Store Sync
+ * Keeps python/item_similarity_store.py (item-based recommendations) in step
+ * with MongoDB when ITEM_SIMILARITY_STORE_SYNC=true:
+ * - the Order hooks queue every save, findOneAndUpdate and findOneAndDelete,
+ *   the BrowsingHistory hooks every view count change; queued events go out
+ *   in batches (storeEventBatcher.js)
+ * - at startup the store is rebuilt from full order and browsing exports if
+ *   it has never been (until then the item mode answers with live KNN); the
+ *   exports are streamed to NDJSON files the worker reads from disk
+ *
+ * Also re-mines the frequently-bought-together rules (not incremental) from
+ * an NDJSON export of the DELIVERED orders at startup when none have been
+ * mined, then every BOUGHT_TOGETHER_MINE_INTERVAL_HOURS (default 24, 0 disables).
+ */
+class ItemSimilarityStoreSync {
+  constructor() {
+    this.ready = false;
+    this.backfill = null;
+    this.mining = null;
+    this.mineTimer = null;
+    const onError = err => console.error('Item similarity store sync failed:', err.message);
+    this.orderEvents = new StoreEventBatcher({
+      upsert: orders => this._send('record_orders', { orders }),
+      remove: orderIds => this._send('remove_order', { orderIds }),
+      onError
+    });
+    this.browsingEvents = new StoreEventBatcher({
+      upsert: browsingHistory => this._send('record_browsing', { browsingHistory }),
+      onError
+    });
+  }
+
+  isEnabled() {
+    return process.env.ITEM_SIMILARITY_STORE_SYNC === 'true';
+  }
+
+  isReady() {
+    return this.isEnabled() && this.ready;
+  }
+
+  _send(action, params, timeout = EVENT_TIMEOUT) {
+    return mlWorkerClient.call('recommendation_engine', { action, ...params }, { timeout });
+  }
+
+  recordOrder(order) {
+    if (!this.isEnabled() || !order) return;
+    this.orderEvents.upsert(String(order._id), orderEvent(order));
+  }
+
+  removeOrder(orderId) {
+    if (!this.isEnabled() || !orderId) return;
+    this.orderEvents.remove(String(orderId));
+  }
+
+  recordBrowsing(browse) {
+    if (!this.isEnabled() || !browse) return;
+    const event = browsingEvent(browse);
+    this.browsingEvents.upsert(`${event.user}:${event.product}`, event);
+  }
+
+  /**
+   * Rebuild the store from full exports unless it already has been
+   * (force: rebuild anyway). Safe to call more than once; runs one backfill at a time.
+   */
+  ensureBackfilled({ force = false } = {}) {
+    if (!this.isEnabled()) return Promise.resolve(false);
+    if (!this.backfill) {
+      this.backfill = this._backfill(force)
+        .catch((err) => {
+          console.error('Item similarity store backfill failed (item mode uses live KNN):', err.message);
+          return false;
+        })
+        .finally(() => { this.backfill = null; });
+    }
+    return this.backfill;
+  }
+
+  async _backfill(force) {
+    const status = await this._send('store_status', {});
+    if (!force && status.ready) {
+      this.ready = true;
+      return true;
+    }
+
+    // Models are looked up by name: they import this service for their hooks
+    const Order = mongoose.model('Order');
+    const BrowsingHistory = mongoose.model('BrowsingHistory');
+    const exportedAt = new Date();
+    console.log('Backfilling the item similarity store from MongoDB...');
+    const counts = await withExportDir('item-similarity-', async (dir) => {
+      const ordersFile = path.join(dir, 'orders.ndjson');
+      const browsingHistoryFile = path.join(dir, 'browsing.ndjson');
+      const [orders, browsing] = await Promise.all([
+        exportNdjson(Order.find().select(ORDER_FIELDS).lean().cursor(), ordersFile, orderEvent),
+        exportNdjson(BrowsingHistory.find().select(BROWSING_FIELDS).lean().cursor(), browsingHistoryFile, browsingEvent)
+      ]);
+      const result = await this._send('rebuild', { ordersFile, browsingHistoryFile }, REBUILD_TIMEOUT);
+      if (!result.success) throw new Error(result.error || 'Rebuild failed');
+      return { orders, browsing };
+    });
+
+    // Changes made while the export was being rebuilt (deletes in that window need another rebuild)
+    for await (const order of Order.find({ updatedAt: { $gte: exportedAt } }).select(ORDER_FIELDS).lean().cursor()) {
+      this.recordOrder(order);
+    }
+    for await (const browse of BrowsingHistory.find({ updatedAt: { $gte: exportedAt } }).select(BROWSING_FIELDS).lean().cursor()) {
+      this.recordBrowsing(browse);
+    }
+    await Promise.all([this.orderEvents.flush(), this.browsingEvents.flush()]);
+
+    this.ready = true;
+    console.log(`Item similarity store ready (${counts.orders} orders, ${counts.browsing} browsing records)`);
+    return true;
+  }
+
+  /**
+   * Mine the bought-together rules from all DELIVERED orders; concurrent calls share the run
+   */
+  mineBoughtTogether() {
+    if (!this.mining) {
+      this.mining = this._mine().finally(() => { this.mining = null; });
+    }
+    return this.mining;
+  }
+
+  _mine() {
+    const Order = mongoose.model('Order');
+    return withExportDir('bought-together-', async (dir) => {
+      const ordersFile = path.join(dir, 'orders.ndjson');
+      await exportNdjson(Order.find({ status: 'DELIVERED' }).select(ORDER_FIELDS).lean().cursor(), ordersFile, orderEvent);
+      const result = await this._send('mine_bought_together', { ordersFile }, REBUILD_TIMEOUT);
+      if (!result.success) throw new Error(result.error || 'Mining failed');
+      console.log(`Bought-together rules mined (${result.rules} rules from ${result.transactions} orders)`);
+      return result;
+    });
+  }
+
+  /**
+   * Mine now if no rules exist yet, then every BOUGHT_TOGETHER_MINE_INTERVAL_HOURS
+   * (only with ITEM_SIMILARITY_STORE_SYNC=true)
+   */
+  startBoughtTogetherMining() {
+    const hours = parseFloat(process.env.BOUGHT_TOGETHER_MINE_INTERVAL_HOURS || '24');
+    if (!this.isEnabled() || !(hours > 0) || this.mineTimer) return;
+
+    const runMining = () => this.mineBoughtTogether()
+      .catch(err => console.error('Bought-together mining failed:', err.message));
+    this._send('bought_together_stats', {})
+      .then(stats => { if (!stats.mined_at) return runMining(); })
+      .catch(err => console.error('Bought-together mining failed:', err.message));
+    this.mineTimer = setInterval(runMining, hours * 60 * 60 * 1000);
+    this.mineTimer.unref();
+  }
+}
+
+export default new ItemSimilarityStoreSync();
@@ -0,0 +1,173 @@
+/**
+ * ML Worker Client
+ * Calls the persistent Python ML worker daemon (python/ml_worker_daemon.py) over
+ * its Unix socket using length-prefixed JSON-RPC. When the daemon is not running,
+ * falls back to spawning python/ml_worker_client.py, which runs the request in-process.
+ */
+
+import net from 'net';
+import os from 'os';
+import path from 'path';
+import { spawn } from 'child_process';
+import { fileURLToPath } from 'url';
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+const SOCKET_PATH = process.env.ML_WORKER_SOCKET || path.join(os.tmpdir(), 'pepper_ml_worker.sock');
+const SHIM_PATH = path.join(__dirname, '../../python/ml_worker_client.py');
+const DEFAULT_TIMEOUT = 30000; // 30 seconds
+const RECONNECT_DELAY = 5000; // don't retry a missing daemon on every call
+
+class MLWorkerClient {
+  constructor() {
+    this.socket = null;
+    this.connecting = null;
+    this.pending = new Map();
+    this.nextId = 1;
+    this.buffer = Buffer.alloc(0);
+    this.unavailableUntil = 0;
+  }
+
+  /**
+   * Open (or reuse) the multiplexed daemon connection
+   */
+  connect() {
+    if (this.socket) return Promise.resolve(this.socket);
+    if (this.connecting) return this.connecting;
+    if (Date.now() < this.unavailableUntil) {
+      return Promise.reject(new Error('ML worker daemon unavailable'));
+    }
+
+    this.connecting = new Promise((resolve, reject) => {
+      const socket = net.createConnection(SOCKET_PATH);
+
+      socket.once('connect', () => {
+        this.socket = socket;
+        this.connecting = null;
+        resolve(socket);
+      });
+
+      socket.once('error', (error) => {
+        if (this.socket !== socket) {
+          this.connecting = null;
+          this.unavailableUntil = Date.now() + RECONNECT_DELAY;
+          reject(error);
+        }
+      });
+
+      socket.on('data', (chunk) => this._onData(chunk));
+      socket.on('close', () => this._onClose(socket));
+    });
+
+    return this.connecting;
+  }
+
+  _onData(chunk) {
+    this.buffer = Buffer.concat([this.buffer, chunk]);
+
+    while (this.buffer.length >= 4) {
+      const length = this.buffer.readUInt32BE(0);
+      if (this.buffer.length < 4 + length) break;
+
+      const message = JSON.parse(this.buffer.subarray(4, 4 + length).toString('utf8'));
+      this.buffer = this.buffer.subarray(4 + length);
+
+      const request = this.pending.get(message.id);
+      if (!request) continue;
+      this.pending.delete(message.id);
+      clearTimeout(request.timer);
+
+      if (message.error) {
+        request.reject(new Error(`ML worker ${message.error.type}: ${message.error.message}`));
+      } else {
+        request.resolve(message.result);
+      }
+    }
+  }
+
+  _onClose(socket) {
+    if (this.socket !== socket) return;
+    this.socket = null;
+    this.buffer = Buffer.alloc(0);
+    for (const [id, request] of this.pending) {
+      clearTimeout(request.timer);
+      request.reject(new Error('ML worker connection closed'));
+      this.pending.delete(id);
+    }
+  }
+
+  /**
+   * Run a Python ML module's handle_request(params)
+   * @param {string} method - Module name (e.g. 'customer_segmentation')
+   * @param {Object} params - Same JSON the script reads from stdin
+   * @param {Object} options - { timeout } in milliseconds
+   * @returns {Promise<Object>} The module's JSON output
+   */
+  async call(method, params, { timeout = DEFAULT_TIMEOUT } = {}) {
+    let socket;
+    try {
+      socket = await this.connect();
+    } catch (error) {
+      return this._spawnShim(method, params, timeout);
+    }
+
+    return new Promise((resolve, reject) => {
+      const id = this.nextId++;
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error(`ML worker request ${method} timed out after ${timeout}ms`));
+      }, timeout);
+
+      this.pending.set(id, { resolve, reject, timer });
+
+      const body = Buffer.from(JSON.stringify({ id, method, params, timeout: timeout / 1000 }), 'utf8');
+      const header = Buffer.alloc(4);
+      header.writeUInt32BE(body.length, 0);
+      socket.write(Buffer.concat([header, body]));
+    });
+  }
+
+  /**
+   * Fallback when the daemon is not running: one Python process for this call
+   */
+  _spawnShim(method, params, timeout) {
+    return new Promise((resolve, reject) => {
+      const pythonProcess = spawn(process.env.PYTHON_PATH || 'python', [SHIM_PATH, method, '--json'], {
+        stdio: ['pipe', 'pipe', 'pipe'],
+        timeout
+      });
+
+      let output = '';
+      let errorOutput = '';
+
+      pythonProcess.stdout.on('data', (data) => {
+        output += data.toString();
+      });
+
+      pythonProcess.stderr.on('data', (data) => {
+        errorOutput += data.toString();
+      });
+
+      pythonProcess.on('close', (code) => {
+        let result;
+        try {
+          result = JSON.parse(output);
+        } catch (e) {
+          return reject(new Error(`Failed to parse Python output (code ${code}): ${errorOutput || output}`));
+        }
+        if (code !== 0) {
+          return reject(new Error(result.error || `Python process failed with code ${code}: ${errorOutput}`));
+        }
+        resolve(result);
+      });
+
+      pythonProcess.stdin.write(JSON.stringify(params));
+      pythonProcess.stdin.end();
+    });
+  }
+}
+
+// Export singleton instance (one multiplexed connection per Node process)
+const mlWorkerClient = new MLWorkerClient();
+export default mlWorkerClient;
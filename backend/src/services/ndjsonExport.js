@@ -0,0 +1,44 @@
+/**
+ * NDJSON exports for the Python stores
+ * Full collections are streamed from a query cursor into a temporary file and
+ * the worker is sent the file path, so a backfill never has to fit in one
+ * JSON-RPC frame (mlWorkerClient MAX_FRAME_BYTES). The daemon and the shim
+ * both run on this host, so they can read the file directly.
+ */
+
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import { once } from 'events';
+
+/**
+ * Stream a query cursor to an NDJSON file, one map(doc) per line; returns the line count
+ */
+export async function exportNdjson(cursor, filePath, map = doc => doc) {
+  const out = fs.createWriteStream(filePath, { encoding: 'utf-8' });
+  let count = 0;
+  try {
+    for await (const doc of cursor) {
+      if (!out.write(JSON.stringify(map(doc)) + '\n')) {
+        await once(out, 'drain');
+      }
+      count += 1;
+    }
+  } finally {
+    out.end();
+    await once(out, 'finish');
+  }
+  return count;
+}
+
+/**
+ * Run fn(dir) with a fresh temporary directory, removed afterwards
+ */
+export async function withExportDir(prefix, fn) {
+  const dir = await fs.promises.mkdtemp(path.join(os.tmpdir(), prefix));
+  try {
+    return await fn(dir);
+  } finally {
+    await fs.promises.rm(dir, { recursive: true, force: true });
+  }
+}
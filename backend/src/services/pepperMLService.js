@@ -7,7 +7,9 @@ import axios from 'axios';
 
 class PepperMLService {
   constructor() {
-    this.mlApiUrl = process.env.ML_API_URL || 'http://localhost:5001';
+    // Standalone pepper_ml_api.py listens on 5002; behind ml_gateway.py it is mounted at /pepper
+    this.mlApiUrl = process.env.ML_API_URL ||
+      (process.env.ML_GATEWAY_URL ? `${process.env.ML_GATEWAY_URL}/pepper` : 'http://localhost:5002');
     this.timeout = 10000; // 10 seconds
   }
 
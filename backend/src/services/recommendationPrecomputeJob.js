@@ -0,0 +1,109 @@
+/**
+ * Recommendation Precompute Job
+ * Exports orders and browsing history from MongoDB as NDJSON and runs
+ * python/precompute_recommendations.py on them, which writes the store that
+ * recommendationService.getPrecomputedRecommendations serves.
+ *
+ * Scheduled every RECOMMENDATIONS_PRECOMPUTE_INTERVAL_HOURS (unset or 0: never;
+ * run the script by hand or from cron instead). Keep the interval below
+ * RECOMMENDATIONS_MAX_AGE_HOURS so the store never goes stale between runs.
+ */
+
+import path from 'path';
+import { spawn } from 'child_process';
+import { fileURLToPath } from 'url';
+import BrowsingHistory from '../models/BrowsingHistory.js';
+import Order from '../models/Order.js';
+import { exportNdjson, withExportDir } from './ndjsonExport.js';
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+const SCRIPT_PATH = path.join(__dirname, '../../python/precompute_recommendations.py');
+const JOB_TIMEOUT = 60 * 60 * 1000; // 1 hour
+
+class RecommendationPrecomputeJob {
+  constructor() {
+    this.running = null;
+    this.timer = null;
+  }
+
+  /**
+   * Export and precompute once; concurrent calls share the running job
+   */
+  run() {
+    if (!this.running) {
+      this.running = this._run().finally(() => { this.running = null; });
+    }
+    return this.running;
+  }
+
+  _run() {
+    return withExportDir('recommendations-', async (dir) => {
+      const ordersPath = path.join(dir, 'orders.ndjson');
+      const browsingPath = path.join(dir, 'browsing.ndjson');
+      const orders = await exportNdjson(
+        Order.find().select('user status items.product createdAt').lean().cursor(),
+        ordersPath
+      );
+      const browsing = await exportNdjson(
+        BrowsingHistory.find().select('user product viewCount lastViewedAt').lean().cursor(),
+        browsingPath
+      );
+      console.log(`Precomputing recommendations (${orders} orders, ${browsing} browsing records)...`);
+
+      const args = [SCRIPT_PATH, ordersPath, '--browsing', browsingPath];
+      if (process.env.RECOMMENDATIONS_PRECOMPUTE_K) {
+        args.push('--k', process.env.RECOMMENDATIONS_PRECOMPUTE_K);
+      }
+      const result = await this._spawn(args);
+      if (!result.success) throw new Error(result.error || 'Precompute failed');
+      console.log(`Recommendations precomputed for ${result.users} users in ${result.seconds}s`);
+      return result;
+    });
+  }
+
+  _spawn(args) {
+    return new Promise((resolve, reject) => {
+      const pythonProcess = spawn(process.env.PYTHON_PATH || 'python', args, {
+        cwd: path.dirname(SCRIPT_PATH)
+      });
+      let stdout = '';
+      let stderr = '';
+      const timer = setTimeout(() => {
+        pythonProcess.kill();
+        reject(new Error('Recommendation precompute timed out'));
+      }, JOB_TIMEOUT);
+
+      pythonProcess.stdout.on('data', (data) => { stdout += data.toString(); });
+      pythonProcess.stderr.on('data', (data) => { stderr += data.toString(); });
+      pythonProcess.on('error', (err) => {
+        clearTimeout(timer);
+        reject(err);
+      });
+      pythonProcess.on('close', (code) => {
+        clearTimeout(timer);
+        try {
+          resolve(JSON.parse(stdout.trim().split('\n').pop()));
+        } catch (error) {
+          reject(new Error(`Precompute exited with code ${code}: ${stderr.trim().split('\n').pop() || 'no output'}`));
+        }
+      });
+    });
+  }
+
+  /**
+   * Run now and then every RECOMMENDATIONS_PRECOMPUTE_INTERVAL_HOURS (no-op when unset)
+   */
+  start() {
+    const hours = parseFloat(process.env.RECOMMENDATIONS_PRECOMPUTE_INTERVAL_HOURS || '0');
+    if (!(hours > 0) || this.timer) return;
+
+    const runScheduled = () => this.run().catch(err => console.error('Recommendation precompute failed:', err.message));
+    runScheduled();
+    this.timer = setInterval(runScheduled, hours * 60 * 60 * 1000);
+    this.timer.unref();
+  }
+}
+
+export default new RecommendationPrecomputeJob();
@@ -1,12 +1,87 @@
+import fs from 'fs/promises';
+import path from 'path';
+import { fileURLToPath } from 'url';
 import BrowsingHistory from '../models/BrowsingHistory.js';
 import Order from '../models/Order.js';
 import Product from '../models/Product.js';
 
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+// Written by python/precompute_recommendations.py (recommendationPrecomputeJob.js)
+const STORE_PATH = process.env.RECOMMENDATIONS_STORE_PATH
+  || path.join(__dirname, '../../python/models/recommendations.json');
+const STORE_MAX_AGE_MS = parseFloat(process.env.RECOMMENDATIONS_MAX_AGE_HOURS || '24') * 60 * 60 * 1000;
+
 /**
  * KNN Recommendation Engine Service
  * Recommends pepper plant varieties based on user similarity
  */
 class RecommendationService {
+  constructor() {
+    this.store = null;
+    this.storeMtime = 0;
+  }
+
+  /**
+   * Load the precomputed recommendation store (re-read only when the file changes)
+   * Returns null when there is no store or it is older than RECOMMENDATIONS_MAX_AGE_HOURS
+   */
+  async loadPrecomputedStore() {
+    try {
+      const { mtimeMs } = await fs.stat(STORE_PATH);
+      if (mtimeMs !== this.storeMtime) {
+        this.store = JSON.parse(await fs.readFile(STORE_PATH, 'utf-8'));
+        this.storeMtime = mtimeMs;
+      }
+    } catch (error) {
+      if (error.code !== 'ENOENT') {
+        console.error('Error loading precomputed recommendations:', error);
+      }
+      this.store = null;
+      this.storeMtime = 0;
+      return null;
+    }
+
+    const age = Date.now() - Date.parse(this.store.generatedAt);
+    return age <= STORE_MAX_AGE_MS ? this.store : null;
+  }
+
+  /**
+   * Serve recommendations from the precomputed store
+   * Returns null when the store is missing, stale, was built with a different k, or
+   * none of the user's ranked products is still available, so the caller can fall
+   * back to getRecommendedProducts
+   */
+  async getPrecomputedRecommendations(userId, k = 5, limit = 5) {
+    const store = await this.loadPrecomputedStore();
+    if (!store || store.k !== k) {
+      return null;
+    }
+
+    // Users without interactions at generation time get the popular list
+    const rankedIds = store.recommendations[userId.toString()] || store.popular;
+    const products = await Product.find(
+      {
+        _id: { $in: rankedIds },
+        isActive: true,
+        available_stock: { $gt: 0 }
+      },
+      null,
+      { lean: true }
+    );
+
+    // Maintain the score order
+    const byId = new Map(products.map(p => [p._id.toString(), p]));
+    const available = rankedIds.map(id => byId.get(id)).filter(Boolean).slice(0, limit);
+
+    // Everything ranked has since gone inactive or out of stock: let the live path rank
+    if (available.length === 0) {
+      return null;
+    }
+    return { generatedAt: store.generatedAt, products: available };
+  }
+
   /**
    * Calculate Euclidean distance between two user vectors
    */
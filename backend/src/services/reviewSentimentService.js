@@ -1,60 +1,15 @@
-import { spawn } from 'child_process';
-import path from 'path';
-import { fileURLToPath } from 'url';
-
-const __filename = fileURLToPath(import.meta.url);
-const __dirname = path.dirname(__filename);
+import mlWorkerClient from './mlWorkerClient.js';
 
 class ReviewSentimentService {
   /**
-   * Execute Python sentiment classifier script
+   * Execute Python sentiment classifier
    * @param {Array} reviews - Array of reviews to analyze
    * @param {string} method - Method to call ('analyze' or 'summary')
-   * @returns {Promise} Result from Python script
+   * @returns {Promise} Result from Python classifier
    */
   static executePythonScript(reviews, method = 'analyze') {
-    return new Promise((resolve, reject) => {
-      const pythonScriptPath = path.join(
-        __dirname,
-        '../../python/review_sentiment_classifier.py'
-      );
-
-      const pythonProcess = spawn('python', [pythonScriptPath], {
-        stdio: ['pipe', 'pipe', 'pipe']
-      });
-
-      let output = '';
-      let errorOutput = '';
-
-      pythonProcess.stdout.on('data', (data) => {
-        output += data.toString();
-      });
-
-      pythonProcess.stderr.on('data', (data) => {
-        errorOutput += data.toString();
-      });
-
-      pythonProcess.on('close', (code) => {
-        if (code !== 0) {
-          console.error('Python stderr:', errorOutput);
-          reject(new Error(`Python script failed with code ${code}: ${errorOutput}`));
-        } else {
-          try {
-            const result = JSON.parse(output);
-            resolve(result);
-          } catch (e) {
-            reject(new Error(`Failed to parse Python output: ${output}`));
-          }
-        }
-      });
-
-      // Send data to Python process
-      pythonProcess.stdin.write(JSON.stringify({
-        reviews,
-        method
-      }));
-      pythonProcess.stdin.end();
-    });
+    // Runs on the warm ML worker daemon (falls back to a one-off Python process)
+    return mlWorkerClient.call('review_sentiment_classifier', { reviews, method });
   }
 
   /**
@@ -7,7 +7,9 @@ import SeasonalSuitabilityAnalytics from '../models/SeasonalSuitabilityAnalytics
 class SeasonalSuitabilityService {
   constructor() {
     // Python ML API configuration
-    this.mlApiUrl = process.env.ML_API_URL || 'http://127.0.0.1:5001';
+    // Standalone seasonal_suitability_api.py listens on 5003; behind ml_gateway.py it is mounted at /seasonal
+    this.mlApiUrl = process.env.SEASONAL_API_URL ||
+      (process.env.ML_GATEWAY_URL ? `${process.env.ML_GATEWAY_URL}/seasonal` : 'http://127.0.0.1:5003');
     this.mlApiTimeout = 5000; // 5 seconds timeout
     this.useCache = true;
     this.cache = new Map();
@@ -0,0 +1,77 @@
+const FLUSH_MS = parseInt(process.env.ML_STORE_EVENT_FLUSH_MS || '200', 10);
+const MAX_BATCH = 500;
+
+/**
+ * Store Event Batcher
+ * Collects the model hook events for one Python store and sends them in
+ * batches: one worker call per ML_STORE_EVENT_FLUSH_MS window (default 200)
+ * or per MAX_BATCH events instead of one per write. A burst of writes then
+ * costs one request, and at most one shim process while the daemon is down.
+ *
+ * Events are keyed by document id: a later upsert replaces a pending one and
+ * a removal drops it. Batches are sent one after another, in order.
+ */
+class StoreEventBatcher {
+  /**
+   * upsert(records) and remove(keys) send one batch and return a promise;
+   * onError(err) is called for a batch that failed
+   */
+  constructor({ upsert, remove = null, onError }) {
+    this.sendUpserts = upsert;
+    this.sendRemovals = remove;
+    this.onError = onError;
+    this.upserts = new Map();
+    this.removals = new Set();
+    this.timer = null;
+    this.sending = Promise.resolve();
+  }
+
+  upsert(key, record) {
+    this.removals.delete(key);
+    this.upserts.set(key, record);
+    this._schedule();
+  }
+
+  remove(key) {
+    this.upserts.delete(key);
+    this.removals.add(key);
+    this._schedule();
+  }
+
+  _schedule() {
+    if (this.upserts.size + this.removals.size >= MAX_BATCH) {
+      this.flush();
+    } else if (!this.timer) {
+      this.timer = setTimeout(() => this.flush(), FLUSH_MS);
+    }
+  }
+
+  /**
+   * Send everything pending now; resolves once it (and earlier batches) went out
+   */
+  flush() {
+    clearTimeout(this.timer);
+    this.timer = null;
+    const records = [...this.upserts.values()];
+    const keys = [...this.removals];
+    this.upserts = new Map();
+    this.removals = new Set();
+    if (records.length === 0 && keys.length === 0) return this.sending;
+
+    this.sending = this.sending
+      .then(() => this._send(records, keys))
+      .catch(err => this.onError(err));
+    return this.sending;
+  }
+
+  async _send(records, keys) {
+    for (let start = 0; start < records.length; start += MAX_BATCH) {
+      await this.sendUpserts(records.slice(start, start + MAX_BATCH));
+    }
+    for (let start = 0; start < keys.length && this.sendRemovals; start += MAX_BATCH) {
+      await this.sendRemovals(keys.slice(start, start + MAX_BATCH));
+    }
+  }
+}
+
+export default StoreEventBatcher;
@@ -7,7 +7,7 @@ const path = require('path');
 
 class SeasonalSuitabilityTester {
   constructor() {
-    this.pythonApiUrl = 'http://127.0.0.1:5001';
+    this.pythonApiUrl = 'http://127.0.0.1:5003';
     this.nodeApiUrl = 'http://localhost:5000';
     this.pythonProcess = null;
   }
@@ -98,7 +98,7 @@ class SeasonalSuitabilityTester {
   async startPythonApi() {
     return new Promise((resolve, reject) => {
       const apiPath = path.join(__dirname, 'python', 'seasonal_suitability_api.py');
-      this.pythonProcess = spawn('python', [apiPath, '--host', '127.0.0.1', '--port', '5001']);
+      this.pythonProcess = spawn('python', [apiPath, '--host', '127.0.0.1', '--port', '5003']);
 
       let started = false;
       const timeout = setTimeout(() => {
@@ -22,11 +22,11 @@ python seasonal_suitability_model.py
 echo.
 
 echo [4/4] Starting Flask API server...
-echo API will be available at: http://127.0.0.1:5001
-echo Health check: http://127.0.0.1:5001/health
+echo API will be available at: http://127.0.0.1:5003
+echo Health check: http://127.0.0.1:5003/health
 echo.
 echo Press Ctrl+C to stop the server
 echo.
-python seasonal_suitability_api.py --host 127.0.0.1 --port 5001
+python seasonal_suitability_api.py --host 127.0.0.1 --port 5003
 
 pause